@@ -1,47 +1,105 @@
-
-import speech_recognition as sr
-import pygame
-import edge_tts
-import asyncio
-import os
+import math
 import time
-import nest_asyncio
-import glob
+import threading
 from config import Config
+from audio_loop import AudioLoop
+from capture import CaptureEngine
+from recognizers import create_recognizer
+from tts_cache import TTSCache
+from tts_stream import StreamingSpeaker, PygameDecoder, ChannelSink
+from playback import MemoryPlayer, PCMCache
+from metrics import get_metrics, NULL_TURN
 
 # Try importing RVC
 # RVC Removed as per user request
 
-# Check if we are running in an event loop (e.g., Jupyter or some GUIs)
-try:
-    asyncio.get_running_loop()
-    nest_asyncio.apply()
-except RuntimeError:
-    pass
-
 class ShipraAudio:
-    def __init__(self):
+    def __init__(self, start=True):
+        """With start=False, call init_output() and init_input() (possibly concurrently) before use"""
         print("[Audio] Initializing Audio System...")
-        
+        self.recognizer = None
+        self.asr = None
+        self.microphone = None
+        self.capture = None
+        self.player = None
+        self.output_ready = threading.Event()
+        self.input_ready = threading.Event()
+        self.pcm_cache = PCMCache(Config.PCM_CACHE_MAX_BYTES)
+        self._prefetch = {}  # cache key -> Future of MP3 bytes (speculative synthesis)
+        self._prefetch_lock = threading.Lock()
+
+        # Voice Settings - see Config.TTS_*
+        self.voice = Config.TTS_VOICE
+        self.rate = Config.TTS_RATE
+        self.volume = Config.TTS_VOLUME
+        self.pitch = Config.TTS_PITCH
+
+        # Synthesized audio cache, keyed by text + voice settings
+        self.tts_cache = None
+        if Config.TTS_CACHE_ENABLED:
+            try:
+                self.tts_cache = TTSCache(Config.TTS_CACHE_DIRECTORY,
+                                          max_bytes=Config.TTS_CACHE_MAX_BYTES,
+                                          max_age=Config.TTS_CACHE_MAX_AGE)
+            except Exception as e:
+                print(f"[Audio] TTS Cache Disabled: {e}")
+
+        # All synthesis runs on one long-lived event loop (no asyncio.run per turn)
+        self.loop = AudioLoop()
+
+        self.streamer = None
+        self.last_speak_report = None  # Timings of the most recent speak() call
+
+        self.metrics = get_metrics()
+        self.metrics.register("pcm_cache", self.pcm_cache.stats)
+        if self.tts_cache is not None:
+            self.metrics.register("tts_cache", self.tts_cache.stats)
+
+        # Playback state for barge-in: set by stop_speaking() from any thread
+        self.speaking = threading.Event()
+        self.interrupted = threading.Event()
+
+        if start:
+            self.init_output()
+            self.init_input()
+
+    def init_output(self):
+        """Open the playback device (pygame imports and mixer init take a few hundred ms)"""
+        # Initialize Pygame Mixer for playback
+        # (at edge-tts' native 24 kHz mono, so decoded replies are not resampled)
+        try:
+            import pygame
+            pygame.mixer.init(frequency=Config.PLAYBACK_SAMPLE_RATE, size=-16, channels=Config.PLAYBACK_CHANNELS)
+            self.player = MemoryPlayer()
+        except Exception as e:
+            print(f"[Audio] Pygame Init Error: {e}")
+        self.output_ready.set()
+
+    def init_input(self):
+        """Set up speech recognition and open the microphone"""
+        import speech_recognition as sr
         # Initialize Speech Recognition
         self.recognizer = sr.Recognizer()
         self.recognizer.energy_threshold = 300
         self.recognizer.pause_threshold = 0.8
+        self.asr = create_recognizer(recognizer=self.recognizer)
+        print(f"[Audio] Speech Recognition: {self.asr.name}")
         
         print(f"[Audio] Selected Mic Index: {Config.MIC_INDEX if Config.MIC_INDEX is not None else 'Default'}")
-        self.microphone = sr.Microphone(device_index=Config.MIC_INDEX)
-        
-        # Initialize Pygame Mixer for playback
-        try:
-            pygame.mixer.init()
-        except Exception as e:
-            print(f"[Audio] Pygame Init Error: {e}")
-
-        # Voice Settings - User Custom (20Hz, ~170wpm)
-        self.voice = "en-IN-NeerjaNeural" 
-        self.rate = "+22%"  # Approx 170 wpm
-        self.volume = "+10%"
-        self.pitch = "+18Hz"  # User specified
+        if Config.VAD_ENABLED:
+            # One stream for the whole session, cut into utterances by the local VAD
+            frame = int(Config.CAPTURE_SAMPLE_RATE * Config.VAD_FRAME_MS / 1000)
+            self.microphone = sr.Microphone(device_index=Config.MIC_INDEX,
+                                            sample_rate=Config.CAPTURE_SAMPLE_RATE, chunk_size=frame)
+            self.capture = CaptureEngine(self.microphone)
+            try:
+                self.capture.start()
+            except Exception as e:
+                # Retried on the first listen()
+                print(f"[Capture] Open Error: {e}")
+        else:
+            self.microphone = sr.Microphone(device_index=Config.MIC_INDEX)
+        self.input_ready.set()
 
     def set_voice_params(self, pitch_hz, rate_percent):
         self.pitch = f"{pitch_hz:+}Hz"
@@ -57,30 +115,137 @@ class ShipraAudio:
         clean = text.replace("*", "").replace("#", "")
         return clean
 
-    def listen(self):
+    def cache_key(self, text):
+        """Cache key for text spoken with the current voice settings"""
+        return TTSCache.make_key(text, self.voice, self.rate, self.volume, self.pitch)
+
+    def forget(self, texts):
+        """Drop the synthesized and decoded audio of texts that will not be spoken again"""
+        keys = [self.cache_key(self.normalize_text(text)) for text in texts]
+        self.pcm_cache.remove(keys)
+        if self.tts_cache is not None:
+            removed = self.tts_cache.remove(keys)
+            if removed:
+                print(f"[Audio] Dropped {removed} outdated cached repl{'y' if removed == 1 else 'ies'}")
+
+    def voice_params(self):
+        return self.voice, self.rate, self.volume, self.pitch
+
+    def start_warmup(self):
+        """Pre-synthesize the static response catalog on a background thread"""
+        if self.tts_cache is None:
+            return None
+        from warmup import start_background_warmup, static_texts
+        on_done = None
+        if Config.TTS_PRELOAD_PCM:
+            def on_done(summary):
+                self.output_ready.wait()
+                loaded = self.preload(static_texts())
+                print(f"[Audio] Preloaded {loaded} responses into memory "
+                      f"({self.pcm_cache.total_bytes / 1048576:.1f} MB)")
+        return start_background_warmup(self.tts_cache, self.voice_params(),
+                                       workers=Config.TTS_WARMUP_WORKERS, loop=self.loop, on_done=on_done)
+
+    def listen(self, turn=NULL_TURN):
         """Captures audio from the microphone and converts to text."""
+        import speech_recognition as sr
+        if self.capture is not None:
+            print("\nListening...")
+            with turn.stage("listen"):
+                audio = self.capture.next_phrase(timeout=Config.LISTEN_TIMEOUT)
+            turn.restart()
+            return self.recognize(audio, turn) if audio is not None else None
+
         with self.microphone as source:
             print("\nListening...")
             try:
-                audio = self.recognizer.listen(source, timeout=5, phrase_time_limit=10)
+                with turn.stage("listen"):
+                    audio = self.recognizer.listen(source, timeout=5, phrase_time_limit=10)
             except sr.WaitTimeoutError:
                 return None
+            turn.restart()
 
+        return self.recognize(audio, turn)
+
+    def recognize(self, audio, turn=NULL_TURN):
+        """Converts captured AudioData to text (None if nothing was understood)."""
+        # Streaming backends have already transcribed the phrase during capture
+        text = getattr(audio, "transcript", None)
+        if text is not None:
+            print(f"You said: {text}")
+            return text or None
         try:
             print("Recognizing...")
-            text = self.recognizer.recognize_google(audio)
-            print(f"You said: {text}")
+            self.metrics.count(f"asr_{self.asr.name}_requests")
+            with turn.stage("recognize"):
+                text = self.asr.recognize(audio)
+            if text:
+                print(f"You said: {text}")
             return text
-        except sr.UnknownValueError:
-            return None
-        except sr.RequestError:
-            print("[Audio] Network Error during Recognition.")
-            return None
         except Exception as e:
             print(f"[Audio] Listen Error: {e}")
             return None
 
-    def speak(self, text, on_start=None, on_end=None):
+    def capture_phrases(self, stop_event):
+        """Keeps the microphone open and yields capture events until stop_event is set.
+
+        Yields ('speech_start', None) as soon as a phrase begins (used for
+        barge-in) and ('phrase', AudioData) once it ends. With a streaming
+        recognizer, ('partial', text) events report the transcript so far.
+        """
+        if self.capture is not None:
+            yield from self._capture_vad(stop_event)
+            return
+        import speech_recognition as sr
+        base_threshold = self.recognizer.energy_threshold
+        with self.microphone as source:
+            while not stop_event.is_set():
+                # Require louder speech while Shipra talks so her own voice
+                # leaking into the mic does not count as a barge-in
+                factor = Config.BARGE_IN_ENERGY_FACTOR if self.speaking.is_set() else 1.0
+                self.recognizer.energy_threshold = base_threshold * factor
+                frames = []
+                try:
+                    for chunk in self.recognizer.listen(source, timeout=1, phrase_time_limit=10, stream=True):
+                        if not frames:
+                            yield 'speech_start', None
+                        frames.append(chunk.frame_data)
+                except sr.WaitTimeoutError:
+                    continue
+                if frames:
+                    yield 'phrase', sr.AudioData(b"".join(frames), source.SAMPLE_RATE, source.SAMPLE_WIDTH)
+        self.recognizer.energy_threshold = base_threshold
+
+    def _capture_vad(self, stop_event):
+        # Require louder speech while Shipra talks (same echo guard as below, in dB)
+        boost = 20 * math.log10(Config.BARGE_IN_ENERGY_FACTOR)
+        streaming = self.asr.streaming and Config.ASR_PARTIALS
+        stream = partial = None
+        for event, data in self.capture.events(stop_event, audio=streaming,
+                                               boost=lambda: boost if self.speaking.is_set() else 0.0):
+            if not streaming:
+                yield event, data
+            elif event == 'speech_start':
+                stream, partial = self.asr.start_stream(self.capture.source.SAMPLE_RATE), None
+                yield event, data
+            elif event == 'audio':
+                text = stream.feed(data)
+                if text and text != partial:
+                    partial = text
+                    yield 'partial', text
+            else:
+                data.transcript = stream.finish() or ""
+                yield event, data
+
+    def stop_speaking(self):
+        """Thread-safe: cut off the reply currently playing (barge-in)"""
+        self.interrupted.set()
+        if self.player is not None:
+            self.player.stop()
+        if self.streamer is not None:
+            self.streamer.cancel()
+
+    def speak(self, text, on_start=None, on_end=None, turn=NULL_TURN):
         """Generates and plays TTS audio using EdgeTTS."""
         if not text: return
         
@@ -89,31 +254,171 @@ class ShipraAudio:
         
         if on_start: on_start()
         
-        tts_file = "response_tts.mp3"
-        
-        # Generate and Play TTS
-        asyncio.run(self._generate_edge_tts(clean_text, tts_file))
-        self._play_audio(tts_file)
+        self.interrupted.clear()
+        self.speaking.set()
+        start = time.perf_counter()
+        try:
+            # Without a mixer (init failed) there is nothing to stream to: the memory
+            # path below skips playback and the reply stays text-only
+            if Config.TTS_STREAMING and self.player is not None and not self._is_cached(clean_text):
+                # Play sentence by sentence while the rest is still synthesizing
+                self.last_speak_report = self.speak_streaming(clean_text)
+            else:
+                # Generate (or fetch cached) and play the decoded reply from memory
+                pcm = self._pcm_for(clean_text)
+                report = {"mode": "memory", "ttfa_ms": None}
+                if pcm and not self.interrupted.is_set():
+                    report["ttfa_ms"] = (time.perf_counter() - start) * 1000
+                    self._play_pcm(pcm)
+                report["total_ms"] = (time.perf_counter() - start) * 1000
+                self.last_speak_report = report
+            self.last_speak_report["interrupted"] = self.interrupted.is_set()
+        finally:
+            # Barge-in detection must not think we are still talking after a failed reply
+            self.speaking.clear()
+        self._record_speak(turn, self.last_speak_report)
         
         if on_end: on_end()
 
-    async def _generate_edge_tts(self, text, filename):
+    def _record_speak(self, turn, report):
+        """Split a speak report into time to first audio and playback for the turn"""
+        if turn is NULL_TURN:
+            return
+        ttfa = report.get("ttfa_ms")
+        total = report.get("total_ms") or 0.0
+        if ttfa is not None:
+            turn.record("tts", ttfa)
+            turn.record("playback", total - ttfa)
+            turn.record("response", turn.elapsed() - (total - ttfa))
+        else:
+            turn.record("tts", total)
+        turn.set(speak_mode=report.get("mode"), interrupted=report["interrupted"])
+
+    def _is_cached(self, clean_text):
+        key = self.cache_key(clean_text)
+        with self._prefetch_lock:
+            prefetching = key in self._prefetch
+        return (key in self.pcm_cache or prefetching
+                or (self.tts_cache is not None and self.tts_cache.contains(key)))
+
+    def prefetch(self, text):
+        """Thread-safe: start synthesizing text before it is spoken (speculative replies)"""
+        clean_text = self.normalize_text(text)
+        key = self.cache_key(clean_text)
+        with self._prefetch_lock:
+            if key not in self.pcm_cache and key not in self._prefetch:
+                self._prefetch[key] = self.submit_synthesis(clean_text)
+
+    def cancel_prefetch(self, text):
+        """Drop a speculative synthesis that will not be spoken"""
+        key = self.cache_key(self.normalize_text(text))
+        with self._prefetch_lock:
+            future = self._prefetch.pop(key, None)
+        if future is not None:
+            future.cancel()
+
+    def _pcm_for(self, clean_text):
+        """Decoded PCM for clean_text: from memory, else synthesized (or cached MP3) and decoded once"""
+        key = self.cache_key(clean_text)
+        pcm = self.pcm_cache.get(key)
+        if pcm is None and self.player is not None:
+            with self._prefetch_lock:
+                future = self._prefetch.pop(key, None)
+            try:
+                data = future.result() if future is not None else None
+            except Exception:
+                data = None
+            data = data or self._synthesize(clean_text)
+            if not data:
+                return None
+            try:
+                pcm = self.player.decode(data)
+            except Exception as e:
+                print(f"[Audio] Decode Error: {e}")
+                return None
+            self.pcm_cache.put(key, pcm)
+        return pcm
+
+    def preload(self, texts):
+        """Decode the cached MP3s of texts into memory; returns how many were loaded"""
+        if self.player is None or self.tts_cache is None:
+            return 0
+        loaded = 0
+        for text in texts:
+            key = self.cache_key(self.normalize_text(text))
+            if key in self.pcm_cache or not self.tts_cache.contains(key):
+                continue
+            try:
+                with open(self.tts_cache.path_for(key), "rb") as f:
+                    self.pcm_cache.put(key, self.player.decode(f.read()))
+                loaded += 1
+            except Exception:
+                continue
+            if self.pcm_cache.total_bytes >= self.pcm_cache.max_bytes:
+                break
+        return loaded
+
+    def speak_streaming(self, clean_text):
+        """Stream edge-tts audio into memory and play it as it arrives"""
+        if self.streamer is None:
+            self.streamer = StreamingSpeaker(
+                self._edge_tts_stream, PygameDecoder(), ChannelSink(),
+                jitter_ms=Config.TTS_STREAM_JITTER_MS,
+                cache=self.tts_cache, cache_key=self.cache_key, loop=self.loop)
+        report = self.streamer.speak(clean_text)
+        report["mode"] = "stream"
+        return report
+
+    def _communicate(self, text):
+        """edge-tts request for text; must be created on the audio loop thread"""
+        import edge_tts
+        connector = self.loop.connector() if Config.TTS_SHARED_CONNECTOR else None
         # Use Indian accent with decreased pitch and increased speed for human-like voice
-        communicate = edge_tts.Communicate(
-            text, 
-            self.voice, 
-            rate=self.rate,  # +25% faster
-            volume=self.volume, 
-            pitch=self.pitch  # -15Hz for natural tone
-        )
-        await communicate.save(filename)
-
-    def _play_audio(self, filename):
+        return edge_tts.Communicate(text, self.voice, rate=self.rate, volume=self.volume,
+                                    pitch=self.pitch, connector=connector)
+
+    async def _edge_tts_stream(self, text):
+        self.metrics.count("tts_requests")
+        communicate = self._communicate(text)
+        async for chunk in communicate.stream():
+            if chunk["type"] == "audio":
+                yield chunk["data"]
+
+    def _synthesize(self, clean_text):
+        """MP3 bytes for clean_text, synthesizing on a cache miss (None on error)"""
+        try:
+            return self.submit_synthesis(clean_text).result()
+        except Exception as e:
+            print(f"[Audio] TTS Error: {e}")
+            return None
+
+    def submit_synthesis(self, clean_text):
+        """Thread-safe: schedule synthesis on the audio loop, returns a Future of the MP3 bytes"""
+        return self.loop.submit(self._synthesize_async(clean_text))
+
+    async def _synthesize_async(self, clean_text):
+        key = self.cache_key(clean_text) if self.tts_cache is not None else None
+        cached = self.tts_cache.get(key) if key else None
+        if cached:
+            with open(cached, "rb") as f:
+                return f.read()
+
+        # Synthesize into memory; the cache (if any) persists it for next time
+        data = bytearray()
+        async for chunk in self._edge_tts_stream(clean_text):
+            data.extend(chunk)
+        if key and data:
+            self.tts_cache.put(key, bytes(data))
+        return bytes(data)
+
+    def _play_pcm(self, pcm):
+        """Play pcm from memory and block until it ends or is interrupted"""
         try:
-            pygame.mixer.music.load(filename)
-            pygame.mixer.music.play()
-            while pygame.mixer.music.get_busy():
-                time.sleep(0.1)
-            pygame.mixer.music.unload()
+            playback = self.player.play(pcm)
         except Exception as e:
             print(f"[Audio] Playback Error: {e}")
+            return
+        if self.interrupted.is_set():
+            # Barge-in raced the start of playback
+            self.player.stop()
+        playback.wait()
@@ -0,0 +1,99 @@
+"""
+A single long-lived asyncio event loop for the audio subsystem, running on a
+dedicated thread. Other threads hand it coroutines through submit() and get
+concurrent.futures.Future objects back.
+"""
+import asyncio
+import threading
+
+
+class AudioLoop:
+    """Owns one event loop on a daemon thread for all synthesis jobs"""
+
+    def __init__(self, name="shipra-audio-loop"):
+        self.loop = asyncio.new_event_loop()
+        self._connector = None
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    @property
+    def running(self):
+        return self._thread.is_alive() and not self.loop.is_closed()
+
+    def submit(self, coro):
+        """Schedule coro on the loop from any thread; returns a concurrent Future"""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def run(self, coro, timeout=None):
+        """Submit coro and block the calling thread for its result"""
+        if threading.current_thread() is self._thread:
+            raise RuntimeError("AudioLoop.run() called from the loop thread; await the coroutine instead")
+        return self.submit(coro).result(timeout)
+
+    def call_soon(self, callback, *args):
+        return self.loop.call_soon_threadsafe(callback, *args)
+
+    def connector(self):
+        """Shared aiohttp connector for synthesis requests (loop thread only)"""
+        if self._connector is None and persistent_connector_class() is not None:
+            self._connector = persistent_connector_class()(ttl_dns_cache=300)
+        return self._connector
+
+    def stop(self, timeout=2.0):
+        """Close the shared connector and stop the loop thread"""
+        if not self.running:
+            return
+
+        async def shutdown():
+            if self._connector is not None:
+                await self._connector.shutdown()
+
+        try:
+            self.submit(shutdown()).result(timeout)
+        except Exception:
+            pass
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join(timeout)
+        if not self._thread.is_alive():
+            self.loop.close()
+
+
+_connector_class = False  # Not defined yet
+
+
+def persistent_connector_class():
+    """PersistentConnector, or None without aiohttp (defined on first use: aiohttp is slow to import)"""
+    global _connector_class
+    if _connector_class is not False:
+        return _connector_class
+    try:
+        import aiohttp
+    except ImportError:
+        _connector_class = None
+        return None
+
+    class PersistentConnector(aiohttp.TCPConnector):
+        """TCPConnector that survives the per-request ClientSession edge-tts opens.
+
+        edge-tts closes whatever connector it is given when its session ends;
+        ignoring that close keeps the DNS cache and idle connections warm
+        across turns. The loop shuts it down for real on stop().
+        """
+
+        _allow_close = False
+
+        def close(self, *args, **kwargs):
+            if self._allow_close:
+                return super().close(*args, **kwargs)
+            return asyncio.sleep(0)
+
+        async def shutdown(self):
+            self._allow_close = True
+            await super().close()
+
+    _connector_class = PersistentConnector
+    return _connector_class
@@ -0,0 +1,28 @@
+"""
+Shipra micro-benchmarks. Run them from the repository root: they import
+the runtime modules and use its data/ and cache/ directories. Nothing here
+is imported by the assistant itself.
+
+Usage:
+    python -m benchmarks intents [--rounds N]
+    python -m benchmarks fuzzy [--sizes N ...] [--probes N]
+    python -m benchmarks stream [--mp3 FILE] [--first-byte-ms MS] [--kbps N]
+    python -m benchmarks loop [--turns N]
+    python -m benchmarks playback [--mp3 FILE] [--seconds S] [--turns N]
+    python -m benchmarks vad [--wav FILE ...] [--fixtures DIR] [--hangover-ms MS ...]
+    python -m benchmarks speculate [--word-ms MS] [--synth-ms MS] [--min-stable N ...] [--fixtures DIR]
+    python -m benchmarks asr --fixtures DIR [--backends NAME ...] | --record DIR
+    python -m benchmarks weather [--latency-ms MS]
+    python -m benchmarks gazetteer [--rounds N]
+    python -m benchmarks knowledge [--sections N] [--files N] [--queries N]
+    python -m benchmarks vectors [--sections N] [--files N] [--queries N]
+    python -m benchmarks sessions [--sessions N] [--ops N]
+    python -m benchmarks metrics [--turns N]
+    python -m benchmarks profile [--turns N]
+    python -m benchmarks startup [--runs N]
+    python -m benchmarks catalog [--turns N] [--runs N]
+    python -m benchmarks routes [--turns N]
+    python -m benchmarks reload [--sections N] [--files N] [--edits N]
+    python -m benchmarks classify [--sizes N ...] [--check N]
+    python -m benchmarks server [--sessions N ...] [--server-workers N ...] [--clients N]
+"""
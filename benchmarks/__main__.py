@@ -0,0 +1,133 @@
+"""python -m benchmarks <name> [options]: see benchmarks/__init__.py"""
+import argparse
+import os
+import sys
+from .routing import bench_intents, bench_fuzzy, bench_gazetteer, bench_catalog, bench_routes, bench_classify
+from .speech import bench_stream, bench_playback, bench_loop, bench_vad, bench_speculate, bench_asr
+from .indexes import bench_knowledge, bench_vectors, bench_sessions, bench_reload
+from .services import bench_weather, bench_server
+from .runtime import bench_metrics, bench_profile, bench_startup
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="Shipra micro-benchmarks")
+    sub = parser.add_subparsers(dest="bench", required=True)
+
+    p = sub.add_parser("intents", help="Compiled intent matcher vs the any() cascade")
+    p.add_argument("--rounds", type=int, default=2000)
+    p.set_defaults(func=bench_intents)
+
+    p = sub.add_parser("fuzzy", help="Fuzzy keyword lookup vs a linear edit-distance scan")
+    p.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 50000])
+    p.add_argument("--probes", type=int, default=500)
+    p.set_defaults(func=bench_fuzzy)
+
+    p = sub.add_parser("stream", help="Time-to-first-audio: streaming vs save-then-play")
+    p.add_argument("--mp3", help="MP3 replayed by the fake TTS stream (default: pygame sample)")
+    p.add_argument("--first-byte-ms", type=int, default=150)
+    p.add_argument("--kbps", type=int, default=512, help="Fake stream delivery rate")
+    p.add_argument("--jitter-ms", type=int, default=250)
+    p.set_defaults(func=bench_stream)
+
+    p = sub.add_parser("playback", help="Reply playback: file + polling vs decoded in-memory buffer + event")
+    p.add_argument("--mp3", help="Reply audio (default: pygame sample)")
+    p.add_argument("--seconds", type=float, default=2.55, help="Clip length to play")
+    p.add_argument("--turns", type=int, default=4)
+    p.set_defaults(func=bench_playback)
+
+    p = sub.add_parser("loop", help="Per-turn event loop overhead: asyncio.run vs AudioLoop")
+    p.add_argument("--turns", type=int, default=300)
+    p.set_defaults(func=bench_loop)
+
+    p = sub.add_parser("vad", help="Endpointing latency and false-cut rate on labelled WAV fixtures")
+    p.add_argument("--wav", nargs="*", help="16-bit WAVs with a sidecar .json {\"utterances\": [[start, end], ...]}")
+    p.add_argument("--fixtures", help="Directory for the generated synthetic fixtures")
+    p.add_argument("--hangover-ms", type=int, nargs="+", default=[200, 300, 500])
+    p.set_defaults(func=bench_vad)
+
+    p = sub.add_parser("speculate", help="Early intent commit: hit rate and latency saved per turn")
+    p.add_argument("--word-ms", type=float, default=300, help="Speaking rate for replayed transcripts")
+    p.add_argument("--synth-ms", type=float, default=600, help="Time to synthesize a reply")
+    p.add_argument("--endpoint-ms", type=float, default=300, help="Speech end to final transcript (VAD hangover)")
+    p.add_argument("--min-stable", type=int, nargs="+", default=[1, 2, 3, 4])
+    p.add_argument("--fixtures", help="Replay recorded WAVs through the vosk stream instead")
+    p.set_defaults(func=bench_speculate)
+
+    p = sub.add_parser("asr", help="Recognition latency, WER and intent accuracy per backend on recorded fixtures")
+    p.add_argument("--fixtures", help="Directory of WAVs with matching .txt transcripts")
+    p.add_argument("--backends", nargs="+", default=["google", "vosk", "whisper"])
+    p.add_argument("--record", metavar="DIR", help="Record the replay corpus into DIR as fixtures")
+    p.set_defaults(func=bench_asr)
+
+    p = sub.add_parser("weather", help="Weather cache, stale-while-revalidate and coalescing against a stub server")
+    p.add_argument("--latency-ms", type=int, default=80, help="Stub server response delay")
+    p.set_defaults(func=bench_weather)
+
+    p = sub.add_parser("gazetteer", help="Offline city extraction and geolocation-free weather lookups")
+    p.add_argument("--rounds", type=int, default=2000)
+    p.set_defaults(func=bench_gazetteer)
+
+    p = sub.add_parser("knowledge", help="BM25 section index: build, incremental refresh and query latency")
+    p.add_argument("--sections", type=int, default=12000)
+    p.add_argument("--files", type=int, default=120)
+    p.add_argument("--queries", type=int, default=2000)
+    p.set_defaults(func=bench_knowledge)
+
+    p = sub.add_parser("vectors", help="Vector store: build, cold load and top-k query latency")
+    p.add_argument("--sections", type=int, default=12000)
+    p.add_argument("--files", type=int, default=120)
+    p.add_argument("--queries", type=int, default=500)
+    p.set_defaults(func=bench_vectors)
+
+    p = sub.add_parser("sessions", help="Bounded session store: memory per session, LRU/TTL eviction, snapshot")
+    p.add_argument("--sessions", type=int, default=20000)
+    p.add_argument("--ops", type=int, default=200000)
+    p.set_defaults(func=bench_sessions)
+
+    p = sub.add_parser("metrics", help="Latency histogram accuracy and per-turn instrumentation overhead")
+    p.add_argument("--turns", type=int, default=5000)
+    p.set_defaults(func=bench_metrics)
+
+    p = sub.add_parser("profile", help="Overhead of the sampling profiler, tracemalloc and cProfile per turn")
+    p.add_argument("--turns", type=int, default=5000)
+    p.set_defaults(func=bench_profile)
+
+    p = sub.add_parser("startup", help="Cold start: sequential init with eager imports vs the parallel startup")
+    p.add_argument("--runs", type=int, default=5)
+    p.set_defaults(func=bench_startup)
+
+    p = sub.add_parser("catalog", help="Response catalog: snapshot vs compile load time, allocations per turn")
+    p.add_argument("--turns", type=int, default=5000)
+    p.add_argument("--runs", type=int, default=5)
+    p.set_defaults(func=bench_catalog)
+
+    p = sub.add_parser("routes", help="Routing memo: chat() latency and hit rate with and without it")
+    p.add_argument("--turns", type=int, default=20000)
+    p.set_defaults(func=bench_routes)
+
+    p = sub.add_parser("reload", help="Hot reload: edit-to-answer latency and reader latency during reloads")
+    p.add_argument("--sections", type=int, default=3000)
+    p.add_argument("--files", type=int, default=30)
+    p.add_argument("--edits", type=int, default=10)
+    p.set_defaults(func=bench_reload)
+
+    p = sub.add_parser("classify", help="Batched NumPy intent/language labels vs IntentMatcher.match per query")
+    p.add_argument("--sizes", type=int, nargs="+", default=[1, 32, 96, 1000, 100000])
+    p.add_argument("--check", type=int, default=100000, help="Utterances compared label by label")
+    p.set_defaults(func=bench_classify)
+
+    p = sub.add_parser("server", help="Load generator: concurrent sessions against server.py")
+    p.add_argument("--sessions", type=int, nargs="+", default=[50, 200, 800])
+    p.add_argument("--server-workers", type=int, nargs="+", default=[1, os.cpu_count() or 1])
+    p.add_argument("--clients", type=int, default=2, help="Load generator processes")
+    p.add_argument("--duration", type=float, default=5.0)
+    p.add_argument("--think-ms", type=float, default=500, help="Mean pause between a session's requests")
+    p.add_argument("--slo-ms", type=float, default=100, help="p99 latency budget for 'sustained'")
+    p.set_defaults(func=bench_server)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,196 @@
+"""
+Shared benchmark fixtures: the replay corpus, the pre-matcher routing
+cascade it is scored against, and timing helpers.
+"""
+import os
+import re
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))  # Repository root (cwd of spawned interpreters)
+
+
+# Replay corpus: utterances as they come back from speech recognition,
+# including common mishearings and Devanagari output.
+REPLAY_CORPUS = [
+    "Who is the president?",
+    "president kaun hai",
+    "Founder kaun hai?",
+    "who is the founder of pushpak auto",
+    "pushpak auto ka founder kaun hai",
+    "tell me about the founders",
+    "co-founder ke baare mein batao",
+    "Tell me about Pushpak O2",
+    "Company ke baare mein batao",
+    "what is the mission of the company",
+    "where is the company location",
+    "Aneerudh kaun hai",
+    "who is the technology lead",
+    "What is the load capacity?",
+    "Vehicle ki capacity kya hai?",
+    "Tell me the features",
+    "Features kya hain?",
+    "what is the top speed",
+    "kitni speed hai",
+    "how fast is the drone",
+    "speeed batao",
+    "does it use hydrogen",
+    "tell me about the aerial vehicle in english",
+    "What's the weather?",
+    "Mausam kaisa hai?",
+    "Tomorrow's forecast",
+    "Kal ka mausam kya hoga?",
+    "waether today",
+    "vedar kaisa hai",
+    "is it going to rain",
+    "aaj garmi kitni hai",
+    "how are you",
+    "kaise ho shipra",
+    "kya haal hai",
+    "what time is it",
+    "abhi kitne baje hain",
+    "samay kya hua hai",
+    "who are you",
+    "tum kaun ho",
+    "what is your purpose",
+    "tumhe kyu banaya",
+    "apne baare mein batao",
+    "hello",
+    "hi there",
+    "namaste",
+    "नमस्ते",
+    "good morning",
+    "good afternoon shipra",
+    "good evening",
+    "thank you",
+    "dhanyawad",
+    "धन्यवाद",
+    "bye",
+    "goodbye shipra",
+    "alvida",
+    "अलविदा",
+    "tata",
+    "see you later",
+    "what is the capital of france",
+    "play some music",
+    "aap kya kar sakti ho",
+    "मुझे कुछ बताओ",
+    "",
+]
+
+
+def legacy_route(user_input):
+    """The pre-matcher any() cascade from ShipraBrain, returning routing labels"""
+    query = user_input.lower().strip()
+    lang = legacy_detect_language(user_input)
+
+    if any(word in query for word in ['company', 'pushpak o2', 'pushpak auto', 'leadership', 'president', 'aditya', 'aneerudh', 'location', 'bhopal', 'mission', 'founder', 'co-founder', 'kaun hai', 'who is']):
+        if 'president' in query or 'aditya' in query:
+            return 'company', 'president', lang
+        elif 'aneerudh' in query or 'technology lead' in query:
+            return 'company', 'aneerudh', lang
+        elif ('founder' in query and ('kaun hai' in query or 'who is' in query)) or ('pushpak auto' in query and ('founder' in query or 'kaun hai' in query)):
+            return 'company', 'pushpak_auto_founders', lang
+        elif 'founder' in query or 'co-founder' in query:
+            return 'company', 'founders', lang
+        elif 'location' in query or 'bhopal' in query:
+            return 'company', 'location', lang
+        return 'company', 'general', lang
+    elif any(word in query for word in ['vehicle', 'pushpak', 'aerial', 'drone', 'uas', 'features', 'technology', 'hydrogen', 'autonomous', 'capacity', 'load', 'speed', 'fast', 'kitni speed', 'speeed']):
+        if 'capacity' in query or 'load' in query or 'person' in query:
+            return 'vehicle', 'capacity', lang
+        elif 'speed' in query or 'fast' in query or 'kitni speed' in query or 'top speed' in query or 'speeed' in query:
+            return 'vehicle', 'speed', lang
+        elif 'features' in query:
+            return 'vehicle', 'features', lang
+        return 'vehicle', 'general', lang
+    elif any(word in query for word in ['weather', 'mausam', 'temperature', 'temp', 'garmi', 'sardi', 'baarish', 'rain', 'forecast', 'kal ka mausam', 'aaj ka mausam', 'waether', 'vedar']):
+        if 'forecast' in query or 'kal' in query or 'tomorrow' in query:
+            return 'weather', 'forecast', lang
+        return 'weather', 'general', lang
+    elif any(word in query for word in ['how are you', 'how r u', 'kaise ho', 'kaisi ho', 'kya haal', 'how do you do', 'how are u']):
+        return 'how_are_you', 'general', lang
+    elif any(word in query for word in ['time', 'samay', 'kitne baje', 'what time', 'current time', 'abhi kitne baje']):
+        return 'time', 'general', lang
+    elif any(word in query for word in ['who are you', 'kaun ho', 'tum kaun', 'your purpose', 'tumhara purpose', 'why you', 'kyu banaya', 'apne bare', 'apne baare']):
+        if 'purpose' in query or 'kyu' in query:
+            return 'identity', 'purpose', lang
+        return 'identity', 'general', lang
+    elif any(word in query for word in ['hello', 'hi', 'hey', 'namaste', 'नमस्ते', 'good morning', 'good afternoon', 'good evening', 'thank you', 'thanks', 'dhanyawad', 'धन्यवाद']):
+        if 'thank' in query or 'dhanyawad' in query or 'धन्यवाद' in query:
+            return 'greeting', 'thanks', lang
+        elif 'good morning' in query:
+            return 'greeting', 'good_morning', lang
+        elif 'good afternoon' in query:
+            return 'greeting', 'good_afternoon', lang
+        elif 'good evening' in query:
+            return 'greeting', 'good_evening', lang
+        return 'greeting', 'general', lang
+    elif any(word in query for word in ['bye', 'goodbye', 'exit', 'stop', 'alvida', 'अलविदा', 'tata', 'see you']):
+        if any(word in query for word in ['alvida', 'अलविदा', 'tata']):
+            return 'goodbye', 'hinglish', lang
+        return 'goodbye', 'general', lang
+    return 'unknown', 'general', lang
+
+
+def legacy_detect_language(text):
+    """The pre-matcher ShipraBrain.detect_language"""
+    if 'english' in text.lower():
+        return 'english'
+    hinglish_indicators = ['bare', 'mein', 'batao', 'baare']
+    if any(word in text.lower() for word in hinglish_indicators):
+        return 'hindi'
+    hindi_keywords = ['hindi', 'hinglish', 'kaun', 'kya', 'kaise', 'kahan', 'kyun', 'kab',
+                     'hai', 'hain', 'hun', 'ho', 'ko', 'ka', 'ki', 'ke', 'se',
+                     'tak', 'par', 'aur', 'ya', 'bhi', 'tum', 'aap', 'main', 'yeh', 'veh']
+    if len(re.findall(r'[\u0900-\u097F]', text)) > 0:
+        return 'hindi'
+    words = text.lower().split()
+    hindi_word_count = sum(1 for word in words if word in hindi_keywords)
+    if len(words) > 0 and (hindi_word_count / len(words)) > 0.2:
+        return 'hindi'
+    return 'english'
+
+
+# Queries answered from the knowledge base (or the unknown reply)
+FALLBACK_QUERIES = [
+    "tell me about hydrogen fuel cells", "what certifications does the drone have", "dgca compliance details",
+    "how long can it fly", "what is the range of pushpak", "who builds the airframe",
+    "what is the wingspan", "does it need a runway", "battery backup kya hai", "kitna range hai",
+    "noise level of the vehicle", "what sensors are used", "xyz qqq", "tell me a joke",
+]
+
+
+def time_per_query(fn, corpus, rounds):
+    """Mean microseconds per call of fn over the corpus"""
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for text in corpus:
+            fn(text)
+    elapsed = time.perf_counter() - start
+    return elapsed / (rounds * len(corpus)) * 1e6
+
+
+def pseudo_words(count, seed=3):
+    """Distinct word-like strings built from random syllables"""
+    import random
+    rng = random.Random(seed)
+    onsets = ["", "b", "ch", "d", "g", "h", "j", "k", "kh", "l", "m", "n", "p", "r", "s", "sh", "t", "v", "y"]
+    vowels = ["a", "aa", "e", "i", "o", "u", "ai", "au"]
+    words = set()
+    while len(words) < count:
+        words.add("".join(rng.choice(onsets) + rng.choice(vowels) for _ in range(rng.randint(2, 4))))
+    return sorted(words)
+
+
+def misspell(word, rng):
+    """One random ASR-style edit: substitution, deletion, insertion or transposition"""
+    i = rng.randrange(1, len(word))
+    op = rng.randrange(4)
+    letter = rng.choice("abcdefghijklmnopqrstuvwxyz")
+    if op == 0:
+        return word[:i] + letter + word[i + 1:]
+    if op == 1:
+        return word[:i] + word[i + 1:]
+    if op == 2:
+        return word[:i] + letter + word[i:]
+    return word[:i - 1] + word[i] + word[i - 1] + word[i + 1:]
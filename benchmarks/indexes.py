@@ -0,0 +1,261 @@
+"""
+Index benchmarks: BM25 knowledge sections, the vector store, the session
+store and hot reload.
+"""
+import os
+import threading
+import time
+from .common import FALLBACK_QUERIES
+
+
+def write_synthetic_docs(directory, sections, files, seed=7):
+    """Markdown files with sections drawn from a Zipf-ish vocabulary"""
+    import random
+    rng = random.Random(seed)
+    from itertools import accumulate
+    vocab = [f"term{i}" for i in range(20000)]
+    weights = list(accumulate(1 / (i + 1) for i in range(len(vocab))))  # cumulative
+    per_file = sections // files
+    for n in range(files):
+        lines = [f"# Document {n}"]
+        for s in range(per_file):
+            lines.append(f"## Section {n}-{s} {' '.join(rng.choices(vocab, cum_weights=weights, k=3))}")
+            for _ in range(3):
+                lines.append(f"- {' '.join(rng.choices(vocab, cum_weights=weights, k=rng.randint(8, 20)))}")
+        with open(os.path.join(directory, f"doc{n:04d}.md"), "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+    return vocab, weights
+
+
+def bench_knowledge(args):
+    import random
+    import tempfile
+    from knowledge import KnowledgeIndex
+
+    docs = tempfile.mkdtemp()
+    index_file = os.path.join(tempfile.mkdtemp(), "knowledge_index.pkl")
+    vocab, weights = write_synthetic_docs(docs, args.sections, args.files)
+
+    def timed_refresh():
+        index = KnowledgeIndex(directory=docs, index_file=index_file)
+        start = time.perf_counter()
+        changed = index.refresh()
+        return index, changed, (time.perf_counter() - start) * 1000
+
+    index, changed, cold_ms = timed_refresh()
+    print(f"{len(index)} sections in {args.files} files, {len(index.vocab)} terms, {len(index.post_sections)} postings")
+    print(f"cold build:          {cold_ms:8.1f} ms ({changed} files parsed)")
+    index, changed, warm_ms = timed_refresh()
+    print(f"load persisted:      {warm_ms:8.1f} ms ({changed} files parsed)")
+
+    path = os.path.join(docs, "doc0000.md")
+    with open(path, "a", encoding="utf-8") as f:
+        f.write("## Appended section\n- incremental rebuild marker\n")
+    index, changed, incr_ms = timed_refresh()
+    print(f"one file edited:     {incr_ms:8.1f} ms ({changed} file parsed)")
+
+    rng = random.Random(11)
+    queries = [" ".join(rng.choices(vocab, cum_weights=weights, k=rng.randint(2, 5))) for _ in range(args.queries)]
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        index.search(query, k=3)
+        latencies.append((time.perf_counter() - start) * 1000)
+    latencies.sort()
+    print(f"query latency:       p50 {latencies[len(latencies) // 2]:.3f} ms, "
+          f"p99 {latencies[int(len(latencies) * 0.99)]:.3f} ms over {len(queries)} queries")
+    return 0
+
+
+def bench_vectors(args):
+    import random
+    import tempfile
+    from vector_store import VectorStore, load_faiss
+
+    docs = tempfile.mkdtemp()
+    store_dir = tempfile.mkdtemp()
+    vocab, weights = write_synthetic_docs(docs, args.sections, args.files)
+
+    start = time.perf_counter()
+    VectorStore(directory=store_dir, documents=docs).build()
+    print(f"build (chunk + embed):  {(time.perf_counter() - start) * 1000:8.1f} ms")
+
+    rng = random.Random(11)
+    queries = [" ".join(rng.choices(vocab, cum_weights=weights, k=rng.randint(2, 5))) for _ in range(args.queries)]
+    backends = [("numpy", False)] + ([("faiss", True)] if load_faiss() is not None else [])
+    for name, use_faiss in backends:
+        start = time.perf_counter()
+        store = VectorStore(directory=store_dir, documents=docs, use_faiss=use_faiss).load()
+        load_ms = (time.perf_counter() - start) * 1000
+
+        latencies = []
+        for query in queries:
+            start = time.perf_counter()
+            store.search(query, k=3)
+            latencies.append((time.perf_counter() - start) * 1000)
+        latencies.sort()
+        start = time.perf_counter()
+        store.search_batch(queries, k=3)
+        batch_us = (time.perf_counter() - start) / len(queries) * 1e6
+        print(f"{name:6} {len(store)} chunks: cold load {load_ms:6.1f} ms, "
+              f"query p50 {latencies[len(latencies) // 2]:.3f} ms / p99 {latencies[int(len(latencies) * 0.99)]:.3f} ms, "
+              f"batched {batch_us:.0f} us/query")
+    return 0
+
+
+def bench_sessions(args):
+    import random
+    import tempfile
+    import tracemalloc
+    from session_store import SessionStore
+
+    categories = ['unknown', 'how_are_you', 'identity', 'greeting', 'goodbye', 'company_general', 'president',
+                  'founders', 'location', 'vehicle_general', 'capacity', 'features']
+    rng = random.Random(5)
+    ops = [(f"s{rng.randrange(args.sessions)}", rng.choice(categories)) for _ in range(args.ops)]
+
+    # Baseline: one dict of string keys per session, as the server used to keep
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    table = {}
+    for session_id, category in ops:
+        counters = table.setdefault(session_id, {})
+        counters[category] = counters.get(category, 0) + 1
+    dict_bytes = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    dict_per_session = dict_bytes / max(1, len(table))
+
+    # Store total includes the slab, the LRU map and the row owners
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    store = SessionStore(max_sessions=args.sessions, max_categories=len(categories), ttl=0)
+    for session_id, category in ops:
+        store.bump(session_id, category)
+    store_bytes = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    start = time.perf_counter()
+    for session_id, category in ops:
+        store.bump(session_id, category)
+    bump_us = (time.perf_counter() - start) / len(ops) * 1e6
+    stats = store.stats()
+    print(f"{len(table)} sessions, {len(ops)} updates over {len(categories)} categories")
+    print(f"  dict counters:  {dict_per_session:6.0f} bytes/session")
+    print(f"  session store:  {store_bytes / max(1, len(store)):6.0f} bytes/session "
+          f"({stats['bytes_per_session']} in the counter row), {bump_us:.2f} us/update")
+
+    # LRU: twice as many sessions as slots
+    small = SessionStore(max_sessions=max(1, args.sessions // 2), ttl=0)
+    start = time.perf_counter()
+    for session_id, category in ops:
+        small.bump(session_id, category)
+    churn_us = (time.perf_counter() - start) / len(ops) * 1e6
+    stats = small.stats()
+    print(f"  LRU at half capacity: {stats['lru_evictions']} evictions, "
+          f"{stats['eviction_us_avg']:.2f} us/eviction, {churn_us:.2f} us/update")
+
+    # TTL: expire every session in one vectorized sweep
+    store.ttl = 1
+    store._last_seen[store._last_seen > 0] -= 10
+    start = time.perf_counter()
+    expired = store.sweep()
+    print(f"  TTL sweep: {expired} sessions expired in {(time.perf_counter() - start) * 1000:.2f} ms")
+
+    # Snapshot and restore
+    for session_id, category in ops:
+        small.bump(session_id, category)
+    path = os.path.join(tempfile.mkdtemp(), "sessions.npz")
+    start = time.perf_counter()
+    saved = small.snapshot(path)
+    save_ms = (time.perf_counter() - start) * 1000
+    restored_store = SessionStore(max_sessions=small.max_sessions)
+    start = time.perf_counter()
+    restored = restored_store.restore(path)
+    restore_ms = (time.perf_counter() - start) * 1000
+    same = all(restored_store.get(sid, c) == small.get(sid, c) for sid in list(small._slots)[:200] for c in categories)
+    print(f"  snapshot: {saved} sessions saved in {save_ms:.1f} ms, {restored} restored in {restore_ms:.1f} ms "
+          f"({'identical' if same else 'MISMATCH'})")
+    return 0
+
+
+def bench_reload(args):
+    import io
+    import tempfile
+    from contextlib import redirect_stdout
+    from config import Config
+
+    docs = tempfile.mkdtemp()
+    cache = tempfile.mkdtemp()
+    write_synthetic_docs(docs, args.sections, args.files)
+    Config.DOCUMENTS_DIRECTORY = docs
+    Config.KNOWLEDGE_INDEX_FILE = os.path.join(cache, "knowledge_index.pkl")
+    Config.CHROMA_PERSIST_DIRECTORY = os.path.join(cache, "vectors")
+    from brain import ShipraBrain
+    from watcher import DocumentWatcher
+
+    with redirect_stdout(io.StringIO()):
+        ShipraBrain(watch=False)  # Builds the persisted indexes
+        start = time.perf_counter()
+        ShipraBrain(watch=False)
+        restart_ms = (time.perf_counter() - start) * 1000
+    print(f"{args.sections} sections in {args.files} files; new brain from the persisted indexes: {restart_ms:.0f} ms")
+
+    def percentile(values, q):
+        values = sorted(values)
+        return values[min(len(values) - 1, int(len(values) * q))] if values else 0.0
+
+    for backend in ("inotify", "poll"):
+        with redirect_stdout(io.StringIO()):
+            brain = ShipraBrain(watch=False)
+        brain.route_cache = None  # Readers go to the indexes on every turn
+        brain.watcher = DocumentWatcher(brain.reload_changed, use_inotify=backend == "inotify").start()
+        if brain.watcher.backend != backend:
+            print(f"  {backend}: not available here")
+            brain.watcher.stop()
+            continue
+        reloads = []
+        original = brain.reload_knowledge
+
+        def timed_reload(paths=None):
+            start = time.perf_counter()
+            with redirect_stdout(io.StringIO()):
+                changed = original(paths)
+            reloads.append((time.perf_counter() - start) * 1000)
+            return changed
+
+        brain.reload_knowledge = timed_reload
+        latencies = {"idle": [], "reloading": []}
+        phase = ["idle"]
+        stop = threading.Event()
+
+        def reader():
+            i = 0
+            while not stop.is_set():
+                start = time.perf_counter()
+                brain.chat(FALLBACK_QUERIES[i % len(FALLBACK_QUERIES)] + f" {i % 50}")
+                latencies[phase[0]].append((time.perf_counter() - start) * 1000)
+                i += 1
+
+        thread = threading.Thread(target=reader)
+        thread.start()
+        time.sleep(0.5)
+        visible = []
+        for n in range(args.edits):
+            marker = f"zqmarker{backend}{n}"
+            path = os.path.join(docs, f"doc{n % args.files:04d}.md")
+            phase[0] = "reloading"
+            start = time.perf_counter()
+            with open(path, "a", encoding="utf-8") as f:
+                f.write(f"\n## Hot reload {n}\n- {marker} spec update\n")
+            while marker not in (brain.get_knowledge_answer(marker) or ""):
+                time.sleep(0.002)
+            visible.append((time.perf_counter() - start) * 1000)
+            phase[0] = "idle"
+            time.sleep(0.3)
+        stop.set()
+        thread.join()
+        brain.watcher.stop()
+        print(f"  {backend:7}: edit -> new answer p50 {percentile(visible, 0.5):6.0f} ms "
+              f"(debounce {Config.KNOWLEDGE_WATCH_DEBOUNCE_MS} ms), reload work p50 {percentile(reloads, 0.5):5.1f} ms; "
+              f"reader p99 idle {percentile(latencies['idle'], 0.99):.2f} ms, "
+              f"during reloads {percentile(latencies['reloading'], 0.99):.2f} ms")
+    return 0
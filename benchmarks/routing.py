@@ -0,0 +1,323 @@
+"""
+Routing benchmarks: intent matching, fuzzy correction, the gazetteer,
+the response catalog, the routing memo and batched classification.
+"""
+import os
+import sys
+import time
+from .common import FALLBACK_QUERIES, REPLAY_CORPUS, ROOT, legacy_route, misspell, pseudo_words, time_per_query
+from .services import start_stub_weather_server
+
+
+def bench_intents(args):
+    from intents import IntentMatcher
+
+    # Exact keyword routing must match the cascade; fuzzy corrections are reported separately
+    build_start = time.perf_counter()
+    matcher = IntentMatcher(fuzzy=False)
+    build_ms = (time.perf_counter() - build_start) * 1000
+
+    mismatches = 0
+    for text in REPLAY_CORPUS:
+        m = matcher.match(text.lower().strip())
+        new = (m.intent, m.sub_intent, m.lang)
+        old = legacy_route(text)
+        if new != old:
+            mismatches += 1
+            print(f"MISMATCH {text!r}: cascade={old} matcher={new}")
+
+    def compiled_route(text):
+        m = matcher.match(text.lower().strip())
+        return m.intent, m.sub_intent, m.lang
+
+    legacy_us = time_per_query(legacy_route, REPLAY_CORPUS, args.rounds)
+    compiled_us = time_per_query(compiled_route, REPLAY_CORPUS, args.rounds)
+
+    print(f"Automaton: {len(matcher.vocabulary)} keywords, {len(matcher._delta)} states, built in {build_ms:.2f} ms")
+    print(f"Replay corpus: {len(REPLAY_CORPUS)} queries, {mismatches} routing mismatches")
+    print(f"any() cascade:    {legacy_us:8.2f} us/query")
+    print(f"compiled matcher: {compiled_us:8.2f} us/query ({legacy_us / compiled_us:.2f}x)")
+
+    fuzzy = IntentMatcher(fuzzy=True)
+    for text in REPLAY_CORPUS:
+        query = text.lower().strip()
+        exact, corrected = matcher.match(query), fuzzy.match(query)
+        if (exact.route, exact.lang) != (corrected.route, corrected.lang):
+            print(f"fuzzy correction {text!r}: {fuzzy.corrector.correct(query)!r} -> "
+                  f"{corrected.route} {corrected.lang}")
+
+    def fuzzy_route(text):
+        m = fuzzy.match(text.lower().strip())
+        return m.intent, m.sub_intent, m.lang
+
+    # Words are corrected once and cached, so repeats measure the steady state
+    fuzzy_us = time_per_query(fuzzy_route, REPLAY_CORPUS, args.rounds)
+    print(f"with fuzzy layer: {fuzzy_us:8.2f} us/query ({legacy_us / fuzzy_us:.2f}x)")
+    return 1 if mismatches else 0
+
+
+def bench_fuzzy(args):
+    import random
+    from fuzzy import FuzzyIndex, edit_distance
+
+    rng = random.Random(5)
+    for size in args.sizes:
+        vocab = pseudo_words(size)
+        start = time.perf_counter()
+        index = FuzzyIndex(vocab)
+        build_ms = (time.perf_counter() - start) * 1000
+        probes = [misspell(word, rng) for word in rng.sample(vocab, args.probes) if len(word) >= 5]
+
+        start = time.perf_counter()
+        found = sum(1 for probe in probes if index.nearest(probe) is not None)
+        index_us = (time.perf_counter() - start) / len(probes) * 1e6
+
+        # Linear scan over the whole vocabulary, on a sample of the probes
+        sample = probes[:max(1, min(len(probes), 200000 // size))]
+        start = time.perf_counter()
+        for probe in sample:
+            k = index.budget(probe)
+            min((edit_distance(probe, term, k), term) for term in vocab)
+        scan_us = (time.perf_counter() - start) / len(sample) * 1e6
+        print(f"{size:6} terms: build {build_ms:7.1f} ms, lookup {index_us:7.1f} us "
+              f"(linear scan {scan_us:9.1f} us), {found}/{len(probes)} resolved")
+    return 0
+
+
+CITY_QUERIES = [
+    "delhi ka mausam", "dilli mein weather kaisa hai", "kal mumbai me baarish hogi kya",
+    "what's the temperature in new york", "banaras ka temperature", "weather in bangalore today",
+    "gurgaon mein garmi kitni hai", "tokyo forecast", "weather today", "aaj ka mausam kaisa hai",
+]
+
+
+def bench_gazetteer(args):
+    import tempfile
+    from gazetteer import get_gazetteer
+    from weather import WeatherService
+
+    start = time.perf_counter()
+    gazetteer = get_gazetteer()
+    load_ms = (time.perf_counter() - start) * 1000
+    print(f"Loaded {len(gazetteer)} cities in {load_ms:.1f} ms")
+    for query in CITY_QUERIES:
+        place = gazetteer.find(query)
+        print(f"  {query!r:42} -> {place.name if place else '(IP location)'}")
+    us = time_per_query(gazetteer.find, CITY_QUERIES, args.rounds)
+    print(f"City extraction: {us:.2f} us/query")
+
+    # A named city must not touch IP geolocation (no location file either)
+    server, counter = start_stub_weather_server(latency_ms=5)
+    location_file = os.path.join(tempfile.mkdtemp(), "location.json")
+    service = WeatherService(base_url=f"http://127.0.0.1:{server.server_address[1]}", location_file=location_file)
+    print(service.get_weather('hindi', place=gazetteer.find("delhi ka mausam")))
+    print(f"Geolocation calls: {service.geolocation_calls}, HTTP requests: {counter['requests']}")
+    server.shutdown()
+    return 0
+
+
+CATALOG_COLD_LOAD = """
+import json, sys, time
+import numpy  # Imported by fuzzy.py either way; not part of the catalog
+from config import Config
+if sys.argv[1] == "compile":
+    Config.CATALOG_SNAPSHOT_FILE = ""
+t0 = time.perf_counter()
+import responses, intents
+intents.get_matcher()
+print(json.dumps({"ms": (time.perf_counter() - t0) * 1000, "source": intents._catalog.source}))
+"""
+
+
+def bench_catalog(args):
+    import json
+    import random
+    import statistics
+    import subprocess
+    import tempfile
+    import tracemalloc
+    from brain import ShipraBrain
+    from catalog import load_catalog
+
+    # Loading: JSON parse + compile + automaton build vs the marshal snapshot
+    def best(fn, runs=20):
+        timings = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            fn()
+            timings.append((time.perf_counter() - start) * 1000)
+        return min(timings)
+
+    snapshot = os.path.join(tempfile.mkdtemp(), "catalog.marshal")
+    load_catalog(snapshot_file=snapshot)
+    compiled = best(lambda: load_catalog(snapshot_file=""))
+    loaded = best(lambda: load_catalog(snapshot_file=snapshot))
+    print(f"Catalog load ({os.path.getsize(snapshot) / 1024:.0f} KB snapshot):")
+    print(f"  compile from catalog.json  {compiled:6.2f} ms")
+    print(f"  marshal snapshot           {loaded:6.2f} ms ({compiled / loaded:.1f}x)")
+    for mode in ("compile", "snapshot"):
+        runs = []
+        for _ in range(args.runs):
+            proc = subprocess.run([sys.executable, "-c", CATALOG_COLD_LOAD, mode], cwd=ROOT, capture_output=True, text=True)
+            lines = [line for line in proc.stdout.splitlines() if line.startswith("{")]
+            if not lines:
+                print(f"  {mode}: failed\n{proc.stderr[-2000:]}")
+                return 1
+            runs.append(json.loads(lines[-1])["ms"])
+        print(f"  fresh interpreter, {mode:<8} import responses + intents + matcher: "
+              f"{statistics.median(runs):6.2f} ms (median of {args.runs})")
+
+    # Hot path: allocations per chat() turn (weather excluded: network)
+    brain = ShipraBrain()
+    corpus = [text for text in REPLAY_CORPUS if brain.matcher.match(text.lower()).intent != 'weather']
+    texts = [random.Random(5).choice(corpus) for _ in range(args.turns)]
+    for text in corpus:
+        brain.chat(text)
+    peaks = []
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    for text in texts:
+        before = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        brain.chat(text)
+        peaks.append(tracemalloc.get_traced_memory()[1] - before)
+    retained = tracemalloc.get_traced_memory()[0] - base
+    # The catalog part of a turn: route lookup and variant selection
+    route, lang = brain.catalog.route('greeting', 'thanks'), 'hindi'
+    before = tracemalloc.get_traced_memory()[0]
+    tracemalloc.reset_peak()
+    for _ in range(10000):
+        brain.catalog.route('greeting', 'thanks').variants[lang]
+    lookup_peak = tracemalloc.get_traced_memory()[1] - before
+    tracemalloc.reset_peak()
+    for _ in range(10000):
+        brain.respond(route, lang)
+    respond_peak = tracemalloc.get_traced_memory()[1] - before
+    tracemalloc.stop()
+    peaks.sort()
+    print(f"{args.turns} brain.chat turns under tracemalloc:")
+    print(f"  peak allocation per turn  median {statistics.median(peaks):6.0f} B, "
+          f"p99 {peaks[int(len(peaks) * 0.99)]:6.0f} B, max {peaks[-1]:6.0f} B")
+    print(f"  retained                  {retained / len(texts):6.1f} B/turn")
+    print(f"  10000 route lookups: peak {lookup_peak} B; 10000 varied replies: peak {respond_peak} B")
+    return 0
+
+
+def bench_routes(args):
+    import random
+    from brain import ShipraBrain
+    from route_cache import RouteCache
+
+    brain = ShipraBrain()
+    routed = [text for text in REPLAY_CORPUS if brain.matcher.match(text.lower()).intent != 'weather']
+    rng = random.Random(13)
+    # A kiosk hears the same utterances over and over (Zipf-like); time queries are never memoized
+    weights = [1 / (rank + 1) for rank in range(len(routed))]
+    mixes = {"catalog replies": rng.choices(routed, weights, k=args.turns),
+             "knowledge fallback": [rng.choice(FALLBACK_QUERIES) for _ in range(args.turns)]}
+
+    def run(texts):
+        start = time.perf_counter()
+        for text in texts:
+            brain.chat(text)
+        return (time.perf_counter() - start) / len(texts) * 1e6
+
+    print(f"{args.turns} brain.chat turns per mix ({len(routed)} routed texts, {len(FALLBACK_QUERIES)} fallback texts):")
+    for name, texts in mixes.items():
+        brain.route_cache = None
+        run(texts)
+        uncached = min(run(texts) for _ in range(3))
+        brain.route_cache = RouteCache()
+        cached = min(run(texts) for _ in range(3))
+        stats = brain.route_cache.stats()
+        print(f"  {name:<19} no memo {uncached:7.1f} us/turn, memo {cached:7.1f} us/turn "
+              f"({uncached / cached:.1f}x), hit rate {stats['hit_rate'] * 100:.1f}%, {stats['entries']} entries")
+
+    # Same replies with and without the memo (rotation stays per turn)
+    texts = mixes["catalog replies"][:500] + mixes["knowledge fallback"][:200]
+    replies = {}
+    for memo in (None, RouteCache()):
+        brain.route_cache = memo
+        with brain.use_session(f"check-{memo is None}"):
+            replies[memo is None] = [brain.chat(text) for text in texts]
+    print(f"  identical replies over {len(texts)} turns: {replies[True] == replies[False]}")
+    return 0
+
+
+def classify_corpus(count, seed=17):
+    """Replay-corpus variants: name prefixes, mishearings, mixed case, odd whitespace, Devanagari, noise"""
+    import random
+    rng = random.Random(seed)
+    base = [text for text in REPLAY_CORPUS + FALLBACK_QUERIES if text.strip()]
+    noise = pseudo_words(500, seed=seed)
+    spaces = [" ", "  ", "\t", " ", "　", "\n"]
+    texts = []
+    while len(texts) < count:
+        words = rng.choice(base).split()
+        if rng.random() < 0.3:
+            words += rng.choice(base).split()
+        if rng.random() < 0.3:
+            words.insert(rng.randrange(len(words) + 1), rng.choice(noise))
+        words = [misspell(word, rng) if len(word) >= 5 and rng.random() < 0.15 else word for word in words]
+        if rng.random() < 0.2:
+            words.insert(0, rng.choice(["shipra", "hey shipra,", "hi shipra", "ok shipra"]))
+        text = "".join(word + rng.choice(spaces) for word in words)
+        if rng.random() < 0.3:
+            text = text.upper() if rng.random() < 0.3 else text.title()
+        texts.append(rng.choice(["", " ", "\t"]) + text.rstrip() + rng.choice(["", " ", "?"]))
+    return texts
+
+
+def bench_classify(args):
+    from config import Config
+    from brain import ShipraBrain
+    from classify import get_classifier
+
+    brain = ShipraBrain()
+    prefixes = tuple(brain.catalog.name_prefixes)
+
+    def scalar(texts):
+        labels = []
+        for text in texts:
+            query = text.lower().strip()
+            if query.startswith(prefixes):
+                query = brain.remove_name_prefix(query)
+            match = brain.matcher.match(query)
+            labels.append((match.intent, match.sub_intent, match.lang))
+        return labels
+
+    texts = classify_corpus(max(args.sizes))
+    get_classifier()
+    check = texts[:args.check]
+    expected = scalar(check)
+    got = brain.classify_batch(check).labels()
+    mismatches = [(text, want, have) for text, want, have in zip(check, expected, got) if want != have]
+    print(f"labels identical to IntentMatcher.match on {len(check)} utterances: {not mismatches}")
+    for text, want, have in mismatches[:5]:
+        print(f"  {text!r}: scalar {want}, batch {have}")
+
+    for size in args.sizes:
+        batch = texts[:size]
+        rounds = max(1, min(200, 20000 // size))
+
+        def best(fn):
+            times = []
+            for _ in range(3):
+                start = time.perf_counter()
+                for _ in range(rounds):
+                    fn(batch)
+                times.append((time.perf_counter() - start) / rounds)
+            return min(times)
+
+        scalar_s = best(scalar)
+        batch_s = best(brain.classify_batch)
+        # The NumPy path alone, below CLASSIFY_MIN_BATCH too: where it overtakes the
+        # one-by-one fallback is the crossover CLASSIFY_MIN_BATCH should sit at
+        min_batch, Config.CLASSIFY_MIN_BATCH = Config.CLASSIFY_MIN_BATCH, 0
+        try:
+            vector_s = best(brain.classify_batch)
+        finally:
+            Config.CLASSIFY_MIN_BATCH = min_batch
+        print(f"  batch {size:6}: scalar {size / scalar_s:10.0f} utt/s, batched {size / batch_s:10.0f} utt/s "
+              f"({scalar_s / batch_s:.2f}x), NumPy path {scalar_s / vector_s:.2f}x")
+    return 0
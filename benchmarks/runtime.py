@@ -0,0 +1,170 @@
+"""
+Runtime benchmarks: metrics and profiler overhead, cold start.
+"""
+import os
+import sys
+import time
+from .common import REPLAY_CORPUS, ROOT
+
+
+def bench_metrics(args):
+    import random
+    import tempfile
+    import numpy as np
+    from config import Config
+    from brain import ShipraBrain
+    from metrics import Metrics, Histogram
+
+    # Histogram accuracy against exact percentiles of a long-tailed sample
+    rng = np.random.default_rng(3)
+    values = rng.lognormal(mean=5.0, sigma=1.0, size=100000)
+    histogram = Histogram()
+    for value in values:
+        histogram.record(float(value))
+    print(f"Histogram: {len(values)} values, {len(histogram.counts)} buckets "
+          f"({len(histogram.counts) * 8 / 1024:.1f} KB of counts)")
+    for q in (50, 90, 99, 99.9):
+        exact = float(np.percentile(values, q))
+        print(f"  p{q:<5} {histogram.percentile(q):9.2f} ms vs exact {exact:9.2f} ms "
+              f"({(histogram.percentile(q) - exact) / exact * 100:+.2f}%)")
+
+    # Per-turn overhead on the cheapest real turn: a brain reply (weather excluded: network)
+    brain = ShipraBrain()
+    corpus = [text for text in REPLAY_CORPUS if brain.matcher.match(text.lower()).intent != 'weather']
+    texts = [random.Random(9).choice(corpus) for _ in range(args.turns)]
+    directory = tempfile.mkdtemp()
+    Config.METRICS_JSONL_FILE = os.path.join(directory, "turns.jsonl")
+    Config.METRICS_PROMETHEUS_FILE = os.path.join(directory, "shipra.prom")
+
+    def run(metrics):
+        start = time.perf_counter()
+        for text in texts:
+            turn = metrics.begin_turn() if metrics is not None else None
+            if turn is None:
+                brain.chat(text)
+                continue
+            with turn.stage("think"):
+                brain.chat(text)
+            turn.record("tts", 0.0)
+            turn.set(speak_mode="memory")
+            turn.end()
+        return (time.perf_counter() - start) / len(texts) * 1e6
+
+    run(None)
+    baseline = min(run(None) for _ in range(3))
+    disabled = min(run(Metrics(enabled=False)) for _ in range(3))
+    enabled_metrics = Metrics(enabled=True)
+    enabled = min(run(enabled_metrics) for _ in range(3))
+    print(f"{args.turns} turns (brain.chat only):")
+    print(f"  uninstrumented:     {baseline:7.1f} us/turn")
+    print(f"  metrics disabled:   {disabled:7.1f} us/turn ({disabled - baseline:+.2f} us)")
+    print(f"  metrics enabled:    {enabled:7.1f} us/turn ({enabled - baseline:+.2f} us, JSONL + histograms)")
+    start = time.perf_counter()
+    text = enabled_metrics.render_prometheus()
+    print(f"  Prometheus render:  {(time.perf_counter() - start) * 1000:.2f} ms, {len(text.splitlines())} lines; "
+          f"think p50 {enabled_metrics.histograms['think'].percentile(50):.3f} ms")
+    return 0
+
+
+def bench_profile(args):
+    import io
+    import tempfile
+    from contextlib import redirect_stdout
+    from config import Config
+    from brain import ShipraBrain
+    from profiling import ProfileSession
+
+    brain = ShipraBrain()
+    corpus = [text for text in REPLAY_CORPUS if brain.matcher.match(text.lower()).intent != 'weather']
+    Config.PROFILE_DIRECTORY = tempfile.mkdtemp()
+
+    def run():
+        start = time.perf_counter()
+        for i in range(args.turns):
+            brain.chat(corpus[i % len(corpus)])
+        return (time.perf_counter() - start) / args.turns * 1e6
+
+    run()
+    baseline = min(run() for _ in range(3))
+    print(f"{args.turns} brain.chat turns: {baseline:.1f} us/turn unprofiled")
+    for mode, tracemalloc_on in (("sample", False), ("sample", True), ("cprofile", False)):
+        session = ProfileSession(f"bench-{mode}", mode, trace_allocations=tracemalloc_on).start()
+        profiled = run()
+        with redirect_stdout(io.StringIO()):
+            base = session.stop()
+        outputs = ", ".join(sorted(name[len(os.path.basename(base)) + 1:] for name in os.listdir(Config.PROFILE_DIRECTORY)
+                                   if name.startswith(os.path.basename(base))))
+        label = mode + (" + tracemalloc" if tracemalloc_on else "")
+        print(f"  {label:<24} {profiled:7.1f} us/turn ({(profiled / baseline - 1) * 100:+.0f}%) -> {outputs}")
+    return 0
+
+
+STARTUP_SEQUENTIAL = """
+import json, time
+t0 = time.perf_counter()
+ms = lambda: (time.perf_counter() - t0) * 1000
+import requests, geocoder  # Imported by weather.py at module level before
+try:
+    import faiss
+except ImportError:
+    pass
+from systems import Systems
+Systems.get_brain()
+import speech_recognition, pygame, edge_tts, aiohttp  # audio.py's eager imports
+from audio import ShipraAudio
+audio = ShipraAudio(start=False)
+error = None
+try:
+    audio.init_input()  # Recognizer and mic came first, then the mixer
+except Exception as e:
+    error = repr(e)
+audio.init_output()
+output = ms()
+print(json.dumps({"output": output, "ready": ms(), "error": error}))
+"""
+
+
+STARTUP_PARALLEL = """
+import json, time
+t0 = time.perf_counter()
+ms = lambda: (time.perf_counter() - t0) * 1000
+from startup import Startup
+startup = Startup().start()
+startup.wait("output")
+output = ms()
+error = None
+try:
+    startup.wait()
+except Exception as e:
+    error = repr(e)
+print(json.dumps({"output": output, "ready": ms(), "error": error}))
+"""
+
+
+def bench_startup(args):
+    import json
+    import statistics
+    import subprocess
+
+    env = dict(os.environ, SDL_AUDIODRIVER=os.environ.get("SDL_AUDIODRIVER", "dummy"))
+    print(f"Cold start, median of {args.runs} fresh interpreters (output = intro can start playing):")
+    for name, script in (("sequential, eager imports", STARTUP_SEQUENTIAL), ("parallel, lazy imports", STARTUP_PARALLEL)):
+        results = []
+        for _ in range(args.runs):
+            start = time.perf_counter()
+            proc = subprocess.run([sys.executable, "-c", script], cwd=ROOT, env=env, capture_output=True, text=True)
+            wall = (time.perf_counter() - start) * 1000
+            lines = [line for line in proc.stdout.splitlines() if line.startswith("{")]
+            if not lines:
+                print(f"  {name}: failed\n{proc.stderr[-2000:]}")
+                return 1
+            result = json.loads(lines[-1])
+            result["process"] = wall
+            results.append(result)
+        output = statistics.median(r["output"] for r in results)
+        ready = statistics.median(r["ready"] for r in results)
+        process = statistics.median(r["process"] for r in results)
+        print(f"  {name:<26} output ready {output:6.0f} ms, all ready {ready:6.0f} ms, process {process:6.0f} ms")
+        if results[-1]["error"]:
+            print(f"    (input init failed: {results[-1]['error']})")
+    return 0
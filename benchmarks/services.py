@@ -0,0 +1,175 @@
+"""
+Network benchmarks against local stub or real servers: the weather cache
+and the HTTP/WebSocket server under load.
+"""
+import asyncio
+import os
+import sys
+import threading
+import time
+from .common import REPLAY_CORPUS, ROOT, legacy_route
+
+
+STUB_J1 = {
+    "current_condition": [{"temp_C": "31", "FeelsLikeC": "34", "humidity": "40",
+                           "weatherDesc": [{"value": "Sunny"}]}],
+    "weather": [
+        {"maxtempC": "33", "mintempC": "22", "hourly": [{"weatherDesc": [{"value": "Sunny"}]}]},
+        {"maxtempC": "32", "mintempC": "21", "hourly": [{"weatherDesc": [{"value": "Partly cloudy"}]}]},
+    ],
+}
+
+
+def start_stub_weather_server(latency_ms):
+    """Local wttr.in stand-in; returns (server, request counter dict)"""
+    import json
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    counter = {"requests": 0}
+    body = json.dumps(STUB_J1).encode()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive, so session pooling is visible
+
+        def do_GET(self):
+            counter["requests"] += 1
+            time.sleep(latency_ms / 1000)
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, counter
+
+
+def bench_weather(args):
+    import json
+    import tempfile
+    from concurrent.futures import ThreadPoolExecutor
+    from weather import WeatherService
+
+    server, counter = start_stub_weather_server(args.latency_ms)
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    location_file = os.path.join(tempfile.mkdtemp(), "location.json")
+    with open(location_file, "w", encoding="utf-8") as f:
+        json.dump({"city": "Bhopal", "country": "India", "resolved_at": time.time()}, f)
+
+    service = WeatherService(base_url=base_url, ttl=0.5, stale_ttl=60, location_file=location_file)
+
+    start = time.perf_counter()
+    service.get_weather()
+    service.get_forecast()
+    pair_ms = (time.perf_counter() - start) * 1000
+    print(f"weather + forecast: {pair_ms:6.1f} ms, {counter['requests']} HTTP request(s) (was 2 + 2 geolocations)")
+
+    # Stale-while-revalidate: the answer comes from the stale copy immediately
+    time.sleep(0.6)
+    start = time.perf_counter()
+    service.get_weather()
+    stale_ms = (time.perf_counter() - start) * 1000
+    time.sleep(args.latency_ms / 1000 + 0.2)
+    print(f"stale answer:       {stale_ms:6.1f} ms, background refresh -> {counter['requests']} request(s)")
+
+    # Coalescing: concurrent callers on an empty cache share one fetch
+    cold = WeatherService(base_url=base_url, location_file=location_file)
+    before = counter["requests"]
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        list(pool.map(lambda _: cold.get_weather(), range(16)))
+    print(f"16 concurrent cold callers: {counter['requests'] - before} HTTP request(s)")
+    print(f"Service stats: {service.stats()}")
+    server.shutdown()
+    return 0
+
+
+def _load_client(base_url, sessions, duration, think_ms, corpus, seed):
+    """One client process: sessions concurrent HTTP sessions for duration seconds"""
+    import random
+    import aiohttp
+
+    async def session_loop(http, rng, results):
+        async with http.post(f"{base_url}/session") as response:
+            if response.status != 200:
+                results["refused"] += 1
+                return
+            session_id = (await response.json())["session"]
+        deadline = time.perf_counter() + duration
+        while time.perf_counter() < deadline:
+            await asyncio.sleep(rng.uniform(0.5, 1.5) * think_ms / 1000)
+            start = time.perf_counter()
+            try:
+                async with http.post(f"{base_url}/chat", json={"session": session_id,
+                                                               "text": rng.choice(corpus)}) as response:
+                    await response.read()
+                    status = response.status
+            except aiohttp.ClientError:
+                status = 0
+            if status == 200:
+                results["latencies"].append((time.perf_counter() - start) * 1000)
+            else:
+                results["errors"][status] = results["errors"].get(status, 0) + 1
+
+    async def run():
+        results = {"latencies": [], "errors": {}, "refused": 0}
+        connector = aiohttp.TCPConnector(limit=0)
+        async with aiohttp.ClientSession(connector=connector) as http:
+            rng = random.Random(seed)
+            await asyncio.gather(*(session_loop(http, random.Random(rng.random()), results)
+                                   for _ in range(sessions)))
+        return results
+
+    return asyncio.run(run())
+
+
+def bench_server(args):
+    import socket
+    import subprocess
+    import urllib.request
+    from concurrent.futures import ProcessPoolExecutor
+
+    # Offline corpus: weather would measure wttr.in, not the server
+    corpus = [q for q in REPLAY_CORPUS if q.strip() and legacy_route(q)[0] != 'weather']
+    for workers in args.server_workers:
+        for sessions in args.sessions:
+            # A fresh server per level, so earlier sessions don't count against the limits
+            with socket.socket() as probe:
+                probe.bind(("127.0.0.1", 0))
+                port = probe.getsockname()[1]
+            base_url = f"http://127.0.0.1:{port}"
+            server = subprocess.Popen([sys.executable, "server.py", "--port", str(port), "--workers", str(workers)],
+                                      cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            try:
+                for _ in range(200):
+                    try:
+                        urllib.request.urlopen(f"{base_url}/health", timeout=1).read()
+                        break
+                    except OSError:
+                        time.sleep(0.1)
+                per_client = max(1, sessions // args.clients)
+                with ProcessPoolExecutor(max_workers=args.clients) as pool:
+                    parts = list(pool.map(_load_client, [base_url] * args.clients, [per_client] * args.clients,
+                                          [args.duration] * args.clients, [args.think_ms] * args.clients,
+                                          [corpus] * args.clients, range(args.clients)))
+            finally:
+                server.terminate()
+                server.wait()
+
+            latencies = sorted(l for part in parts for l in part["latencies"])
+            errors = {}
+            for part in parts:
+                for status, count in part["errors"].items():
+                    errors[status] = errors.get(status, 0) + count
+            refused = sum(part["refused"] for part in parts)
+            total = len(latencies) + sum(errors.values())
+            p50 = latencies[len(latencies) // 2] if latencies else 0.0
+            p99 = latencies[int(len(latencies) * 0.99)] if latencies else 0.0
+            ok = latencies and p99 <= args.slo_ms and sum(errors.values()) <= total * 0.01 and not refused
+            print(f"server x{workers}: {per_client * args.clients:5} sessions, "
+                  f"{len(latencies) / args.duration:7.0f} req/s, p50 {p50:6.2f} ms, p99 {p99:7.2f} ms, "
+                  f"errors {errors or 0}, refused {refused} -> {'sustained' if ok else 'over SLO'}")
+    return 0
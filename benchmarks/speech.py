@@ -0,0 +1,473 @@
+"""
+Audio benchmarks: streaming TTS, playback, the event loop, endpointing,
+speculation and recognition backends.
+"""
+import asyncio
+import os
+import re
+import time
+from .common import REPLAY_CORPUS, legacy_route
+
+
+class FakeTTSStream:
+    """Local stand-in for edge-tts: replays an MP3 in chunks at a fixed bitrate.
+
+    Each sentence gets a prefix of the MP3 proportional to its share of the
+    reply's characters, so the whole reply replays the file once.
+    """
+
+    def __init__(self, data, total_chars, first_byte_ms=150, kbps=512, chunk_bytes=1024):
+        self.data = data
+        self.bytes_per_char = len(data) / max(total_chars, 1)
+        self.first_byte_ms = first_byte_ms
+        self.bytes_per_sec = kbps * 1000 / 8
+        self.chunk_bytes = chunk_bytes
+
+    async def __call__(self, text):
+        data = self.data[:int(len(text) * self.bytes_per_char)]
+        await asyncio.sleep(self.first_byte_ms / 1000)
+        for i in range(0, len(data), self.chunk_bytes):
+            chunk = data[i:i + self.chunk_bytes]
+            await asyncio.sleep(len(chunk) / self.bytes_per_sec)
+            yield chunk
+
+
+class RecordingSink:
+    """Sink that accepts PCM without an audio device and only counts it"""
+
+    def __init__(self):
+        self.pcm_bytes = 0
+
+    def play(self, pcm):
+        self.pcm_bytes += len(pcm)
+
+    def wait(self):
+        pass
+
+    def stop(self):
+        pass
+
+
+def bench_stream(args):
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    import pygame
+    from tts_stream import StreamingSpeaker, PygameDecoder, split_sentences
+
+    pygame.mixer.init()
+    mp3 = args.mp3 or os.path.join(os.path.dirname(pygame.__file__), "examples", "data", "house_lo.mp3")
+    with open(mp3, "rb") as f:
+        data = f.read()
+    from responses import get_responses
+    text = get_responses('company.pushpak_auto_founders', 'english')[0]
+    sentences = split_sentences(text)
+    fake = FakeTTSStream(data, len(text), first_byte_ms=args.first_byte_ms, kbps=args.kbps)
+    decoder = PygameDecoder()
+
+    # Current path: synthesize the whole reply in one request, then decode and play
+    async def synthesize_all():
+        buffer = bytearray()
+        async for chunk in fake(text):
+            buffer.extend(chunk)
+        return bytes(buffer)
+
+    start = time.perf_counter()
+    full = asyncio.run(synthesize_all())
+    decoder.decode(full)
+    save_then_play_ms = (time.perf_counter() - start) * 1000
+
+    speaker = StreamingSpeaker(fake, decoder, RecordingSink(), jitter_ms=args.jitter_ms)
+    report = speaker.speak(text)
+
+    print(f"Reply: {len(sentences)} sentences, fake stream {args.kbps} kbps, first byte {args.first_byte_ms} ms")
+    print(f"save-then-play TTFA: {save_then_play_ms:8.1f} ms")
+    print(f"streaming TTFA:      {report['ttfa_ms']:8.1f} ms "
+          f"({report['segments']} segments, jitter buffer {args.jitter_ms} ms)")
+    return 0
+
+
+def bench_playback(args):
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    import tempfile
+    import pygame
+    from config import Config
+    from playback import MemoryPlayer, PCMCache
+
+    pygame.mixer.init(frequency=Config.PLAYBACK_SAMPLE_RATE, size=-16, channels=Config.PLAYBACK_CHANNELS)
+    mp3 = args.mp3 or os.path.join(os.path.dirname(pygame.__file__), "examples", "data", "house_lo.mp3")
+    with open(mp3, "rb") as f:
+        data = f.read()
+    player = MemoryPlayer()
+    pcm = player.decode(data)
+    # Clip the reply to a typical spoken length
+    pcm = pcm[:int(args.seconds * 1000 * player.decoder.bytes_per_ms) // player.decoder.frame_bytes
+              * player.decoder.frame_bytes]
+    duration = player.duration(pcm)
+
+    # Old path: write response_tts.mp3, load it, poll get_busy() every 100 ms, unload
+    path = os.path.join(tempfile.mkdtemp(), "response_tts.mp3")
+    legacy = []
+    for _ in range(args.turns):
+        start = time.perf_counter()
+        with open(path, "wb") as f:
+            f.write(data)
+        pygame.mixer.music.load(path)
+        pygame.mixer.music.play()
+        started = time.perf_counter()
+        # Stop at the clip length so both paths play the same audio
+        while pygame.mixer.music.get_busy():
+            if time.perf_counter() - started >= duration:
+                pygame.mixer.music.stop()
+                break
+            time.sleep(0.1)
+        pygame.mixer.music.unload()
+        legacy.append(((started - start) * 1000, (time.perf_counter() - started - duration) * 1000))
+
+    # New path: decode once into the PCM cache, then play from memory
+    cache = PCMCache(Config.PCM_CACHE_MAX_BYTES)
+    memory = []
+    for turn in range(args.turns):
+        start = time.perf_counter()
+        buffer = cache.get("reply")
+        if buffer is None:
+            cache.put("reply", pcm)
+            buffer = pcm
+        playback = player.play(buffer)
+        started = time.perf_counter()
+        playback.wait()
+        memory.append(((started - start) * 1000, (time.perf_counter() - started - duration) * 1000))
+
+    def mean(values):
+        return sum(values) / len(values)
+
+    print(f"Reply: {duration:.2f} s, {args.turns} turns each")
+    for name, runs in (("file + 100 ms polling", legacy), ("in-memory + event", memory)):
+        print(f"  {name:22} start {mean([r[0] for r in runs]):6.2f} ms, "
+              f"tail after audio ends {mean([r[1] for r in runs]):6.1f} ms")
+    return 0
+
+
+def bench_loop(args):
+    import aiohttp
+    from audio_loop import AudioLoop
+
+    # Stand-in for one synthesis job: the session setup edge-tts does per
+    # request (without the network round-trip) plus a little async work
+    async def fake_synthesis(connector=None):
+        async with aiohttp.ClientSession(connector=connector):
+            await asyncio.sleep(0)
+        return b""
+
+    def per_turn_ms(fn):
+        start = time.perf_counter()
+        for _ in range(args.turns):
+            fn()
+        return (time.perf_counter() - start) / args.turns * 1000
+
+    before = per_turn_ms(lambda: asyncio.run(fake_synthesis()))
+
+    loop = AudioLoop()
+    loop.run(fake_synthesis())  # Warm the loop thread
+    after = per_turn_ms(lambda: loop.run(fake_synthesis()))
+
+    async def with_shared_connector():
+        return await fake_synthesis(loop.connector())
+
+    shared = per_turn_ms(lambda: loop.run(with_shared_connector()))
+    loop.stop()
+
+    print(f"{args.turns} turns of a fake synthesis job")
+    print(f"asyncio.run per turn:        {before:7.3f} ms/turn")
+    print(f"persistent AudioLoop:        {after:7.3f} ms/turn")
+    print(f"AudioLoop + shared connector:{shared:7.3f} ms/turn")
+    return 0
+
+
+def write_vad_fixtures(directory, count=6, rate=16000, seed=11):
+    """Synthetic speech-like WAVs (voiced syllables, short inter-word pauses,
+    background noise) with a sidecar .json of labelled utterance spans"""
+    import json
+    import wave
+    import numpy as np
+    rng = np.random.default_rng(seed)
+    paths = []
+    for n in range(count):
+        noise_db = -62 + 6 * (n % 3)  # quiet room to busy office
+        parts, spans, t = [], [], 0.0
+
+        def silence(seconds):
+            return np.zeros(int(rate * seconds), dtype=np.float32)
+
+        parts.append(silence(1.0))
+        t += 1.0
+        for _ in range(5):
+            start = t
+            for word in range(rng.integers(3, 8)):
+                duration = rng.uniform(0.12, 0.35)
+                k = np.arange(int(rate * duration)) / rate
+                f0 = rng.uniform(110, 240)
+                voiced = sum(np.sin(2 * np.pi * f0 * h * k) / h for h in range(1, 6))
+                level = 10 ** (rng.uniform(-26, -14) / 20)
+                parts.append((voiced * np.hanning(len(k)) ** 0.5 * level).astype(np.float32))
+                t += duration
+                if word < 6:
+                    gap = rng.uniform(0.04, 0.22)  # pauses between words
+                    parts.append(silence(gap))
+                    t += gap
+            spans.append([round(start, 3), round(t, 3)])
+            gap = rng.uniform(1.5, 3.0)
+            parts.append(silence(gap))
+            t += gap
+        signal = np.concatenate(parts)
+        signal += rng.normal(0, 10 ** (noise_db / 20), len(signal)).astype(np.float32)
+        path = os.path.join(directory, f"vad{n:02d}.wav")
+        with wave.open(path, "wb") as f:
+            f.setnchannels(1)
+            f.setsampwidth(2)
+            f.setframerate(rate)
+            f.writeframes((np.clip(signal, -1, 1) * 32767).astype(np.int16).tobytes())
+        with open(path[:-4] + ".json", "w", encoding="utf-8") as f:
+            json.dump({"utterances": spans}, f)
+        paths.append(path)
+    return paths
+
+
+def score_endpoints(decisions, spans):
+    """(latencies after each utterance end, false cuts inside utterances, misses)"""
+    latencies, cuts, misses = [], 0, 0
+    for i, (start, end) in enumerate(spans):
+        limit = spans[i + 1][0] if i + 1 < len(spans) else float("inf")
+        cuts += sum(1 for d in decisions if start <= d < end)
+        after = [d for d in decisions if end <= d < limit]
+        if after:
+            latencies.append((after[0] - end) * 1000)
+        else:
+            misses += 1
+    return latencies, cuts, misses
+
+
+def legacy_decisions(path):
+    """End-of-phrase times of speech_recognition's listen() with the old settings"""
+    import speech_recognition as sr
+    recognizer = sr.Recognizer()
+    recognizer.energy_threshold = 300
+    recognizer.pause_threshold = 0.8
+    decisions = []
+    with sr.AudioFile(path) as source:
+        total = source.audio_reader.getnframes()
+        while source.audio_reader.tell() < total:
+            try:
+                recognizer.listen(source, timeout=5, phrase_time_limit=10)
+            except sr.WaitTimeoutError:
+                continue
+            decisions.append(source.audio_reader.tell() / source.SAMPLE_RATE)
+    return decisions
+
+
+def bench_vad(args):
+    import json
+    import tempfile
+    from capture import endpoint_file
+
+    paths = args.wav
+    if not paths:
+        directory = args.fixtures or tempfile.mkdtemp()
+        os.makedirs(directory, exist_ok=True)
+        paths = write_vad_fixtures(directory)
+        print(f"Synthetic fixtures in {directory}")
+    labels = {}
+    for path in paths:
+        with open(os.path.splitext(path)[0] + ".json", "r", encoding="utf-8") as f:
+            labels[path] = json.load(f)["utterances"]
+    total = sum(len(spans) for spans in labels.values())
+
+    def report(name, decide):
+        latencies, cuts, misses = [], 0, 0
+        for path in paths:
+            l, c, m = score_endpoints(decide(path), labels[path])
+            latencies += l
+            cuts += c
+            misses += m
+        latencies.sort()
+        p50 = latencies[len(latencies) // 2] if latencies else 0.0
+        p90 = latencies[int(len(latencies) * 0.9)] if latencies else 0.0
+        print(f"  {name:28} endpoint p50 {p50:6.0f} ms, p90 {p90:6.0f} ms, "
+              f"false cuts {cuts / total:5.1%}, missed {misses}/{total}")
+
+    print(f"{total} utterances in {len(paths)} file(s)")
+    try:
+        report("speech_recognition (0.8 s)", legacy_decisions)
+    except ImportError:
+        print("  speech_recognition not installed; skipping the baseline")
+    for hangover in args.hangover_ms:
+        report(f"local VAD ({hangover} ms)",
+               lambda path: [phrase[3] for phrase in endpoint_file(path, hangover_ms=hangover)])
+    return 0
+
+
+def transcript_partials(text, word_ms):
+    """(seconds, partial) pairs as a streaming recognizer reports them: one per word"""
+    words = text.split()
+    return [((i + 1) * word_ms / 1000, " ".join(words[:i + 1])) for i in range(len(words))]
+
+
+def recorded_partials(path, recognizer):
+    """(audio seconds, partial) pairs from a streaming recognizer fed a WAV in 100 ms blocks"""
+    import speech_recognition as sr
+    with sr.AudioFile(path) as source:
+        audio = sr.Recognizer().record(source)
+    raw = audio.get_raw_data(convert_width=2)
+    step = audio.sample_rate // 10 * 2
+    stream = recognizer.start_stream(audio.sample_rate)
+    partials, last = [], None
+    for offset in range(0, len(raw), step):
+        text = stream.feed(raw[offset:offset + step])
+        if text and text != last:
+            partials.append(((offset + step) / 2 / audio.sample_rate, text))
+            last = text
+    final = stream.finish() or ""
+    return partials, final, len(raw) / 2 / audio.sample_rate
+
+
+def bench_speculate(args):
+    from brain import ShipraBrain
+    from speculation import Speculation
+
+    if args.fixtures:
+        from recognizers import create_recognizer
+        recognizer = create_recognizer("vosk")
+        if not recognizer.streaming:
+            print("Replaying recordings needs a streaming backend (vosk)")
+            return 1
+        turns = [recorded_partials(os.path.join(args.fixtures, name), recognizer)
+                 for name in sorted(os.listdir(args.fixtures)) if name.endswith(".wav")]
+        source = f"{len(turns)} recordings in {args.fixtures}"
+    else:
+        # Offline routes only: weather replies depend on the network
+        corpus = [q for q in REPLAY_CORPUS if q.strip() and legacy_route(q)[0] != 'weather']
+        turns = []
+        for text in corpus:
+            partials = transcript_partials(text, args.word_ms)
+            turns.append((partials, text, partials[-1][0]))
+        source = f"{len(turns)} replayed transcripts, {args.word_ms:.0f} ms per word"
+
+    brain = ShipraBrain()
+    print(f"{source}; final transcript {args.endpoint_ms:.0f} ms after speech ends, "
+          f"synthesis takes {args.synth_ms:.0f} ms")
+    for min_stable in args.min_stable:
+        hits = misses = committed = 0
+        saved = []
+        for partials, final, speech_end in turns:
+            spec = Speculation(brain, min_stable=min_stable)
+            commit_time = None
+            for at, partial in partials:
+                had = spec.response is not None
+                spec.update(partial)
+                if spec.response is not None and not had:
+                    commit_time = at
+                elif spec.response is None:
+                    commit_time = None
+            if spec.cancelled or spec.response is not None:
+                committed += 1
+            response, hit = spec.finish(final)
+            if hit:
+                hits += 1
+                # The final transcript lands after the endpointing hangover; the reply's
+                # audio is ready at max(final, commit + synth) instead of final + synth
+                final_at = speech_end + args.endpoint_ms / 1000
+                saved.append(min(args.synth_ms, (final_at - commit_time) * 1000))
+            elif spec.cancelled:
+                misses += 1
+        print(f"  min stable {min_stable}: committed {committed / len(turns):5.1%}, "
+              f"hit {hits / len(turns):5.1%}, wasted syntheses {misses}, "
+              f"saved {sum(saved) / len(turns):6.0f} ms/turn on average "
+              f"({sum(saved) / hits if hits else 0:.0f} ms per hit)")
+    return 0
+
+
+def word_error_rate(reference, hypothesis):
+    from fuzzy import edit_distance
+    ref = re.sub(r"[^\w\s]", " ", reference.lower()).split()
+    hyp = re.sub(r"[^\w\s]", " ", (hypothesis or "").lower()).split()
+    return edit_distance(ref, hyp, len(ref) + len(hyp)) / max(1, len(ref))
+
+
+def record_asr_fixtures(directory):
+    """Prompt each replay-corpus line, record it with the capture engine, save WAV + .txt"""
+    import wave
+    import speech_recognition as sr
+    from capture import CaptureEngine
+    from config import Config
+    os.makedirs(directory, exist_ok=True)
+    engine = CaptureEngine(sr.Microphone(device_index=Config.MIC_INDEX, sample_rate=16000, chunk_size=320))
+    try:
+        for n, prompt in enumerate(q for q in REPLAY_CORPUS if q.strip()):
+            print(f"[{n}] Say: {prompt}")
+            audio = engine.next_phrase(timeout=10)
+            if audio is None:
+                print("    (nothing heard, skipped)")
+                continue
+            path = os.path.join(directory, f"asr{n:03d}")
+            with wave.open(path + ".wav", "wb") as f:
+                f.setnchannels(1)
+                f.setsampwidth(2)
+                f.setframerate(audio.sample_rate)
+                f.writeframes(audio.get_raw_data())
+            with open(path + ".txt", "w", encoding="utf-8") as f:
+                f.write(prompt + "\n")
+    finally:
+        engine.close()
+    return 0
+
+
+def bench_asr(args):
+    import speech_recognition as sr
+    from intents import get_matcher
+    from recognizers import create_recognizer
+
+    if args.record:
+        return record_asr_fixtures(args.record)
+    if not args.fixtures:
+        print("Pass --fixtures DIR (WAVs with matching .txt transcripts); record a set with --record DIR")
+        return 1
+    fixtures = []
+    for name in sorted(os.listdir(args.fixtures)):
+        if name.endswith(".wav") and os.path.exists(os.path.join(args.fixtures, name[:-4] + ".txt")):
+            with open(os.path.join(args.fixtures, name[:-4] + ".txt"), "r", encoding="utf-8") as f:
+                reference = f.read().strip()
+            with sr.AudioFile(os.path.join(args.fixtures, name)) as source:
+                fixtures.append((reference, sr.Recognizer().record(source)))
+    print(f"{len(fixtures)} recorded utterances")
+    matcher = get_matcher()
+
+    for backend in args.backends:
+        for grammar in ([False, True] if backend != "google" else [False]):
+            recognizer = create_recognizer(backend, grammar=grammar)
+            if recognizer.name != backend:
+                break
+            latencies, finish, errors, intents = [], [], 0.0, 0
+            for reference, audio in fixtures:
+                start = time.perf_counter()
+                text = recognizer.recognize(audio)
+                latencies.append((time.perf_counter() - start) * 1000)
+                errors += word_error_rate(reference, text)
+                intents += matcher.match(reference.lower()).route == matcher.match((text or "").lower()).route
+                if recognizer.streaming:
+                    # Feed in 100 ms blocks as capture would; only finish() is left after the user stops
+                    stream = recognizer.start_stream(audio.sample_rate)
+                    raw = audio.get_raw_data(convert_width=2)
+                    step = audio.sample_rate // 10 * 2
+                    for offset in range(0, len(raw), step):
+                        stream.feed(raw[offset:offset + step])
+                    start = time.perf_counter()
+                    stream.finish()
+                    finish.append((time.perf_counter() - start) * 1000)
+            latencies.sort()
+            label = f"{backend}{' + intent grammar' if grammar else ''}"
+            line = (f"  {label:26} p50 {latencies[len(latencies) // 2]:7.1f} ms, "
+                    f"p90 {latencies[int(len(latencies) * 0.9)]:7.1f} ms, "
+                    f"WER {errors / len(fixtures):5.1%}, intent match {intents / len(fixtures):5.1%}")
+            if finish:
+                finish.sort()
+                line += f", streaming final p50 {finish[len(finish) // 2]:.1f} ms"
+            print(line)
+    return 0
@@ -1,17 +1,73 @@
 from config import Config
 import os
-import re
-import random
+import threading
+import time
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 from weather import WeatherService
+from intents import IntentMatcher, get_matcher
+from gazetteer import get_gazetteer
+from catalog import get_catalog, reload_catalog
+from route_cache import RouteCache, Decision, STATIC, EXPIRING, UNCACHED
+from speculation import Speculation
+from metrics import get_metrics
+
+LOCAL_SESSION = "local" # Session id of the single-user voice and text front ends
+
+class KnowledgeState:
+    """Documents and the indexes built from them; replaced whole on reload, so a
+    reader that takes brain.state once sees one consistent version"""
+    __slots__ = ('knowledge', 'vectors', 'company_data', 'vehicle_data', 'generation')
+
+    def __init__(self, knowledge, vectors, company_data, vehicle_data, generation=0):
+        self.knowledge = knowledge
+        self.vectors = vectors
+        self.company_data = company_data
+        self.vehicle_data = vehicle_data
+        self.generation = generation
+
+    def digests(self):
+        """path -> content hash of the indexed files"""
+        if self.knowledge is not None:
+            return self.knowledge.digests()
+        return dict(self.vectors.sources) if self.vectors is not None else {}
+
+    def spoken_texts(self, paths=None):
+        """Every answer text the indexes can return (for the files in paths)"""
+        texts = set()
+        if self.knowledge is not None:
+            texts.update(s.spoken() for s in self.knowledge.sections if paths is None or s.path in paths)
+        if self.vectors is not None:
+            texts.update(c["text"] for c in self.vectors.chunks if paths is None or c["path"] in paths)
+        return texts
 
 class ShipraBrain:
-    def __init__(self, domain="General Assistant"):
+    def __init__(self, domain="General Assistant", watch=None):
         self.domain = domain
-        self.company_data = self.load_company_data()
-        self.vehicle_data = self.load_vehicle_data()
-        self.response_counter = {}
+        self.sessions = self.load_sessions()
+        self._local = threading.local()  # Session id of the current thread (server mode)
         self.weather_service = WeatherService()
+        self.catalog = get_catalog()
+        self.matcher = get_matcher()
+        self.gazetteer = get_gazetteer()
+        self.state = KnowledgeState(self.load_knowledge(), self.load_vectors(),
+                                    self.load_company_data(), self.load_vehicle_data())
+        self.route_cache = RouteCache() if Config.ROUTE_CACHE_ENABLED else None
+        self._knowledge_fingerprint = self.knowledge_fingerprint()
+        self._next_knowledge_check = time.monotonic() + Config.KNOWLEDGE_POLL_INTERVAL
+        self._reload_lock = threading.RLock()
+        self._knowledge_listeners = []
+        self._classifier = None
+        self.watcher = None
+        if Config.KNOWLEDGE_WATCH if watch is None else watch:
+            from watcher import DocumentWatcher
+            self.watcher = DocumentWatcher(self.reload_changed).start()
+        metrics = get_metrics()
+        metrics.register("weather", self.weather_service.stats)
+        metrics.register("session_store", self.sessions.stats)
+        if self.route_cache is not None:
+            metrics.register("route_cache", self.route_cache.stats)
         
     def load_company_data(self):
         """Load company information from Pushpak_Company.md"""
@@ -29,439 +85,444 @@ class ShipraBrain:
         except:
             return ""
     
+    @property
+    def knowledge(self):
+        return self.state.knowledge
+    
+    @property
+    def vectors(self):
+        return self.state.vectors
+    
+    @property
+    def company_data(self):
+        return self.state.company_data
+    
+    @property
+    def vehicle_data(self):
+        return self.state.vehicle_data
+    
+    def load_knowledge(self, previous=None):
+        """Load the BM25 section index, re-parsing only changed markdown files"""
+        if not Config.KNOWLEDGE_ENABLED:
+            return None
+        from knowledge import KnowledgeIndex
+        try:
+            # A copy of the live index keeps its parsed files and skips the pickle
+            knowledge = previous.copy() if previous is not None else KnowledgeIndex()
+            changed = knowledge.refresh()
+            print(f"[Knowledge] {len(knowledge)} sections indexed ({changed} file(s) re-parsed)")
+            return knowledge
+        except Exception as e:
+            print(f"[Knowledge] Error: {e}")
+            return None
+    
+    def knowledge_fingerprint(self):
+        """Modification fingerprint of the knowledge files"""
+        from knowledge import fingerprint
+        return fingerprint()
+    
+    def load_sessions(self):
+        """Bounded response-variation store, restored from its snapshot if enabled"""
+        from session_store import SessionStore
+        sessions = SessionStore()
+        if Config.SESSION_SNAPSHOT_ENABLED:
+            restored = sessions.restore()
+            if restored:
+                print(f"[Sessions] Restored {restored} session(s)")
+        return sessions
+    
+    def load_vectors(self, previous=None):
+        """Open the local vector store, rebuilding it if data/*.md changed"""
+        if not Config.VECTOR_ENABLED:
+            return None
+        from vector_store import VectorStore
+        try:
+            # The previous embedder's word-feature cache makes re-embedding an edited file cheap
+            embedder = previous.embedder if previous is not None else None
+            return VectorStore(embedder=embedder).load(previous)
+        except Exception as e:
+            print(f"[Vectors] Error: {e}")
+            return None
+    
     def detect_language(self, text):
         """Detect if input is primarily Hindi or English"""
-        # Check for explicit 'english' keyword in the query
-        if 'english' in text.lower():
-            return 'english'
-        
-        # Check for specific Hindi keywords that indicate Hinglish preference
-        hinglish_indicators = ['bare', 'mein', 'batao', 'baare']
-        if any(word in text.lower() for word in hinglish_indicators):
-            return 'hindi'
-        
-        # Check for Hindi/Hinglish keywords
-        hindi_keywords = ['hindi', 'hinglish', 'kaun', 'kya', 'kaise', 'kahan', 'kyun', 'kab', 
-                         'hai', 'hain', 'hun', 'ho', 'ko', 'ka', 'ki', 'ke', 'se', 
-                         'tak', 'par', 'aur', 'ya', 'bhi', 'tum', 'aap', 'main', 'yeh', 'veh']
-        
-        # Check for Devanagari characters
-        hindi_chars = len(re.findall(r'[\u0900-\u097F]', text))
-        if hindi_chars > 0:
-            return 'hindi'
-        
-        # Count Hindi keywords in the text
-        words = text.lower().split()
-        hindi_word_count = sum(1 for word in words if word in hindi_keywords)
-        
-        # If more than 20% of words are Hindi keywords, use Hindi
-        if len(words) > 0 and (hindi_word_count / len(words)) > 0.2:
-            return 'hindi'
+        # 'english' keyword, Hinglish indicators, Devanagari characters, then
+        # the >20% Hindi keyword ratio - see IntentMatcher.resolve_language
+        return self.matcher.match(text.lower()).lang
+    
+    @contextmanager
+    def use_session(self, session_id):
+        """Rotate varied responses with a session's own counters on this thread"""
+        previous = getattr(self._local, "session", None)
+        self._local.session = session_id
+        try:
+            yield
+        finally:
+            self._local.session = previous
+    
+    @contextmanager
+    def dry_run(self):
+        """Answer without advancing the variation counters.
         
-        # Default to English for pure English sentences
-        return 'english'
+        Yields the list of counter keys that a real answer would have
+        advanced; pass it to advance() to commit them.
+        """
+        previous = getattr(self._local, "dry_run", None)
+        self._local.dry_run = []
+        try:
+            yield self._local.dry_run
+        finally:
+            self._local.dry_run = previous
+    
+    def advance(self, keys):
+        """Advance the variation counters a dry run recorded"""
+        session_id = getattr(self._local, "session", None) or LOCAL_SESSION
+        for key in keys:
+            self.sessions.bump(session_id, key)
     
     def get_varied_response(self, key, responses):
         """Get varied response to avoid repetition"""
-        if key not in self.response_counter:
-            self.response_counter[key] = 0
-        
-        response = responses[self.response_counter[key] % len(responses)]
-        self.response_counter[key] += 1
-        return response
+        session_id = getattr(self._local, "session", None) or LOCAL_SESSION
+        recorded = getattr(self._local, "dry_run", None)
+        if recorded is not None:
+            recorded.append(key)
+            return responses[self.sessions.get(session_id, key) % len(responses)]
+        return responses[self.sessions.bump(session_id, key) % len(responses)]
+    
+    def speculate(self, on_commit=None, on_cancel=None):
+        """Incremental mode: a Speculation fed with partial transcripts of one utterance"""
+        return Speculation(self, on_commit=on_commit, on_cancel=on_cancel)
+    
+    def respond(self, route, lang):
+        """Reply for a catalog route, rotating its variants unless it has no counter"""
+        variants = route.variants[lang]
+        if route.counter is None:
+            return variants[0]
+        return self.get_varied_response(route.counter, variants)
     
     def get_unknown_response(self, lang):
         """Return unknown response based on language"""
-        if lang == 'hindi':
-            responses = [
-                "Maaf kijiye, main sirf Pushpak O2 company aur vehicle ke baare mein jaankari de sakti hun. Iske baare mein mujhe pata nahi hai.",
-                "Yeh meri expertise ke bahar hai. Main bas Pushpak O2 aur hamare aerial vehicle ke baare mein bata sakti hun.",
-                "Main sirf Pushpak O2 ki assistant hun. Is topic ke baare mein mujhe jaankari nahi hai."
-            ]
-        else:
-            responses = [
-                "Sorry, I can only provide information about Pushpak O2 company and our vehicle. I don't have knowledge about this.",
-                "This is outside my expertise. I can only tell you about Pushpak O2 and our aerial vehicle.",
-                "I'm only an assistant for Pushpak O2. I don't have information about this topic."
-            ]
-        return self.get_varied_response('unknown', responses)
+        return self.respond(self.catalog.route('unknown'), lang)
+    
+    def get_knowledge_answer(self, query, state=None):
+        """Text of the best matching knowledge-base section or chunk, or None"""
+        state = state or self.state
+        if state.knowledge is not None:
+            section = state.knowledge.best(query)
+            if section is not None:
+                return section.spoken()
+        # No keyword overlap: try the n-gram embeddings (catches word variants)
+        if state.vectors is not None:
+            chunk = state.vectors.best(query)
+            if chunk is not None:
+                return chunk["text"]
+        return None
+    
+    def get_knowledge_response(self, query, lang):
+        """Answer from the knowledge base, else the unknown reply"""
+        return self.get_knowledge_answer(query) or self.get_unknown_response(lang)
     
     def analyze_query(self, user_input):
         """Analyze user query and return relevant information"""
+        return self.answer(self.decide(user_input))
+    
+    def decide(self, user_input):
+        """Routing decision for a query whose name prefix is already removed"""
         query = user_input.lower().strip()
         
         # Language detection happens automatically per sentence now
         # No need for persistent language preference
         
-        lang = self.detect_language(user_input)
-        
-        # Company-related queries
-        if any(word in query for word in ['company', 'pushpak o2', 'pushpak auto', 'leadership', 'president', 'aditya', 'aneerudh', 'location', 'bhopal', 'mission', 'founder', 'co-founder', 'kaun hai', 'who is']):
-            return self.get_company_info(query, lang)
-        
-        # Vehicle-related queries  
-        elif any(word in query for word in ['vehicle', 'pushpak', 'aerial', 'drone', 'uas', 'features', 'technology', 'hydrogen', 'autonomous', 'capacity', 'load', 'speed', 'fast', 'kitni speed', 'speeed']):
-            return self.get_vehicle_info(query, lang)
+        # One matcher pass finds every keyword, the winning intent (in the
+        # priority order of data/catalog.json) and the language
+        match = self.matcher.match(query)
+        intent = match.intent
         
-        # Weather queries
-        elif any(word in query for word in ['weather', 'mausam', 'temperature', 'temp', 'garmi', 'sardi', 'baarish', 'rain', 'forecast', 'kal ka mausam', 'aaj ka mausam', 'waether', 'vedar']):
-            return self.get_weather_info(query, lang)
+        # Time queries: the reply changes every minute
+        if intent == 'time':
+            return Decision(query, match, volatility=UNCACHED)
         
-        # How are you queries
-        elif any(word in query for word in ['how are you', 'how r u', 'kaise ho', 'kaisi ho', 'kya haal', 'how do you do', 'how are u']):
-            if lang == 'hindi':
-                responses = [
-                    "Main bilkul theek hun, dhanyawad! Aap kaise hain?",
-                    "Main achhi hun, shukriya! Aap batao, kaise hain?",
-                    "Sab badhiya hai! Aapka din kaisa ja raha hai?"
-                ]
-            else:
-                responses = [
-                    "I'm doing great, thank you! How are you?",
-                    "I'm well, thanks for asking! How about you?",
-                    "All good! How is your day going?"
-                ]
-            return self.get_varied_response('how_are_you', responses)
+        # Weather queries: a named city skips IP geolocation entirely
+        elif intent == 'weather':
+            return Decision(query, match, place=self.gazetteer.find(query), volatility=EXPIRING)
         
-        # Time queries
-        elif any(word in query for word in ['time', 'samay', 'kitne baje', 'what time', 'current time', 'abhi kitne baje']):
-            now = datetime.now()
-            hour = now.hour
-            minute = now.minute
-            
-            if lang == 'hindi':
-                # Convert to 12-hour format for Hinglish
-                period = "subah" if hour < 12 else "shaam" if hour < 18 else "raat"
-                hour_12 = hour if hour <= 12 else hour - 12
-                hour_12 = 12 if hour_12 == 0 else hour_12
-                
-                if minute == 0:
-                    responses = [
-                        f"Abhi {hour_12} baje {period} ke hain.",
-                        f"Time hai {hour_12} baje {period}.",
-                        f"{period} ke {hour_12} baj gaye hain."
-                    ]
-                else:
-                    responses = [
-                        f"Abhi {hour_12} baj kar {minute} minute {period} ke hain.",
-                        f"Time hai {hour_12}:{minute:02d} {period}.",
-                        f"{period} ke {hour_12} baj kar {minute} minute hue hain."
-                    ]
-            else:
-                period = "AM" if hour < 12 else "PM"
-                hour_12 = hour if hour <= 12 else hour - 12
-                hour_12 = 12 if hour_12 == 0 else hour_12
-                
-                responses = [
-                    f"It's {hour_12}:{minute:02d} {period}.",
-                    f"The current time is {hour_12}:{minute:02d} {period}.",
-                    f"Right now it's {hour_12}:{minute:02d} {period}."
-                ]
-            return self.get_varied_response('time', responses)
-        
-        # Personal questions about Shipra
-        elif any(word in query for word in ['who are you', 'kaun ho', 'tum kaun', 'your purpose', 'tumhara purpose', 'why you', 'kyu banaya', 'apne bare', 'apne baare']):
-            if 'purpose' in query or 'kyu' in query:
-                if lang == 'hindi':
-                    responses = [
-                        "Mera purpose hai Pushpak vehicle ke baare mein jaankari dena. Main aerial vehicle ki features, capacity aur technology ke baare mein bata sakti hun.",
-                        "Mujhe isliye banaya gaya hai taaki main Pushpak vehicle ki information provide kar sakun. Main vehicle specifications aur capabilities ke baare mein batati hun.",
-                        "Mera kaam hai Pushpak aerial vehicle ke baare mein batana - uski capacity, features aur technology."
-                    ]
-                else:
-                    responses = [
-                        "My purpose is to provide information about the Pushpak vehicle. I can tell you about the aerial vehicle's features, capacity, and technology.",
-                        "I was created to provide information about the Pushpak vehicle. I share details about vehicle specifications and capabilities.",
-                        "My job is to inform about the Pushpak aerial vehicle - its capacity, features, and technology."
-                    ]
-            else:
-                if lang == 'hindi':
-                    responses = [
-                        "Main Shipra hun, Pushpak vehicle ki AI assistant. Main aerial vehicle ke baare mein jaankari deti hun.",
-                        "Namaste! Main Shipra, Pushpak vehicle ki voice assistant. Main vehicle information ke liye yahan hun.",
-                        "Main Shipra, Pushpak aerial vehicle ki dedicated assistant hun. Main vehicle technology ke baare mein bata sakti hun."
-                    ]
-                else:
-                    responses = [
-                        "I am Shipra, the AI assistant for Pushpak vehicle. I provide information about the aerial vehicle.",
-                        "Hello! I'm Shipra, the voice assistant for Pushpak vehicle. I'm here to help with vehicle information.",
-                        "I am Shipra, the dedicated assistant for Pushpak aerial vehicle. I can tell you about vehicle technology."
-                    ]
-            return self.get_varied_response('identity', responses)
+        # Company, vehicle, how are you, identity, greetings and goodbyes:
+        # the catalog routes the (intent, sub-intent) pair to its replies
+        route = self.catalog.route(intent, match.sub_intent)
+        if route is not None and intent != 'unknown':
+            return Decision(query, match, route=route)
+        state = self.state
+        return Decision(query, match, answer=self.get_knowledge_answer(query, state), generation=state.generation)
+    
+    def answer(self, decision):
+        """Reply for a routing decision (variants still rotate per turn)"""
+        lang = decision.match.lang
+        if decision.route is not None:
+            return self.respond(decision.route, lang)
+        intent = decision.match.intent
+        if intent == 'time':
+            return self.get_time_response(lang)
+        elif intent == 'weather':
+            return self.get_weather_report(lang, decision.place, decision.match.sub_intent == 'forecast')
+        return decision.answer or self.get_unknown_response(lang)
+    
+    def route(self, user_input):
+        """decide() for the raw input, memoized by its normalized text"""
+        key = user_input.lower().strip()
+        if self.watcher is None:
+            self.check_knowledge()
+        if self.route_cache is None:
+            return self.decide(self.remove_name_prefix(key))
+        decision = self.route_cache.get(key)
+        # A knowledge answer decided while a reload was swapping indexes may outlive its invalidation
+        if decision is None or decision.generation not in (None, self.state.generation):
+            decision = self.decide(self.remove_name_prefix(key))
+            self.route_cache.put(key, decision)
+        return decision
+    
+    def check_knowledge(self):
+        """Reload the knowledge base if its files changed (at most every KNOWLEDGE_POLL_INTERVAL).
+
+        Only used without a DocumentWatcher (KNOWLEDGE_WATCH off).
+        """
+        now = time.monotonic()
+        if now < self._next_knowledge_check:
+            return False
+        self._next_knowledge_check = now + Config.KNOWLEDGE_POLL_INTERVAL
+        with self._reload_lock:
+            if self.knowledge_fingerprint() == self._knowledge_fingerprint:
+                return False
+            self.reload_knowledge()
+        return True
+    
+    def on_knowledge_change(self, callback):
+        """Call callback(texts) after a reload with the reply texts it made stale (to drop their audio)"""
+        self._knowledge_listeners.append(callback)
+    
+    def _notify_stale(self, texts):
+        for callback in self._knowledge_listeners:
+            try:
+                callback(texts)
+            except Exception as e:
+                print(f"[Brain] Knowledge listener error: {e}")
+    
+    def reload_changed(self, paths):
+        """DocumentWatcher callback: reload the catalog and/or knowledge base (paths None: both)"""
+        catalog_file = os.path.abspath(Config.CATALOG_FILE)
+        if paths is None or catalog_file in paths:
+            self.reload_catalog()
+        if paths is None or any(path != catalog_file for path in paths):
+            self.reload_knowledge(paths)
+    
+    def reload_catalog(self):
+        """Swap in an edited data/catalog.json: replies, routes and intent keywords.
         
-        # General greetings and social responses
-        elif any(word in query for word in ['hello', 'hi', 'hey', 'namaste', 'नमस्ते', 'good morning', 'good afternoon', 'good evening', 'thank you', 'thanks', 'dhanyawad', 'धन्यवाद']):
-            if 'thank' in query or 'dhanyawad' in query or 'धन्यवाद' in query:
-                if lang == 'hindi':
-                    responses = [
-                        "Koi baat nahi! Khushi se madad ki.",
-                        "Swagat hai! Aur kuch chahiye?",
-                        "Dhanyawad aapka! Kuch aur poochna hai?"
-                    ]
-                else:
-                    responses = [
-                        "No problem! Happy to help.",
-                        "You're welcome! Anything else?",
-                        "Thank you! Any other questions?"
-                    ]
-            elif 'good morning' in query:
-                if lang == 'hindi':
-                    responses = [
-                        "Suprabhat! Aaj kaise madad kar sakti hun?",
-                        "Good morning! Din shubh ho, kya chahiye?",
-                        "Namaskar! Subah ki shuruaat kaise karein?"
-                    ]
-                else:
-                    responses = [
-                        "Good morning! How can I help you today?",
-                        "Good morning! Have a great day, what do you need?",
-                        "Hello! How shall we start the morning?"
-                    ]
-            elif 'good afternoon' in query:
-                if lang == 'hindi':
-                    responses = [
-                        "Namaskar! Dopahar kaisi ja rahi hai?",
-                        "Good afternoon! Kaise sahayata karun?",
-                        "Pranaam! Din kaisa chal raha hai?"
-                    ]
-                else:
-                    responses = [
-                        "Hello! How is your afternoon going?",
-                        "Good afternoon! How can I assist you?",
-                        "Greetings! How is your day going?"
-                    ]
-            elif 'good evening' in query:
-                if lang == 'hindi':
-                    responses = [
-                        "Shubh sandhya! Shaam kaisi hai?",
-                        "Good evening! Kaise madad karun?",
-                        "Namaskar! Sandhya ki shuruaat achhi ho!"
-                    ]
-                else:
-                    responses = [
-                        "Good evening! How is your evening?",
-                        "Good evening! How can I help?",
-                        "Hello! Have a great evening!"
-                    ]
-            else:
-                if lang == 'hindi':
-                    responses = [
-                        "Namaste! Main Shipra hun, Pushpak O2 ki AI assistant. Kaise madad kar sakti hun?",
-                        "Hello! Shipra yahan, aapki seva mein. Kya chahiye?",
-                        "Namaskar! Main Pushpak O2 ki AI assistant Shipra. Bataiye kaise sahayata karun?"
-                    ]
-                else:
-                    responses = [
-                        "Hello! I am Shipra, the AI assistant for Pushpak O2. How can I help you?",
-                        "Hi! Shipra here, at your service. What do you need?",
-                        "Greetings! I am Shipra, the AI assistant for Pushpak O2. How can I assist you?"
-                    ]
-            return self.get_varied_response('greeting', responses)
+        The language rules (english marker, Hinglish words) are module tables
+        of intents.py and change on restart only.
+        """
+        with self._reload_lock:
+            old = self.catalog
+            try:
+                catalog = reload_catalog()
+            except Exception as e:
+                print(f"[Brain] Catalog not reloaded, keeping the current one: {e}")
+                return False
+            if catalog.raw == old.raw:
+                return False
+            language = ('english_marker', 'hinglish_indicators', 'hindi_keywords', 'hindi_keyword_ratio')
+            if any(getattr(catalog, name) != getattr(old, name) for name in language):
+                print("[Brain] Catalog language rules changed: they apply after a restart")
+            matcher = self.matcher
+            if catalog.intents != old.intents or catalog.sub_intent_rules != old.sub_intent_rules:
+                matcher = IntentMatcher(catalog.intents, catalog.sub_intent_rules)
+            self.catalog, self.matcher = catalog, matcher
+            # Any decision may route differently now
+            dropped = self.route_cache.invalidate(None) if self.route_cache is not None else 0
+            stale = old.reply_texts() - catalog.reply_texts()
+            print(f"[Brain] Catalog reloaded: {dropped} cached decision(s) dropped, {len(stale)} stale reply text(s)")
+            self._notify_stale(stale)
+            return True
+    
+    def reload_knowledge(self, paths=None):
+        """Re-index changed knowledge files and swap them in (paths: the files reported changed).
         
-        # Exit commands
-        elif any(word in query for word in ['bye', 'goodbye', 'exit', 'stop', 'alvida', 'अलविदा', 'tata', 'see you']):
-            # Use Hinglish for Hindi exit words, English for English exit words
-            if any(word in query for word in ['alvida', 'अलविदा', 'tata']):
-                responses = [
-                    "Dhanyawad! Phir milte hain. Jay Shree Ram.",
-                    "Achha, phir baat karte hain. Namaste! Jay Shree Ram.",
-                    "Theek hai, alvida! Khush rahiye. Jay Shree Ram."
-                ]
-            else:
-                responses = [
-                    "Thank you! See you again. Jay Shree Ram.",
-                    "Alright, talk to you later. Goodbye! Jay Shree Ram.",
-                    "Okay, goodbye! Stay happy. Jay Shree Ram."
-                ]
-            return self.get_varied_response('goodbye', responses)
+        The new indexes are built next to the live ones from copies that reuse
+        every unchanged file, then replace them in one assignment, so turns in
+        flight never wait and never mix versions. Catalog routes and weather
+        decisions are kept. Memoized knowledge answers are dropped, because a
+        changed file can shift the ranking for any query.
+        """
+        with self._reload_lock:
+            self._knowledge_fingerprint = self.knowledge_fingerprint()
+            old = self.state
+            knowledge = self.load_knowledge(old.knowledge)
+            vectors = self.load_vectors(old.vectors)
+            # An index that fails to rebuild keeps serving its previous version
+            state = KnowledgeState(old.knowledge if knowledge is None else knowledge,
+                                   old.vectors if vectors is None else vectors,
+                                   self.load_company_data(), self.load_vehicle_data(), old.generation)
+            before, after = old.digests(), state.digests()
+            changed = {path for path in set(before) | set(after) if before.get(path) != after.get(path)}
+            if changed:
+                state.generation += 1
+            self.state = state
+            if not changed:
+                return 0
+            stale = old.spoken_texts(changed) - state.spoken_texts(changed)
+            dropped = 0
+            if self.route_cache is not None:
+                dropped = self.route_cache.invalidate(STATIC, where=lambda decision: decision.generation is not None)
+            names = ", ".join(sorted(os.path.basename(path) for path in changed))
+            print(f"[Brain] Knowledge reloaded ({names}): {dropped} cached answer(s) dropped, "
+                  f"{len(stale)} stale text(s)")
+            self._notify_stale(stale)
+            return len(changed)
+    
+    def get_time_response(self, lang):
+        """Format the current time in the detected language"""
+        now = datetime.now()
+        hour = now.hour
+        minute = now.minute
         
+        if lang == 'hindi':
+            # Convert to 12-hour format for Hinglish
+            period = "subah" if hour < 12 else "shaam" if hour < 18 else "raat"
         else:
-            return self.get_unknown_response(lang)
+            period = "AM" if hour < 12 else "PM"
+        hour_12 = hour if hour <= 12 else hour - 12
+        hour_12 = 12 if hour_12 == 0 else hour_12
+        
+        templates = self.catalog.template('time.on_the_hour' if minute == 0 else 'time.minutes', lang)
+        template = self.get_varied_response('time', templates)
+        return template.format(hour_12=hour_12, minute=minute, period=period)
     
-    def get_company_info(self, query, lang):
+    def get_company_info(self, query, lang, match=None):
         """Extract specific company information based on query"""
         # Language is already detected, no need to override
-            
-        if 'president' in query or 'aditya' in query:
-            if lang == 'hindi':
-                responses = [
-                    "Shri Aditya Shrivastava hamare President aur Co-Founder hain. Ve strategic vision aur governance handle karte hain.",
-                    "Aditya ji Pushpak O2 ke President hain. Company ki strategic direction ve dekhte hain.",
-                    "Mr. Aditya Shrivastava hamare mukhya neta hain, President ke roop mein governance ka kaam karte hain."
-                ]
-            else:
-                responses = [
-                    "Mr. Aditya Shrivastava is our President and Co-Founder. He handles strategic vision and governance.",
-                    "Aditya ji is the President of Pushpak O2. He oversees the company's strategic direction.",
-                    "Mr. Aditya Shrivastava is our chief leader, working as President handling governance."
-                ]
-            return self.get_varied_response('president', responses)
-            
-        elif 'aneerudh' in query or 'technology lead' in query:
-            if lang == 'hindi':
-                responses = [
-                    "Shri Aneerudh Kumar hamare Co-Founder aur Technology Lead hain. Ve engineering aur systems architecture dekhte hain.",
-                    "Aneerudh ji technical operations handle karte hain. Ve hamare Technology Lead hain.",
-                    "Mr. Aneerudh Kumar engineering ka poora kaam dekhte hain, Co-Founder bhi hain."
-                ]
-            else:
-                responses = [
-                    "Mr. Aneerudh Kumar is our Co-Founder and Technology Lead. He handles engineering and systems architecture.",
-                    "Aneerudh ji handles technical operations. He is our Technology Lead.",
-                    "Mr. Aneerudh Kumar oversees all engineering work and is also a Co-Founder."
-                ]
-            return self.get_varied_response('aneerudh', responses)
-            
-        elif ('founder' in query and ('kaun hai' in query or 'who is' in query)) or ('pushpak auto' in query and ('founder' in query or 'kaun hai' in query)):
-            if lang == 'hindi':
-                responses = [
-                    "Pushpak O2 ke do co-founders hain - Mr. Aditya Shrivastava jo President hain aur Mr. Aneerudh Kumar jo Technology Lead hain. Dono milkar company ko chala rahe hain.",
-                    "Pushpak auto yaani Pushpak O2 ke founders hain Aditya Shrivastava sahab (President) aur Aneerudh Kumar ji (Technology Lead). Dono co-founders hain.",
-                    "Hamare company ke do mukhya neta hain - Aditya ji jo business operations handle karte hain aur Aneerudh ji jo technical work dekhte hain."
-                ]
-            else:
-                responses = [
-                    "Pushpak O2 has two co-founders - Mr. Aditya Shrivastava who is the President and Mr. Aneerudh Kumar who is the Technology Lead. Both are running the company together.",
-                    "Pushpak auto, which is Pushpak O2, has founders Aditya Shrivastava (President) and Aneerudh Kumar (Technology Lead). Both are co-founders.",
-                    "Our company has two main leaders - Aditya ji who handles business operations and Aneerudh ji who oversees technical work."
-                ]
-            return self.get_varied_response('pushpak_auto_founders', responses)
-        elif 'founder' in query or 'co-founder' in query:
-            if lang == 'hindi':
-                responses = [
-                    "Pushpak O2 ke do co-founders hain - Mr. Aditya Shrivastava (President) aur Mr. Aneerudh Kumar (Technology Lead). Dono milkar company ko aage badha rahe hain.",
-                    "Hamare founders hain Aditya ji jo business operations handle karte hain aur Aneerudh ji jo technical side dekhte hain.",
-                    "Company ke do mukhya neta hain - strategic leadership ke liye Aditya Shrivastava aur technical innovation ke liye Aneerudh Kumar."
-                ]
-            else:
-                responses = [
-                    "Pushpak O2 has two co-founders - Mr. Aditya Shrivastava (President) and Mr. Aneerudh Kumar (Technology Lead). Both are advancing the company together.",
-                    "Our founders are Aditya ji who handles business operations and Aneerudh ji who oversees the technical side.",
-                    "The company has two main leaders - Aditya Shrivastava for strategic leadership and Aneerudh Kumar for technical innovation."
-                ]
-        elif 'location' in query or 'bhopal' in query:
-            if lang == 'hindi':
-                responses = [
-                    "Pushpak O2 ka headquarters Bhopal, Madhya Pradesh mein hai.",
-                    "Hamara mukhyalay Bhopal mein sthit hai, MP mein.",
-                    "Company ka base Bhopal, Madhya Pradesh mein hai."
-                ]
-            else:
-                responses = [
-                    "Pushpak O2's headquarters is in Bhopal, Madhya Pradesh.",
-                    "Our headquarters is located in Bhopal, MP.",
-                    "The company's base is in Bhopal, Madhya Pradesh."
-                ]
-            return self.get_varied_response('location', responses)
-            
-        else:
-            if lang == 'hindi':
-                responses = [
-                    "Pushpak O2 ek Indian aerospace company hai jo indigenous aviation platforms aur unmanned aerial systems develop karti hai.",
-                    "Yeh Bharatiya aerospace company hai jo swadeshi vimanan takneek banati hai.",
-                    "Hamari company indigenous aircraft aur drone technology mein kaam karti hai."
-                ]
-            else:
-                responses = [
-                    "Pushpak O2 is an Indian aerospace company that develops indigenous aviation platforms and unmanned aerial systems.",
-                    "It is an Indian aerospace company that builds indigenous aviation technology.",
-                    "Our company works in indigenous aircraft and drone technology."
-                ]
-            return self.get_varied_response('company_general', responses)
-    
-    def get_vehicle_info(self, query, lang):
+        if match is None:
+            match = self.matcher.match(query)
+        # president / aneerudh / pushpak_auto_founders / founders / location / general
+        topic = self.matcher.resolve_sub_intent('company', match.keywords)
+        return self.respond(self.catalog.route('company', topic), lang)
+    
+    def get_vehicle_info(self, query, lang, match=None):
         """Extract specific vehicle information based on query"""
         # Language is already detected, no need to override
-            
-        if 'capacity' in query or 'load' in query or 'person' in query:
-            if lang == 'hindi':
-                responses = [
-                    "Pushpak vehicle ki load capacity 500kg hai ya 4 persons tak le ja sakta hai.",
-                    "Yeh 4 logon ko carry kar sakta hai ya 500 kilo wajan utha sakta hai.",
-                    "Ismein 4 vyakti baith sakte hain ya 500kg ka bhaar le ja sakta hai."
-                ]
-            else:
-                responses = [
-                    "Pushpak vehicle has a load capacity of 500kg or can carry up to 4 persons.",
-                    "It can carry 4 people or lift 500 kilograms of weight.",
-                    "The vehicle can seat 4 persons or carry a load of 500kg."
-                ]
-            return self.get_varied_response('capacity', responses)
-        
-        elif 'speed' in query or 'fast' in query or 'kitni speed' in query or 'top speed' in query or 'speeed' in query:
-            # Always respond in both languages for speed queries
-            return "Pushpak vehicle ki top speed 400 kilometer per hour hai. The top speed of Pushpak vehicle is 400 kilometers per hour."
-            
-        elif 'features' in query:
-            if lang == 'hindi':
-                responses = [
-                    "Pushpak vehicle mein AI-enabled autonomous flight, real-time obstacle detection, hydrogen fuel cell power, aur zero-emission operations hai.",
-                    "Ismein swachalit udaan, baadha pehchaan, hydrogen indhan aur shunya pradooshan ki suvidha hai.",
-                    "Vehicle mein AI flight control, obstacle avoidance, hydrogen power aur eco-friendly operations hain."
-                ]
-            else:
-                responses = [
-                    "Pushpak vehicle has AI-enabled autonomous flight, real-time obstacle detection, hydrogen fuel cell power, and zero-emission operations.",
-                    "It features autonomous flight, obstacle detection, hydrogen fuel, and pollution-free operations.",
-                    "The vehicle has AI flight control, obstacle avoidance, hydrogen power, and eco-friendly operations."
-                ]
-            return self.get_varied_response('features', responses)
-            
-        else:
-            if lang == 'hindi':
-                responses = [
-                    "Pushpak ek advanced unmanned aerial system hai with hybrid capabilities aur DGCA compliant design.",
-                    "Yeh ek unnat drone hai jo hybrid technology aur DGCA maankon ke anusaar bana hai.",
-                    "Pushpak aerial vehicle ek smart UAS hai jo sabhi aviation niyamon ka paalan karta hai."
-                ]
-            else:
-                responses = [
-                    "Pushpak is an advanced unmanned aerial system with hybrid capabilities and DGCA compliant design.",
-                    "It is an advanced drone built with hybrid technology and DGCA standards.",
-                    "Pushpak aerial vehicle is a smart UAS that complies with all aviation regulations."
-                ]
-            return self.get_varied_response('vehicle_general', responses)
-    
-    def get_weather_info(self, query, lang):
+        if match is None:
+            match = self.matcher.match(query)
+        # capacity / speed / features / general
+        # Speed replies are bilingual and have no counter
+        topic = self.matcher.resolve_sub_intent('vehicle', match.keywords)
+        return self.respond(self.catalog.route('vehicle', topic), lang)
+    
+    def get_weather_info(self, query, lang, match=None):
         """Get weather information based on query"""
-        # Check if asking for forecast/tomorrow
-        if 'forecast' in query or 'kal' in query or 'tomorrow' in query:
-            forecast = self.weather_service.get_forecast(lang)
-            if forecast:
-                return forecast
-            else:
-                if lang == 'hindi':
-                    return "Maaf kijiye, mausam ki jaankari abhi nahi mil pa rahi hai."
-                else:
-                    return "Sorry, weather information is not available right now."
+        if match is None:
+            match = self.matcher.match(query)
+        # A named city skips IP geolocation entirely
+        place = self.gazetteer.find(query)
+        forecast = self.matcher.resolve_sub_intent('weather', match.keywords) == 'forecast'
+        return self.get_weather_report(lang, place, forecast)
+    
+    def get_weather_report(self, lang, place, forecast):
+        """Today's weather (or the forecast) for place, or the unavailable reply"""
+        if forecast:
+            report = self.weather_service.get_forecast(lang, place=place)
         # Default: return today's weather for any weather keyword
         else:
-            weather = self.weather_service.get_weather(lang)
-            if weather:
-                return weather
-            else:
-                if lang == 'hindi':
-                    return "Maaf kijiye, mausam ki jaankari abhi nahi mil pa rahi hai."
-                else:
-                    return "Sorry, weather information is not available right now."
+            report = self.weather_service.get_weather(lang, place=place)
+        if report:
+            return report
+        return self.catalog.replies('weather.unavailable', lang)[0]
+    
+    def exit_reply(self, user_input):
+        """Farewell line if the input is an exit command, otherwise None"""
+        # Respond based on the word used (Hinglish words are checked first)
+        text = user_input.lower()
+        for words, key in self.catalog.exit_rules:
+            for word in words:
+                if word in text:
+                    return self.catalog.replies(key, 'any')[0]
+        return None
     
     def chat(self, user_input):
         """Main chat function that analyzes and responds"""
-        # Remove name prefix if present
-        cleaned_input = self.remove_name_prefix(user_input)
-        return self.analyze_query(cleaned_input)
+        # Name prefix removal and routing are memoized per normalized text
+        return self.answer(self.route(user_input))
     
+    def chat_detail(self, user_input):
+        """chat() plus the routing labels and latency, for the text front end"""
+        start = time.perf_counter()
+        farewell = self.exit_reply(user_input)
+        decision = self.route(user_input)
+        match = decision.match
+        response = farewell or self.answer(decision)
+        return {"text": user_input, "response": response, "intent": match.intent,
+                "sub_intent": match.sub_intent, "lang": match.lang, "exit": farewell is not None,
+                "latency_ms": (time.perf_counter() - start) * 1000}
+    
+    def chat_batch(self, texts, workers=None, chunk_size=None):
+        """chat_detail() for every text, in order, optionally over a process pool.
+        
+        The corpus is cut into fixed chunks and every chunk starts from fresh
+        response counters, so the varied replies come out the same for any
+        worker count or scheduling.
+        """
+        workers = workers or Config.BATCH_WORKERS
+        chunk_size = chunk_size or Config.BATCH_CHUNK_SIZE
+        chunks = [texts[i:i + chunk_size] for i in range(0, len(texts), chunk_size)]
+        if workers <= 1 or len(chunks) <= 1:
+            return [detail for chunk in chunks for detail in _run_chunk(self, chunk)]
+        with ProcessPoolExecutor(max_workers=workers, initializer=_batch_worker_init) as pool:
+            return [detail for results in pool.map(_batch_worker_run, chunks) for detail in results]
+
+    def classify_batch(self, texts):
+        """Routing labels for every text without replies (BatchLabels, see classify.py).
+
+        Same labels as chat_detail(): the text is lowercased, stripped and loses
+        its name prefix before classification.
+        """
+        from classify import BatchClassifier
+        if self._classifier is None or self._classifier.matcher is not self.matcher:
+            self._classifier = BatchClassifier(self.matcher)  # Rebuilt after a catalog reload
+        prefixes = tuple(self.catalog.name_prefixes)
+        queries = [text.lower().strip() for text in texts]
+        queries = [self.remove_name_prefix(query) if query.startswith(prefixes) else query for query in queries]
+        return self._classifier.classify(queries)
+
     def remove_name_prefix(self, text):
         """Remove 'Shipra' or similar name prefixes from input"""
-        # Common name patterns
-        name_patterns = ['shipra', 'shipra ji', 'hey shipra', 'hi shipra', 'hello shipra']
-        
-        text_lower = text.lower().strip()
+        text = text.strip()
+        text_lower = text.lower()
         
-        for pattern in name_patterns:
+        # Common name patterns (catalog "name_prefixes")
+        for pattern in self.catalog.name_prefixes:
             if text_lower.startswith(pattern):
                 # Remove the name and any following comma or whitespace
                 remaining = text[len(pattern):].lstrip(' ,').strip()
                 return remaining if remaining else text
         
-        return text
\ No newline at end of file
+        return text
+
+
+def _run_chunk(brain, chunk):
+    session_id = f"batch-{threading.get_ident()}"
+    brain.sessions.reset(session_id)
+    try:
+        with brain.use_session(session_id):
+            return [brain.chat_detail(text) for text in chunk]
+    finally:
+        brain.sessions.drop(session_id)
+
+
+_worker_brain = None
+
+
+def _batch_worker_init():
+    """Process pool initializer: one brain per worker process"""
+    global _worker_brain
+    _worker_brain = ShipraBrain(watch=False)
+
+
+def _batch_worker_run(chunk):
+    return _run_chunk(_worker_brain, chunk)
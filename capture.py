@@ -0,0 +1,280 @@
+"""
+Persistent microphone capture with a local voice-activity detector. One
+input stream stays open for the life of the assistant and a reader thread
+copies it into a ring buffer. Utterances are cut from the buffer by a NumPy
+frame-energy VAD that tracks the background noise floor and ends a phrase
+after a short hangover of silence, instead of speech_recognition's fixed
+energy threshold and 0.8 s pause.
+"""
+import threading
+import numpy as np
+from config import Config
+
+
+class RingBuffer:
+    """Fixed-size int16 sample buffer written by one thread, read by another"""
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self._data = np.zeros(capacity, dtype=np.int16)
+        self.written = 0  # Samples written since start (absolute position)
+        self.overruns = 0
+        self._cond = threading.Condition()
+
+    def write(self, samples):
+        n = len(samples)
+        if n >= self.capacity:
+            samples = samples[-self.capacity:]
+        with self._cond:
+            start = (self.written + n - len(samples)) % self.capacity
+            first = min(len(samples), self.capacity - start)
+            self._data[start:start + first] = samples[:first]
+            self._data[:len(samples) - first] = samples[first:]
+            self.written += n
+            self._cond.notify_all()
+
+    def read(self, position, timeout=None):
+        """(samples, new position) of everything written after position.
+
+        Waits up to timeout for new data. If the reader fell more than a
+        buffer behind, the lost samples are skipped.
+        """
+        with self._cond:
+            if self.written <= position:
+                self._cond.wait(timeout)
+            oldest = max(0, self.written - self.capacity)
+            if position < oldest:
+                self.overruns += 1
+                position = oldest
+            n = self.written - position
+            start = position % self.capacity
+            first = min(n, self.capacity - start)
+            samples = np.concatenate((self._data[start:start + first], self._data[:n - first]))
+            return samples, self.written
+
+
+class Endpointer:
+    """Frame-energy VAD with an adaptive noise floor and hangover-based endpointing.
+
+    process() takes int16 samples in any block size and returns events:
+    ('speech_start', time) once speech has lasted onset_ms, and
+    ('phrase', (samples, start, end, decided)) once it has been followed by
+    hangover_ms of silence. Times are seconds since the first sample. With
+    emit_audio, the utterance's samples are also passed on as they arrive,
+    as ('audio', samples) events, for streaming recognizers.
+    """
+
+    def __init__(self, sample_rate, frame_ms=None, margin_db=None, min_energy_db=None, onset_ms=None,
+                 hangover_ms=None, preroll_ms=None, max_phrase=None, emit_audio=False):
+        self.sample_rate = sample_rate
+        self.emit_audio = emit_audio
+        self.frame = int(sample_rate * (frame_ms or Config.VAD_FRAME_MS) / 1000)
+        frame_s = self.frame / sample_rate
+        self.margin_db = Config.VAD_MARGIN_DB if margin_db is None else margin_db
+        self.min_energy_db = Config.VAD_MIN_ENERGY_DB if min_energy_db is None else min_energy_db
+        self.onset_frames = max(1, round((Config.VAD_ONSET_MS if onset_ms is None else onset_ms) / 1000 / frame_s))
+        self.hangover_frames = max(1, round((Config.VAD_HANGOVER_MS if hangover_ms is None else hangover_ms)
+                                            / 1000 / frame_s))
+        self.preroll_frames = round((Config.VAD_PREROLL_MS if preroll_ms is None else preroll_ms) / 1000 / frame_s)
+        self.max_frames = round((max_phrase or Config.VAD_MAX_PHRASE_SECONDS) / frame_s)
+        self.boost_db = 0.0  # Extra margin, e.g. while the assistant is talking (echo guard)
+        self.floor_db = None
+        self.frames_seen = 0
+        self._pending = np.zeros(0, dtype=np.int16)
+        self.reset()
+
+    def reset(self):
+        """Forget the current utterance; the noise floor is kept"""
+        self._frames = []  # Pre-roll, then the utterance being collected
+        self._in_speech = False
+        self._voiced = 0  # Consecutive speech frames before onset
+        self._silent = 0  # Consecutive silent frames inside an utterance
+        self._speech_end = 0
+        self._emitted = 0  # Frames of the utterance already sent as 'audio' events
+
+    def energies(self, frames):
+        """Frame energies in dBFS for a (n, frame) int16 block"""
+        x = frames.astype(np.float32) / 32768.0
+        return 10.0 * np.log10(np.mean(x * x, axis=1) + 1e-10)
+
+    def process(self, samples):
+        samples = np.concatenate((self._pending, samples)) if len(self._pending) else samples
+        count = len(samples) // self.frame
+        self._pending = samples[count * self.frame:]
+        if not count:
+            return []
+        frames = samples[:count * self.frame].reshape(count, self.frame)
+        energies = self.energies(frames)
+        if self.floor_db is None:
+            self.floor_db = float(np.min(energies[:max(1, min(count, self.onset_frames * 4))]))
+
+        events = []
+        for frame, energy in zip(frames, energies):
+            self.frames_seen += 1
+            threshold = max(self.floor_db + self.margin_db + self.boost_db, self.min_energy_db)
+            if self._in_speech:
+                # Hysteresis: soft syllable tails keep the utterance going
+                speech = energy > threshold - 3.0
+            else:
+                speech = energy > threshold
+                # Track the floor only outside speech: down fast, up slowly
+                rate = 0.2 if energy < self.floor_db else 0.02
+                self.floor_db += rate * (energy - self.floor_db)
+            self._frames.append(frame)
+            if not self._in_speech:
+                self._voiced = self._voiced + 1 if speech else 0
+                if self._voiced >= self.onset_frames:
+                    self._in_speech = True
+                    self._silent = 0
+                    self._speech_end = self.frames_seen
+                    events.append(('speech_start', self.frames_seen * self.frame / self.sample_rate))
+                elif len(self._frames) > self.preroll_frames + self.onset_frames:
+                    del self._frames[0]
+                continue
+            if speech:
+                self._silent = 0
+                self._speech_end = self.frames_seen
+            else:
+                self._silent += 1
+            if self._silent >= self.hangover_frames or len(self._frames) >= self.max_frames:
+                self._emit(events)
+                events.append(('phrase', self._finish()))
+        if self._in_speech:
+            self._emit(events)
+        return events
+
+    def _emit(self, events):
+        if self.emit_audio and self._emitted < len(self._frames):
+            events.append(('audio', np.concatenate(self._frames[self._emitted:])))
+            self._emitted = len(self._frames)
+
+    def _finish(self):
+        """The collected utterance, trimmed to the last speech frame"""
+        keep = len(self._frames) - (self.frames_seen - self._speech_end)
+        audio = np.concatenate(self._frames[:keep]) if keep > 0 else np.zeros(0, dtype=np.int16)
+        frame_s = self.frame / self.sample_rate
+        end = self._speech_end * frame_s
+        phrase = (audio, end - len(audio) / self.sample_rate, end, self.frames_seen * frame_s)
+        self.reset()
+        return phrase
+
+    def flush(self):
+        """End of input: the utterance in progress, if any, as a final event"""
+        events = []
+        if self._in_speech:
+            self._emit(events)
+            events.append(('phrase', self._finish()))
+        return events
+
+
+class CaptureEngine:
+    """Keeps one microphone stream open and cuts utterances with Endpointer"""
+
+    def __init__(self, microphone):
+        self.microphone = microphone
+        self.source = None
+        self.ring = None
+        self.endpointer = None
+        self._thread = None
+        self._closed = threading.Event()
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Open the input stream once and start the reader thread"""
+        with self._lock:
+            if self._thread is not None:
+                return self
+            self.source = self.microphone.__enter__()
+            rate = self.source.SAMPLE_RATE
+            self.ring = RingBuffer(int(rate * Config.CAPTURE_RING_SECONDS))
+            self.endpointer = Endpointer(rate)
+            self._thread = threading.Thread(target=self._reader, name="capture", daemon=True)
+            self._thread.start()
+            print(f"[Capture] Stream open at {rate} Hz")
+        return self
+
+    def _reader(self):
+        while not self._closed.is_set():
+            try:
+                data = self.source.stream.read(self.source.CHUNK)
+            except Exception as e:
+                print(f"[Capture] Read Error: {e}")
+                self._closed.wait(0.1)
+                continue
+            self.ring.write(np.frombuffer(data, dtype=np.int16))
+
+    def events(self, stop_event, start_timeout=None, boost=None, audio=False):
+        """Yield ('speech_start', None) and ('phrase', AudioData) until stop_event is set.
+
+        With start_timeout, stops if no speech begins within that many seconds.
+        boost() is polled for the extra onset margin in dB (echo guard). With
+        audio, ('audio', PCM bytes) events carry the utterance as it is spoken.
+        """
+        import speech_recognition as sr
+        self.start()
+        endpointer = self.endpointer
+        endpointer.reset()
+        endpointer.emit_audio = audio
+        # Start from now (plus pre-roll), not from audio captured while idle or talking
+        position = max(0, self.ring.written - endpointer.preroll_frames * endpointer.frame)
+        waited = 0.0
+        started = False
+        while not stop_event.is_set() and not self._closed.is_set():
+            samples, position = self.ring.read(position, timeout=0.1)
+            if boost is not None:
+                endpointer.boost_db = boost()
+            if not len(samples):
+                waited += 0.1
+            else:
+                waited += len(samples) / self.source.SAMPLE_RATE
+            for event, data in endpointer.process(samples):
+                if event == 'speech_start':
+                    started = True
+                    yield 'speech_start', None
+                elif event == 'audio':
+                    yield 'audio', data.tobytes()
+                else:
+                    started = False
+                    waited = 0.0
+                    yield 'phrase', sr.AudioData(data[0].tobytes(), self.source.SAMPLE_RATE, 2)
+            if start_timeout is not None and not started and waited >= start_timeout:
+                return
+
+    def next_phrase(self, timeout=None):
+        """AudioData of the next utterance, or None if nobody spoke within timeout"""
+        for event, data in self.events(threading.Event(), start_timeout=timeout):
+            if event == 'phrase':
+                return data
+        return None
+
+    def close(self):
+        self._closed.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+            self.microphone.__exit__(None, None, None)
+            self._thread = None
+
+
+def read_wav(path):
+    """(int16 mono samples, sample rate) of a 16-bit PCM WAV file"""
+    import wave
+    with wave.open(path, "rb") as f:
+        if f.getsampwidth() != 2:
+            raise ValueError(f"{path}: only 16-bit PCM is supported")
+        samples = np.frombuffer(f.readframes(f.getnframes()), dtype=np.int16)
+        if f.getnchannels() > 1:
+            samples = samples.reshape(-1, f.getnchannels()).mean(axis=1).astype(np.int16)
+        return samples, f.getframerate()
+
+
+def endpoint_file(path, block_ms=100, **options):
+    """Run the Endpointer over a WAV file in real-time-sized blocks; list of phrases"""
+    samples, rate = read_wav(path)
+    endpointer = Endpointer(rate, **options)
+    block = int(rate * block_ms / 1000)
+    phrases = []
+    for start in range(0, len(samples), block):
+        phrases.extend(data for event, data in endpointer.process(samples[start:start + block])
+                       if event == 'phrase')
+    phrases.extend(data for _, data in endpointer.flush())
+    return phrases
@@ -0,0 +1,287 @@
+"""
+Response and routing catalog. Everything ShipraBrain says or routes on is
+declared in data/catalog.json:
+
+    intents        intents in priority order: a query goes to the first one
+                   with any keyword present as a substring. Sub-intents are
+                   checked in order; each is a list of clauses ("all") and
+                   matches when every clause has a keyword hit, otherwise the
+                   sub-intent is 'general'.
+    language       Hinglish detection: the 'english' marker and indicator
+                   words (substrings), Hindi function words (whole tokens) and
+                   the share of them that makes a query Hindi
+    routes         intent -> sub-intent -> reply key and variation counter
+                   (null: always the first variant)
+    responses      '<intent>.<topic>' -> language ('hindi', 'english', or
+                   'any' for both) -> variants
+    templates      replies with runtime values (str.format), never warmed up
+    exit, name_prefixes
+                   farewell words and the wake-word prefixes chat() strips
+
+compile_source() turns it into immutable tables (tuples, frozensets,
+interned strings) plus the keyword trie of the intent matcher, and
+load_catalog() keeps those tables in a marshal snapshot in CACHE_DIRECTORY
+next to a copy of the source they came from, so a normal start skips JSON parsing and the
+trie build. Catalog wraps the tables in slot objects; a route lookup
+on the hot path is two dict lookups that allocate nothing.
+"""
+import marshal
+import os
+import sys
+import threading
+from config import Config
+
+# Bump when the compiled table layout changes (invalidates old snapshots)
+CATALOG_FORMAT = 1
+
+LANGUAGES = ('hindi', 'english')
+
+
+def build_trie(vocabulary):
+    """Aho-Corasick trie over vocabulary: (goto, fail, order, outputs).
+
+    order is the breadth-first state order that fold_automaton() needs.
+    """
+    goto = [{}]
+    outputs = [()]
+    for keyword in vocabulary:
+        state = 0
+        for ch in keyword:
+            nxt = goto[state].get(ch)
+            if nxt is None:
+                nxt = len(goto)
+                goto[state][ch] = nxt
+                goto.append({})
+                outputs.append(())
+            state = nxt
+        outputs[state] = outputs[state] + (keyword,)
+
+    # Breadth-first failure links; outputs inherit from their fail state
+    fail = [0] * len(goto)
+    order = list(goto[0].values())
+    head = 0
+    while head < len(order):
+        state = order[head]
+        head += 1
+        for ch, nxt in goto[state].items():
+            order.append(nxt)
+            f = fail[state]
+            while f and ch not in goto[f]:
+                f = fail[f]
+            fail[nxt] = goto[f].get(ch, 0)
+            if outputs[fail[nxt]]:
+                outputs[nxt] = outputs[nxt] + outputs[fail[nxt]]
+    return goto, fail, order, outputs
+
+
+def fold_automaton(goto, fail, order):
+    """Fold the failure links into a full transition table (a DFA) so the
+    scan is one dict lookup per character; unknown characters go to root"""
+    delta = [None] * len(goto)
+    delta[0] = dict(goto[0])
+    for state in order:
+        transitions = dict(delta[fail[state]])
+        transitions.update(goto[state])
+        delta[state] = transitions
+    return delta
+
+
+def build_automaton(vocabulary):
+    """Keyword DFA for vocabulary: (delta, outputs)"""
+    goto, fail, order, outputs = build_trie(vocabulary)
+    return fold_automaton(goto, fail, order), outputs
+
+
+def keyword_vocabulary(english_marker, hinglish_indicators, intents, sub_intent_rules):
+    """Every routing and language keyword once, in table order"""
+    vocabulary = [english_marker] + list(hinglish_indicators)
+    for _, keywords in intents:
+        vocabulary.extend(keywords)
+    for rules in sub_intent_rules.values():
+        for _, clauses in rules:
+            for clause in clauses:
+                vocabulary.extend(clause)
+    return list(dict.fromkeys(vocabulary))
+
+
+def _strings(values):
+    return tuple(sys.intern(value) for value in values)
+
+
+def _variants(entries, kind):
+    """key -> language -> variants, with 'any' standing in for missing languages"""
+    table = {}
+    for key, entry in entries.items():
+        variants = {sys.intern(lang): _strings(texts) for lang, texts in entry.items()}
+        if not all(variants.values()):
+            raise ValueError(f"{kind} '{key}' has a language without variants")
+        if 'any' in variants:
+            for lang in LANGUAGES:
+                variants.setdefault(lang, variants['any'])
+        table[sys.intern(key)] = variants
+    return table
+
+
+def compile_source(source):
+    """Validate the parsed catalog.json and compile it to snapshot-ready tables"""
+    intents = tuple((sys.intern(intent['name']), _strings(intent['keywords'])) for intent in source['intents'])
+    sub_intent_rules = {}
+    for intent in source['intents']:
+        if intent.get('sub_intents'):
+            sub_intent_rules[sys.intern(intent['name'])] = tuple(
+                (sys.intern(rule['name']), tuple(_strings(clause) for clause in rule['all']))
+                for rule in intent['sub_intents'])
+    language = source['language']
+    english_marker = sys.intern(language['english_marker'])
+    hinglish_indicators = _strings(language['hinglish_indicators'])
+
+    responses = _variants(source['responses'], 'response')
+    templates = _variants(source.get('templates', {}), 'template')
+    routes = {}
+    for intent, subs in source['routes'].items():
+        routes[sys.intern(intent)] = {}
+        for sub_intent, route in subs.items():
+            if route['reply'] not in responses:
+                raise ValueError(f"route {intent}.{sub_intent} names unknown reply '{route['reply']}'")
+            counter = route.get('counter')
+            routes[intent][sys.intern(sub_intent)] = (sys.intern(route['reply']),
+                                                      sys.intern(counter) if counter else None)
+    exit_rules = []
+    for rule in source.get('exit', ()):
+        if rule['reply'] not in responses:
+            raise ValueError(f"exit rule names unknown reply '{rule['reply']}'")
+        exit_rules.append((_strings(rule['words']), sys.intern(rule['reply'])))
+
+    vocabulary = keyword_vocabulary(english_marker, hinglish_indicators, intents, sub_intent_rules)
+    goto, fail, order, outputs = build_trie(vocabulary)
+    return {
+        'intents': intents,
+        'sub_intent_rules': sub_intent_rules,
+        'english_marker': english_marker,
+        'hinglish_indicators': hinglish_indicators,
+        'hindi_keywords': frozenset(_strings(language['hindi_keywords'])),
+        'hindi_keyword_ratio': float(language['hindi_keyword_ratio']),
+        'name_prefixes': _strings(source.get('name_prefixes', ())),
+        'exit_rules': tuple(exit_rules),
+        'responses': responses,
+        'templates': templates,
+        'routes': routes,
+        'vocabulary': tuple(vocabulary),
+        # The folded DFA is ~10x the size of the trie and slower to unmarshal
+        # than to rebuild, so the snapshot keeps the trie
+        'automaton': (goto, fail, order),
+        'outputs': outputs,
+    }
+
+
+class Route:
+    """Reply variants of one (intent, sub-intent) and the counter rotating them"""
+    __slots__ = ('key', 'counter', 'variants')
+
+    def __init__(self, key, counter, variants):
+        self.key = key
+        self.counter = counter  # None: always the first variant
+        self.variants = variants  # language -> tuple of texts
+
+    def __repr__(self):
+        return f"Route({self.key!r}, counter={self.counter!r})"
+
+
+class Catalog:
+    """Compiled catalog tables; read-only after construction"""
+    __slots__ = ('intents', 'sub_intent_rules', 'english_marker', 'hinglish_indicators', 'hindi_keywords',
+                 'hindi_keyword_ratio', 'name_prefixes', 'exit_rules', 'responses', 'templates', 'routes',
+                 'vocabulary', 'delta', 'outputs', 'source', 'raw')
+
+    def __init__(self, tables, source=None, raw=None):
+        for name in self.__slots__[:-2]:
+            if name != 'delta':
+                setattr(self, name, tables[name])
+        self.delta = fold_automaton(*tables['automaton'])
+        self.routes = {intent: {sub_intent: Route(key, counter, self.responses[key])
+                                for sub_intent, (key, counter) in subs.items()}
+                       for intent, subs in tables['routes'].items()}
+        self.source = source  # 'snapshot' or 'compiled'
+        self.raw = raw  # catalog.json bytes the tables came from
+
+    def route(self, intent, sub_intent='general'):
+        """Route for a matcher result, or None (unrouted intents: weather, time, unknown queries)"""
+        subs = self.routes.get(intent)
+        if subs is None:
+            return None
+        return subs.get(sub_intent) or subs.get('general')
+
+    def replies(self, key, lang):
+        """Variants of response key in lang, falling back to the language-neutral entry"""
+        entry = self.responses[key]
+        return entry.get(lang) or entry['any']
+
+    def template(self, key, lang):
+        entry = self.templates[key]
+        return entry.get(lang) or entry['any']
+
+    def exit_words(self):
+        return [word for words, _ in self.exit_rules for word in words]
+
+    def reply_texts(self):
+        """Every static reply variant"""
+        return {text for entry in self.responses.values() for variants in entry.values() for text in variants}
+
+
+def _stamp():
+    return f"{CATALOG_FORMAT}:{sys.implementation.cache_tag}:{marshal.version}"
+
+
+def load_catalog(source_file=None, snapshot_file=None):
+    """Catalog from its snapshot when it matches the source, else compiled (and snapshotted)"""
+    source_file = source_file or Config.CATALOG_FILE
+    snapshot_file = Config.CATALOG_SNAPSHOT_FILE if snapshot_file is None else snapshot_file
+    with open(source_file, "rb") as f:
+        raw = f.read()
+    if snapshot_file:
+        try:
+            with open(snapshot_file, "rb") as f:
+                data = marshal.loads(f.read())  # marshal.load(f) reads in small pieces
+            # The snapshot keeps its source: comparing bytes is cheaper than hashing
+            if data.get("stamp") == _stamp() and data.get("source") == raw:
+                return Catalog(data["tables"], source="snapshot", raw=raw)
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"[Catalog] Ignoring unreadable snapshot: {e}")
+
+    import json
+    tables = compile_source(json.loads(raw.decode("utf-8")))
+    if snapshot_file:
+        try:
+            os.makedirs(os.path.dirname(snapshot_file) or ".", exist_ok=True)
+            tmp = f"{snapshot_file}.{os.getpid()}.tmp"
+            with open(tmp, "wb") as f:
+                marshal.dump({"stamp": _stamp(), "source": raw, "tables": tables}, f)
+            os.replace(tmp, snapshot_file)
+        except OSError as e:
+            print(f"[Catalog] Could not write snapshot: {e}")
+    return Catalog(tables, source="compiled", raw=raw)
+
+
+_catalog = None
+_catalog_lock = threading.Lock()
+
+
+def get_catalog():
+    """Process-wide catalog, loaded on first use"""
+    global _catalog
+    if _catalog is None:
+        with _catalog_lock:
+            if _catalog is None:
+                _catalog = load_catalog()
+    return _catalog
+
+
+def reload_catalog():
+    """Load catalog.json again and make it the process-wide catalog (raises on an invalid file)"""
+    global _catalog
+    catalog = load_catalog()
+    with _catalog_lock:
+        _catalog = catalog
+    return catalog
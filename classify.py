@@ -0,0 +1,231 @@
+"""
+Batch intent and language classification with NumPy. IntentMatcher.match
+walks one query at a time through its keyword automaton; BatchClassifier
+gives the same (intent, sub-intent, language) labels for a whole batch:
+
+    1. fuzzy correction of the distinct words of the batch (one regex pass)
+    2. queries become rows of a padded code-point matrix, sorted by length
+       into chunks so short queries are not padded to the longest one
+    3. the keyword DFA advances every row of a chunk in lockstep, one column
+       per step, ORing each state's keyword bitset into its row
+    4. keyword hits (rows x keywords) times 0/1 keyword-to-intent and
+       keyword-to-clause matrices give per-intent scores and sub-intent rule
+       checks; the first non-zero intent in priority order wins
+    5. whitespace runs in the matrix count each row's words, the batch's
+       tokens (one str.split) map to Hindi-vocabulary ids and are summed per
+       row for the Hindi keyword ratio; Devanagari is a range test
+"""
+import re
+import numpy as np
+from config import Config
+from fuzzy import WORD
+from intents import DEVANAGARI_FIRST, DEVANAGARI_LAST, ENGLISH_MARKER, HINDI_KEYWORD_RATIO, HINDI_KEYWORDS, \
+    HINGLISH_INDICATORS, get_matcher
+
+LANGUAGES = ('english', 'hindi')
+SEPARATOR = '\x00'  # Joins a batch into one string; never part of a keyword or a word
+
+_WORD_SPLIT = re.compile(f"({WORD.pattern})")
+
+# str.split() whitespace: no code point above U+3000 is whitespace
+_WHITESPACE = np.array([chr(c).isspace() for c in range(0x3001)] + [False])
+
+
+class BatchLabels:
+    """Classification of a batch: label ids per row plus the name tables"""
+
+    def __init__(self, intents, sub_intents, intent, sub_intent, lang, has_devanagari, scores):
+        self.intents = intents  # Intent names in priority order, then 'unknown'
+        self.sub_intents = sub_intents  # Sub-intent names, 'general' first
+        self.intent = intent  # Row -> index into intents
+        self.sub_intent = sub_intent  # Row -> index into sub_intents
+        self.lang = lang  # Row -> index into LANGUAGES
+        self.has_devanagari = has_devanagari
+        self.scores = scores  # Row x intent: distinct keywords hit
+
+    def __len__(self):
+        return len(self.intent)
+
+    def labels(self):
+        """(intent, sub_intent, lang) per row, as IntentMatch would give"""
+        return [(self.intents[i], self.sub_intents[s], LANGUAGES[l])
+                for i, s, l in zip(self.intent.tolist(), self.sub_intent.tolist(), self.lang.tolist())]
+
+
+class BatchClassifier:
+    """Vectorized IntentMatcher.match over lowercased queries"""
+
+    def __init__(self, matcher=None, chunk_rows=None):
+        self.matcher = matcher or get_matcher()
+        self.chunk_rows = chunk_rows or Config.CLASSIFY_CHUNK_ROWS
+        matcher = self.matcher
+        vocabulary = matcher.vocabulary
+        self.column = column = {keyword: i for i, keyword in enumerate(vocabulary)}
+
+        # Dense DFA: states x character classes (class 0: any other character -> root)
+        alphabet = sorted({ord(ch) for keyword in vocabulary for ch in keyword})
+        classes = {chr(code): i + 1 for i, code in enumerate(alphabet)}
+        self.classes = np.zeros(alphabet[-1] + 2, dtype=np.int32)  # Code point -> class (clamped: last is 0)
+        self.classes[alphabet] = np.arange(1, len(alphabet) + 1)
+        self.transitions = np.zeros((len(matcher._delta), len(alphabet) + 1), dtype=np.int32)
+        for state, moves in enumerate(matcher._delta):
+            for ch, target in moves.items():
+                self.transitions[state, classes[ch]] = target
+
+        # Keyword bitset emitted by each state
+        words = (len(vocabulary) + 63) // 64
+        self.outputs = np.zeros((len(matcher._outputs), words), dtype=np.uint64)
+        for state, keywords in enumerate(matcher._outputs):
+            for keyword in keywords:
+                i = column[keyword]
+                self.outputs[state, i // 64] |= np.uint64(1) << np.uint64(i % 64)
+        self.keywords = len(vocabulary)
+
+        # Keyword -> intent and keyword -> clause incidence, clause -> rule sums
+        self.intents = tuple(name for name, _ in matcher.intent_keywords) + ('unknown',)
+        self.intent_matrix = np.zeros((self.keywords, len(self.intents) - 1), dtype=np.float32)
+        for i, (_, keywords) in enumerate(matcher.intent_keywords):
+            for keyword in keywords:
+                self.intent_matrix[column[keyword], i] = 1
+        sub_intents = ['general']
+        clauses, rule_intent, rule_sub, rule_size = [], [], [], []
+        for i, (intent, _) in enumerate(matcher.intent_keywords):
+            for name, rule in matcher.sub_intent_rules.get(intent, ()):
+                if name not in sub_intents:
+                    sub_intents.append(name)
+                rule_intent.append(i)
+                rule_sub.append(sub_intents.index(name))
+                rule_size.append(len(rule))
+                clauses.extend((len(rule_intent) - 1, clause) for clause in rule)
+        self.sub_intents = tuple(sub_intents)
+        self._intent_index = {name: i for i, name in enumerate(self.intents)}
+        self._sub_index = {name: i for i, name in enumerate(self.sub_intents)}
+        self.clause_matrix = np.zeros((self.keywords, len(clauses)), dtype=np.float32)
+        self.rule_matrix = np.zeros((len(clauses), len(rule_intent)), dtype=np.float32)
+        for c, (rule, clause) in enumerate(clauses):
+            self.rule_matrix[c, rule] = 1
+            for keyword in clause:
+                self.clause_matrix[column[keyword], c] = 1
+        self.rule_intent = np.array(rule_intent, dtype=np.int32)
+        self.rule_sub = np.array(rule_sub, dtype=np.int32)
+        self.rule_size = np.array(rule_size, dtype=np.float32)
+
+        self.english_column = column[ENGLISH_MARKER]
+        self.hinglish_columns = np.array([column[word] for word in HINGLISH_INDICATORS], dtype=np.int64)
+        self.hindi_vocabulary = {word: i for i, word in enumerate(sorted(HINDI_KEYWORDS))}
+
+    def correct(self, queries):
+        """Fuzzy-correct every query, looking up each distinct word once"""
+        corrector = self.matcher.corrector
+        if corrector is None or not queries:
+            return queries
+        # Words sit at the odd positions of the split; unchanged words map to themselves
+        parts = _WORD_SPLIT.split(SEPARATOR.join(queries))
+        words = parts[1::2]
+        changed = {}
+        for word in set(words):
+            corrected = corrector.correct_word(word)
+            if corrected != word:
+                changed[word] = corrected
+        if not changed:
+            return queries
+        parts[1::2] = map(changed.get, words, words)
+        corrected = "".join(parts).split(SEPARATOR)
+        # A query containing the separator itself is corrected on its own
+        return corrected if len(corrected) == len(queries) else [corrector.correct(query) for query in queries]
+
+    def classify(self, queries):
+        """BatchLabels for lowercased, stripped queries (as IntentMatcher.match takes them)"""
+        queries = list(queries)
+        if len(queries) < Config.CLASSIFY_MIN_BATCH:
+            return self._match_each(queries)
+        queries = self.correct(queries)
+        n = len(queries)
+        intent = np.full(n, len(self.intents) - 1, dtype=np.int32)
+        sub_intent = np.zeros(n, dtype=np.int32)
+        lang = np.zeros(n, dtype=np.int8)
+        devanagari = np.zeros(n, dtype=bool)
+        scores = np.zeros((n, len(self.intents) - 1), dtype=np.int32)
+        lengths = np.fromiter(map(len, queries), dtype=np.int64, count=n)
+        order = np.argsort(lengths, kind="stable")
+        for start in range(0, n, self.chunk_rows):
+            rows = order[start:start + self.chunk_rows]
+            chunk = [queries[i] for i in rows.tolist()]
+            labels = self._classify_chunk(chunk, lengths[rows])
+            intent[rows], sub_intent[rows], lang[rows], devanagari[rows], scores[rows] = labels
+        return BatchLabels(self.intents, self.sub_intents, intent, sub_intent, lang, devanagari, scores)
+
+    def _match_each(self, queries):
+        """Small batches: the scalar matcher beats NumPy's per-call overhead"""
+        matches = [self.matcher.match(query) for query in queries]
+        intent_index, sub_index, column = self._intent_index, self._sub_index, self.column
+        rows = [row for row, match in enumerate(matches) for _ in match.keywords]
+        columns = [column[keyword] for match in matches for keyword in match.keywords]
+        found = np.zeros((len(matches), self.keywords), dtype=np.float32)
+        found[rows, columns] = 1
+        return BatchLabels(self.intents, self.sub_intents,
+                           np.array([intent_index[m.intent] for m in matches], dtype=np.int32),
+                           np.array([sub_index[m.sub_intent] for m in matches], dtype=np.int32),
+                           np.array([LANGUAGES.index(m.lang) for m in matches], dtype=np.int8),
+                           np.array([m.has_devanagari for m in matches], dtype=bool),
+                           (found @ self.intent_matrix).astype(np.int32))
+
+    def _classify_chunk(self, queries, lengths):
+        n = len(queries)
+        width = int(lengths.max()) if n else 0
+        valid = np.arange(width) < lengths[:, None]
+        codes = np.zeros((n, width), dtype=np.uint32)
+        codes[valid] = np.frombuffer("".join(queries).encode("utf-32-le"), dtype=np.uint32)
+
+        # Character classes, then the DFA over all rows at once (flat table, one column per step)
+        classes = self.classes[np.minimum(codes, len(self.classes) - 1)].T.copy()
+        stride = self.transitions.shape[1]
+        transitions = self.transitions.ravel()
+        hits = np.zeros((n, self.outputs.shape[1]), dtype=np.uint64)
+        state = np.zeros(n, dtype=np.int32)
+        for column in classes:
+            state *= stride
+            state += column
+            state = transitions.take(state)
+            hits |= self.outputs.take(state, axis=0)
+        found = np.unpackbits(hits.view(np.uint8), axis=1, bitorder="little")[:, :self.keywords].astype(np.float32)
+
+        # Intent: first intent (priority order) with any keyword hit
+        scores = found @ self.intent_matrix
+        hit = scores > 0
+        intent = np.where(hit.any(axis=1), hit.argmax(axis=1), len(self.intents) - 1).astype(np.int32)
+
+        # Sub-intent: first rule of that intent whose clauses all have a hit
+        satisfied = ((found @ self.clause_matrix > 0).astype(np.float32) @ self.rule_matrix) == self.rule_size
+        satisfied &= self.rule_intent[None, :] == intent[:, None]
+        sub_intent = np.where(satisfied.any(axis=1), self.rule_sub[satisfied.argmax(axis=1)], 0).astype(np.int32)
+
+        # Language: marker, Hinglish indicators, Devanagari, then the Hindi word ratio
+        devanagari = ((codes >= ord(DEVANAGARI_FIRST)) & (codes <= ord(DEVANAGARI_LAST))).any(axis=1)
+        hindi = found[:, self.hinglish_columns].any(axis=1) | devanagari
+        space = ~valid | _WHITESPACE[np.minimum(codes, len(_WHITESPACE) - 1)]
+        starts = ~space
+        starts[:, 1:] &= space[:, :-1]
+        words = starts.sum(axis=1)
+        tokens = SEPARATOR.join(queries).replace(SEPARATOR, " ").split()
+        if len(tokens) == int(words.sum()):
+            ids = np.fromiter(map(self.hindi_vocabulary.get, tokens, [-1] * len(tokens)),
+                              dtype=np.int32, count=len(tokens))
+            hindi_words = np.bincount(np.repeat(np.arange(n), words), weights=ids >= 0, minlength=n)
+        else:
+            hindi_words = np.array([sum(1 for word in query.split() if word in HINDI_KEYWORDS) for query in queries])
+        with np.errstate(divide="ignore", invalid="ignore"):
+            hindi |= (words > 0) & (hindi_words / words > HINDI_KEYWORD_RATIO)
+        lang = np.where(found[:, self.english_column] > 0, 0, hindi.astype(np.int8)).astype(np.int8)
+        return intent, sub_intent, lang, devanagari, scores.astype(np.int32)
+
+
+_default_classifier = None
+
+
+def get_classifier():
+    """Shared classifier over the default matcher"""
+    global _default_classifier
+    if _default_classifier is None:
+        _default_classifier = BatchClassifier()
+    return _default_classifier
@@ -10,6 +10,67 @@ class Config:
     
     # Audio Settings
     MIC_INDEX = None # Set to Integer ID (e.g., 1) to use specific mic
+
+    # Pipeline Mode (python main.py --pipeline): overlapped listen/recognize/think/speak
+    PIPELINE_MODE = False
+    PIPELINE_QUEUE_SIZE = 4 # Bound on each inter-stage queue
+    PIPELINE_ASR_WORKERS = 2 # Concurrent recognition requests
+    BARGE_IN = True # Stop speaking when the user starts talking
+    BARGE_IN_ENERGY_FACTOR = 2.5 # Mic energy multiplier while Shipra is talking (echo guard)
+    SPECULATION_ENABLED = True # Commit the intent from partial transcripts and pre-synthesize
+    SPECULATION_MIN_STABLE = 2 # Confidence needed: stable partials (+1 for a specific sub-intent)
+    SPECULATION_INTENTS = ('company', 'vehicle', 'how_are_you', 'identity', 'greeting') # Offline replies only
+
+    # Capture and Voice Activity Detection (one open input stream, local VAD)
+    VAD_ENABLED = True # False falls back to speech_recognition's energy threshold
+    CAPTURE_SAMPLE_RATE = 16000
+    CAPTURE_RING_SECONDS = 30 # Audio kept in the capture ring buffer
+    VAD_FRAME_MS = 20
+    VAD_MARGIN_DB = 9 # Speech must be this far above the adaptive noise floor
+    VAD_MIN_ENERGY_DB = -50 # ...and above this absolute level (dBFS)
+    VAD_ONSET_MS = 60 # Speech needed before an utterance starts (and barge-in fires)
+    VAD_HANGOVER_MS = 300 # Trailing silence that ends an utterance
+    VAD_PREROLL_MS = 200 # Audio kept from before the onset
+    VAD_MAX_PHRASE_SECONDS = 10
+    LISTEN_TIMEOUT = 5 # Seconds listen() waits for speech to begin
+
+    # Speech Recognition Backend: "google" (online), "vosk" or "whisper" (offline, CPU)
+    ASR_BACKEND = "google"
+    ASR_INTENT_GRAMMAR = False # Bias offline backends towards the intent keywords
+    ASR_PARTIALS = True # Stream partial transcripts while the user talks (vosk)
+    VOSK_MODEL_PATH = os.path.join(os.getcwd(), "models", "vosk-model-small-en-in-0.4")
+    WHISPER_MODEL = "base.en" # pywhispercpp model name or path to a ggml file
+
+    # Fuzzy Keyword Matching (ASR mishearings like "waether", "speeed")
+    FUZZY_MATCHING = True
+    FUZZY_MIN_LENGTH = 6 # Shorter words must match exactly
+    FUZZY_MAX_EDITS = 2 # Edit budget for words of 8+ letters (1 below that)
+    FUZZY_MIN_SIMILARITY = 0.8 # 1 - edits / word length needed to rewrite a word
+    FUZZY_COMMON_WORDS_FILE = os.path.join(os.getcwd(), "data", "common_words.txt") # Never rewritten; None to disable
+
+    # Headless Text Mode (python main.py --text / python headless.py)
+    BATCH_WORKERS = 1 # Processes for ShipraBrain.chat_batch
+    BATCH_CHUNK_SIZE = 256 # Utterances per chunk; each chunk restarts response variation
+    CLASSIFY_CHUNK_ROWS = 4096 # Queries per NumPy block in classify.py (sorted by length first)
+    CLASSIFY_MIN_BATCH = 96 # Smaller batches go through IntentMatcher.match one by one (crossover from python -m benchmarks classify)
+
+    # Server Mode (python server.py): many sessions sharing one brain
+    SERVER_HOST = "127.0.0.1"
+    SERVER_PORT = 8765
+    SERVER_THREADS = 8 # Brain calls run on this thread pool (weather lookups block)
+    SERVER_MAX_SESSIONS = 1000 # New sessions are refused (503) beyond this
+    SERVER_MAX_INFLIGHT = 64 # Requests processed at once before shedding load (503)
+    SERVER_RATE_PER_SEC = 5 # Per-session token bucket refill rate
+    SERVER_RATE_BURST = 10 # Per-session token bucket size
+    SERVER_SESSION_TTL = 900 # Seconds before an idle session is dropped
+    SERVER_HISTORY = 10 # Recent turns kept per session
+    SERVER_MAX_CLASSIFY = 100000 # Texts accepted by one POST /classify
+
+    # Voice Settings - User Custom (20Hz, ~170wpm)
+    TTS_VOICE = "en-IN-NeerjaNeural"
+    TTS_RATE = "+22%"  # Approx 170 wpm
+    TTS_VOLUME = "+10%"
+    TTS_PITCH = "+18Hz"  # User specified
     
     GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
     
@@ -19,8 +80,90 @@ class Config:
     # Persistence Paths
     CHROMA_PERSIST_DIRECTORY = os.path.join(os.getcwd(), "chroma_db")
     DOCUMENTS_DIRECTORY = os.path.join(os.getcwd(), "data")
+    TTS_CACHE_DIRECTORY = os.path.join(os.getcwd(), "tts_cache")
+    CACHE_DIRECTORY = os.path.join(os.getcwd(), "cache") # Small persisted state (location, indexes)
+
+    # Response Catalog (intents, keywords and replies; see catalog.py)
+    CATALOG_FILE = os.path.join(DOCUMENTS_DIRECTORY, "catalog.json")
+    CATALOG_SNAPSHOT_FILE = os.path.join(CACHE_DIRECTORY, "catalog.marshal") # Compiled tables; None to always compile
+
+    # TTS Audio Cache
+    TTS_CACHE_ENABLED = True
+    TTS_CACHE_MAX_BYTES = 50 * 1024 * 1024 # LRU eviction above this size
+    TTS_CACHE_MAX_AGE = 30 * 24 * 3600 # Seconds before an entry is re-synthesized
+    TTS_WARMUP_ON_STARTUP = True # Pre-synthesize the response catalog in the background
+    TTS_WARMUP_WORKERS = 4 # Concurrent edge-tts requests during warmup
+
+    # Streaming TTS: play uncached replies sentence by sentence as audio arrives
+    TTS_STREAMING = True
+    TTS_STREAM_JITTER_MS = 250 # Decoded audio to buffer before playback starts
+    TTS_SHARED_CONNECTOR = True # Reuse one aiohttp connector (DNS cache, sockets) across turns
+
+    # In-memory Playback: replies are decoded once and played from RAM
+    PLAYBACK_SAMPLE_RATE = 24000 # Mixer rate; edge-tts delivers 24 kHz mono
+    PLAYBACK_CHANNELS = 1
+    PCM_CACHE_MAX_BYTES = 32 * 1024 * 1024 # Decoded replies kept in memory (LRU)
+    TTS_PRELOAD_PCM = True # Decode the warmed-up catalog into memory after warmup
+    
+    # Weather (wttr.in)
+    WEATHER_BASE_URL = "https://wttr.in"
+    WEATHER_CACHE_TTL = 600 # Seconds a weather payload is served as fresh
+    WEATHER_STALE_TTL = 1800 # Further seconds it is served stale while refreshing
+    WEATHER_LOCATION_TTL = 24 * 3600 # Seconds before the IP location is looked up again
+    WEATHER_LOCATION_FILE = os.path.join(CACHE_DIRECTORY, "location.json")
+
+    # Knowledge Base (BM25 over the markdown files in DOCUMENTS_DIRECTORY)
+    KNOWLEDGE_ENABLED = True
+    KNOWLEDGE_INDEX_FILE = os.path.join(CACHE_DIRECTORY, "knowledge_index.pkl")
+    KNOWLEDGE_MIN_SCORE = 1.2 # Below this BM25 score the query gets the unknown reply (see KnowledgeIndex.best)
+    KNOWLEDGE_WATCH = True # Hot reload: watch DOCUMENTS_DIRECTORY (inotify, else polling) and re-index edits
+    KNOWLEDGE_WATCH_DEBOUNCE_MS = 200 # Quiet time after the last file event before reloading
+    KNOWLEDGE_POLL_INTERVAL = 2 # Seconds between checks of the files without inotify (or per turn with KNOWLEDGE_WATCH off)
+
+    # Vector Store (hashed n-gram embeddings in CHROMA_PERSIST_DIRECTORY)
+    VECTOR_ENABLED = True
+    VECTOR_DIM = 384
+    VECTOR_BATCH_SIZE = 256 # Chunks embedded per batch while building
+    VECTOR_USE_FAISS = True # Use faiss-cpu for search when installed
+    VECTOR_FAISS_MIN_CHUNKS = 2000 # Smaller stores use numpy (and skip importing faiss)
+    VECTOR_MIN_SIMILARITY = 0.22 # Cosine similarity needed to answer from a chunk that covers the query (VectorStore.best)
+
+    # Routing Memo (see route_cache.py)
+    ROUTE_CACHE_ENABLED = True
+    ROUTE_CACHE_MAX_ENTRIES = 2048 # Normalized queries whose routing decision is kept (LRU)
+
+    # Session State (response variation counters per session)
+    SESSION_STORE_MAX_SESSIONS = 4096 # Least recently used sessions are evicted beyond this
+    SESSION_STORE_MAX_CATEGORIES = 32 # Counter slots per session (one per response category)
+    SESSION_STORE_TTL = 1800 # Seconds before an idle session's counters are dropped
+    SESSION_SNAPSHOT_ENABLED = False # Restore counters on startup and save them on server shutdown
+    SESSION_SNAPSHOT_FILE = os.path.join(CACHE_DIRECTORY, "sessions.npz")
+
+    # Metrics (per-turn stage latency histograms, see metrics.py)
+    METRICS_ENABLED = False # Off: instrumented code only pays for a no-op call
+    METRICS_JSONL_FILE = os.path.join(CACHE_DIRECTORY, "metrics", "turns.jsonl") # One line per turn
+    METRICS_JSONL_MAX_BYTES = 5 * 1024 * 1024 # Rotate the turn log beyond this size
+    METRICS_JSONL_BACKUPS = 3 # Rotated turn logs kept (turns.jsonl.1 .. .3)
+    METRICS_PROMETHEUS_FILE = os.path.join(CACHE_DIRECTORY, "metrics", "shipra.prom") # None to disable
+    METRICS_EXPORT_INTERVAL = 10 # Minimum seconds between Prometheus file rewrites
+    METRICS_PORT = None # Serve /metrics on this port in voice mode (the server has its own route)
+
+    # Startup
+    STARTUP_WORKERS = 4 # Threads initializing brain, audio output, mic input and intro synthesis
+
+    # Profiling (see profiling.py; triggered by SHIPRA_PROFILE, SIGUSR1 or PROFILE_TRIGGER_FILE)
+    PROFILE_DIRECTORY = os.path.join(CACHE_DIRECTORY, "profiles")
+    PROFILE_TRIGGER_FILE = os.path.join(CACHE_DIRECTORY, "profile.request") # Create it to profile the next turns
+    PROFILE_MODE = "sample" # "sample" (all threads, collapsed stacks) or "cprofile" (calling thread, pstats)
+    PROFILE_TURNS = 5 # Turns covered by one signal or trigger
+    PROFILE_INTERVAL_MS = 2 # Sampling period
+    PROFILE_TRACEMALLOC = False # Always snapshot allocations (or ask with "alloc"); slows Python code while on
+    PROFILE_TRACEMALLOC_FRAMES = 4 # Stack depth kept per allocation
+    PROFILE_TOP_ALLOCATIONS = 25 # Lines in the .alloc.txt report
     
     @staticmethod
     def ensure_directories():
         os.makedirs(Config.CHROMA_PERSIST_DIRECTORY, exist_ok=True)
         os.makedirs(Config.DOCUMENTS_DIRECTORY, exist_ok=True)
+        os.makedirs(Config.TTS_CACHE_DIRECTORY, exist_ok=True)
+        os.makedirs(Config.CACHE_DIRECTORY, exist_ok=True)
@@ -0,0 +1,160 @@
+"""
+ASR-error-tolerant word lookup. Vocabulary terms are indexed by padded
+character bigrams keyed by first letter and position. A misheard token
+collects the terms whose bigrams sit within its edit budget of the same
+position, keeps those of similar length that share enough bigrams (the
+q-gram count filter) and verifies them with a banded optimal string
+alignment distance, so lookup cost follows the token's neighbourhood rather
+than the vocabulary size.
+"""
+import re
+import numpy as np
+
+WORD = re.compile(r"[a-z]+")
+
+
+def edit_distance(a, b, limit):
+    """Optimal string alignment distance, or limit + 1 once it is exceeded.
+
+    Only the diagonal band |i - j| <= limit is computed.
+    """
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    over = limit + 1
+    previous2 = None
+    previous = [j if j <= limit else over for j in range(len(b) + 1)]
+    for i in range(1, len(a) + 1):
+        current = [over] * (len(b) + 1)
+        if i <= limit:
+            current[0] = i
+        row_min = current[0]
+        for j in range(max(1, i - limit), min(len(b), i + limit) + 1):
+            value = previous[j - 1] if a[i - 1] == b[j - 1] else previous[j - 1] + 1
+            if previous[j] + 1 < value:
+                value = previous[j] + 1
+            if current[j - 1] + 1 < value:
+                value = current[j - 1] + 1
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1] and previous2[j - 2] + 1 < value:
+                value = previous2[j - 2] + 1  # transposition
+            current[j] = value
+            if value < row_min:
+                row_min = value
+        if row_min > limit:
+            return over
+        previous2, previous = previous, current
+    return min(previous[-1], over)
+
+
+def bigrams(word):
+    padded = f"^{word}$"
+    return [padded[i:i + 2] for i in range(len(padded) - 1)]
+
+
+class FuzzyIndex:
+    """Bigram index for nearest-term lookup within an edit budget"""
+
+    def __init__(self, terms, max_edits=2, min_length=5):
+        self.terms = sorted(set(terms))
+        self.max_edits = max_edits
+        self.min_length = min_length
+        self._ids = {term: i for i, term in enumerate(self.terms)}
+
+        self._lengths = np.array([len(term) for term in self.terms], dtype=np.int32)
+
+        # ASR rarely loses the first sound, so candidates share the first letter
+        postings = {}  # (first letter, position, bigram) -> term ids
+        for term_id, term in enumerate(self.terms):
+            for position, gram in enumerate(bigrams(term)):
+                postings.setdefault((term[0], position, gram), []).append(term_id)
+        self._postings = {key: np.array(ids, dtype=np.int32) for key, ids in postings.items()}
+
+    def budget(self, token):
+        """Edits allowed for token: none for short words, more for long ones"""
+        if len(token) < self.min_length:
+            return 0
+        return 1 if len(token) < 8 else self.max_edits
+
+    def __contains__(self, term):
+        return term in self._ids
+
+    def nearest(self, token, max_edits=None):
+        """(term, distance) of the closest term within the budget, or None"""
+        if token in self._ids:
+            return token, 0
+        k = self.budget(token) if max_edits is None else max_edits
+        if k <= 0:
+            return None
+
+        # A bigram survives k edits only if it stays within k positions
+        grams = bigrams(token)
+        first = token[0]
+        arrays = []
+        for position, gram in enumerate(grams):
+            for shifted in range(max(0, position - k), position + k + 1):
+                posting = self._postings.get((first, shifted, gram))
+                if posting is not None:
+                    arrays.append(posting)
+        if not arrays:
+            return None
+        ids, counts = np.unique(np.concatenate(arrays), return_counts=True)
+        # One edit (transpositions included) touches at most three bigrams
+        keep = (counts >= len(grams) - 3 * k) & (np.abs(self._lengths[ids] - len(token)) <= k)
+        candidates = ids[keep]
+
+        best = None
+        for term_id in candidates:
+            term = self.terms[term_id]
+            distance = edit_distance(token, term, k)
+            if distance > k:
+                continue
+            # Prefer fewer edits, then similar length
+            rank = (distance, abs(len(term) - len(token)), term)
+            if best is None or rank < best[0]:
+                best = (rank, term)
+        if best is None:
+            return None
+        return best[1], best[0][0]
+
+    def __len__(self):
+        return len(self.terms)
+
+
+class FuzzyCorrector:
+    """Rewrites misheard words in a query to their nearest vocabulary term.
+
+    Words for which keep(word) is true are left as heard (ordinary
+    dictionary words, words the exact scan already matches), and a
+    correction must keep at least min_similarity of the longer word
+    (1 - edits / length) so short words cannot turn into other words.
+    """
+
+    def __init__(self, index, cache_size=4096, keep=None, min_similarity=0.0):
+        self.index = index
+        self.cache_size = cache_size
+        self.keep = keep
+        self.min_similarity = min_similarity
+        self._cache = {}
+        # Words shorter than the index's min_length have no edit budget: never looked at
+        self._candidates = re.compile(f"[a-z]{{{index.min_length},}}")
+
+    def correct_word(self, word):
+        corrected = self._cache.get(word)
+        if corrected is None:
+            corrected = word
+            if word not in self.index and not (self.keep is not None and self.keep(word)):
+                hit = self.index.nearest(word)
+                if hit and 1 - hit[1] / max(len(word), len(hit[0])) >= self.min_similarity:
+                    corrected = hit[0]
+            if len(self._cache) >= self.cache_size:
+                self._cache.clear()
+            self._cache[word] = corrected
+        return corrected
+
+    def correct(self, text):
+        """text with every unknown Latin word replaced by its nearest term"""
+        # Most queries have nothing to correct: check the cache before rebuilding the text
+        cache = self._cache
+        for word in self._candidates.findall(text):
+            if cache.get(word) != word:
+                return self._candidates.sub(lambda m: self.correct_word(m.group(0)), text)
+        return text
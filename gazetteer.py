@@ -0,0 +1,122 @@
+"""
+Offline city gazetteer for weather queries. City names and their aliases
+(English, Hinglish and Devanagari spellings) are loaded from data/cities.tsv
+into a word-level trie, so a city can be picked out of a query in one pass
+and resolved to coordinates without any network lookup.
+"""
+import os
+import re
+
+GAZETTEER_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "cities.tsv")
+
+# Latin words and Devanagari runs (vowel signs and virama included)
+TOKEN = re.compile(r"[a-z\u00e0-\u00f6\u00f8-\u00ff]+|[\u0900-\u097f]+")
+
+# Trie node slot holding the city id of a complete name
+_END = ""
+
+
+class Place:
+    """A gazetteer entry"""
+    __slots__ = ('name', 'country', 'lat', 'lon')
+
+    def __init__(self, name, country, lat, lon):
+        self.name = name
+        self.country = country
+        self.lat = lat
+        self.lon = lon
+
+    @property
+    def query(self):
+        """wttr.in location string; coordinates skip its own geocoding"""
+        return f"{self.lat:.2f},{self.lon:.2f}"
+
+    def __repr__(self):
+        return f"Place({self.name!r}, {self.country!r}, {self.lat}, {self.lon})"
+
+
+class Gazetteer:
+    """Word-level trie over city names and aliases"""
+
+    def __init__(self, path=GAZETTEER_FILE):
+        self.places = []
+        self.root = {}
+        self.max_words = 0
+        self._load(path)
+
+    @staticmethod
+    def tokenize(text):
+        return TOKEN.findall(text.lower())
+
+    def _load(self, path):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                lines = f.read().splitlines()
+        except Exception as e:
+            print(f"[Gazetteer] Could not load {path}: {e}")
+            return
+
+        for line in lines:
+            if not line.strip() or line.startswith("#"):
+                continue
+            fields = line.split("\t")
+            try:
+                place = Place(fields[0], fields[1], float(fields[2]), float(fields[3]))
+            except (IndexError, ValueError):
+                print(f"[Gazetteer] Skipping malformed line: {line!r}")
+                continue
+            aliases = fields[4].split("|") if len(fields) > 4 and fields[4] else []
+            self.places.append(place)
+            for name in [place.name] + aliases:
+                self._insert(name, len(self.places) - 1)
+
+    def _insert(self, name, place_id):
+        words = self.tokenize(name)
+        if not words:
+            return
+        node = self.root
+        for word in words:
+            node = node.setdefault(word, {})
+        # First entry wins when two cities share an alias
+        node.setdefault(_END, place_id)
+        self.max_words = max(self.max_words, len(words))
+
+    def find(self, text):
+        """First (longest) city named in text, or None"""
+        words = self.tokenize(text)
+        for i in range(len(words)):
+            node = self.root
+            found = None
+            for word in words[i:i + self.max_words]:
+                node = node.get(word)
+                if node is None:
+                    break
+                if _END in node:
+                    found = node[_END]
+            if found is not None:
+                return self.places[found]
+        return None
+
+    def lookup(self, name):
+        """Exact name or alias lookup, or None"""
+        node = self.root
+        for word in self.tokenize(name):
+            node = node.get(word)
+            if node is None:
+                return None
+        place_id = node.get(_END)
+        return self.places[place_id] if place_id is not None else None
+
+    def __len__(self):
+        return len(self.places)
+
+
+_gazetteer = None
+
+
+def get_gazetteer():
+    """Shared Gazetteer, loaded on first use"""
+    global _gazetteer
+    if _gazetteer is None:
+        _gazetteer = Gazetteer()
+    return _gazetteer
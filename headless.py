@@ -0,0 +1,126 @@
+"""
+Headless text front end: no microphone, pygame or edge-tts. Utterances are
+read from stdin or a file, one per line, either as plain text or as JSON
+objects with a "text" field (and an optional "id" that is echoed back).
+Each reply is written as a JSON line with its intent and language labels,
+followed by a throughput and latency summary on stderr.
+
+Usage:
+    python headless.py [--input FILE] [--output FILE] [--workers N]
+    python main.py --text [FILE]
+"""
+import argparse
+import json
+import sys
+import time
+from contextlib import redirect_stdout
+from config import Config
+
+
+def read_utterances(stream):
+    """(id, text) pairs from plain-text or JSONL lines; blank lines skipped"""
+    items = []
+    for number, line in enumerate(stream, 1):
+        line = line.strip()
+        if not line:
+            continue
+        if line.startswith("{"):
+            try:
+                record = json.loads(line)
+                items.append((record.get("id", number), str(record.get("text", ""))))
+                continue
+            except ValueError:
+                pass
+        items.append((number, line))
+    return items
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * q / 100))]
+
+
+def summarize(details, elapsed, workers):
+    latencies = sorted(detail["latency_ms"] for detail in details)
+    qps = len(details) / elapsed if elapsed > 0 else 0.0
+    return (f"[Headless] {len(details)} utterances in {elapsed:.2f}s with {workers} worker(s): "
+            f"{qps:.0f} queries/sec, p50 {percentile(latencies, 50):.3f} ms, "
+            f"p99 {percentile(latencies, 99):.3f} ms")
+
+
+def write_detail(out, ident, detail):
+    record = {"id": ident}
+    record.update(detail)
+    record["latency_ms"] = round(detail["latency_ms"], 3)
+    out.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+def run_interactive(brain, out):
+    """Answer stdin line by line until an exit command"""
+    for number, line in enumerate(sys.stdin, 1):
+        text = line.strip()
+        if not text:
+            continue
+        detail = brain.chat_detail(text)
+        write_detail(out, number, detail)
+        out.flush()
+        if detail["exit"]:
+            break
+    return 0
+
+
+def record_metrics(details):
+    """Feed batch latencies into the "think" histogram and export it (if metrics are on)"""
+    from metrics import get_metrics
+    metrics = get_metrics()
+    if not metrics.enabled:
+        return
+    for detail in details:
+        metrics.observe("think", detail["latency_ms"])
+    if Config.METRICS_PROMETHEUS_FILE:
+        metrics.write_prometheus(Config.METRICS_PROMETHEUS_FILE)
+
+
+def run_text(input_path=None, output_path=None, workers=None):
+    """Text mode entry point used by main.py --text"""
+    workers = workers or Config.BATCH_WORKERS
+    out = open(output_path, "w", encoding="utf-8") if output_path else sys.stdout
+    try:
+        # Keep stdout pure JSONL: subsystem log lines go to stderr
+        with redirect_stdout(sys.stderr):
+            from systems import Systems
+            brain = Systems.get_brain()
+            if not input_path or input_path == "-":
+                if sys.stdin.isatty():
+                    return run_interactive(brain, out)
+                items = read_utterances(sys.stdin)
+            else:
+                with open(input_path, "r", encoding="utf-8") as f:
+                    items = read_utterances(f)
+
+            start = time.perf_counter()
+            details = brain.chat_batch([text for _, text in items], workers=workers)
+            elapsed = time.perf_counter() - start
+        for (ident, _), detail in zip(items, details):
+            write_detail(out, ident, detail)
+        print(summarize(details, elapsed, workers), file=sys.stderr)
+        record_metrics(details)
+        return 0
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Shipra text mode: utterances in, JSONL replies out")
+    parser.add_argument("--input", help="Plain-text or JSONL utterances (default: stdin)")
+    parser.add_argument("--output", help="JSONL replies (default: stdout)")
+    parser.add_argument("--workers", type=int, default=Config.BATCH_WORKERS,
+                        help="Process pool size for batch input")
+    args = parser.parse_args(argv)
+    return run_text(args.input, args.output, args.workers)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,162 @@
+"""Compiled single-pass keyword matcher used by ShipraBrain for query routing."""
+from config import Config
+from catalog import build_automaton, get_catalog, keyword_vocabulary
+from fuzzy import FuzzyCorrector, FuzzyIndex, WORD
+
+# Keyword tables compiled from data/catalog.json (see catalog.py)
+_catalog = get_catalog()
+INTENT_KEYWORDS = _catalog.intents
+SUB_INTENT_RULES = _catalog.sub_intent_rules
+
+# Language markers (substring matches) and Hinglish word list (whole-token matches)
+ENGLISH_MARKER = _catalog.english_marker
+HINGLISH_INDICATORS = _catalog.hinglish_indicators
+HINDI_KEYWORDS = _catalog.hindi_keywords
+HINDI_KEYWORD_RATIO = _catalog.hindi_keyword_ratio
+
+DEVANAGARI_FIRST = '\u0900'
+DEVANAGARI_LAST = '\u097F'
+
+_common_words = None
+
+
+def common_words():
+    """Ordinary English words that fuzzy correction must leave alone (read on first use)"""
+    global _common_words
+    if _common_words is None:
+        words = frozenset()
+        if Config.FUZZY_COMMON_WORDS_FILE:
+            try:
+                with open(Config.FUZZY_COMMON_WORDS_FILE, encoding="utf-8") as f:
+                    words = frozenset(line.strip() for line in f if line.strip() and not line.startswith("#"))
+            except OSError as e:
+                print(f"[Intents] No common word list ({e}); fuzzy correction may rewrite ordinary words")
+        _common_words = words
+    return _common_words
+
+
+class IntentMatch:
+    """Result of a single matcher pass over a query"""
+    __slots__ = ('intent', 'sub_intent', 'keywords', 'lang', 'has_devanagari')
+
+    def __init__(self, intent, sub_intent, keywords, lang, has_devanagari):
+        self.intent = intent
+        self.sub_intent = sub_intent
+        self.keywords = keywords
+        self.lang = lang
+        self.has_devanagari = has_devanagari
+
+    @property
+    def route(self):
+        return (self.intent, self.sub_intent)
+
+    def __repr__(self):
+        return (f"IntentMatch(intent={self.intent!r}, sub_intent={self.sub_intent!r}, "
+                f"lang={self.lang!r}, keywords={sorted(self.keywords)!r})")
+
+
+class IntentMatcher:
+    """Aho-Corasick automaton over every routing and language keyword"""
+
+    def __init__(self, intent_keywords=None, sub_intent_rules=None, fuzzy=None):
+        self.intent_keywords = intent_keywords if intent_keywords is not None else INTENT_KEYWORDS
+        self.sub_intent_rules = sub_intent_rules if sub_intent_rules is not None else SUB_INTENT_RULES
+
+        # Pre-freeze the keyword sets so routing is a set-disjointness check
+        self._intents = [(name, frozenset(keywords)) for name, keywords in self.intent_keywords]
+        self._sub_intents = {
+            intent: [(name, [frozenset(clause) for clause in clauses]) for name, clauses in rules]
+            for intent, rules in self.sub_intent_rules.items()
+        }
+        self._hinglish_indicators = frozenset(HINGLISH_INDICATORS)
+        if self.intent_keywords is INTENT_KEYWORDS and self.sub_intent_rules is SUB_INTENT_RULES:
+            # The catalog snapshot already holds the automaton for its own tables
+            self.vocabulary = list(_catalog.vocabulary)
+            self._delta, self._outputs = _catalog.delta, _catalog.outputs
+        else:
+            self.vocabulary = keyword_vocabulary(ENGLISH_MARKER, HINGLISH_INDICATORS,
+                                                 self.intent_keywords, self.sub_intent_rules)
+            self._delta, self._outputs = build_automaton(self.vocabulary)
+
+        # Every keyword word and Hinglish function word, for ASR-error correction
+        self.corrector = None
+        if Config.FUZZY_MATCHING if fuzzy is None else fuzzy:
+            words = set(HINDI_KEYWORDS)
+            for keyword in self.vocabulary:
+                words.update(WORD.findall(keyword))
+            self.corrector = FuzzyCorrector(FuzzyIndex(words, max_edits=Config.FUZZY_MAX_EDITS,
+                                                       min_length=Config.FUZZY_MIN_LENGTH),
+                                            keep=self._keep_word, min_similarity=Config.FUZZY_MIN_SIMILARITY)
+
+    def _keep_word(self, word):
+        """True for words correction must not touch: dictionary words and words the
+        exact scan already matches (a keyword long enough to be corrected itself)"""
+        if word in common_words():
+            return True
+        return any(len(keyword) >= Config.FUZZY_MIN_LENGTH for keyword in self.scan(word)[0])
+
+    def scan(self, text):
+        """Return (keywords found in text, whether text has Devanagari) in one pass"""
+        delta = self._delta
+        outputs = self._outputs
+        found = set()
+        devanagari = False
+        state = 0
+        for ch in text:
+            if not devanagari and DEVANAGARI_FIRST <= ch <= DEVANAGARI_LAST:
+                devanagari = True
+            state = delta[state].get(ch, 0)
+            if outputs[state]:
+                found.update(outputs[state])
+        return found, devanagari
+
+    def resolve_intent(self, keywords):
+        """Return the highest-priority intent hit by keywords, or 'unknown'"""
+        for name, intent_keywords in self._intents:
+            if not intent_keywords.isdisjoint(keywords):
+                return name
+        return 'unknown'
+
+    def resolve_sub_intent(self, intent, keywords):
+        """Return the first sub-intent of intent whose clauses are all satisfied"""
+        for name, clauses in self._sub_intents.get(intent, ()):
+            if all(not clause.isdisjoint(keywords) for clause in clauses):
+                return name
+        return 'general'
+
+    def resolve_language(self, text, keywords, has_devanagari):
+        """Same rules as ShipraBrain.detect_language, reusing the scan results"""
+        if ENGLISH_MARKER in keywords:
+            return 'english'
+        if not self._hinglish_indicators.isdisjoint(keywords):
+            return 'hindi'
+        if has_devanagari:
+            return 'hindi'
+        words = text.split()
+        if words:
+            hindi_word_count = sum(1 for word in words if word in HINDI_KEYWORDS)
+            if hindi_word_count / len(words) > HINDI_KEYWORD_RATIO:
+                return 'hindi'
+        return 'english'
+
+    def match(self, query):
+        """Route a lowercased query: intent, sub-intent, language and keyword hits"""
+        if self.corrector is not None:
+            query = self.corrector.correct(query)
+        found, devanagari = self.scan(query)
+        keywords = frozenset(found)
+        intent = self.resolve_intent(keywords)
+        sub_intent = self.resolve_sub_intent(intent, keywords)
+        lang = self.resolve_language(query, keywords, devanagari)
+        return IntentMatch(intent, sub_intent, keywords, lang, devanagari)
+
+
+_default_matcher = None
+
+
+def get_matcher():
+    """Shared matcher built from the module keyword tables"""
+    global _default_matcher
+    if _default_matcher is None:
+        _default_matcher = IntentMatcher()
+    return _default_matcher
@@ -0,0 +1,344 @@
+"""
+Section-level BM25 retrieval over the markdown knowledge base. Every file
+under Config.DOCUMENTS_DIRECTORY is split into heading-scoped sections and
+indexed with compact integer postings. The index is persisted in
+Config.CACHE_DIRECTORY and only files whose mtime/size and content hash
+changed are re-parsed on refresh.
+"""
+import hashlib
+import math
+import os
+import pickle
+import re
+from array import array
+import numpy as np
+from config import Config
+from intents import HINDI_KEYWORDS
+
+INDEX_VERSION = 2
+
+TOKEN = re.compile(r"[a-z0-9]+|[\u0900-\u097f]+")
+HEADING = re.compile(r"^(#{1,6})\s+(.*?)\s*#*\s*$")
+
+# Query filler words (English plus the Hinglish function words from intents)
+STOPWORDS = frozenset(['a', 'an', 'the', 'is', 'are', 'was', 'were', 'be', 'of', 'to', 'in', 'on', 'for',
+                       'and', 'or', 'with', 'about', 'what', 'which', 'who', 'whom', 'how', 'why', 'when',
+                       'where', 'do', 'does', 'did', 'can', 'could', 'me', 'you', 'your', 'i', 'it',
+                       'its', 'this', 'that', 'tell', 'please', 'shipra', 'batao', 'bataiye', 'bare',
+                       'baare', 'mein', 'me']) | HINDI_KEYWORDS
+
+
+def tokenize(text):
+    return [t for t in TOKEN.findall(text.lower()) if t not in STOPWORDS]
+
+
+class Section:
+    """Text under one markdown heading, with its heading path"""
+    __slots__ = ('path', 'heading', 'body', 'line')
+
+    def __init__(self, path, heading, body, line):
+        self.path = path
+        self.heading = heading
+        self.body = body
+        self.line = line
+
+    def spoken(self):
+        """Section as a plain-text reply (markdown markers and bullets removed)"""
+        sentences = []
+        for raw in self.body.splitlines():
+            line = re.sub(r"^\s*(?:[-*+]|\d+[.)])\s+", "", raw).replace("**", "").replace("`", "").strip()
+            if not line:
+                continue
+            if line[-1] not in ".!?:":
+                line += "."
+            sentences.append(line)
+        title = self.heading.split(" > ")[-1]
+        return f"{title}: {' '.join(sentences)}"
+
+    def __repr__(self):
+        return f"Section({os.path.basename(self.path)!r}, {self.heading!r})"
+
+
+def fingerprint(directory=None):
+    """(path, mtime, size) of every markdown file under directory, to detect edits"""
+    found = []
+    for root, _, names in os.walk(directory or Config.DOCUMENTS_DIRECTORY):
+        for name in names:
+            if name.lower().endswith(".md"):
+                path = os.path.join(root, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                found.append((path, st.st_mtime_ns, st.st_size))
+    return tuple(sorted(found))
+
+
+def parse_markdown(path, text):
+    """Split a markdown document into heading-scoped sections"""
+    sections = []
+    stack = []  # (level, title) of the enclosing headings
+    body = []
+    start = 1
+    in_fence = False
+
+    def flush():
+        content = "\n".join(body).strip()
+        if content:
+            heading = " > ".join(title for _, title in stack) or os.path.splitext(os.path.basename(path))[0]
+            sections.append(Section(path, heading, content, start))
+
+    for number, line in enumerate(text.splitlines(), 1):
+        if line.lstrip().startswith("```"):
+            in_fence = not in_fence
+        match = None if in_fence else HEADING.match(line)
+        if match is None:
+            body.append(line)
+            continue
+        flush()
+        level = len(match.group(1))
+        while stack and stack[-1][0] >= level:
+            stack.pop()
+        stack.append((level, match.group(2).replace("**", "")))
+        body = []
+        start = number
+    flush()
+    return sections
+
+
+class KnowledgeIndex:
+    """BM25 index over markdown sections, persisted and refreshed per file.
+
+    Each file keeps its own (term id, section, tf) triples; refresh()
+    re-tokenizes only changed files and merges the triples into one CSR
+    posting list (term offsets into uint32 section ids and uint16 term
+    frequencies), so scoring a term is a single vectorized update.
+    """
+
+    def __init__(self, directory=None, index_file=None, k1=1.5, b=0.75):
+        self.directory = directory or Config.DOCUMENTS_DIRECTORY
+        self.index_file = index_file or Config.KNOWLEDGE_INDEX_FILE
+        self.k1 = k1
+        self.b = b
+
+        self.vocab = {}  # term -> term id (compacted when terms drop out of every file)
+        self._files = {}  # path -> {"mtime", "size", "sha256", "sections", "terms", "local", "tfs", "lengths"}
+        self.sections = []
+        self.titles = []  # Section -> terms of its own heading (without the parent headings)
+        self.offsets = np.zeros(1, dtype=np.int64)  # term id -> slice of the posting arrays
+        self.post_sections = np.zeros(0, dtype=np.uint32)
+        self.post_tfs = np.zeros(0, dtype=np.uint16)
+        self.doc_len = np.zeros(0, dtype=np.float32)
+        self.avgdl = 0.0
+        self._loaded = False
+
+    def copy(self):
+        """Independent index sharing the parsed files, so refresh() on the copy
+        re-parses only what changed while readers keep using this one"""
+        other = KnowledgeIndex(self.directory, self.index_file, self.k1, self.b)
+        other.vocab = dict(self.vocab)
+        other._files = {path: dict(entry) for path, entry in self._files.items()}
+        other.sections, other.titles = self.sections, self.titles
+        other.offsets, other.post_sections, other.post_tfs = self.offsets, self.post_sections, self.post_tfs
+        other.doc_len, other.avgdl = self.doc_len, self.avgdl
+        other._loaded = self._loaded
+        return other
+
+    def digests(self):
+        """path -> content hash of every indexed file"""
+        return {path: entry["sha256"] for path, entry in self._files.items()}
+
+    def _discover(self):
+        found = []
+        for root, _, names in os.walk(self.directory):
+            for name in names:
+                if name.lower().endswith(".md"):
+                    found.append(os.path.join(root, name))
+        return sorted(found)
+
+    def refresh(self):
+        """Re-index new or changed files; returns the number of files re-parsed"""
+        if not self._loaded:
+            self._load()
+            self._loaded = True
+
+        paths = self._discover()
+        changed = 0
+        dirty = set(self._files) != set(paths)
+        for path in list(self._files):
+            if path not in paths:
+                del self._files[path]
+
+        for path in paths:
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            entry = self._files.get(path)
+            if entry is not None and entry["mtime"] == st.st_mtime_ns and entry["size"] == st.st_size:
+                continue
+            try:
+                with open(path, "rb") as f:
+                    raw = f.read()
+            except OSError as e:
+                print(f"[Knowledge] Could not read {path}: {e}")
+                continue
+            digest = hashlib.sha256(raw).hexdigest()
+            if entry is not None and entry["sha256"] == digest:
+                # Touched but unchanged: keep the parsed sections
+                entry["mtime"], entry["size"] = st.st_mtime_ns, st.st_size
+                dirty = True
+                continue
+            entry = self._index_file(parse_markdown(path, raw.decode("utf-8", errors="replace")))
+            entry.update(mtime=st.st_mtime_ns, size=st.st_size, sha256=digest)
+            self._files[path] = entry
+            changed += 1
+
+        if changed or dirty:
+            self._compact_vocab()
+            self._build_postings()
+            self._save()
+        return changed
+
+    def _index_file(self, sections):
+        """Per-file (term id, local section, tf) triples and section lengths"""
+        terms = array('I')
+        local = array('I')
+        tfs = array('H')
+        lengths = array('I')
+        for section_id, section in enumerate(sections):
+            counts = {}
+            tokens = tokenize(f"{section.heading}\n{section.body}")
+            for token in tokens:
+                counts[token] = counts.get(token, 0) + 1
+            for term, tf in counts.items():
+                term_id = self.vocab.setdefault(term, len(self.vocab))
+                terms.append(term_id)
+                local.append(section_id)
+                tfs.append(min(tf, 0xFFFF))
+            lengths.append(len(tokens))
+        return {"sections": [(s.path, s.heading, s.body, s.line) for s in sections],
+                "terms": np.frombuffer(terms, dtype=np.uint32), "local": np.frombuffer(local, dtype=np.uint32),
+                "tfs": np.frombuffer(tfs, dtype=np.uint16), "lengths": np.frombuffer(lengths, dtype=np.uint32)}
+
+    def _compact_vocab(self):
+        """Drop the ids of terms no file uses any more and renumber the rest"""
+        used = np.zeros(len(self.vocab), dtype=bool)
+        for entry in self._files.values():
+            used[entry["terms"]] = True
+        if used.all():
+            return
+        remap = np.cumsum(used, dtype=np.int64) - 1
+        self.vocab = {term: int(remap[i]) for term, i in self.vocab.items() if used[i]}
+        for entry in self._files.values():
+            entry["terms"] = remap[entry["terms"]].astype(np.uint32)
+
+    def _build_postings(self):
+        """Merge the per-file triples into global CSR postings"""
+        self.sections = []
+        terms, ids, tfs, lengths = [], [], [], []
+        for path in sorted(self._files):
+            entry = self._files[path]
+            terms.append(entry["terms"])
+            ids.append(entry["local"].astype(np.uint32) + len(self.sections))
+            tfs.append(entry["tfs"])
+            lengths.append(entry["lengths"])
+            self.sections.extend(Section(*fields) for fields in entry["sections"])
+        self.titles = [frozenset(tokenize(section.heading.split(" > ")[-1])) for section in self.sections]
+
+        if not self.sections:
+            self.offsets = np.zeros(len(self.vocab) + 1, dtype=np.int64)
+            self.post_sections = np.zeros(0, dtype=np.uint32)
+            self.post_tfs = np.zeros(0, dtype=np.uint16)
+            self.doc_len = np.zeros(0, dtype=np.float32)
+            self.avgdl = 0.0
+            return
+        terms = np.concatenate(terms)
+        order = np.argsort(terms, kind="stable")
+        self.post_sections = np.concatenate(ids)[order]
+        self.post_tfs = np.concatenate(tfs)[order]
+        self.offsets = np.zeros(len(self.vocab) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(terms, minlength=len(self.vocab)), out=self.offsets[1:])
+        self.doc_len = np.concatenate(lengths).astype(np.float32)
+        self.avgdl = float(self.doc_len.mean()) or 1.0
+
+    def _load(self):
+        try:
+            with open(self.index_file, "rb") as f:
+                data = pickle.load(f)
+            if data.get("version") != INDEX_VERSION or data.get("directory") != self.directory:
+                return
+            self.vocab = data["vocab"]
+            self._files = data["files"]
+            self._build_postings()
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"[Knowledge] Ignoring unreadable index: {e}")
+
+    def _save(self):
+        data = {"version": INDEX_VERSION, "directory": self.directory,
+                "vocab": self.vocab, "files": self._files}
+        try:
+            os.makedirs(os.path.dirname(self.index_file), exist_ok=True)
+            tmp = f"{self.index_file}.{os.getpid()}.tmp"  # Server workers may save at once
+            with open(tmp, "wb") as f:
+                pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, self.index_file)
+        except Exception as e:
+            print(f"[Knowledge] Could not persist index: {e}")
+
+    def _score(self, query):
+        """(BM25 scores, distinct query terms matched) per section, and the query's terms"""
+        n = len(self.sections)
+        terms = set(tokenize(query))
+        scores = np.zeros(n, dtype=np.float32)
+        matched = np.zeros(n, dtype=np.int32)
+        norm = self.k1 * (1 - self.b + self.b * self.doc_len / self.avgdl) if n else None
+        for term in terms:
+            term_id = self.vocab.get(term)
+            if term_id is None or not n:
+                continue
+            start, end = self.offsets[term_id], self.offsets[term_id + 1]
+            if start == end:
+                continue
+            ids = self.post_sections[start:end]
+            tf = self.post_tfs[start:end].astype(np.float32)
+            idf = math.log(1 + (n - (end - start) + 0.5) / ((end - start) + 0.5))
+            scores[ids] += idf * tf * (self.k1 + 1) / (tf + norm[ids])
+            matched[ids] += 1
+        return scores, matched, terms
+
+    def search(self, query, k=3):
+        """Top-k (score, Section) pairs for query by BM25"""
+        n = len(self.sections)
+        if not n:
+            return []
+        scores, _, _ = self._score(query)
+        k = min(k, n)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(float(scores[i]), self.sections[i]) for i in top if scores[i] > 0]
+
+    def best(self, query, min_score=None):
+        """Best matching section, or None if nothing scores above min_score.
+
+        A section only answers when it matches two of the query's terms or a
+        term of its own heading: one incidental word of a long section ("market"
+        in a bio, "range" in a feature list) is not an answer. Words the index
+        has never seen count as query terms too, so a Hinglish query is not
+        answered from the one English word it shares with a section.
+        """
+        min_score = Config.KNOWLEDGE_MIN_SCORE if min_score is None else min_score
+        if not self.sections:
+            return None
+        scores, matched, terms = self._score(query)
+        for i in np.argsort(-scores, kind="stable").tolist():
+            if scores[i] < min_score:
+                break
+            if matched[i] >= 2 or self.titles[i] & terms:
+                return self.sections[i]
+        return None
+
+    def __len__(self):
+        return len(self.sections)
@@ -1,41 +1,96 @@
 
+import argparse
 import sys
 import time
-from systems import Systems
+from startup import Startup
+from config import Config
+from responses import get_responses
+from metrics import get_metrics
+from profiling import get_profiler
 
-def main():
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Shipra AI voice assistant")
+    parser.add_argument("--pipeline", action="store_true", default=Config.PIPELINE_MODE,
+                        help="Overlap listening, recognition, thinking and speaking (with barge-in)")
+    parser.add_argument("--text", nargs="?", const="-", metavar="FILE",
+                        help="Headless text mode: utterances from FILE or stdin, JSONL replies on stdout")
+    parser.add_argument("--workers", type=int, default=Config.BATCH_WORKERS,
+                        help="Process pool size for --text batch input")
+    parser.add_argument("--metrics", action="store_true", default=Config.METRICS_ENABLED,
+                        help="Record per-turn stage latencies (JSONL log and Prometheus export)")
+    parser.add_argument("--startup-report", action="store_true",
+                        help="Print the import and init time of each startup step")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    metrics = get_metrics()
+    if args.metrics:
+        metrics.enable()
+    if args.text:
+        from headless import run_text
+        return run_text(args.text, workers=args.workers)
+    
     print("Launching Shipra AI System (Voice CLI)...")
+    profiler = get_profiler()
+    profiler.install_signal()
+    
+    # Initialize Systems concurrently; the intro plays once the speakers are ready
+    intro_text = get_responses('system.intro', 'any')[0]
+    with profiler.startup("voice"):
+        startup = Startup().start(intro_text)
+        audio = startup.audio
+        
+        # Pre-synthesize canned replies while the intro plays
+        if Config.TTS_WARMUP_ON_STARTUP:
+            audio.start_warmup()
+        
+        startup.speak_intro(intro_text)
+        startup.wait()
+    brain = startup.brain
+    brain.on_knowledge_change(audio.forget)  # Edited knowledge files: drop their old answers' audio
+    if args.startup_report:
+        print(startup.report.render())
     
-    # Initialize Systems
-    brain = Systems.get_brain()
-    audio = Systems.get_audio()
+    if metrics.enabled and Config.METRICS_PORT:
+        metrics.serve(Config.METRICS_PORT)
     
     print("\n--- SYSTEM READY ---")
     print("Shipra is listening continuously. Speak anytime!\n")
     
-    # Intro
-    intro_text = "Namaste! Main Pushpak O 2 ki AI Assistant hoon. Boliye, main kya kar sakti hoon?"
-    audio.speak(intro_text)
+    if args.pipeline:
+        from pipeline import VoicePipeline
+        try:
+            VoicePipeline(brain, audio).run()
+        finally:
+            profiler.close()
+        return
     
     while True:
         try:
-            # Continuously listen for user input
-            user_text = audio.listen()
+            # Continuously listen for user input; a turn only counts once something was heard
+            turn = metrics.begin_turn()
+            user_text = audio.listen(turn)
+            if not user_text:
+                continue
             
-            if user_text:
+            profiler.turn_started()
+            try:
                 # Check for Exit - respond based on the word used
-                if any(word in user_text.lower() for word in ['alvida', 'tata']):
-                    audio.speak("Dhanyavaad. Alvida! Jay Shree Ram.")
-                    break
-                elif any(word in user_text.lower() for word in ['exit', 'bye', 'goodbye', 'stop']):
-                    audio.speak("Thank you. Goodbye! Jay Shree Ram.")
+                farewell = brain.exit_reply(user_text)
+                if farewell:
+                    audio.speak(farewell, turn=turn)
                     break
                 
                 # Brain Processing
-                response_text = brain.chat(user_text)
+                with turn.stage("think"):
+                    response_text = brain.chat(user_text)
                 
                 # Speak Response
-                audio.speak(response_text)
+                audio.speak(response_text, turn=turn)
+            finally:
+                turn.end()
+                profiler.turn_finished()
                 
         except KeyboardInterrupt:
             print("\nExiting...")
@@ -43,6 +98,7 @@ def main():
         except Exception as e:
             print(f"Loop Error: {e}")
             time.sleep(1)
+    profiler.close()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(main())
\ No newline at end of file
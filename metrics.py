@@ -0,0 +1,361 @@
+"""
+Per-turn latency instrumentation. Each turn records how long its stages took
+(capture, recognize, think, synthesize, playback) into log-linear HDR-style
+histograms. Finished turns are appended to a rotating JSONL file, and the
+histograms, counters (network calls) and subsystem stats (cache hit rates)
+are exported in the Prometheus text format, to a file and optionally over
+HTTP.
+
+When Config.METRICS_ENABLED is off, begin_turn() hands out one shared no-op
+turn and count() returns immediately, so instrumented code costs a method
+call.
+"""
+import json
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from config import Config
+
+# Prometheus histogram bucket bounds, in milliseconds
+EXPORT_BOUNDS_MS = (1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+
+
+class Histogram:
+    """Log-linear histogram of microsecond values (about 1.5% relative error).
+
+    Values below 128 us get exact buckets; above that every power of two is
+    split into 64 buckets, as in HdrHistogram with two significant digits.
+    """
+    SUB_BITS = 7
+    SUB = 1 << SUB_BITS
+    HALF = SUB >> 1
+
+    def __init__(self):
+        self.counts = []
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+
+    @classmethod
+    def index(cls, value):
+        if value < cls.SUB:
+            return value
+        shift = value.bit_length() - cls.SUB_BITS
+        return cls.SUB + (shift - 1) * cls.HALF + ((value >> shift) - cls.HALF)
+
+    @classmethod
+    def bounds(cls, index):
+        """(lowest, highest) microsecond value of a bucket"""
+        if index < cls.SUB:
+            return index, index
+        shift = (index - cls.SUB) // cls.HALF + 1
+        top = (index - cls.SUB) % cls.HALF + cls.HALF
+        return top << shift, ((top + 1) << shift) - 1
+
+    def record(self, ms):
+        us = max(0, int(ms * 1000))
+        i = self.index(us)
+        if i >= len(self.counts):
+            self.counts.extend([0] * (i + 1 - len(self.counts)))
+        self.counts[i] += 1
+        self.count += 1
+        self.total += ms
+        self.min = ms if self.min is None or ms < self.min else self.min
+        self.max = ms if self.max is None or ms > self.max else self.max
+
+    def percentile(self, q):
+        """Value in ms at percentile q (0-100), from the bucket midpoint"""
+        if not self.count:
+            return 0.0
+        target = max(1, math.ceil(q / 100 * self.count))
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= target:
+                low, high = self.bounds(i)
+                return min(self.max, (low + high) / 2 / 1000)
+        return self.max
+
+    def cumulative(self, bounds_ms):
+        """Count of values <= each bound (by bucket upper edge), for export"""
+        result = []
+        i = seen = 0
+        for bound in bounds_ms:
+            limit = bound * 1000
+            while i < len(self.counts) and self.bounds(i)[1] <= limit:
+                seen += self.counts[i]
+                i += 1
+            result.append(seen)
+        return result
+
+    def merge(self, other):
+        if len(other.counts) > len(self.counts):
+            self.counts.extend([0] * (len(other.counts) - len(self.counts)))
+        for i, n in enumerate(other.counts):
+            self.counts[i] += n
+        self.count += other.count
+        self.total += other.total
+        for value in (other.min, other.max):
+            if value is not None:
+                self.min = value if self.min is None or value < self.min else self.min
+                self.max = value if self.max is None or value > self.max else self.max
+
+    def summary(self):
+        return {"count": self.count, "mean": self.total / self.count if self.count else 0.0,
+                "p50": self.percentile(50), "p90": self.percentile(90), "p99": self.percentile(99),
+                "max": self.max or 0.0}
+
+
+class RotatingJSONL:
+    """Append-only JSON lines file, rotated to path.1 .. path.N by size"""
+
+    def __init__(self, path, max_bytes, backups):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+    def write(self, record):
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        with self._lock:
+            try:
+                if os.path.exists(self.path) and os.path.getsize(self.path) + len(line) > self.max_bytes:
+                    self._rotate()
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(line)
+            except OSError as e:
+                print(f"[Metrics] Write Error: {e}")
+
+    def _rotate(self):
+        for n in range(self.backups - 1, 0, -1):
+            if os.path.exists(f"{self.path}.{n}"):
+                os.replace(f"{self.path}.{n}", f"{self.path}.{n + 1}")
+        if self.backups > 0:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+
+
+class Turn:
+    """Stage timings of one conversational turn.
+
+    The turn's clock starts when the user stops talking (restart() after
+    capture); "response" is the time from there to the reply's first audio.
+    """
+
+    def __init__(self, metrics):
+        self.metrics = metrics
+        self.number = None  # Assigned when the turn ends; abandoned turns are not counted
+        self.started = time.perf_counter()
+        self.stages = {}
+        self.attributes = {}
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, (time.perf_counter() - start) * 1000)
+
+    def record(self, name, ms):
+        """Add ms to stage name (repeated stages accumulate)"""
+        self.stages[name] = self.stages.get(name, 0.0) + ms
+
+    def restart(self):
+        self.started = time.perf_counter()
+
+    def elapsed(self):
+        return (time.perf_counter() - self.started) * 1000
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def end(self):
+        self.metrics.finish(self, self.elapsed())
+
+
+class NullTurn:
+    """Turn stand-in while metrics are disabled: every call is a no-op.
+
+    stage() hands back the turn itself as its context manager, so a disabled
+    stage allocates nothing (a @contextmanager generator costs about 1 us).
+    """
+    number = 0
+
+    def stage(self, name):
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def record(self, name, ms):
+        pass
+
+    def restart(self):
+        pass
+
+    def elapsed(self):
+        return 0.0
+
+    def set(self, **attributes):
+        pass
+
+    def end(self):
+        pass
+
+
+NULL_TURN = NullTurn()
+
+
+class Metrics:
+    """Registry of stage histograms, counters and subsystem stats"""
+
+    def __init__(self, enabled=None):
+        self.enabled = Config.METRICS_ENABLED if enabled is None else enabled
+        self.histograms = {}  # stage -> Histogram
+        self.counters = {}  # name -> int
+        self.sources = {}  # name -> callable returning a dict of numbers
+        self.turns = 0
+        self._lock = threading.Lock()
+        self._log = None
+        self._last_export = 0.0
+        self._http = None
+
+    def enable(self):
+        self.enabled = True
+
+    def begin_turn(self):
+        if not self.enabled:
+            return NULL_TURN
+        return Turn(self)
+
+    def count(self, name, n=1):
+        """Add n to a counter (network calls, errors)"""
+        if not self.enabled:
+            return
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def register(self, name, stats):
+        """Export the numeric values of stats() (e.g. TTSCache.stats) as gauges"""
+        self.sources[name] = stats
+
+    def observe(self, stage, ms):
+        with self._lock:
+            histogram = self.histograms.get(stage)
+            if histogram is None:
+                histogram = self.histograms[stage] = Histogram()
+            histogram.record(ms)
+
+    def finish(self, turn, total_ms):
+        with self._lock:
+            self.turns += 1
+            turn.number = self.turns
+        for stage, ms in turn.stages.items():
+            self.observe(stage, ms)
+        self.observe("turn", total_ms)
+        record = {"ts": round(time.time(), 3), "turn": turn.number, "total_ms": round(total_ms, 2),
+                  "stages": {stage: round(ms, 2) for stage, ms in turn.stages.items()}}
+        record.update(turn.attributes)
+        if self._log is None:
+            self._log = RotatingJSONL(Config.METRICS_JSONL_FILE, Config.METRICS_JSONL_MAX_BYTES,
+                                      Config.METRICS_JSONL_BACKUPS)
+        self._log.write(record)
+        now = time.time()
+        if Config.METRICS_PROMETHEUS_FILE and now - self._last_export >= Config.METRICS_EXPORT_INTERVAL:
+            self._last_export = now
+            self.write_prometheus(Config.METRICS_PROMETHEUS_FILE)
+
+    # --- Export ----------------------------------------------------------
+
+    def snapshot(self):
+        """Stage summaries, counters and source stats as one dict"""
+        with self._lock:
+            stages = {stage: h.summary() for stage, h in self.histograms.items()}
+            counters = dict(self.counters)
+        sources = {}
+        for name, stats in self.sources.items():
+            try:
+                sources[name] = stats()
+            except Exception:
+                continue
+        return {"turns": self.turns, "stages": stages, "counters": counters, "sources": sources}
+
+    def render_prometheus(self):
+        lines = ["# HELP shipra_stage_latency_ms Per-turn stage latency in milliseconds",
+                 "# TYPE shipra_stage_latency_ms histogram"]
+        with self._lock:
+            histograms = sorted(self.histograms.items())
+            counters = sorted(self.counters.items())
+            for stage, h in histograms:
+                for bound, n in zip(EXPORT_BOUNDS_MS, h.cumulative(EXPORT_BOUNDS_MS)):
+                    lines.append(f'shipra_stage_latency_ms_bucket{{stage="{stage}",le="{bound}"}} {n}')
+                lines.append(f'shipra_stage_latency_ms_bucket{{stage="{stage}",le="+Inf"}} {h.count}')
+                lines.append(f'shipra_stage_latency_ms_sum{{stage="{stage}"}} {h.total:.3f}')
+                lines.append(f'shipra_stage_latency_ms_count{{stage="{stage}"}} {h.count}')
+            lines.append("# TYPE shipra_stage_latency_quantile_ms gauge")
+            for stage, h in histograms:
+                for q in (50, 90, 99):
+                    lines.append(f'shipra_stage_latency_quantile_ms{{stage="{stage}",quantile="0.{q}"}} '
+                                 f'{h.percentile(q):.3f}')
+        for name, value in counters:
+            lines.append(f"# TYPE shipra_{name}_total counter")
+            lines.append(f"shipra_{name}_total {value}")
+        for source, values in self.snapshot()["sources"].items():
+            for key, value in sorted(values.items()):
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    lines.append(f"# TYPE shipra_{source}_{key} gauge")
+                    lines.append(f"shipra_{source}_{key} {value}")
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path):
+        """Write the Prometheus text atomically (for node_exporter's textfile collector)"""
+        try:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            tmp = f"{path}.{os.getpid()}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.write(self.render_prometheus())
+            os.replace(tmp, path)
+        except OSError as e:
+            print(f"[Metrics] Export Error: {e}")
+
+    def serve(self, port, host="127.0.0.1"):
+        """Serve GET /metrics on a daemon thread"""
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                body = metrics.render_prometheus().encode("utf-8")
+                self.send_response(200 if self.path.startswith("/metrics") else 404)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self._http = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=self._http.serve_forever, name="metrics-http", daemon=True).start()
+        print(f"[Metrics] Serving http://{host}:{port}/metrics")
+        return self._http
+
+
+_metrics = None
+
+
+def get_metrics():
+    """Process-wide metrics registry"""
+    global _metrics
+    if _metrics is None:
+        _metrics = Metrics()
+    return _metrics
@@ -0,0 +1,236 @@
+"""
+Overlapped voice loop: capture, recognition, brain and playback run as
+separate stages joined by bounded queues, so the microphone stays open while
+Shipra is thinking or talking. Speech that starts during playback cuts the
+reply off (barge-in).
+"""
+import queue
+import threading
+import time
+from config import Config
+from metrics import get_metrics
+from profiling import get_profiler
+
+
+class Turn:
+    """One utterance as it moves through the pipeline"""
+    __slots__ = ('seq', 'generation', 'audio', 'text', 'response', 'final', 'captured_at', 'speculation',
+                 'metrics')
+
+    def __init__(self, seq, generation, audio, captured_at, speculation=None, metrics=None):
+        self.seq = seq
+        self.generation = generation
+        self.audio = audio
+        self.text = None
+        self.response = None
+        self.final = False
+        self.captured_at = captured_at
+        self.speculation = speculation
+        self.metrics = metrics
+
+
+class VoicePipeline:
+    """Runs capture -> recognize -> think -> speak concurrently with barge-in"""
+
+    def __init__(self, brain, audio, queue_size=None, asr_workers=None, barge_in=None):
+        self.brain = brain
+        self.audio = audio
+        queue_size = queue_size or Config.PIPELINE_QUEUE_SIZE
+        self.asr_workers = asr_workers or Config.PIPELINE_ASR_WORKERS
+        self.barge_in_enabled = Config.BARGE_IN if barge_in is None else barge_in
+        self.speculation_enabled = Config.SPECULATION_ENABLED
+        self.speculation_hits = 0
+        self.speculation_turns = 0
+        self.metrics = get_metrics()
+        self.profiler = get_profiler()
+        self.metrics.register("speculation", lambda: {"turns": self.speculation_turns,
+                                                      "hits": self.speculation_hits})
+
+        self.capture_queue = queue.Queue(maxsize=queue_size)
+        self.text_queue = queue.Queue(maxsize=queue_size)
+        self.speak_queue = queue.Queue(maxsize=queue_size)
+        self.stop_event = threading.Event()
+
+        # Bumped on every barge-in; replies from older generations are dropped
+        self.generation = 0
+        self._seq = 0
+        self._threads = []
+
+    def run(self, intro_text=None):
+        """Start the worker stages and run playback on the calling thread"""
+        self._start(self._capture_stage, "capture")
+        for i in range(self.asr_workers):
+            self._start(self._recognize_stage, f"recognize-{i}")
+        self._start(self._brain_stage, "brain")
+
+        if intro_text:
+            self.audio.speak(intro_text)
+        try:
+            self._playback_stage()
+        except KeyboardInterrupt:
+            print("\nExiting...")
+        finally:
+            self.stop()
+
+    def stop(self):
+        self.stop_event.set()
+        self.audio.stop_speaking()
+        for thread in self._threads:
+            thread.join(timeout=2)
+
+    def _start(self, target, name):
+        thread = threading.Thread(target=self._guard(target), name=f"pipeline-{name}", daemon=True)
+        thread.start()
+        self._threads.append(thread)
+
+    def _guard(self, target):
+        def run():
+            try:
+                target()
+            except Exception as e:
+                print(f"[Pipeline] {threading.current_thread().name} Error: {e}")
+                self.stop_event.set()
+        return run
+
+    def _get(self, q):
+        """Blocking get that wakes up periodically to honour stop()"""
+        while not self.stop_event.is_set():
+            try:
+                return q.get(timeout=0.2)
+            except queue.Empty:
+                continue
+        return None
+
+    def _put(self, q, item):
+        while not self.stop_event.is_set():
+            try:
+                q.put(item, timeout=0.2)
+                return
+            except queue.Full:
+                continue
+
+    def barge_in(self):
+        """User started talking: drop pending replies and stop the current one"""
+        self.generation += 1
+        while True:
+            try:
+                self.speak_queue.get_nowait()
+            except queue.Empty:
+                break
+        if self.audio.speaking.is_set():
+            print("[Pipeline] Barge-in")
+            self.audio.stop_speaking()
+
+    # --- Stages ---------------------------------------------------------
+
+    def _capture_stage(self):
+        generation = self.generation
+        speculation = None
+        speech_started = None
+        for event, data in self.audio.capture_phrases(self.stop_event):
+            if event == 'speech_start':
+                speech_started = time.perf_counter()
+                if self.barge_in_enabled and (self.audio.speaking.is_set() or not self.speak_queue.empty()):
+                    self.barge_in()
+                generation = self.generation
+                if self.speculation_enabled:
+                    speculation = self.brain.speculate(on_commit=self.audio.prefetch,
+                                                       on_cancel=self.audio.cancel_prefetch)
+            elif event == 'partial':
+                # Streaming recognizers only: commit the intent before the user stops
+                if speculation is not None:
+                    speculation.update(data)
+            elif event == 'phrase':
+                self.profiler.turn_started()
+                now = time.perf_counter()
+                turn = Turn(self._seq, generation, data, now, speculation, self.metrics.begin_turn())
+                if speech_started is not None:
+                    turn.metrics.record("listen", (now - speech_started) * 1000)
+                speculation = speech_started = None
+                self._seq += 1
+                try:
+                    self.capture_queue.put_nowait(turn)
+                except queue.Full:
+                    # Recognition is backed up; the oldest audio is the least useful
+                    try:
+                        dropped = self.capture_queue.get_nowait()
+                    except queue.Empty:
+                        dropped = None
+                    if dropped is not None:
+                        if dropped.speculation is not None:
+                            dropped.speculation.cancel()
+                        dropped.metrics.set(dropped=True)
+                        dropped.metrics.end()
+                        self.profiler.turn_finished()
+                    self.capture_queue.put_nowait(turn)
+
+    def _recognize_stage(self):
+        while not self.stop_event.is_set():
+            turn = self._get(self.capture_queue)
+            if turn is None:
+                break
+            turn.text = self.audio.recognize(turn.audio, turn.metrics)
+            turn.audio = None
+            self._put(self.text_queue, turn)
+
+    def _brain_stage(self):
+        # Recognition workers may finish out of order; answer in capture order
+        pending = {}
+        next_seq = 0
+        while not self.stop_event.is_set():
+            turn = self._get(self.text_queue)
+            if turn is None:
+                break
+            pending[turn.seq] = turn
+            if next_seq not in pending and len(pending) > self.asr_workers:
+                # A dropped capture left a hole in the sequence
+                next_seq = min(pending)
+            while next_seq in pending:
+                ready = pending.pop(next_seq)
+                next_seq += 1
+                if ready.text:
+                    self._think(ready)
+                    continue
+                # Nothing recognized: not a turn (its metrics are never ended, so not counted)
+                if ready.speculation is not None:
+                    ready.speculation.cancel()
+                self.profiler.turn_finished()
+
+    def _think(self, turn):
+        with turn.metrics.stage("think"):
+            self._respond(turn)
+        self._put(self.speak_queue, turn)
+
+    def _respond(self, turn):
+        farewell = self.brain.exit_reply(turn.text)
+        if farewell:
+            turn.response = farewell
+            turn.final = True
+        elif turn.speculation is not None and turn.speculation.partials:
+            committed_at = turn.speculation.committed_at
+            turn.response, hit = turn.speculation.finish(turn.text)
+            self.speculation_turns += 1
+            turn.metrics.set(speculation_hit=hit)
+            if hit:
+                self.speculation_hits += 1
+                print(f"[Pipeline] Speculation hit: committed {(turn.captured_at - committed_at) * 1000:.0f} ms "
+                      f"before the end of speech ({self.speculation_hits}/{self.speculation_turns})")
+        else:
+            turn.response = self.brain.chat(turn.text)
+
+    def _playback_stage(self):
+        while not self.stop_event.is_set():
+            turn = self._get(self.speak_queue)
+            if turn is None:
+                break
+            if turn.generation < self.generation and not turn.final:
+                # Superseded by a barge-in
+                turn.metrics.set(superseded=True)
+                turn.metrics.end()
+                self.profiler.turn_finished()
+                continue
+            self.audio.speak(turn.response, turn=turn.metrics)
+            turn.metrics.end()
+            self.profiler.turn_finished()
+            if turn.final:
+                break
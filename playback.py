@@ -0,0 +1,166 @@
+"""
+Disk-free playback. Replies are decoded once into PCM and played from memory
+on a reserved pygame mixer channel; completion is signalled through an Event
+(and an optional callback) when the channel finishes the buffer or playback
+is stopped. One waiter thread sleeps until the buffer's known duration has
+elapsed, then checks Channel.get_busy() every END_POLL_INTERVAL until the
+device has drained it. It never touches the display or the pygame event
+queue, which only work on the main thread on macOS and Windows. Decoded
+buffers are kept in a small LRU so repeated replies skip both file
+I/O and decoding.
+"""
+import threading
+import time
+from collections import OrderedDict
+from tts_stream import PygameDecoder
+
+END_POLL_INTERVAL = 0.01  # Seconds between channel checks once the expected duration has passed
+
+
+class PCMCache:
+    """In-memory LRU of decoded PCM buffers, bounded by total bytes"""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            pcm = self._entries.get(key)
+            if pcm is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return pcm
+
+    def put(self, key, pcm):
+        if len(pcm) > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.total_bytes -= len(old)
+            self._entries[key] = pcm
+            self.total_bytes += len(pcm)
+            while self.total_bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.total_bytes -= len(evicted)
+
+    def remove(self, keys):
+        with self._lock:
+            for key in keys:
+                pcm = self._entries.pop(key, None)
+                if pcm is not None:
+                    self.total_bytes -= len(pcm)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def stats(self):
+        return {"entries": len(self._entries), "bytes": self.total_bytes, "hits": self.hits, "misses": self.misses}
+
+
+class Playback:
+    """Handle of one buffer being played; done is set when it ends or is stopped"""
+
+    def __init__(self, sound, duration, on_done=None):
+        self.sound = sound  # Keep the Sound alive for as long as it plays
+        self.duration = duration
+        self.on_done = on_done
+        self.started = time.monotonic()
+        self.done = threading.Event()
+        self.interrupted = False
+
+    def _complete(self, interrupted):
+        if self.done.is_set():
+            return
+        self.interrupted = interrupted
+        self.done.set()
+        if self.on_done is not None:
+            self.on_done(self)
+
+    def wait(self, timeout=None):
+        return self.done.wait(timeout)
+
+
+class MemoryPlayer:
+    """Plays PCM buffers in the mixer's format straight from memory.
+
+    Buffers go to mixer channel 0, reserved so Sound.play() elsewhere never
+    takes it. A single daemon thread completes them.
+    """
+
+    def __init__(self):
+        import pygame
+        self.pygame = pygame
+        self.decoder = PygameDecoder()
+        pygame.mixer.set_reserved(1)
+        self.channel = pygame.mixer.Channel(0)
+        self.current = None
+        self._closed = False
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)  # Wakes the waiter on play/stop/close
+        self._thread = threading.Thread(target=self._wait_ends, name="playback-end", daemon=True)
+        self._thread.start()
+
+    def decode(self, data):
+        """Compressed audio bytes (MP3) to PCM, trimmed to whole sample frames"""
+        pcm = self.decoder.decode(data)
+        return pcm[:len(pcm) - len(pcm) % self.decoder.frame_bytes]
+
+    def duration(self, pcm):
+        return len(pcm) / self.decoder.bytes_per_ms / 1000.0
+
+    def play(self, pcm, on_done=None):
+        """Start pcm (stopping whatever is playing) and return its Playback"""
+        self.stop()
+        sound = self.pygame.mixer.Sound(buffer=pcm)
+        playback = Playback(sound, self.duration(pcm), on_done)
+        with self._lock:
+            self.current = playback
+            self.channel.play(sound)
+            self._changed.notify()
+        return playback
+
+    def stop(self):
+        """Thread-safe: cut off the current buffer; its Playback completes as interrupted"""
+        with self._lock:
+            playback, self.current = self.current, None
+            self.channel.stop()
+            self._changed.notify()
+        if playback is not None:
+            playback._complete(True)
+
+    def close(self):
+        """Stop playback and end the waiter thread"""
+        self.stop()
+        with self._lock:
+            self._closed = True
+            self._changed.notify()
+        self._thread.join(timeout=1)
+
+    def _wait_ends(self):
+        while True:
+            with self._lock:
+                if self._closed:
+                    return
+                playback = self.current
+                if playback is None:
+                    self._changed.wait()
+                    continue
+                # Nothing to check before the buffer can have ended; play/stop wake the wait early
+                remaining = playback.started + playback.duration - time.monotonic()
+                if remaining > 0:
+                    self._changed.wait(remaining)
+                    continue
+                # The device may lag the estimate, so only the channel decides
+                if self.channel.get_busy():
+                    self._changed.wait(END_POLL_INTERVAL)
+                    continue
+                self.current = None
+            playback._complete(False)
@@ -0,0 +1,260 @@
+"""
+On-demand profiling of the voice loop. A profile covers either the startup
+sequence (Systems.get_brain / get_audio) or the next N turns, and is written
+to PROFILE_DIRECTORY as:
+
+    <label>.collapsed   sampled stacks, one "frame;frame;... count" per line
+                        (flamegraph.pl, speedscope, inferno)
+    <label>.pstats      cProfile statistics (PROFILE_MODE = "cprofile" only)
+    <label>.tracemalloc allocation snapshot at the end (tracemalloc.Snapshot.load)
+    <label>.alloc.txt   top allocation growth over the profiled window
+
+The last two need allocation tracing ("alloc" below, or PROFILE_TRACEMALLOC),
+which slows Python code several times over while it is on.
+
+It is triggered without a restart:
+    SHIPRA_PROFILE=startup,turns:5,alloc  environment, read at startup
+    kill -USR1 <pid>                 profile the next PROFILE_TURNS turns
+                                     (a second signal stops early)
+    echo "5 alloc" > cache/profile.request
+                                     same, on platforms without SIGUSR1; the
+                                     file may hold a turn count and "alloc"
+
+The sampler is a daemon thread reading sys._current_frames() every
+PROFILE_INTERVAL_MS, so every thread (pipeline stages, audio loop) is seen
+and the profiled code is not slowed by tracing. While idle the only cost is
+one trigger check per turn.
+"""
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from config import Config
+
+
+class StackSampler:
+    """Samples the stacks of all threads into collapsed-stack counts"""
+
+    def __init__(self, interval_ms):
+        self.interval = interval_ms / 1000.0
+        self.stacks = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self):
+        me = threading.get_ident()
+        names = {}
+        while not self._stop.wait(self.interval):
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                if ident not in names:
+                    names = {thread.ident: thread.name for thread in threading.enumerate()}
+                frames = []
+                while frame is not None:
+                    code = frame.f_code
+                    frames.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                    frame = frame.f_back
+                frames.append(names.get(ident, str(ident)))
+                self.stacks[";".join(reversed(frames))] += 1
+            self.samples += 1
+
+    def write(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+class ProfileSession:
+    """One profiled window: sampler or cProfile, plus tracemalloc"""
+
+    def __init__(self, label, mode=None, trace_allocations=None):
+        self.label = label
+        self.mode = mode or Config.PROFILE_MODE
+        self.trace_allocations = Config.PROFILE_TRACEMALLOC if trace_allocations is None else trace_allocations
+        self.started = time.perf_counter()
+        self.sampler = None
+        self.profile = None
+        self._traced = False
+        self._baseline = None
+
+    def start(self):
+        import tracemalloc
+        if self.trace_allocations and not tracemalloc.is_tracing():
+            tracemalloc.start(Config.PROFILE_TRACEMALLOC_FRAMES)
+            self._traced = True
+        if tracemalloc.is_tracing():
+            self._baseline = tracemalloc.take_snapshot()
+        if self.mode == "cprofile":
+            # Only sees the thread that started it (the voice loop or startup)
+            import cProfile
+            self.profile = cProfile.Profile()
+            self.profile.enable()
+        else:
+            self.sampler = StackSampler(Config.PROFILE_INTERVAL_MS)
+            self.sampler.start()
+        return self
+
+    def stop(self):
+        """Stop and write the output files; returns their base path"""
+        import tracemalloc
+        if self.profile is not None:
+            self.profile.disable()
+        if self.sampler is not None:
+            self.sampler.stop()
+        os.makedirs(Config.PROFILE_DIRECTORY, exist_ok=True)
+        stamp = time.strftime("%Y%m%d-%H%M%S") + f".{int(time.time() * 1000) % 1000:03d}"
+        base = os.path.join(Config.PROFILE_DIRECTORY, f"{self.label}-{stamp}-{os.getpid()}")
+        try:
+            if self.sampler is not None:
+                self.sampler.write(base + ".collapsed")
+            if self.profile is not None:
+                self.profile.dump_stats(base + ".pstats")
+            if tracemalloc.is_tracing():
+                snapshot = tracemalloc.take_snapshot()
+                snapshot.dump(base + ".tracemalloc")
+                self._write_allocations(base + ".alloc.txt", snapshot)
+        except OSError as e:
+            print(f"[Profile] Write Error: {e}")
+        finally:
+            if self._traced:
+                tracemalloc.stop()
+        elapsed = time.perf_counter() - self.started
+        samples = f", {self.sampler.samples} samples" if self.sampler is not None else ""
+        print(f"[Profile] {self.label}: {elapsed:.1f} s{samples} -> {base}.*")
+        return base
+
+    def _write_allocations(self, path, snapshot):
+        import tracemalloc
+        filters = [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, __file__)]
+        snapshot = snapshot.filter_traces(filters)
+        with open(path, "w", encoding="utf-8") as f:
+            if self._baseline is not None:
+                f.write("# Allocation growth over the profiled window\n")
+                for stat in snapshot.compare_to(self._baseline.filter_traces(filters), "lineno")[:Config.PROFILE_TOP_ALLOCATIONS]:
+                    f.write(f"{stat}\n")
+            f.write("\n# Largest live allocations at the end\n")
+            for stat in snapshot.statistics("lineno")[:Config.PROFILE_TOP_ALLOCATIONS]:
+                f.write(f"{stat}\n")
+
+
+class Profiler:
+    """Arms, runs and stops profile sessions from env, signal or trigger file"""
+
+    def __init__(self, spec=None):
+        spec = os.environ.get("SHIPRA_PROFILE", "") if spec is None else spec
+        self.profile_startup = False
+        self.pending = 0  # Turns requested but not started yet
+        self.remaining = 0  # Turns left in the running session
+        self.trace_allocations = None  # None: Config.PROFILE_TRACEMALLOC
+        self.session = None
+        self._startup_session = None
+        self._stop_requested = False
+        self._lock = threading.Lock()
+        for part in spec.replace(" ", "").lower().split(","):
+            if part == "startup":
+                self.profile_startup = True
+            elif part == "alloc":
+                self.trace_allocations = True
+            elif part.startswith("turns"):
+                count = part.partition(":")[2]
+                try:
+                    self.pending = int(count or Config.PROFILE_TURNS)
+                except ValueError:
+                    print(f"[Profile] Bad turn count {count!r} in SHIPRA_PROFILE; profiling {Config.PROFILE_TURNS} turn(s)")
+                    self.pending = Config.PROFILE_TURNS
+
+    def install_signal(self):
+        """SIGUSR1 arms (or stops) a turn profile; no-op where SIGUSR1 does not exist"""
+        import signal
+        if not hasattr(signal, "SIGUSR1") or threading.current_thread() is not threading.main_thread():
+            return False
+        signal.signal(signal.SIGUSR1, lambda signum, frame: self.request())
+        return True
+
+    def request(self, turns=None, trace_allocations=None):
+        """Thread- and signal-safe: profile the next turns (or stop the running profile)"""
+        if self.session is not None:
+            self._stop_requested = True
+        else:
+            self.trace_allocations = trace_allocations
+            self.pending = turns or Config.PROFILE_TURNS
+
+    def _check_trigger(self):
+        path = Config.PROFILE_TRIGGER_FILE
+        if not path or not os.path.exists(path):
+            return
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                words = f.read().lower().split()
+            os.remove(path)
+        except OSError:
+            return
+        turns = next((int(word) for word in words if word.isdigit()), None)
+        self.request(turns, True if "alloc" in words else None)
+
+    @contextmanager
+    def startup(self, label):
+        """Profile a block of the startup sequence when SHIPRA_PROFILE has "startup" (outermost block only)"""
+        if not self.profile_startup or self.session is not None or self._startup_session is not None:
+            yield
+            return
+        self._startup_session = ProfileSession(f"startup-{label}", trace_allocations=self.trace_allocations).start()
+        try:
+            yield
+        finally:
+            session, self._startup_session = self._startup_session, None
+            session.stop()
+
+    def turn_started(self):
+        self._check_trigger()
+        if self.session is not None or not self.pending:
+            return
+        with self._lock:
+            if self.session is None and self.pending:
+                self.remaining, self.pending = self.pending, 0
+                self._stop_requested = False
+                print(f"[Profile] Profiling the next {self.remaining} turn(s)")
+                self.session = ProfileSession(f"turns{self.remaining}",
+                                              trace_allocations=self.trace_allocations).start()
+
+    def turn_finished(self):
+        if self.session is None:
+            return
+        with self._lock:
+            if self.session is None:
+                return
+            self.remaining -= 1
+            if self.remaining <= 0 or self._stop_requested:
+                session, self.session = self.session, None
+                session.stop()
+
+    def close(self):
+        """Write out a profile still running at exit"""
+        with self._lock:
+            session, self.session = self.session, None
+        if session is not None:
+            session.stop()
+
+
+_profiler = None
+
+
+def get_profiler():
+    """Process-wide profiler (configured from SHIPRA_PROFILE on first use)"""
+    global _profiler
+    if _profiler is None:
+        _profiler = Profiler()
+    return _profiler
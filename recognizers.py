@@ -0,0 +1,194 @@
+"""
+Speech recognition backends behind one interface. "google" is the online
+Google Web Speech API used so far; "vosk" (Kaldi) and "whisper" (whisper.cpp
+through pywhispercpp) run offline on the CPU. Offline backends can be biased
+towards the words the intent matcher listens for: Vosk is restricted to a
+grammar built from them, whisper gets them as its initial prompt.
+
+Every backend answers recognize(AudioData) with text or None. Streaming
+backends also accept audio while the user is still talking through
+start_stream(), whose feed() returns the growing partial transcript.
+"""
+import json
+import os
+import numpy as np
+from config import Config
+
+SAMPLE_RATE = 16000  # What the offline models expect
+
+
+def intent_vocabulary():
+    """Latin-script words and phrases the intent matcher routes on"""
+    from catalog import get_catalog
+    from intents import get_matcher, HINDI_KEYWORDS, ENGLISH_MARKER
+    # Exit words as in ShipraBrain.exit_reply
+    phrases = ([ENGLISH_MARKER, "shipra"] + list(get_matcher().vocabulary) + sorted(HINDI_KEYWORDS)
+               + get_catalog().exit_words())
+    vocabulary = []
+    for phrase in phrases:
+        phrase = phrase.lower().strip()
+        if phrase and phrase.isascii():
+            vocabulary.append(phrase)
+    return list(dict.fromkeys(vocabulary))
+
+
+def pcm16(audio, rate=SAMPLE_RATE):
+    """Mono 16-bit PCM bytes of an sr.AudioData at rate"""
+    return audio.get_raw_data(convert_rate=rate, convert_width=2)
+
+
+class RecognizerStream:
+    """Buffers audio and recognizes it at the end (for non-streaming backends)"""
+
+    def __init__(self, backend, sample_rate):
+        self.backend = backend
+        self.sample_rate = sample_rate
+        self._chunks = []
+
+    def feed(self, pcm):
+        """Add PCM bytes; returns the partial transcript so far (None if unknown)"""
+        self._chunks.append(pcm)
+        return None
+
+    def finish(self):
+        import speech_recognition as sr
+        return self.backend.recognize(sr.AudioData(b"".join(self._chunks), self.sample_rate, 2))
+
+
+class GoogleRecognizer:
+    """Google Web Speech API through speech_recognition (needs the network)"""
+    name = "google"
+    streaming = False
+
+    def __init__(self, recognizer=None):
+        import speech_recognition as sr
+        self.recognizer = recognizer or sr.Recognizer()
+
+    def recognize(self, audio):
+        import speech_recognition as sr
+        try:
+            return self.recognizer.recognize_google(audio) or None
+        except sr.UnknownValueError:
+            return None
+        except sr.RequestError:
+            print("[ASR] Network Error during Recognition.")
+            return None
+
+    def start_stream(self, sample_rate):
+        return RecognizerStream(self, sample_rate)
+
+
+class VoskStream:
+    """Incremental Kaldi decoding: partial results while the user talks"""
+
+    def __init__(self, backend, sample_rate):
+        self.sample_rate = sample_rate
+        self._recognizer = backend.new_recognizer()
+        self._final = []
+
+    def feed(self, pcm):
+        if self.sample_rate != SAMPLE_RATE:
+            import speech_recognition as sr
+            pcm = pcm16(sr.AudioData(pcm, self.sample_rate, 2))
+        if self._recognizer.AcceptWaveform(pcm):
+            # Kaldi found its own endpoint inside the utterance
+            text = json.loads(self._recognizer.Result()).get("text", "")
+            if text:
+                self._final.append(text)
+            return " ".join(self._final) or None
+        partial = json.loads(self._recognizer.PartialResult()).get("partial", "")
+        return " ".join(self._final + ([partial] if partial else [])) or None
+
+    def finish(self):
+        text = json.loads(self._recognizer.FinalResult()).get("text", "")
+        return _clean(" ".join(self._final + ([text] if text else [])))
+
+
+def _clean(text):
+    text = " ".join(word for word in text.split() if word != "[unk]")
+    return text or None
+
+
+class VoskRecognizer:
+    """Offline Kaldi recognizer, optionally restricted to the intent vocabulary"""
+    name = "vosk"
+    streaming = True
+
+    def __init__(self, model_path=None, grammar=None):
+        import vosk
+        model_path = model_path or Config.VOSK_MODEL_PATH
+        if not os.path.isdir(model_path):
+            raise FileNotFoundError(f"Vosk model not found at {model_path}")
+        vosk.SetLogLevel(-1)
+        self._vosk = vosk
+        self.model = vosk.Model(model_path)
+        # "[unk]" lets out-of-grammar speech fall through instead of being forced onto a keyword
+        self.grammar = json.dumps(list(grammar) + ["[unk]"]) if grammar else None
+
+    def new_recognizer(self):
+        if self.grammar:
+            return self._vosk.KaldiRecognizer(self.model, SAMPLE_RATE, self.grammar)
+        return self._vosk.KaldiRecognizer(self.model, SAMPLE_RATE)
+
+    def recognize(self, audio):
+        recognizer = self.new_recognizer()
+        recognizer.AcceptWaveform(pcm16(audio))
+        return _clean(json.loads(recognizer.FinalResult()).get("text", ""))
+
+    def start_stream(self, sample_rate):
+        return VoskStream(self, sample_rate)
+
+
+class WhisperRecognizer:
+    """Offline whisper.cpp (pywhispercpp); the vocabulary becomes the initial prompt"""
+    name = "whisper"
+    streaming = False
+
+    def __init__(self, model=None, vocabulary=None, threads=None):
+        from pywhispercpp.model import Model
+        self.model = Model(model or Config.WHISPER_MODEL, n_threads=threads or os.cpu_count() or 1,
+                           print_progress=False, print_realtime=False)
+        self.prompt = ", ".join(vocabulary) if vocabulary else ""
+
+    def recognize(self, audio):
+        samples = np.frombuffer(pcm16(audio), dtype=np.int16).astype(np.float32) / 32768.0
+        if not len(samples):
+            return None
+        segments = self.model.transcribe(samples, initial_prompt=self.prompt, language="en")
+        text = " ".join(segment.text.strip() for segment in segments).strip()
+        return text or None
+
+    def start_stream(self, sample_rate):
+        return RecognizerStream(self, sample_rate)
+
+
+BACKENDS = {"google": GoogleRecognizer, "vosk": VoskRecognizer, "whisper": WhisperRecognizer}
+
+
+FALLBACKS = ("google", "vosk")  # Tried in order after the configured backend; whisper may download its model
+
+
+def create_recognizer(backend=None, recognizer=None, grammar=None):
+    """Recognizer for backend (default Config.ASR_BACKEND), falling back to Google,
+    then to Vosk, when it is unavailable.
+
+    grammar defaults to Config.ASR_INTENT_GRAMMAR; recognizer is the
+    speech_recognition Recognizer the Google backend should reuse.
+    """
+    backend = (backend or Config.ASR_BACKEND).lower()
+    grammar = Config.ASR_INTENT_GRAMMAR if grammar is None else grammar
+    if backend not in BACKENDS:
+        print(f"[ASR] Unknown backend '{backend}'")
+    errors = []
+    for name in [backend] + [name for name in FALLBACKS if name != backend]:
+        try:
+            if name == "google":
+                return GoogleRecognizer(recognizer)
+            if name == "vosk":
+                return VoskRecognizer(grammar=intent_vocabulary() if grammar else None)
+            if name == "whisper":
+                return WhisperRecognizer(vocabulary=intent_vocabulary() if grammar else None)
+        except Exception as e:
+            print(f"[ASR] {name} unavailable ({e})")
+            errors.append(f"{name}: {e}")
+    raise RuntimeError(f"No speech recognition backend available ({'; '.join(errors)})")
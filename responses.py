@@ -0,0 +1,30 @@
+"""Response catalog for ShipraBrain.
+
+Every fixed reply is declared in data/catalog.json under "responses", keyed
+by '<intent>.<topic>' and then by language ('hindi', 'english', or 'any'
+when one text serves both). Replies that depend on runtime values are
+str.format templates under "templates" and are never enumerated by
+iter_static(). The compiled tables come from catalog.get_catalog().
+"""
+from catalog import get_catalog
+
+
+def get_responses(key, lang):
+    """Variants for key in lang, falling back to the language-neutral entry"""
+    return get_catalog().replies(key, lang)
+
+
+def get_templates(key, lang):
+    return get_catalog().template(key, lang)
+
+
+def iter_static():
+    """Yield (key, lang, text) for every static reply variant"""
+    catalog = get_catalog()
+    for key, entry in catalog.responses.items():
+        for lang, variants in entry.items():
+            # Languages filled in from 'any' would repeat its texts
+            if lang != 'any' and 'any' in entry and variants == entry['any']:
+                continue
+            for text in variants:
+                yield key, lang, text
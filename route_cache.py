@@ -0,0 +1,103 @@
+"""
+Memoized routing decisions for ShipraBrain. The decision for a normalized
+query (name prefix removal, language, intent, sub-intent, the catalog route
+or the knowledge-base answer, the weather place) is kept in a bounded LRU,
+tagged by how long it stays valid:
+
+    STATIC    catalog replies and knowledge answers, until invalidate()
+              (ShipraBrain drops the knowledge answers when the files change)
+    EXPIRING  weather queries, for WEATHER_CACHE_TTL seconds
+    UNCACHED  time queries, never stored
+
+Only the decision is cached. The reply itself is still picked per turn, so
+get_varied_response keeps rotating the variants and weather reports come
+from WeatherService's own cache.
+"""
+import threading
+import time
+from collections import OrderedDict
+from config import Config
+
+STATIC = "static"
+EXPIRING = "expiring"
+UNCACHED = "uncached"
+
+
+class Decision:
+    """Routing of one normalized query"""
+    __slots__ = ('query', 'match', 'route', 'answer', 'place', 'volatility', 'generation')
+
+    def __init__(self, query, match, route=None, answer=None, place=None, volatility=STATIC, generation=None):
+        self.query = query  # Lowercased text without the name prefix
+        self.match = match  # IntentMatch
+        self.route = route  # Catalog Route, for replies from the catalog
+        self.answer = answer  # Knowledge-base answer (None: the unknown reply)
+        self.place = place  # Gazetteer place of a weather query
+        self.volatility = volatility
+        self.generation = generation  # Knowledge version of a knowledge-base decision, else None
+
+
+class RouteCache:
+    """Bounded LRU of Decisions keyed by normalized query text"""
+
+    def __init__(self, max_entries=None, ttl=None):
+        self.max_entries = max_entries or Config.ROUTE_CACHE_MAX_ENTRIES
+        self.ttl = ttl or Config.WEATHER_CACHE_TTL
+        self._entries = OrderedDict()  # key -> (decision, expires or None)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expired = 0
+        self.invalidated = 0
+        self.uncached = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            decision, expires = entry
+            if expires is not None and time.monotonic() >= expires:
+                del self._entries[key]
+                self.expired += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return decision
+
+    def put(self, key, decision):
+        if decision.volatility == UNCACHED:
+            self.uncached += 1
+            return
+        expires = time.monotonic() + self.ttl if decision.volatility == EXPIRING else None
+        with self._lock:
+            self._entries[key] = (decision, expires)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, volatility=STATIC, where=None):
+        """Drop every entry of one volatility (None: all), optionally only the
+        decisions where(decision) is true for; returns how many"""
+        with self._lock:
+            keys = [key for key, (decision, _) in self._entries.items()
+                    if (volatility is None or decision.volatility == volatility)
+                    and (where is None or where(decision))]
+            for key in keys:
+                del self._entries[key]
+            self.invalidated += len(keys)
+        return len(keys)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {"entries": len(self._entries), "max_entries": self.max_entries, "hits": self.hits,
+                "misses": self.misses, "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions, "expired": self.expired, "invalidated": self.invalidated,
+                "uncached": self.uncached}
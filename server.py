@@ -0,0 +1,434 @@
+"""
+Multi-session HTTP/WebSocket server. One shared ShipraBrain answers every
+session; each session keeps its own recent history, and its response-variation counters
+live in the brain's bounded session store. Admission control sheds load once too many requests are in flight
+or too many sessions are open, and every session is rate limited with a
+token bucket.
+
+Endpoints:
+    POST /session                         -> {"session": id}
+    POST /chat   {"session", "text"}      -> reply with intent/language labels
+    POST /classify {"texts": [...]}       -> intent/language labels per text, no replies
+    POST /speak  {"text"}                 -> streamed audio/mpeg
+    GET  /ws?session=id                   -> JSON messages {"text", "audio": bool}
+    GET  /health                          -> session and load counters
+    GET  /metrics                         -> Prometheus text (latency histograms, cache stats)
+
+Usage:
+    python server.py [--host H] [--port P] [--workers N] [--metrics]
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import time
+import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from aiohttp import web, WSMsgType
+from config import Config
+from metrics import get_metrics
+from profiling import get_profiler
+
+SESSION_ID_MAX = 64  # Characters in a client-supplied session id (ours are 32)
+SWEEPER = web.AppKey("sweeper", asyncio.Task)  # Idle-session sweep, cancelled on cleanup
+
+
+class Session:
+    """Per-session conversation history and rate-limit bucket"""
+    __slots__ = ('id', 'history', 'tokens', 'refilled', 'last_seen')
+
+    def __init__(self, session_id, burst):
+        self.id = session_id
+        self.history = deque(maxlen=Config.SERVER_HISTORY)
+        self.tokens = float(burst)
+        self.refilled = self.last_seen = time.monotonic()
+
+    def allow(self, rate, burst):
+        """Take one token from the bucket if available"""
+        now = time.monotonic()
+        self.tokens = min(burst, self.tokens + (now - self.refilled) * rate)
+        self.refilled = self.last_seen = now
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+
+class ShipraServer:
+    """aiohttp application around one shared brain"""
+
+    def __init__(self, brain, max_sessions=None, max_inflight=None, rate=None, burst=None, session_ttl=None):
+        self.brain = brain
+        self.max_sessions = max_sessions or Config.SERVER_MAX_SESSIONS
+        self.max_inflight = max_inflight or Config.SERVER_MAX_INFLIGHT
+        self.rate = rate or Config.SERVER_RATE_PER_SEC
+        self.burst = burst or Config.SERVER_RATE_BURST
+        self.session_ttl = session_ttl or Config.SERVER_SESSION_TTL
+
+        self.sessions = {}
+        self.inflight = 0
+        # Brain calls can block (weather lookups), so they run off the event loop
+        self.executor = ThreadPoolExecutor(max_workers=Config.SERVER_THREADS, thread_name_prefix="brain")
+        self.tts_cache = None
+        self.connector = None
+
+        # Counters
+        self.requests = 0
+        self.rejected_busy = 0
+        self.rejected_rate = 0
+        self.sessions_evicted = 0
+        self.metrics = get_metrics()
+        self.profiler = get_profiler()
+        self.metrics.register("server", self.counters)
+
+    def app(self):
+        app = web.Application()
+        app.router.add_post("/session", self.handle_session)
+        app.router.add_post("/chat", self.handle_chat)
+        app.router.add_post("/classify", self.handle_classify)
+        app.router.add_post("/speak", self.handle_speak)
+        app.router.add_get("/ws", self.handle_ws)
+        app.router.add_get("/health", self.handle_health)
+        app.router.add_get("/metrics", self.handle_metrics)
+        app.on_startup.append(self._on_startup)
+        app.on_cleanup.append(self._on_cleanup)
+        return app
+
+    async def _on_startup(self, app):
+        if Config.TTS_CACHE_ENABLED:
+            from tts_cache import TTSCache
+            self.tts_cache = TTSCache(Config.TTS_CACHE_DIRECTORY, max_bytes=Config.TTS_CACHE_MAX_BYTES,
+                                      max_age=Config.TTS_CACHE_MAX_AGE)
+            self.metrics.register("tts_cache", self.tts_cache.stats)
+            self.brain.on_knowledge_change(self._forget_audio)
+        app[SWEEPER] = asyncio.create_task(self._sweep())
+
+    async def _on_cleanup(self, app):
+        app[SWEEPER].cancel()
+        if self.connector is not None:
+            await self.connector.shutdown()
+        if Config.SESSION_SNAPSHOT_ENABLED:
+            saved = self.brain.sessions.snapshot()
+            print(f"[Server] Saved {saved} session(s)")
+        self.profiler.close()
+        self.executor.shutdown(wait=False)
+
+    # --- Sessions and admission ------------------------------------------
+
+    def get_session(self, session_id=None):
+        """Existing session, or a new one; None when the session table is full"""
+        session = self.sessions.get(session_id) if session_id else None
+        if session is not None:
+            return session
+        if len(self.sessions) >= self.max_sessions:
+            self._evict_idle()
+            if len(self.sessions) >= self.max_sessions:
+                return None
+        # Unknown ids are adopted so clients survive a server restart
+        session = Session(session_id or uuid.uuid4().hex, self.burst)
+        self.sessions[session.id] = session
+        return session
+
+    def _evict_idle(self):
+        cutoff = time.monotonic() - self.session_ttl
+        for session_id in [sid for sid, s in self.sessions.items() if s.last_seen < cutoff]:
+            del self.sessions[session_id]
+            self.brain.sessions.drop(session_id)
+            self.sessions_evicted += 1
+
+    async def _sweep(self):
+        while True:
+            await asyncio.sleep(min(60, self.session_ttl))
+            self._evict_idle()
+
+    def _admit(self, session):
+        """None if the request may proceed, else the rejection response"""
+        self.requests += 1
+        if session is None or self.inflight >= self.max_inflight:
+            self.rejected_busy += 1
+            return web.json_response({"error": "busy"}, status=503, headers={"Retry-After": "1"})
+        if not session.allow(self.rate, self.burst):
+            self.rejected_rate += 1
+            return web.json_response({"error": "rate limited"}, status=429, headers={"Retry-After": "1"})
+        return None
+
+    async def _reply(self, session, text):
+        loop = asyncio.get_running_loop()
+        turn = self.metrics.begin_turn()
+        self.profiler.turn_started()
+        self.inflight += 1
+        try:
+            with turn.stage("think"):
+                detail = await loop.run_in_executor(self.executor, self._think, session, text)
+        finally:
+            self.inflight -= 1
+            self.profiler.turn_finished()
+        turn.set(pid=os.getpid(), intent=detail.get("intent"))
+        turn.end()
+        session.history.append((text, detail["response"]))
+        detail["session"] = session.id
+        return detail
+
+    def _think(self, session, text):
+        with self.brain.use_session(session.id):
+            return self.brain.chat_detail(text)
+
+    # --- Audio -----------------------------------------------------------
+
+    async def synthesize(self, text):
+        """Async iterator of MP3 chunks for text: from the TTS cache or streamed from edge-tts"""
+        from tts_cache import TTSCache
+        clean = TTSCache.normalize(text)
+        voice = (Config.TTS_VOICE, Config.TTS_RATE, Config.TTS_VOLUME, Config.TTS_PITCH)
+        key = TTSCache.make_key(clean, *voice)
+        # Workers share the cache directory but each indexes it separately: get() misses on a file
+        # another worker removed, and one removed between get() and open() is synthesized again
+        cached = self.tts_cache.get(key) if self.tts_cache is not None else None
+        f = None
+        if cached:
+            try:
+                f = open(cached, "rb")
+            except FileNotFoundError:
+                pass
+        if f is not None:
+            with f:
+                while True:
+                    chunk = f.read(16384)
+                    if not chunk:
+                        return
+                    yield chunk
+
+        import edge_tts
+        self.metrics.count("tts_requests")
+        if self.connector is None and Config.TTS_SHARED_CONNECTOR:
+            from audio_loop import persistent_connector_class
+            if persistent_connector_class() is not None:
+                self.connector = persistent_connector_class()(ttl_dns_cache=300)
+        communicate = edge_tts.Communicate(clean, voice[0], rate=voice[1], volume=voice[2], pitch=voice[3],
+                                           connector=self.connector)
+        data = bytearray()
+        async for chunk in communicate.stream():
+            if chunk["type"] == "audio":
+                data.extend(chunk["data"])
+                yield chunk["data"]
+        if self.tts_cache is not None and data:
+            self.tts_cache.put(key, bytes(data))
+
+    def _forget_audio(self, texts):
+        """Knowledge reload: drop the cached audio of answers that changed"""
+        from tts_cache import TTSCache
+        voice = (Config.TTS_VOICE, Config.TTS_RATE, Config.TTS_VOLUME, Config.TTS_PITCH)
+        self.tts_cache.remove([TTSCache.make_key(TTSCache.normalize(text), *voice) for text in texts])
+
+    # --- Handlers --------------------------------------------------------
+
+    async def _json(self, request):
+        """Request body as a dict; None for anything else (malformed JSON, lists, numbers)"""
+        try:
+            body = await request.json()
+        except Exception:
+            return None
+        return body if isinstance(body, dict) else None
+
+    @staticmethod
+    def valid_session_id(session_id):
+        return session_id is None or (isinstance(session_id, str) and 0 < len(session_id) <= SESSION_ID_MAX)
+
+    def _bad_request(self, body):
+        """400 response if body is not an object or carries a bad session id, else None"""
+        if body is None:
+            return web.json_response({"error": "expected a JSON object"}, status=400)
+        if not self.valid_session_id(body.get("session")):
+            return web.json_response({"error": "invalid session id"}, status=400)
+        return None
+
+    async def handle_session(self, request):
+        session = self.get_session()
+        if session is None:
+            return web.json_response({"error": "busy"}, status=503, headers={"Retry-After": "1"})
+        return web.json_response({"session": session.id})
+
+    async def handle_chat(self, request):
+        body = await self._json(request)
+        invalid = self._bad_request(body)
+        if invalid is not None:
+            return invalid
+        text = str(body.get("text", "")).strip()
+        if not text:
+            return web.json_response({"error": "missing text"}, status=400)
+        session = self.get_session(body.get("session"))
+        rejected = self._admit(session)
+        if rejected is not None:
+            return rejected
+        return web.json_response(await self._reply(session, text))
+
+    async def handle_classify(self, request):
+        body = await self._json(request)
+        invalid = self._bad_request(body)
+        if invalid is not None:
+            return invalid
+        texts = body.get("texts")
+        if not isinstance(texts, list) or not texts:
+            return web.json_response({"error": "missing texts"}, status=400)
+        if len(texts) > Config.SERVER_MAX_CLASSIFY:
+            return web.json_response({"error": f"at most {Config.SERVER_MAX_CLASSIFY} texts"}, status=413)
+        session = self.get_session(body.get("session"))
+        rejected = self._admit(session)
+        if rejected is not None:
+            return rejected
+        loop = asyncio.get_running_loop()
+        self.inflight += 1
+        try:
+            labels = await loop.run_in_executor(self.executor, self.brain.classify_batch, [str(t) for t in texts])
+        finally:
+            self.inflight -= 1
+        return web.json_response({"labels": [{"intent": intent, "sub_intent": sub_intent, "lang": lang}
+                                             for intent, sub_intent, lang in labels.labels()]})
+
+    async def handle_speak(self, request):
+        body = await self._json(request)
+        invalid = self._bad_request(body)
+        if invalid is not None:
+            return invalid
+        text = str(body.get("text", "")).strip()
+        if not text:
+            return web.json_response({"error": "missing text"}, status=400)
+        session = self.get_session(body.get("session"))
+        rejected = self._admit(session)
+        if rejected is not None:
+            return rejected
+        response = web.StreamResponse(headers={"Content-Type": "audio/mpeg"})
+        await response.prepare(request)
+        self.inflight += 1
+        try:
+            async for chunk in self.synthesize(text):
+                await response.write(chunk)
+        except Exception as e:
+            print(f"[Server] TTS Error: {e}")
+        finally:
+            self.inflight -= 1
+        await response.write_eof()
+        return response
+
+    async def handle_ws(self, request):
+        if not self.valid_session_id(request.query.get("session")):
+            return web.json_response({"error": "invalid session id"}, status=400)
+        session = self.get_session(request.query.get("session"))
+        if session is None:
+            return web.json_response({"error": "busy"}, status=503, headers={"Retry-After": "1"})
+        ws = web.WebSocketResponse(heartbeat=30)
+        await ws.prepare(request)
+        await ws.send_json({"session": session.id})
+        async for message in ws:
+            if message.type != WSMsgType.TEXT:
+                continue
+            try:
+                body = json.loads(message.data)
+            except ValueError:
+                body = {"text": message.data}
+            if not isinstance(body, dict):
+                await ws.send_json({"error": "expected a JSON object", "status": 400})
+                continue
+            text = str(body.get("text", "")).strip()
+            if not text:
+                continue
+            rejected = self._admit(session)
+            if rejected is not None:
+                await ws.send_json({"error": json.loads(rejected.body)["error"], "status": rejected.status})
+                continue
+            detail = await self._reply(session, text)
+            await ws.send_json(detail)
+            if body.get("audio"):
+                try:
+                    async for chunk in self.synthesize(detail["response"]):
+                        await ws.send_bytes(chunk)
+                except Exception as e:
+                    print(f"[Server] TTS Error: {e}")
+                await ws.send_json({"audio_end": True})
+        return ws
+
+    async def handle_health(self, request):
+        return web.json_response(self.stats())
+
+    async def handle_metrics(self, request):
+        return web.Response(text=self.metrics.render_prometheus(), content_type="text/plain",
+                            charset="utf-8", headers={"X-Shipra-Pid": str(os.getpid())})
+
+    def counters(self):
+        return {
+            "sessions": len(self.sessions),
+            "inflight": self.inflight,
+            "requests": self.requests,
+            "rejected_busy": self.rejected_busy,
+            "rejected_rate": self.rejected_rate,
+            "sessions_evicted": self.sessions_evicted,
+        }
+
+    def stats(self):
+        stats = {"pid": os.getpid()}
+        stats.update(self.counters())
+        stats["session_store"] = self.brain.sessions.stats()
+        return stats
+
+
+def serve(host, port, reuse_port=False, metrics=False):
+    """Run one server process"""
+    from systems import Systems
+    if metrics:
+        get_metrics().enable()
+    # kill -USR1 <pid> profiles this process's next PROFILE_TURNS requests
+    get_profiler().install_signal()
+    server = ShipraServer(Systems.get_brain())
+    print(f"[Server] pid {os.getpid()} listening on http://{host}:{port}")
+    web.run_app(server.app(), host=host, port=port, reuse_port=reuse_port, print=None)
+
+
+def prepare_indexes():
+    """Bring the persisted knowledge and vector indexes up to date once, so the
+    workers load them instead of all rebuilding the same files at startup"""
+    if Config.KNOWLEDGE_ENABLED:
+        from knowledge import KnowledgeIndex
+        KnowledgeIndex().refresh()
+    if Config.VECTOR_ENABLED:
+        from vector_store import VectorStore
+        VectorStore().load()
+
+
+def run(host, port, workers=1, metrics=False):
+    """One process per core sharing the port (SO_REUSEPORT).
+
+    Sessions live in the process that created them; HTTP clients that keep
+    their connection alive (and WebSocket clients) stay on that process.
+    """
+    if workers <= 1:
+        serve(host, port, metrics=metrics)
+        return
+    prepare_indexes()
+    processes = [multiprocessing.Process(target=serve, args=(host, port, True, metrics), daemon=True)
+                 for _ in range(workers)]
+    for process in processes:
+        process.start()
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        for process in processes:
+            process.terminate()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Shipra multi-session HTTP/WebSocket server")
+    parser.add_argument("--host", default=Config.SERVER_HOST)
+    parser.add_argument("--port", type=int, default=Config.SERVER_PORT)
+    parser.add_argument("--workers", type=int, default=1, help="Server processes (one per core)")
+    parser.add_argument("--metrics", action="store_true", default=Config.METRICS_ENABLED,
+                        help="Record per-request latency histograms and the turn log")
+    args = parser.parse_args(argv)
+    run(args.host, args.port, args.workers, args.metrics)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,206 @@
+"""
+Bounded per-session state for response variation. Every session owns one
+fixed-size row of uint16 counters, indexed by a category id, in a slab that
+is preallocated for Config.SESSION_STORE_MAX_SESSIONS sessions. Idle
+sessions expire after a TTL; when the slab is full the least recently used
+session is evicted. The whole store can be snapshotted to disk and restored.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+import numpy as np
+from config import Config
+
+
+class SessionStore:
+    """Fixed-size integer counter rows per session with TTL and LRU eviction"""
+
+    def __init__(self, max_sessions=None, max_categories=None, ttl=None, sweep_interval=60):
+        self.max_sessions = max_sessions or Config.SESSION_STORE_MAX_SESSIONS
+        self.max_categories = max_categories or Config.SESSION_STORE_MAX_CATEGORIES
+        self.ttl = Config.SESSION_STORE_TTL if ttl is None else ttl
+        self.sweep_interval = sweep_interval
+
+        self.categories = {}  # category name -> column
+        self._rows = np.zeros((self.max_sessions, self.max_categories), dtype=np.uint16)
+        self._last_seen = np.zeros(self.max_sessions, dtype=np.float64)
+        self._owners = [None] * self.max_sessions  # row -> session id
+        self._slots = OrderedDict()  # session id -> row, least recently used first
+        self._free = list(range(self.max_sessions - 1, -1, -1))
+        self._lock = threading.Lock()
+        self._last_sweep = time.time()
+
+        # Counters
+        self.ttl_evictions = 0
+        self.lru_evictions = 0
+        self.eviction_seconds = 0.0
+        self.dropped_categories = 0
+
+    def category_id(self, name):
+        """Column for a category name, assigned on first use (None once full)"""
+        with self._lock:
+            return self._category_id_locked(name)
+
+    def _category_id_locked(self, name):
+        column = self.categories.get(name)
+        if column is None:
+            if len(self.categories) >= self.max_categories:
+                self.dropped_categories += 1
+                return None
+            column = len(self.categories)
+            self.categories[name] = column
+        return column
+
+    def _row(self, session_id, now):
+        """Row of session_id, allocating (and evicting) if needed; caller holds the lock"""
+        if now - self._last_sweep >= self.sweep_interval:
+            self._sweep_locked(now)
+        row = self._slots.get(session_id)
+        if row is not None:
+            self._slots.move_to_end(session_id)
+        else:
+            if not self._free:
+                start = time.perf_counter()
+                oldest, freed = self._slots.popitem(last=False)
+                self._release(oldest, freed)
+                self.lru_evictions += 1
+                self.eviction_seconds += time.perf_counter() - start
+            row = self._free.pop()
+            self._rows[row] = 0
+            self._owners[row] = session_id
+            self._slots[session_id] = row
+        self._last_seen[row] = now
+        return row
+
+    def _release(self, session_id, row):
+        self._owners[row] = None
+        self._last_seen[row] = 0.0
+        self._free.append(row)
+
+    def bump(self, session_id, category):
+        """Current count of category for the session, then increment it"""
+        with self._lock:
+            column = self._category_id_locked(category)
+            row = self._row(session_id, time.time())
+            if column is None:
+                return 0
+            value = int(self._rows[row, column])
+            self._rows[row, column] = (value + 1) & 0xFFFF
+            return value
+
+    def get(self, session_id, category):
+        with self._lock:
+            column = self.categories.get(category)
+            row = self._slots.get(session_id)
+            if row is None or column is None:
+                return 0
+            return int(self._rows[row, column])
+
+    def reset(self, session_id):
+        """Zero the session's counters (creating the session if needed)"""
+        with self._lock:
+            self._rows[self._row(session_id, time.time())] = 0
+
+    def drop(self, session_id):
+        with self._lock:
+            row = self._slots.pop(session_id, None)
+            if row is not None:
+                self._release(session_id, row)
+
+    def sweep(self):
+        """Evict sessions idle for longer than the TTL; returns how many"""
+        with self._lock:
+            return self._sweep_locked(time.time())
+
+    def _sweep_locked(self, now):
+        start = time.perf_counter()
+        self._last_sweep = now
+        if self.ttl <= 0:
+            return 0
+        expired = np.nonzero((self._last_seen > 0) & (self._last_seen < now - self.ttl))[0]
+        for row in expired:
+            session_id = self._owners[row]
+            del self._slots[session_id]
+            self._release(session_id, int(row))
+        self.ttl_evictions += len(expired)
+        self.eviction_seconds += time.perf_counter() - start
+        return len(expired)
+
+    def __contains__(self, session_id):
+        return session_id in self._slots
+
+    def __len__(self):
+        return len(self._slots)
+
+    # --- Snapshot --------------------------------------------------------
+
+    def snapshot(self, path=None):
+        """Write every live session to an .npz file atomically"""
+        path = path or Config.SESSION_SNAPSHOT_FILE
+        with self._lock:
+            ids = list(self._slots)
+            rows = [self._slots[session_id] for session_id in ids]
+            data = {
+                "ids": np.array(ids, dtype=object),
+                "counters": self._rows[rows].copy(),
+                "last_seen": self._last_seen[rows].copy(),
+                "categories": np.array(sorted(self.categories, key=self.categories.get), dtype=object),
+            }
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = f"{path}.{os.getpid()}.tmp"
+            with open(tmp, "wb") as f:
+                np.savez(f, **data)
+            os.replace(tmp, path)
+            return len(ids)
+        except Exception as e:
+            print(f"[Sessions] Could not write snapshot: {e}")
+            return 0
+
+    def restore(self, path=None):
+        """Load a snapshot, skipping sessions that have since expired"""
+        path = path or Config.SESSION_SNAPSHOT_FILE
+        try:
+            with np.load(path, allow_pickle=True) as data:
+                ids = list(data["ids"])
+                counters = data["counters"]
+                last_seen = data["last_seen"]
+                categories = list(data["categories"])
+        except FileNotFoundError:
+            return 0
+        except Exception as e:
+            print(f"[Sessions] Ignoring unreadable snapshot: {e}")
+            return 0
+
+        now = time.time()
+        restored = 0
+        with self._lock:
+            # Map the snapshot's columns onto this store's category ids
+            columns = [self._category_id_locked(name) for name in categories]
+            for session_id, row_counters, seen in zip(ids, counters, last_seen):
+                if self.ttl > 0 and seen < now - self.ttl:
+                    continue
+                row = self._row(session_id, seen)
+                for source, column in enumerate(columns):
+                    if column is not None:
+                        self._rows[row, column] = row_counters[source]
+                restored += 1
+        return restored
+
+    # --- Metrics ---------------------------------------------------------
+
+    def stats(self):
+        row_bytes = self._rows.itemsize * self.max_categories + self._last_seen.itemsize
+        evictions = self.ttl_evictions + self.lru_evictions
+        return {
+            "sessions": len(self._slots),
+            "capacity": self.max_sessions,
+            "categories": len(self.categories),
+            "bytes_per_session": row_bytes,
+            "slab_bytes": self._rows.nbytes + self._last_seen.nbytes,
+            "ttl_evictions": self.ttl_evictions,
+            "lru_evictions": self.lru_evictions,
+            "eviction_us_avg": self.eviction_seconds / evictions * 1e6 if evictions else 0.0,
+            "dropped_categories": self.dropped_categories,
+        }
@@ -0,0 +1,83 @@
+"""
+Early intent commit from streaming partial transcripts. A Speculation keeps
+a running intent/sub-intent/language hypothesis while the user is still
+talking. Once the same hypothesis has held for enough partials it commits:
+the reply is computed without advancing the variation counters and handed
+to on_commit (the audio layer pre-synthesizes it). When the final
+transcript arrives the reply is recomputed the same way; if it matches, the
+speculative audio is used, otherwise on_cancel drops it.
+"""
+import time
+from config import Config
+
+
+class Speculation:
+    """Intent hypothesis over the partial transcripts of one utterance"""
+
+    def __init__(self, brain, on_commit=None, on_cancel=None, min_stable=None, intents=None):
+        self.brain = brain
+        self.on_commit = on_commit
+        self.on_cancel = on_cancel
+        self.min_stable = min_stable or Config.SPECULATION_MIN_STABLE
+        self.intents = Config.SPECULATION_INTENTS if intents is None else intents
+
+        self.hypothesis = None  # (intent, sub_intent, lang) of the latest partial
+        self.stable = 0  # Consecutive partials with that hypothesis
+        self.partials = 0
+        self.response = None  # Committed reply
+        self.committed = None  # Hypothesis it was committed for
+        self.committed_at = None  # perf_counter time of the commit
+        self.cancelled = 0
+
+    def confidence(self, match):
+        """Stability of the hypothesis, plus one once a specific sub-intent is known"""
+        return self.stable + (match.sub_intent != 'general')
+
+    def update(self, partial):
+        """Feed the transcript so far; returns the committed reply (or None)"""
+        self.partials += 1
+        if self.brain.exit_reply(partial):
+            self.cancel()
+            return None
+        cleaned = self.brain.remove_name_prefix(partial)
+        match = self.brain.matcher.match(cleaned.lower().strip())
+        hypothesis = (match.intent, match.sub_intent, match.lang)
+        if hypothesis == self.hypothesis:
+            self.stable += 1
+        else:
+            self.hypothesis, self.stable = hypothesis, 1
+
+        if self.response is not None:
+            if hypothesis != self.committed:
+                # The user kept talking and changed the meaning
+                self.cancel()
+            return self.response
+        if match.intent not in self.intents or self.confidence(match) < self.min_stable:
+            return None
+        with self.brain.dry_run():
+            # decide() directly: memoizing every partial would push real queries out of the route cache
+            self.response = self.brain.answer(self.brain.decide(cleaned.lower().strip()))
+        self.committed = hypothesis
+        self.committed_at = time.perf_counter()
+        if self.on_commit is not None:
+            self.on_commit(self.response)
+        return self.response
+
+    def cancel(self):
+        """Withdraw the committed reply (on_cancel drops its speculative audio)"""
+        if self.response is None:
+            return
+        if self.on_cancel is not None:
+            self.on_cancel(self.response)
+        self.response = self.committed = self.committed_at = None
+        self.cancelled += 1
+
+    def finish(self, final_text):
+        """(reply, hit) for the final transcript; hit means the speculative reply stands"""
+        with self.brain.dry_run() as keys:
+            response = self.brain.chat(final_text)
+        self.brain.advance(keys)
+        hit = self.response is not None and response == self.response
+        if not hit:
+            self.cancel()
+        return response, hit
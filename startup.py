@@ -0,0 +1,144 @@
+"""
+Cold start. Instead of building the brain and then the whole audio system
+one after the other before the intro can play, the voice front end starts
+its parts on a small thread pool in the order the intro needs them:
+
+    output   import pygame, open the mixer                 (first)
+    audio    device-free audio state; starts the intro's synthesis or
+             cache read on the audio loop                  (meanwhile)
+    brain    import brain.py, indexes, session store       (after output)
+    input    import speech_recognition, open the mic       (after output)
+
+Brain and input finish while the intro plays. Imports hold the GIL, so
+starting everything at once would only slow the intro down. Heavy
+third-party modules are imported where they are first used (audio.py,
+audio_loop.py, weather.py, warmup.py, vector_store.py). StartupReport
+records every import and init step for --startup-report.
+"""
+import importlib
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from config import Config
+
+
+class StartupReport:
+    """Timeline of imports and init steps, relative to the report's creation"""
+
+    def __init__(self):
+        self.origin = time.perf_counter()
+        self.steps = []  # (kind, name, thread, start_ms, duration_ms)
+        self.marks = {}  # name -> ms since origin
+        self._lock = threading.Lock()
+
+    def now(self):
+        return (time.perf_counter() - self.origin) * 1000
+
+    @contextmanager
+    def step(self, kind, name):
+        start = self.now()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.steps.append((kind, name, threading.current_thread().name, start, self.now() - start))
+
+    def mark(self, name, ms=None):
+        self.marks[name] = self.now() if ms is None else ms
+
+    def import_module(self, name):
+        """Import name, timing it unless an earlier import already loaded it"""
+        if name in sys.modules:
+            return sys.modules[name]
+        with self.step("import", name):
+            return importlib.import_module(name)
+
+    def render(self):
+        lines = [f"{'step':<8} {'name':<22} {'thread':<12} {'start':>8} {'took':>8}"]
+        for kind, name, thread, start, duration in sorted(self.steps, key=lambda step: step[3]):
+            lines.append(f"{kind:<8} {name:<22} {thread:<12} {start:7.0f}ms {duration:7.0f}ms")
+        imports = sum(step[4] for step in self.steps if step[0] == "import")
+        lines.append(f"{imports:.0f} ms of imports (included in the init steps that made them)")
+        for name, ms in sorted(self.marks.items(), key=lambda mark: mark[1]):
+            lines.append(f"{name:<30} at {ms:7.0f} ms")
+        return "\n".join(lines)
+
+
+class Startup:
+    """Initializes brain, audio output, mic input and the intro's synthesis concurrently"""
+
+    def __init__(self, report=None, workers=None):
+        self.report = report or StartupReport()
+        self.pool = ThreadPoolExecutor(max_workers=workers or Config.STARTUP_WORKERS, thread_name_prefix="startup")
+        self.audio = None
+        self.futures = {}
+        self._audio_built = threading.Event()
+
+    def start(self, intro_text=None):
+        """Schedule every part; returns immediately"""
+        from systems import Systems
+        report = self.report
+        # The intro only needs the speakers (and its audio, usually cached), so
+        # those go first. Imports hold the GIL, so starting everything at once
+        # would only slow the critical path down.
+        self._submit("output", lambda: (report.import_module("pygame"), self._audio().init_output(),
+                                        self._start_rest(Systems)))
+        try:
+            with report.step("init", "audio"):
+                self.audio = Systems.get_audio(start=False)
+        finally:
+            self._audio_built.set()
+        if intro_text:
+            # Synthesis (or the cache read) runs on the audio loop meanwhile
+            self.audio.prefetch(intro_text)
+        return self
+
+    def _start_rest(self, Systems):
+        """Brain and microphone are not needed until the intro has played"""
+        report = self.report
+        self._submit("brain", lambda: self._init_brain(Systems))
+        self._submit("input", lambda: (report.import_module("speech_recognition"), self.audio.init_input()))
+
+    def _init_brain(self, Systems):
+        # brain.py imports its indexes on first use; importing them here times each in the report
+        for name in ("brain", "session_store", "knowledge", "vector_store"):
+            self.report.import_module(name)
+        return Systems.get_brain()
+
+    def _audio(self):
+        self._audio_built.wait()
+        if self.audio is None:
+            raise RuntimeError("audio system failed to initialize")
+        return self.audio
+
+    def _submit(self, name, fn):
+        def run():
+            with self.report.step("init", name):
+                return fn()
+        self.futures[name] = self.pool.submit(run)
+
+    def wait(self, *names):
+        """Block until the named parts (default: all) are initialized; re-raises their errors"""
+        if not names:
+            self.futures["output"].result()  # Schedules brain and input before it completes
+        results = [self.futures[name].result() for name in (names or list(self.futures))]
+        if not names:
+            self.report.mark("ready")
+            self.pool.shutdown(wait=False)
+        return results
+
+    @property
+    def brain(self):
+        self.futures["output"].result()
+        return self.futures["brain"].result()
+
+    def speak_intro(self, intro_text):
+        """Speak the intro as soon as the output device is ready"""
+        self.wait("output")
+        start = self.report.now()
+        self.audio.speak(intro_text)
+        ttfa = (self.audio.last_speak_report or {}).get("ttfa_ms")
+        if ttfa is not None:
+            self.report.mark("intro audible", start + ttfa)
@@ -1,3 +1,6 @@
+from profiling import get_profiler
+
+
 class Systems:
     _brain = None
     _audio = None
@@ -6,14 +9,17 @@ class Systems:
     def get_brain(cls):
         if cls._brain is None:
             print("Initializing Brain (Singleton)...")
-            from brain import ShipraBrain  # Lazy Import
-            cls._brain = ShipraBrain()
+            with get_profiler().startup("brain"):
+                from brain import ShipraBrain  # Lazy Import
+                cls._brain = ShipraBrain()
         return cls._brain
         
     @classmethod
-    def get_audio(cls):
+    def get_audio(cls, start=True):
+        """The audio singleton; with start=False its devices are opened later (see startup.py)"""
         if cls._audio is None:
             print("Initializing Audio System (Singleton)...")
-            from audio import ShipraAudio  # Lazy Import
-            cls._audio = ShipraAudio()
+            with get_profiler().startup("audio"):
+                from audio import ShipraAudio  # Lazy Import
+                cls._audio = ShipraAudio(start=start)
         return cls._audio
@@ -0,0 +1,9 @@
+"""Tests run against the flat modules in the repository root, which resolve
+their Config paths (data/, cache/) from the working directory."""
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+os.chdir(ROOT)
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
@@ -0,0 +1,61 @@
+import threading
+import time
+from concurrent.futures import Future
+import pytest
+from audio import ShipraAudio
+from config import Config
+
+
+@pytest.fixture
+def audio(monkeypatch):
+    monkeypatch.setattr(Config, "TTS_CACHE_ENABLED", False)
+    audio = ShipraAudio(start=False)
+    yield audio
+    audio.loop.stop()
+
+
+def test_concurrent_prefetch_submits_once(audio):
+    submitted = []
+
+    def submit(clean_text):
+        # Widen the window between the membership check and the insert
+        time.sleep(0.01)
+        submitted.append(clean_text)
+        return Future()
+
+    audio.submit_synthesis = submit
+    threads = [threading.Thread(target=audio.prefetch, args=("Hello there",)) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(submitted) == 1
+
+    audio.cancel_prefetch("Hello there")
+    assert not audio._prefetch
+
+
+def test_speaking_is_cleared_when_synthesis_fails(audio, monkeypatch):
+    monkeypatch.setattr(Config, "TTS_STREAMING", False)
+
+    def fail(clean_text):
+        raise RuntimeError("synthesis failed")
+
+    audio._pcm_for = fail
+    with pytest.raises(RuntimeError):
+        audio.speak("Hello there")
+    assert not audio.speaking.is_set()
+
+
+def test_speak_is_text_only_when_the_mixer_failed(audio, monkeypatch):
+    monkeypatch.setattr(Config, "TTS_STREAMING", True)
+    assert audio.player is None  # As after a failed mixer init
+
+    def stream(clean_text):
+        raise AssertionError("streaming needs the mixer")
+
+    audio.speak_streaming = stream
+    audio.speak("Hello there")
+    assert audio.last_speak_report["mode"] == "memory"
+    assert audio.last_speak_report["ttfa_ms"] is None
+    assert not audio.speaking.is_set()
@@ -0,0 +1,60 @@
+import asyncio
+import threading
+import pytest
+import audio_loop
+from audio_loop import AudioLoop
+
+
+class FakeConnector:
+    def __init__(self, **kwargs):
+        self.closed = False
+
+    async def shutdown(self):
+        self.closed = True
+
+
+@pytest.fixture
+def loop(monkeypatch):
+    monkeypatch.setattr(audio_loop, "_connector_class", FakeConnector)
+    loop = AudioLoop(name="test-audio-loop")
+    yield loop
+    loop.stop()
+
+
+def test_coroutines_share_one_loop_thread_across_calls(loop):
+    async def where():
+        await asyncio.sleep(0)
+        return threading.current_thread().name, asyncio.get_running_loop(), loop.connector()
+
+    first = loop.run(where(), timeout=2)
+    second = loop.submit(where()).result(2)
+    # Same thread, same loop, same connector on every call
+    assert first == second
+    assert first[0] == "test-audio-loop" and first[1] is loop.loop
+    assert isinstance(first[2], FakeConnector)
+
+
+def test_run_from_the_loop_thread_is_refused(loop):
+    async def nested():
+        inner = asyncio.sleep(0)
+        try:
+            return loop.run(inner)
+        finally:
+            inner.close()
+
+    with pytest.raises(RuntimeError, match="loop thread"):
+        loop.run(nested(), timeout=2)
+
+
+def test_stop_closes_the_connector_and_ends_the_thread(loop):
+    async def connect():
+        return loop.connector()
+
+    connector = loop.run(connect(), timeout=2)
+    assert loop.running
+    loop.stop()
+    assert connector.closed
+    assert not loop.running and loop.loop.is_closed()
+    assert not loop._thread.is_alive()
+    # Stopping twice is harmless
+    loop.stop()
@@ -0,0 +1,9 @@
+import subprocess
+import sys
+
+
+def test_importing_brain_leaves_indexes_unloaded():
+    code = ("import sys, brain; "
+            "print(sorted(m for m in ('knowledge', 'vector_store', 'session_store') if m in sys.modules))")
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout
+    assert out.strip().splitlines()[-1] == "[]"
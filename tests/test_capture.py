@@ -0,0 +1,50 @@
+import wave
+import numpy as np
+import pytest
+from capture import endpoint_file
+
+RATE = 16000
+OPTIONS = dict(frame_ms=20, margin_db=9, min_energy_db=-50, onset_ms=60, hangover_ms=300, preroll_ms=200,
+               max_phrase=10)
+
+
+def write_wav(path, *parts):
+    """Mono 16-bit WAV of (seconds, amplitude) parts: low background noise plus a 220 Hz tone"""
+    rng = np.random.default_rng(1)
+    audio = []
+    for seconds, amplitude in parts:
+        t = np.arange(int(seconds * RATE)) / RATE
+        audio.append(amplitude * np.sin(2 * np.pi * 220 * t) + rng.normal(0, 30, len(t)))
+    samples = np.concatenate(audio).clip(-32768, 32767).astype(np.int16)
+    with wave.open(str(path), "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(RATE)
+        f.writeframes(samples.tobytes())
+    return str(path)
+
+
+def test_silence_yields_no_phrase(tmp_path):
+    assert endpoint_file(write_wav(tmp_path / "silence.wav", (3.0, 0)), **OPTIONS) == []
+
+
+def test_speech_ends_after_the_hangover(tmp_path):
+    path = write_wav(tmp_path / "speech.wav", (0.5, 0), (1.0, 8000), (1.0, 0))
+    [(audio, start, end, decided)] = endpoint_file(path, **OPTIONS)
+    # Trimmed to the last speech frame, with the pre-roll kept before the onset
+    assert end == pytest.approx(1.5, abs=0.02)
+    assert start == pytest.approx(0.5 - 0.2, abs=0.04)
+    assert len(audio) == pytest.approx((end - start) * RATE, abs=1)
+    # Decided once hangover_ms of silence followed the speech
+    assert decided - end == pytest.approx(0.3, abs=0.02)
+
+
+def test_long_speech_is_cut_at_max_phrase(tmp_path):
+    path = write_wav(tmp_path / "monologue.wav", (0.5, 0), (5.0, 8000), (1.0, 0))
+    phrases = endpoint_file(path, **dict(OPTIONS, max_phrase=2))
+    durations = [len(audio) / RATE for audio, *_ in phrases]
+    assert len(phrases) == 3
+    assert durations[0] == pytest.approx(2.0, abs=0.02)
+    assert all(duration <= 2.0 + 0.02 for duration in durations)
+    # Nothing is lost between the cuts: the phrases end where the speech does
+    assert phrases[-1][2] == pytest.approx(5.5, abs=0.02)
@@ -0,0 +1,61 @@
+import json
+import shutil
+import pytest
+from catalog import Catalog, compile_source, load_catalog
+from config import Config
+
+TABLES = [name for name in Catalog.__slots__ if name not in ('routes', 'source', 'raw')]
+
+
+def routes(catalog):
+    return {(intent, sub): (route.key, route.counter, route.variants)
+            for intent, subs in catalog.routes.items() for sub, route in subs.items()}
+
+
+@pytest.fixture
+def source(tmp_path):
+    path = tmp_path / "catalog.json"
+    shutil.copy(Config.CATALOG_FILE, path)
+    return path
+
+
+def test_snapshot_round_trip_matches_compiled_tables(source, tmp_path):
+    snapshot = tmp_path / "catalog.marshal"
+    compiled = load_catalog(str(source), str(snapshot))
+    assert compiled.source == "compiled" and snapshot.exists()
+
+    loaded = load_catalog(str(source), str(snapshot))
+    assert loaded.source == "snapshot"
+    for name in TABLES:
+        assert getattr(loaded, name) == getattr(compiled, name), name
+    assert routes(loaded) == routes(compiled)
+
+
+def test_edited_source_is_recompiled(source, tmp_path):
+    snapshot = tmp_path / "catalog.marshal"
+    load_catalog(str(source), str(snapshot))
+    data = json.loads(source.read_text(encoding="utf-8"))
+    data["name_prefixes"] = data["name_prefixes"] + ["hey kiosk"]
+    source.write_text(json.dumps(data), encoding="utf-8")
+
+    catalog = load_catalog(str(source), str(snapshot))
+    assert catalog.source == "compiled"
+    assert "hey kiosk" in catalog.name_prefixes
+    assert load_catalog(str(source), str(snapshot)).source == "snapshot"
+
+
+def test_unreadable_snapshot_falls_back_to_compiling(source, tmp_path, capsys):
+    snapshot = tmp_path / "catalog.marshal"
+    snapshot.write_bytes(b"not a marshal stream")
+    assert load_catalog(str(source), str(snapshot)).source == "compiled"
+    assert "Ignoring unreadable snapshot" in capsys.readouterr().out
+    assert load_catalog(str(source), str(snapshot)).source == "snapshot"
+
+
+def test_route_to_unknown_reply_is_rejected(source):
+    data = json.loads(source.read_text(encoding="utf-8"))
+    intent = next(iter(data["routes"]))
+    sub_intent = next(iter(data["routes"][intent]))
+    data["routes"][intent][sub_intent]["reply"] = "no.such.reply"
+    with pytest.raises(ValueError):
+        compile_source(data)
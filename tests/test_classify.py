@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+from benchmarks.routing import classify_corpus
+from brain import ShipraBrain
+from classify import SEPARATOR, BatchClassifier
+from config import Config
+from intents import get_matcher
+
+
+@pytest.fixture(scope="module")
+def corpus():
+    return [text.lower().strip() for text in classify_corpus(5000)]
+
+
+def scalar_labels(matcher, queries):
+    return [(m.intent, m.sub_intent, m.lang) for m in map(matcher.match, queries)]
+
+
+def test_batch_labels_match_the_scalar_matcher(corpus):
+    matcher = get_matcher()
+    # Small chunks so the length-sorted chunking is exercised too
+    labels = BatchClassifier(matcher, chunk_rows=257).classify(corpus)
+    assert labels.labels() == scalar_labels(matcher, corpus)
+
+
+def scalar_scores(matcher, queries):
+    """Distinct keywords of each intent that IntentMatcher.match finds, per query"""
+    intents = [frozenset(keywords) for _, keywords in matcher.intent_keywords]
+    return np.array([[len(keywords & m.keywords) for keywords in intents] for m in map(matcher.match, queries)],
+                    dtype=np.int32).reshape(len(queries), len(intents))
+
+
+@pytest.mark.parametrize("size", [0, 1, Config.CLASSIFY_MIN_BATCH - 1, Config.CLASSIFY_MIN_BATCH, 1000])
+def test_batch_scores_match_the_scalar_matcher(corpus, size):
+    matcher = get_matcher()
+    queries = corpus[:size]
+    batch = BatchClassifier(matcher).classify(queries)
+    assert len(batch) == size
+    assert batch.labels() == scalar_labels(matcher, queries)
+    assert np.array_equal(batch.scores, scalar_scores(matcher, queries))
+    assert batch.has_devanagari.tolist() == [matcher.match(q).has_devanagari for q in queries]
+
+
+def test_separator_in_a_query_keeps_rows_aligned(corpus):
+    matcher = get_matcher()
+    queries = corpus[:100] + [f"tell me about the compny{SEPARATOR}please"]
+    labels = BatchClassifier(matcher).classify(queries)
+    assert labels.labels() == scalar_labels(matcher, queries)
+
+
+def test_brain_batch_labels_match_chat_routing():
+    brain = ShipraBrain(watch=False)
+    texts = classify_corpus(300, seed=5)
+    expected = [brain.decide(brain.remove_name_prefix(text.lower().strip())).match for text in texts]
+    assert brain.classify_batch(texts).labels() == [(m.intent, m.sub_intent, m.lang) for m in expected]
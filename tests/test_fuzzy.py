@@ -0,0 +1,66 @@
+import pytest
+from fuzzy import FuzzyCorrector, FuzzyIndex, edit_distance
+from intents import IntentMatcher
+
+
+@pytest.fixture(scope="module")
+def matcher():
+    return IntentMatcher(fuzzy=True)
+
+
+def test_edit_distance_stops_at_limit():
+    assert edit_distance("weather", "waether", 2) == 1  # transposition
+    assert edit_distance("speed", "spend", 1) == 1
+    assert edit_distance("hydrogen", "hydrogn", 1) == 1
+    assert edit_distance("company", "vehicle", 2) == 3
+
+
+@pytest.mark.parametrize("query", [
+    "how do i spend money",
+    "my steed is tired",
+    "she drove home",
+    "whether or not",
+    "i love my mother",
+    "present the results",
+    "the lady sings",
+    "good mourning",
+])
+def test_ordinary_words_are_not_rewritten(matcher, query):
+    assert matcher.corrector.correct(query) == query
+    assert matcher.match(query).route == IntentMatcher(fuzzy=False).match(query).route
+
+
+@pytest.mark.parametrize("query, corrected, route", [
+    ("what is the weathr", "what is the weather", ("weather", "general")),
+    ("hydrogn vehicle", "hydrogen vehicle", ("vehicle", "general")),
+    ("capasity batao", "capacity batao", ("vehicle", "capacity")),
+    ("whats the temprature", "whats the temperature", ("weather", "general")),
+])
+def test_misheard_keywords_are_corrected(matcher, query, corrected, route):
+    assert matcher.corrector.correct(query) == corrected
+    assert matcher.match(query).route == route
+
+
+def test_exact_keyword_hits_are_kept(matcher):
+    # "speedometer" already contains "speed"; it must not be rewritten to another term
+    assert matcher.corrector.correct_word("speedometer") == "speedometer"
+    assert matcher.match("the speedometer broke").route == ("vehicle", "speed")
+
+
+def test_short_words_and_low_similarity_are_left_alone():
+    corrector = FuzzyCorrector(FuzzyIndex(["speed", "drone", "weather"], min_length=6), min_similarity=0.8)
+    assert corrector.correct("spend steed drove") == "spend steed drove"
+    assert corrector.correct_word("weathr") == "weather"
+    # Two edits in eight letters keep only 75% of the word
+    loose = FuzzyCorrector(FuzzyIndex(["hydrogen"], max_edits=2, min_length=6))
+    strict = FuzzyCorrector(FuzzyIndex(["hydrogen"], max_edits=2, min_length=6), min_similarity=0.8)
+    assert loose.correct_word("hidrogan") == "hydrogen"
+    assert strict.correct_word("hidrogan") == "hidrogan"
+
+
+def test_no_frequent_english_word_is_rewritten(matcher):
+    # data/common_words.txt must cover every collision; rebuild it with tools/build_common_words.py
+    wordfreq = pytest.importorskip("wordfreq")
+    rewritten = [word for word in wordfreq.top_n_list("en", 20000)
+                 if word.isalpha() and matcher.corrector.correct_word(word) != word]
+    assert rewritten == []
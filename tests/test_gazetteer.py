@@ -0,0 +1,51 @@
+import pytest
+from gazetteer import Gazetteer, get_gazetteer
+from intents import get_matcher
+
+
+@pytest.fixture
+def gazetteer():
+    return get_gazetteer()
+
+
+def test_multi_word_names_win_over_their_first_word(gazetteer):
+    assert gazetteer.find("weather in new york city today").name == "New York"
+    assert gazetteer.find("is it raining in san francisco").name == "San Francisco"
+    # "new delhi" and "nai dilli" are aliases of Delhi, not "new" or "nai" of anything else
+    assert gazetteer.find("new delhi temperature").name == "Delhi"
+    assert gazetteer.lookup("Nai Dilli").name == "Delhi"
+
+
+def test_hinglish_and_devanagari_queries(gazetteer):
+    assert gazetteer.find("delhi ka mausam kaisa hai").name == "Delhi"
+    assert gazetteer.find("bambai me baarish hogi kya").name == "Mumbai"
+    assert gazetteer.find("kal kalkatta ka mausam").name == "Kolkata"
+    assert gazetteer.find("दिल्ली का मौसम").name == "Delhi"
+
+
+@pytest.mark.parametrize("query", ["what is the weather", "aaj ka mausam kaisa hai", "kal ka mausam",
+                                   "will it rain tomorrow", "temperature kya hai", "weather in the city",
+                                   "how hot is it outside"])
+def test_ordinary_weather_queries_name_no_city(gazetteer, query):
+    assert gazetteer.find(query) is None
+
+
+def test_city_shared_with_a_company_keyword_routes_by_the_rest_of_the_query(gazetteer):
+    # "bhopal" is the company's location and a city: a weather word makes it a weather query
+    matcher = get_matcher()
+    for query in ["bhopal ka mausam", "weather in bhopal"]:
+        assert matcher.match(query).intent == "weather"
+        assert gazetteer.find(query).name == "Bhopal"
+    match = matcher.match("company location bhopal")
+    assert (match.intent, match.sub_intent) == ("company", "location")
+
+
+def test_malformed_lines_are_skipped(tmp_path):
+    path = tmp_path / "cities.tsv"
+    path.write_text("# name, country, lat, lon, aliases\n"
+                    "Pune\tIndia\t18.52\t73.86\tpoona|पुणे\n"
+                    "Nowhere\tIndia\tnorth\t73.0\n"
+                    "Nashik\tIndia\t20.0\n", encoding="utf-8")
+    gazetteer = Gazetteer(str(path))
+    assert len(gazetteer) == 1
+    assert gazetteer.find("poona ka mausam").query == "18.52,73.86"
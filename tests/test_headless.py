@@ -0,0 +1,36 @@
+import io
+from brain import ShipraBrain
+from headless import read_utterances
+
+# Repeated queries rotate through their reply variants; no weather or time (network, clock)
+CORPUS = ["hello", "tell me about the company", "what is the top speed", "hello", "kaise ho",
+          "tell me about the company", "who is the president", "hello", "load capacity kitni hai",
+          "tell me about the company", "thank you", "kaun ho tum", "hello", "what features does it have"]
+
+
+def replies(details):
+    return [(d["text"], d["response"], d["intent"], d["sub_intent"], d["lang"]) for d in details]
+
+
+def test_chat_batch_is_deterministic_across_worker_counts():
+    brain = ShipraBrain(watch=False)
+    chunk_size = 4
+    sequential = replies(brain.chat_batch(CORPUS, workers=1, chunk_size=chunk_size))
+    for workers in (2, 3):
+        assert replies(brain.chat_batch(CORPUS, workers=workers, chunk_size=chunk_size)) == sequential
+    # Rerunning starts every chunk from fresh counters again
+    assert replies(brain.chat_batch(CORPUS, workers=1, chunk_size=chunk_size)) == sequential
+
+    # Each chunk answers as a fresh brain's chat() would, one utterance after another
+    expected = []
+    for start in range(0, len(CORPUS), chunk_size):
+        fresh = ShipraBrain(watch=False)
+        expected.extend(fresh.chat(text) for text in CORPUS[start:start + chunk_size])
+    assert [response for _, response, *_ in sequential] == expected
+    # ...and the repeated queries really did vary
+    assert len({response for text, response, *_ in sequential if text == "hello"}) > 1
+
+
+def test_read_utterances_accepts_text_and_jsonl():
+    stream = io.StringIO('hello\n\n{"id": "a1", "text": "kaise ho"}\n{not json\n{"text": "bye"}\n')
+    assert read_utterances(stream) == [(1, "hello"), ("a1", "kaise ho"), (4, "{not json"), (5, "bye")]
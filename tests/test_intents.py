@@ -0,0 +1,24 @@
+import pytest
+from benchmarks.common import REPLAY_CORPUS, legacy_route
+from intents import IntentMatcher
+
+
+@pytest.fixture(scope="module")
+def matcher():
+    return IntentMatcher(fuzzy=False)
+
+
+@pytest.mark.parametrize("text", REPLAY_CORPUS)
+def test_matcher_routes_like_the_legacy_cascade(matcher, text):
+    m = matcher.match(text.lower().strip())
+    assert (m.intent, m.sub_intent, m.lang) == legacy_route(text)
+
+
+def test_fuzzy_layer_keeps_exact_routes():
+    fuzzy = IntentMatcher(fuzzy=True)
+    for text in REPLAY_CORPUS:
+        m = fuzzy.match(text.lower().strip())
+        legacy = legacy_route(text)
+        if legacy[0] != 'unknown':
+            # Correction must not move a query the exact keywords already route
+            assert (m.intent, m.sub_intent, m.lang) == legacy, text
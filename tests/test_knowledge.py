@@ -0,0 +1,96 @@
+import os
+import pytest
+
+pytest.importorskip("numpy")
+from config import Config
+from knowledge import KnowledgeIndex, parse_markdown
+
+
+def write(path, text):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+
+
+def index(tmp_path, directory):
+    return KnowledgeIndex(directory=str(directory), index_file=str(tmp_path / "cache" / "index.pkl"))
+
+
+@pytest.fixture
+def docs(tmp_path):
+    directory = tmp_path / "data"
+    directory.mkdir()
+    write(directory / "fuel.md", "# Fuel\nThe vehicle runs on a hydrogen fuel cell.\n")
+    write(directory / "safety.md", "# Safety\nObstacle detection keeps every flight safe.\n")
+    return directory
+
+
+def test_parse_markdown_scopes_sections_by_heading():
+    text = ("Intro before any heading.\n"
+            "# Vehicle\n"
+            "## **Performance**\n"
+            "- Top speed 120 km/h\n"
+            "```\n"
+            "# not a heading inside a fence\n"
+            "```\n"
+            "## Safety\n"
+            "Obstacle detection.\n"
+            "# Company\n"
+            "Founded in Bhopal.\n")
+    sections = parse_markdown("docs/vehicle.md", text)
+    assert [s.heading for s in sections] == ["vehicle", "Vehicle > Performance", "Vehicle > Safety", "Company"]
+    assert [s.line for s in sections] == [1, 3, 8, 10]
+    assert "# not a heading inside a fence" in sections[1].body
+    assert sections[1].spoken().startswith("Performance: Top speed 120 km/h.")
+
+
+def test_refresh_indexes_every_file_and_persists(tmp_path, docs):
+    knowledge = index(tmp_path, docs)
+    assert knowledge.refresh() == 2
+    assert len(knowledge) == 2
+    assert knowledge.best("hydrogen fuel cell").heading == "Fuel"
+
+    # A second index loads the pickle and re-parses nothing
+    reloaded = index(tmp_path, docs)
+    assert reloaded.refresh() == 0
+    assert reloaded.best("obstacle detection").heading == "Safety"
+
+
+def test_incremental_rebuild_reparses_only_changed_files(tmp_path, docs):
+    knowledge = index(tmp_path, docs)
+    knowledge.refresh()
+
+    # Touched but unchanged: the content hash matches, nothing is re-parsed
+    os.utime(docs / "safety.md", ns=(0, 0))
+    assert knowledge.refresh() == 0
+
+    write(docs / "fuel.md", "# Fuel\nThe vehicle runs on compressed natural gas.\n")
+    assert knowledge.refresh() == 1
+    assert knowledge.best("compressed natural gas").heading == "Fuel"
+    assert knowledge.best("hydrogen cell") is None
+
+    (docs / "safety.md").unlink()
+    assert knowledge.refresh() == 0
+    assert [s.heading for s in knowledge.sections] == ["Fuel"]
+
+
+def test_vocabulary_drops_terms_no_file_uses(tmp_path, docs):
+    knowledge = index(tmp_path, docs)
+    knowledge.refresh()
+    for n in range(5):
+        write(docs / "fuel.md", f"# Fuel\nRevision{n} of the hydrogen fuel cell notes.\n")
+        knowledge.refresh()
+    assert "revision0" not in knowledge.vocab
+    assert "revision4" in knowledge.vocab
+    assert sorted(knowledge.vocab.values()) == list(range(len(knowledge.vocab)))
+    assert knowledge.best("obstacle detection").heading == "Safety"
+    assert knowledge.best("revision4 notes").heading == "Fuel"
+
+
+def test_one_incidental_term_is_not_an_answer(tmp_path):
+    knowledge = index(tmp_path, Config.DOCUMENTS_DIRECTORY)
+    knowledge.refresh()
+    # "market" in a bio, "range" in the feature list, an English word in a Hinglish query
+    for query in ["the stock market", "what is the range", "kitna range hai", "noise level", "cricket score"]:
+        assert knowledge.best(query) is None, query
+    assert knowledge.best("top speed of the scooter").heading.endswith("> Performance")
+    assert knowledge.best("who is the founder").heading.endswith("(President & Co-Founder)")
@@ -0,0 +1,31 @@
+import json
+from config import Config
+from metrics import Metrics, NULL_TURN
+
+
+def test_only_ended_turns_are_counted(tmp_path, monkeypatch):
+    log = tmp_path / "turns.jsonl"
+    monkeypatch.setattr(Config, "METRICS_JSONL_FILE", str(log))
+    monkeypatch.setattr(Config, "METRICS_PROMETHEUS_FILE", None)
+    metrics = Metrics(enabled=True)
+
+    metrics.begin_turn().record("listen", 5000)  # Heard nothing: abandoned
+    turn = metrics.begin_turn()
+    turn.record("think", 2)
+    turn.end()
+
+    assert metrics.snapshot()["turns"] == 1
+    assert "listen" not in metrics.histograms
+    records = [json.loads(line) for line in log.read_text().splitlines()]
+    assert [record["turn"] for record in records] == [1]
+
+
+def test_disabled_turns_share_one_allocation_free_null_turn():
+    metrics = Metrics(enabled=False)
+    turn = metrics.begin_turn()
+    assert turn is NULL_TURN and metrics.begin_turn() is turn
+    with turn.stage("think") as stage:
+        assert stage is turn
+    turn.record("tts", 1.0)
+    turn.end()
+    assert metrics.snapshot()["turns"] == 0 and not metrics.histograms
@@ -0,0 +1,62 @@
+import os
+import threading
+import time
+import pytest
+
+pygame = pytest.importorskip("pygame")
+
+
+@pytest.fixture
+def player():
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    pygame.mixer.init(frequency=22050, size=-16, channels=1)
+    from playback import MemoryPlayer
+    player = MemoryPlayer()
+    yield player
+    player.close()
+    pygame.mixer.quit()
+
+
+def silence(ms):
+    return b"\0\0" * (22050 * ms // 1000)
+
+
+def test_completion_follows_the_channel_not_the_estimate(player):
+    # An estimate far shorter than the buffer must not end the playback early
+    player.duration = lambda pcm: 0.01
+    start = time.perf_counter()
+    playback = player.play(silence(200))
+    assert playback.wait(2)
+    assert time.perf_counter() - start >= 0.15
+    assert not playback.interrupted
+    assert not player.channel.get_busy()
+
+
+def test_stop_completes_as_interrupted(player):
+    finished = []
+    playback = player.play(silence(1000), on_done=finished.append)
+    player.stop()
+    assert playback.done.is_set() and playback.interrupted
+    assert finished == [playback]
+    assert not player.channel.get_busy()
+
+
+def test_one_waiter_thread_serves_every_playback(player):
+    before = threading.active_count()
+    for _ in range(3):
+        assert player.play(silence(30)).wait(2)
+    assert threading.active_count() == before
+    player.close()
+    assert not player._thread.is_alive()
+
+
+def test_the_display_is_never_initialized(player):
+    assert player.play(silence(30)).wait(2)
+    assert not pygame.display.get_init()
+
+
+def test_replacing_a_buffer_interrupts_the_previous_one(player):
+    first = player.play(silence(1000))
+    second = player.play(silence(50))
+    assert first.done.is_set() and first.interrupted
+    assert second.wait(2) and not second.interrupted
@@ -0,0 +1,15 @@
+from config import Config
+from profiling import Profiler
+
+
+def test_turn_count_comes_from_the_spec():
+    assert Profiler("turns:3").pending == 3
+    assert Profiler("startup, turns").pending == Config.PROFILE_TURNS
+    assert Profiler("").pending == 0
+
+
+def test_a_malformed_turn_count_falls_back_to_the_default(capsys):
+    profiler = Profiler("turns:abc,startup")
+    assert profiler.pending == Config.PROFILE_TURNS
+    assert profiler.profile_startup
+    assert "[Profile] Bad turn count 'abc'" in capsys.readouterr().out
@@ -0,0 +1,63 @@
+import pytest
+import recognizers
+from recognizers import create_recognizer
+
+
+def available(name):
+    class Backend:
+        def __init__(self, *args, **kwargs):
+            self.name = name
+            self.kwargs = kwargs
+    return Backend
+
+
+def unavailable(name):
+    def fail(*args, **kwargs):
+        raise ImportError(f"No module named '{name}'")
+    return fail
+
+
+@pytest.fixture
+def backends(monkeypatch):
+    """Every backend constructible, as fakes; tests break the ones they need missing"""
+    monkeypatch.setattr(recognizers, "intent_vocabulary", lambda: ["weather", "company"])
+    for name, attribute in [("google", "GoogleRecognizer"), ("vosk", "VoskRecognizer"),
+                            ("whisper", "WhisperRecognizer")]:
+        monkeypatch.setattr(recognizers, attribute, available(name))
+
+    def missing(*names):
+        for name in names:
+            attribute = {"google": "GoogleRecognizer", "vosk": "VoskRecognizer", "whisper": "WhisperRecognizer"}[name]
+            monkeypatch.setattr(recognizers, attribute, unavailable(name))
+    return missing
+
+
+def test_the_configured_backend_is_used_when_available(backends):
+    assert create_recognizer("vosk", grammar=True).name == "vosk"
+    assert create_recognizer("vosk", grammar=True).kwargs == {"grammar": ["weather", "company"]}
+    assert create_recognizer("whisper", grammar=False).kwargs == {"vocabulary": None}
+
+
+def test_missing_vosk_falls_back_to_google(backends):
+    backends("vosk")
+    assert create_recognizer("vosk").name == "google"
+
+
+def test_missing_whisper_falls_back_to_google_then_vosk(backends):
+    backends("whisper")
+    assert create_recognizer("whisper").name == "google"
+    backends("google")
+    assert create_recognizer("whisper").name == "vosk"
+
+
+def test_missing_online_backend_falls_back_to_vosk(backends):
+    backends("google")
+    assert create_recognizer("google").name == "vosk"
+    # An unknown name goes through the same order
+    assert create_recognizer("azure").name == "vosk"
+
+
+def test_no_backend_raises(backends):
+    backends("google", "vosk")
+    with pytest.raises(RuntimeError, match="google: .*vosk: "):
+        create_recognizer("google")
@@ -0,0 +1,78 @@
+import pytest
+import route_cache
+from brain import ShipraBrain
+from route_cache import Decision, RouteCache, EXPIRING, STATIC, UNCACHED
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(route_cache.time, "monotonic", clock)
+    return clock
+
+
+def decision(volatility=STATIC, generation=None):
+    return Decision("query", None, volatility=volatility, generation=generation)
+
+
+def test_uncached_decisions_are_never_stored():
+    cache = RouteCache(max_entries=8, ttl=60)
+    cache.put("what time is it", decision(UNCACHED))
+    assert cache.get("what time is it") is None
+    assert len(cache) == 0 and cache.uncached == 1
+
+
+def test_expiring_decisions_expire_after_the_ttl(clock):
+    cache = RouteCache(max_entries=8, ttl=60)
+    weather, company = decision(EXPIRING), decision(STATIC)
+    cache.put("weather in delhi", weather)
+    cache.put("tell me about the company", company)
+    clock.now += 59
+    assert cache.get("weather in delhi") is weather
+    clock.now += 1
+    assert cache.get("weather in delhi") is None
+    assert cache.expired == 1
+    # Static decisions have no deadline
+    clock.now += 10 ** 6
+    assert cache.get("tell me about the company") is company
+
+
+def test_invalidate_by_volatility_and_predicate():
+    cache = RouteCache(max_entries=8, ttl=60)
+    cache.put("catalog", decision(STATIC))
+    cache.put("knowledge", decision(STATIC, generation=0))
+    cache.put("weather", decision(EXPIRING))
+    assert cache.invalidate(STATIC, where=lambda d: d.generation is not None) == 1
+    assert cache.get("knowledge") is None and cache.get("catalog") is not None
+    assert cache.invalidate(None) == 2
+    assert len(cache) == 0
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = RouteCache(max_entries=2, ttl=60)
+    cache.put("a", decision())
+    cache.put("b", decision())
+    cache.get("a")
+    cache.put("c", decision())
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+    assert cache.evictions == 1
+
+
+def test_brain_tags_decisions_by_volatility():
+    brain = ShipraBrain(watch=False)
+    assert brain.route("what time is it").volatility == UNCACHED
+    assert brain.route("weather in delhi").volatility == EXPIRING
+    assert brain.route("tell me about the company").volatility == STATIC
+    assert brain.route("Shipra, tell me about the company").match.intent == "company"
+    # Time is never memoized; the rest is, keyed by the normalized text
+    assert len(brain.route_cache) == 3
+    assert brain.route("  Tell me about the COMPANY ") is brain.route("tell me about the company")
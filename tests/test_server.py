@@ -0,0 +1,142 @@
+import asyncio
+import multiprocessing
+import os
+import pickle
+from contextlib import contextmanager
+import pytest
+from aiohttp.test_utils import TestClient, TestServer
+from config import Config
+from session_store import SessionStore
+from server import SESSION_ID_MAX, ShipraServer
+
+
+class FakeBrain:
+    """Just what ShipraServer calls on a brain"""
+
+    def __init__(self):
+        self.sessions = SessionStore(max_sessions=16, max_categories=8)
+
+    def on_knowledge_change(self, callback):
+        pass
+
+    @contextmanager
+    def use_session(self, session_id):
+        yield
+
+    def chat_detail(self, text):
+        return {"response": f"echo {text}", "intent": "unknown", "sub_intent": "general", "lang": "english"}
+
+
+def post_all(requests):
+    """(status, JSON reply) of (path, json body) posts against a fresh server; bytes bodies are sent as is"""
+    async def run():
+        server = ShipraServer(FakeBrain(), rate=1000, burst=1000)
+        async with TestClient(TestServer(server.app())) as client:
+            statuses = []
+            for path, body in requests:
+                if isinstance(body, bytes):
+                    response = await client.post(path, data=body, headers={"Content-Type": "application/json"})
+                else:
+                    response = await client.post(path, json=body)
+                statuses.append((response.status, await response.json()))
+            return statuses
+
+    previous = Config.TTS_CACHE_ENABLED
+    Config.TTS_CACHE_ENABLED = False
+    try:
+        return asyncio.run(run())
+    finally:
+        Config.TTS_CACHE_ENABLED = previous
+
+
+def test_chat_accepts_objects_and_short_session_ids():
+    replies = post_all([("/chat", {"text": "hello"}),
+                        ("/chat", {"text": "hello", "session": "a" * SESSION_ID_MAX})])
+    assert [status for status, _ in replies] == [200, 200]
+
+
+@pytest.mark.parametrize("body", [
+    ["hello"],
+    "hello",
+    42,
+    {"text": "hello", "session": 7},
+    {"text": "hello", "session": ["x"]},
+    {"text": "hello", "session": ""},
+    {"text": "hello", "session": "a" * (SESSION_ID_MAX + 1)},
+])
+@pytest.mark.parametrize("path", ["/chat", "/classify", "/speak"])
+def test_malformed_bodies_are_rejected_with_400(path, body):
+    assert post_all([(path, body)])[0][0] == 400
+
+
+@pytest.mark.parametrize("body", [b"not json", b'{"text": "hello"', b""])
+@pytest.mark.parametrize("path", ["/chat", "/classify", "/speak"])
+def test_non_json_bodies_are_rejected_as_malformed(path, body):
+    assert post_all([(path, body)]) == [(400, {"error": "expected a JSON object"})]
+
+
+def _save_index(directory, index_file, rounds):
+    from knowledge import KnowledgeIndex
+    index = KnowledgeIndex(directory=directory, index_file=index_file)
+    index._loaded = True  # Build from the documents, not from another worker's file
+    index.refresh()
+    for _ in range(rounds):
+        index._save()
+
+
+def test_concurrent_index_saves_do_not_share_a_temp_file(tmp_path, capfd):
+    # Workers with different documents save to one index file; it must always be one of them, intact
+    directories = []
+    for worker in range(4):
+        docs = tmp_path / f"docs{worker}"
+        docs.mkdir()
+        for i in range(5 + worker * 5):
+            (docs / f"doc{i}.md").write_text("\n".join(f"# Section {j}\n" + " ".join(f"w{i}x{j}x{k}" for k in range(40))
+                                                       for j in range(50)))
+        directories.append(str(docs))
+    index_file = str(tmp_path / "index.pkl")
+    context = multiprocessing.get_context("fork")
+    workers = [context.Process(target=_save_index, args=(directory, index_file, 50)) for directory in directories]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(60)
+        assert worker.exitcode == 0
+    assert "Could not persist index" not in capfd.readouterr().out
+
+    with open(index_file, "rb") as f:
+        data = pickle.load(f)
+    assert data["directory"] in directories
+    assert len(data["files"]) == 5 + directories.index(data["directory"]) * 5
+    assert not [name for name in os.listdir(tmp_path) if name.endswith(".tmp")]
+
+
+def test_speak_synthesizes_audio_another_worker_removed(tmp_path, monkeypatch):
+    import sys
+    import types
+    from tts_cache import TTSCache
+
+    class Communicate:
+        def __init__(self, text, *args, **kwargs):
+            self.text = text
+
+        async def stream(self):
+            yield {"type": "audio", "data": f"fresh {self.text}".encode()}
+
+    monkeypatch.setitem(sys.modules, "edge_tts", types.SimpleNamespace(Communicate=Communicate))
+    monkeypatch.setattr(Config, "TTS_SHARED_CONNECTOR", False)
+    voice = (Config.TTS_VOICE, Config.TTS_RATE, Config.TTS_VOLUME, Config.TTS_PITCH)
+    key = TTSCache.make_key("hello", *voice)
+
+    TTSCache(str(tmp_path)).put(key, b"cached hello")
+    server = ShipraServer(FakeBrain())
+    server.tts_cache = TTSCache(str(tmp_path))
+    other_worker = TTSCache(str(tmp_path))
+
+    async def speak():
+        return b"".join([chunk async for chunk in server.synthesize("hello")])
+
+    assert asyncio.run(speak()) == b"cached hello"
+    other_worker.remove([key])
+    assert asyncio.run(speak()) == b"fresh hello"
+    assert server.tts_cache.stats()["misses"] == 1
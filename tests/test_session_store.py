@@ -0,0 +1,81 @@
+import threading
+import time
+from session_store import SessionStore
+
+
+class SlowDict(dict):
+    """Yields to other threads while inserting, widening any unlocked read-then-insert window"""
+
+    def __setitem__(self, key, value):
+        time.sleep(0.001)
+        super().__setitem__(key, value)
+
+
+def test_concurrent_new_categories_get_distinct_columns():
+    store = SessionStore(max_sessions=64, max_categories=4096, ttl=0)
+    store.categories = SlowDict()
+
+    def register(worker):
+        for i in range(40):
+            store.bump(f"s{worker}", f"category-{worker}-{i}")
+
+    threads = [threading.Thread(target=register, args=(worker,)) for worker in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(store.categories) == 8 * 40
+    assert sorted(store.categories.values()) == list(range(8 * 40))
+
+
+def test_bump_counts_per_session_and_category():
+    store = SessionStore(max_sessions=4, max_categories=4, ttl=0)
+    assert [store.bump("a", "greeting") for _ in range(3)] == [0, 1, 2]
+    assert store.bump("b", "greeting") == 0
+    assert store.get("a", "greeting") == 3
+    assert store.get("a", "unknown") == 0
+
+
+def test_full_category_table_drops_new_categories():
+    store = SessionStore(max_sessions=4, max_categories=2, ttl=0)
+    store.bump("a", "x")
+    store.bump("a", "y")
+    assert store.bump("a", "z") == 0 and store.bump("a", "z") == 0
+    assert store.stats()["dropped_categories"] == 2
+
+
+def test_least_recently_used_session_is_evicted_when_full():
+    store = SessionStore(max_sessions=2, max_categories=4, ttl=0)
+    store.bump("a", "x")
+    store.bump("b", "x")
+    store.bump("a", "x")  # a is now the most recent
+    store.bump("c", "x")
+    assert "b" not in store and "a" in store and "c" in store
+    assert store.get("a", "x") == 2
+    assert store.lru_evictions == 1
+
+
+def test_idle_sessions_expire_after_the_ttl():
+    store = SessionStore(max_sessions=4, max_categories=4, ttl=60)
+    store.bump("old", "x")
+    store._last_seen[store._slots["old"]] = time.time() - 120
+    store.bump("new", "x")
+    assert store.sweep() == 1
+    assert "old" not in store and "new" in store
+
+
+def test_snapshot_round_trip(tmp_path):
+    path = str(tmp_path / "sessions.npz")
+    store = SessionStore(max_sessions=8, max_categories=8, ttl=600)
+    for _ in range(3):
+        store.bump("a", "greeting")
+    store.bump("b", "company")
+    assert store.snapshot(path) == 2
+
+    # A store that already knows other categories maps the snapshot's columns by name
+    restored = SessionStore(max_sessions=8, max_categories=8, ttl=600)
+    restored.bump("c", "weather")
+    assert restored.restore(path) == 2
+    assert restored.get("a", "greeting") == 3
+    assert restored.get("b", "company") == 1
+    assert restored.get("c", "weather") == 1
@@ -0,0 +1,85 @@
+import threading
+from brain import ShipraBrain
+from config import Config
+from pipeline import VoicePipeline
+
+PARTIALS = ["tell me", "tell me about the", "tell me about the company", "tell me about the company please"]
+
+
+def test_partials_do_not_fill_the_route_cache():
+    brain = ShipraBrain(watch=False)
+    speculation = brain.speculate()
+    for partial in PARTIALS:
+        speculation.update(partial)
+    assert speculation.response is not None
+    assert len(brain.route_cache) == 0
+
+    response, hit = speculation.finish(PARTIALS[-1])
+    assert hit and response == speculation.response
+    # Only the final transcript is memoized
+    assert len(brain.route_cache) == 1
+
+
+class FakeSpeculation:
+    def __init__(self):
+        self.cancelled = 0
+
+    def update(self, partial):
+        pass
+
+    def cancel(self):
+        self.cancelled += 1
+
+
+class FakeBrain:
+    def __init__(self):
+        self.speculations = []
+
+    def speculate(self, on_commit=None, on_cancel=None):
+        self.speculations.append(FakeSpeculation())
+        return self.speculations[-1]
+
+
+class CountingProfiler:
+    def __init__(self):
+        self.started = self.finished = 0
+
+    def turn_started(self):
+        self.started += 1
+
+    def turn_finished(self):
+        self.finished += 1
+
+
+class FakeAudio:
+    def __init__(self, phrases):
+        self.phrases = phrases
+        self.speaking = threading.Event()
+
+    def capture_phrases(self, stop_event):
+        for i in range(self.phrases):
+            yield 'speech_start', None
+            yield 'partial', f"phrase {i}"
+            yield 'phrase', f"audio {i}"
+
+    def prefetch(self, text):
+        pass
+
+    def cancel_prefetch(self, text):
+        pass
+
+
+def test_dropped_turn_cancels_its_speculation(monkeypatch):
+    monkeypatch.setattr(Config, "SPECULATION_ENABLED", True)
+    brain = FakeBrain()
+    pipeline = VoicePipeline(brain, FakeAudio(3), queue_size=1, barge_in=False)
+    pipeline.profiler = CountingProfiler()
+    pipeline._capture_stage()
+
+    # Nothing drains the queue, so the first two turns were dropped for the third
+    queued = pipeline.capture_queue.get_nowait()
+    assert queued.seq == 2
+    assert [s.cancelled for s in brain.speculations] == [1, 1, 0]
+    assert pipeline.capture_queue.empty()
+    # Every profiled turn but the queued one has finished
+    assert pipeline.profiler.started - pipeline.profiler.finished == 1
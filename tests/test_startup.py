@@ -0,0 +1,99 @@
+import pytest
+import systems
+from startup import Startup
+
+
+class FakeAudio:
+    def __init__(self, fail_output=False):
+        self.fail_output = fail_output
+        self.inputs = 0
+        self.prefetched = []
+
+    def init_output(self):
+        if self.fail_output:
+            raise OSError("no audio device")
+
+    def init_input(self):
+        self.inputs += 1
+
+    def prefetch(self, text):
+        self.prefetched.append(text)
+
+
+@pytest.fixture
+def parts(monkeypatch):
+    """Fake Systems whose parts a test can break; imports are not timed"""
+    broken = {}
+
+    class Systems:
+        @classmethod
+        def get_audio(cls, start=True):
+            if broken.get("audio"):
+                raise RuntimeError("audio broke")
+            return FakeAudio(fail_output=broken.get("output", False))
+
+        @classmethod
+        def get_brain(cls):
+            if broken.get("brain"):
+                raise RuntimeError("brain broke")
+            return "brain"
+
+    monkeypatch.setattr(systems, "Systems", Systems)
+
+    def create():
+        startup = Startup(workers=2)
+        monkeypatch.setattr(startup.report, "import_module", lambda name: None)
+        return startup
+    create.broken = broken
+    return create
+
+
+def finished(startup, *names):
+    """Every named part completes (result or error) instead of hanging"""
+    for name in names:
+        startup.futures[name].exception(timeout=5)
+
+
+def steps(startup):
+    return {name for kind, name, *_ in startup.report.steps if kind == "init"}
+
+
+def test_all_parts_start(parts):
+    startup = parts().start("hello")
+    startup.wait()
+    assert startup.brain == "brain"
+    assert startup.audio.inputs == 1 and startup.audio.prefetched == ["hello"]
+    assert steps(startup) == {"audio", "output", "brain", "input"}
+
+
+def test_a_failing_brain_does_not_stop_the_other_parts(parts):
+    parts.broken["brain"] = True
+    startup = parts().start("hello")
+    startup.futures["output"].result(timeout=5)
+    finished(startup, "brain", "input")
+    assert startup.audio.inputs == 1
+    with pytest.raises(RuntimeError, match="brain broke"):
+        startup.wait()
+    with pytest.raises(RuntimeError, match="brain broke"):
+        startup.brain
+    # The failed step is still in the report
+    assert steps(startup) == {"audio", "output", "brain", "input"}
+
+
+def test_a_failing_output_device_is_reported_not_waited_on(parts):
+    parts.broken["output"] = True
+    startup = parts().start()
+    finished(startup, "output")
+    with pytest.raises(OSError, match="no audio device"):
+        startup.wait()
+
+
+def test_a_failing_audio_system_releases_the_output_task(parts):
+    parts.broken["audio"] = True
+    startup = parts()
+    with pytest.raises(RuntimeError, match="audio broke"):
+        startup.start("hello")
+    # The output task was already waiting for the audio system; it fails instead of hanging
+    finished(startup, "output")
+    with pytest.raises(RuntimeError, match="audio system failed"):
+        startup.wait()
@@ -0,0 +1,28 @@
+import os
+from tts_cache import TTSCache
+
+
+def test_a_file_deleted_behind_the_index_is_a_miss(tmp_path):
+    cache = TTSCache(str(tmp_path))
+    path = cache.put("k", b"mp3")
+    other = TTSCache(str(tmp_path))  # Another worker sharing the directory
+    assert other.get("k") == path
+
+    cache.remove(["k"])
+    assert not os.path.exists(path)
+    assert other.get("k") is None
+    assert not other.contains("k")
+    stats = other.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"], stats["bytes"]) == (1, 1, 0, 0)
+
+
+def test_eviction_counters_keep_their_causes_apart(tmp_path):
+    cache = TTSCache(str(tmp_path), max_bytes=10, max_age=60)
+    cache.put("a", b"12345")
+    cache.put("b", b"12345")
+    cache.put("c", b"12345")  # Over max_bytes: "a" is least recently used
+    cache.remove(["b"])
+    cache._entries["c"][1] -= 120  # Created two minutes ago
+    assert cache.get("c") is None
+    stats = cache.stats()
+    assert (stats["evictions"], stats["removed"], stats["expired"], stats["entries"]) == (1, 1, 1, 0)
@@ -0,0 +1,174 @@
+import asyncio
+import os
+import time
+import numpy as np
+import pytest
+from tts_cache import TTSCache
+from tts_stream import FrameDecoder, StreamingSpeaker, mp3_frame, split_sentences
+
+# MPEG-2 Layer III, 48 kbps, 24 kHz, mono (what edge-tts sends): 144-byte frames of 576 samples
+HEADER = bytes([0xFF, 0xF3, 0x64, 0xC4])
+FRAME_BYTES = 144
+
+
+def fake_mp3(tag, frames):
+    """frames MP3 frames whose payload starts with (tag, frame number)"""
+    return b"".join(HEADER + bytes([tag, i % 256]) + bytes(FRAME_BYTES - 6) for i in range(frames))
+
+
+class FakeDecoder:
+    """Decodes fake frames to 576 int16 samples holding tag * 256 + frame number"""
+    frame_bytes = 2
+    bytes_per_ms = 48.0  # 24 kHz mono int16
+
+    def __init__(self):
+        self.decoded_bytes = 0
+
+    def decode(self, data):
+        self.decoded_bytes += len(data)
+        pcm = []
+        offset = 0
+        while offset < len(data):
+            header = mp3_frame(data, offset)
+            assert header is not None, "decode() was handed a split frame"
+            pcm.append(np.full(header[1], data[offset + 4] * 256 + data[offset + 5], dtype=np.int16))
+            offset += header[0]
+        return np.concatenate(pcm).tobytes() if pcm else b""
+
+
+class RecordingSink:
+    def __init__(self):
+        self.segments = []
+        self.first_at = None
+
+    def play(self, pcm):
+        if self.first_at is None:
+            self.first_at = time.perf_counter()
+        self.segments.append(pcm)
+
+    def wait(self):
+        pass
+
+    def stop(self):
+        pass
+
+
+def labels(pcm):
+    """Frame labels in PCM order, one per 576-sample frame"""
+    samples = np.frombuffer(pcm, dtype=np.int16)
+    assert len(samples) % 576 == 0
+    return samples[::576].tolist()
+
+
+def test_mp3_frame_header():
+    assert mp3_frame(HEADER, 0) == (FRAME_BYTES, 576, 24000)
+    assert mp3_frame(bytes([0xFF, 0xFB, 0x90, 0x64]), 0) == (417, 1152, 44100)  # MPEG-1 128 kbps
+    assert mp3_frame(b"ID3\x03", 0) is None
+    assert mp3_frame(HEADER[:3], 0) is None
+
+
+def test_frame_decoder_returns_each_frame_once_in_order():
+    data = fake_mp3(1, 300)
+    decoder = FakeDecoder()
+    frames = FrameDecoder(decoder, step_bytes=4096)
+    pcm = bytearray()
+    steps = 0
+    for i in range(0, len(data), 1000):  # Chunks split frames
+        out = frames.feed(data[i:i + 1000])
+        steps += bool(out)
+        pcm += out
+    pcm += frames.finish()
+    assert labels(pcm) == [256 + i % 256 for i in range(300)]
+    assert steps > 5
+    # Only new frames (plus a few warmup/lookahead frames) per step, not the whole buffer again
+    assert decoder.decoded_bytes < 1.3 * len(data)
+
+
+def test_frame_decoder_skips_id3_and_decodes_unparsed_tail_at_finish():
+    tag = b"ID3\x03\x00\x00\x00\x00\x00\x05" + b"TAGXX"
+    data = fake_mp3(2, 100)
+    decoder = FakeDecoder()
+    decoder.decode = lambda d, original=decoder.decode: original(d[15:] if d.startswith(b"ID3") else d)
+    frames = FrameDecoder(decoder, step_bytes=1024)
+    pcm = frames.feed(tag + data[:5000]) + frames.feed(data[5000:]) + frames.finish()
+    assert labels(pcm) == [512 + i for i in range(100)]
+
+
+def test_streaming_speaker_plays_before_synthesis_ends_in_order():
+    text = "The first sentence is long enough. The second sentence follows it. The third one ends the reply."
+    sentences = split_sentences(text)
+    assert len(sentences) == 3
+    streams = {sentence: fake_mp3(n, 60) for n, sentence in enumerate(sentences)}
+
+    async def stream(sentence):
+        data = streams[sentence]
+        await asyncio.sleep(0.05)  # First byte
+        for i in range(0, len(data), 720):
+            await asyncio.sleep(0.01)
+            yield data[i:i + 720]
+
+    sink = RecordingSink()
+    speaker = StreamingSpeaker(stream, FakeDecoder(), sink, jitter_ms=100, decode_step_bytes=1440)
+    report = speaker.speak(text)
+
+    assert report["error"] is None
+    assert labels(b"".join(sink.segments)) == [n * 256 + i for n in range(3) for i in range(60)]
+    # Audio starts during the first sentence: long before all three are synthesized
+    assert report["ttfa_ms"] < report["synth_ms"] / 2
+    assert report["segments"] > 3
+
+
+def test_streamed_reply_is_cached_under_the_whole_text_key(tmp_path):
+    text = "The first sentence is long enough. The second sentence follows it."
+    sentences = split_sentences(text)
+    streams = {sentence: fake_mp3(n, 20) for n, sentence in enumerate(sentences)}
+    requested = []
+
+    async def stream(sentence):
+        requested.append(sentence)
+        yield streams[sentence]
+
+    cache = TTSCache(str(tmp_path))
+    sink = RecordingSink()
+    speaker = StreamingSpeaker(stream, FakeDecoder(), sink, jitter_ms=0,
+                               cache=cache, cache_key=lambda text: TTSCache.make_key(text, "v", "r", "l", "p"))
+    speaker.speak(text)
+    key = TTSCache.make_key(text, "v", "r", "l", "p")
+    # The same key the non-streaming path checks and forget() removes
+    assert cache.contains(key)
+    assert [cache.contains(speaker.cache_key(sentence)) for sentence in sentences] == [False, False]
+
+    # Replayed from the cache without synthesizing again
+    requested.clear()
+    sink.segments.clear()
+    speaker.speak(text)
+    assert requested == []
+    assert labels(b"".join(sink.segments)) == [n * 256 + i for n in range(2) for i in range(20)]
+
+    assert cache.remove([key]) == 1
+    assert not cache.contains(key)
+
+
+def test_pygame_stepwise_decode_matches_whole_decode():
+    pygame = pytest.importorskip("pygame")
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    from tts_stream import PygameDecoder
+    path = os.path.join(os.path.dirname(pygame.__file__), "examples", "data", "house_lo.mp3")
+    if not os.path.exists(path):
+        pytest.skip("pygame example MP3 not installed")
+    with open(path, "rb") as f:
+        data = f.read()
+    pygame.mixer.init(frequency=22050, size=-16, channels=1)
+    try:
+        decoder = PygameDecoder()
+        whole = np.frombuffer(decoder.decode(data), dtype=np.int16).astype(np.int32)
+        frames = FrameDecoder(decoder)
+        pcm = bytearray()
+        for i in range(0, len(data), 1024):
+            pcm += frames.feed(data[i:i + 1024])
+        pcm += frames.finish()
+        stitched = np.frombuffer(bytes(pcm), dtype=np.int16).astype(np.int32)
+    finally:
+        pygame.mixer.quit()
+    assert len(stitched) == len(whole)
+    assert np.abs(stitched - whole).max() <= 1
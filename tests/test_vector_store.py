@@ -0,0 +1,86 @@
+import gc
+import os
+import pytest
+
+pytest.importorskip("numpy")
+import vector_store
+from config import Config
+from vector_store import CHUNKS_FILE, VectorStore, vector_generations
+
+
+def write(path, text):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+
+
+@pytest.fixture
+def docs(tmp_path):
+    directory = tmp_path / "data"
+    directory.mkdir()
+    write(directory / "a.md", "# Fuel\nThe vehicle runs on a hydrogen fuel cell.\n")
+    write(directory / "b.md", "# Safety\nObstacle detection keeps every flight safe.\n")
+    return directory
+
+
+def test_reload_writes_a_new_generation_and_drops_the_old_once_released(tmp_path, docs, monkeypatch):
+    store_dir = str(tmp_path / "store")
+    old = VectorStore(directory=store_dir, documents=str(docs), use_faiss=False).load()
+    old_file = f"vectors.{old.generation}.npy"
+    assert list(vector_generations(store_dir).values()) == [old_file]
+
+    # As on Windows, a mapped file cannot be deleted
+    mapped = {old_file}
+    remove = os.remove
+
+    def remove_unmapped(path):
+        if os.path.basename(path) in mapped:
+            raise PermissionError(path)
+        remove(path)
+    monkeypatch.setattr(vector_store.os, "remove", remove_unmapped)
+
+    write(docs / "a.md", "# Fuel\nThe vehicle runs on compressed hydrogen.\n")
+    new = VectorStore(directory=store_dir, documents=str(docs), use_faiss=False).load(old)
+    assert new.generation == old.generation + 1
+    # The replaced store keeps answering from its own matrix until its readers are done
+    assert old.best("hydrogen fuel cell", min_similarity=0)["path"].endswith("a.md")
+    assert new.best("compressed hydrogen", min_similarity=0)["path"].endswith("a.md")
+
+    assert old_file in vector_generations(store_dir).values()
+    mapped.clear()
+    del old
+    gc.collect()
+    assert list(vector_generations(store_dir).values()) == [f"vectors.{new.generation}.npy"]
+    assert list(vector_generations(store_dir, CHUNKS_FILE).values()) == [f"chunks.{new.generation}.json"]
+
+
+def test_an_unchanged_store_is_reopened_without_a_new_generation(tmp_path, docs):
+    store_dir = str(tmp_path / "store")
+    first = VectorStore(directory=store_dir, documents=str(docs), use_faiss=False).load()
+    again = VectorStore(directory=store_dir, documents=str(docs), use_faiss=False).load()
+    assert again.generation == first.generation
+    assert os.path.exists(os.path.join(store_dir, f"vectors.{first.generation}.npy"))
+
+
+def test_a_generation_opens_with_its_own_chunks(tmp_path, docs):
+    store_dir = str(tmp_path / "store")
+    old = VectorStore(directory=store_dir, documents=str(docs), use_faiss=False).load()
+
+    # A newer build lands between a reader's manifest read and its open
+    write(docs / "c.md", "# Range\nThe vehicle flies forty kilometres per charge.\n")
+    VectorStore(directory=store_dir, documents=str(docs), use_faiss=False).build()
+    reader = VectorStore(directory=store_dir, documents=str(docs), use_faiss=False)
+    reader._open(old.generation)
+    assert len(reader.chunks) == reader.vectors.shape[0] == len(old.chunks)
+    assert [chunk["text"] for chunk in reader.chunks] == [chunk["text"] for chunk in old.chunks]
+
+
+def test_off_domain_and_hinglish_queries_get_no_chunk(tmp_path):
+    store = VectorStore(directory=str(tmp_path / "store"), documents=Config.DOCUMENTS_DIRECTORY,
+                        use_faiss=False).load()
+    for query in ["noise level", "the stock market", "cricket score", "weather in london",
+                  "kitna range hai", "range kitni hai", "mausam kaisa hai", "aapka naam kya hai"]:
+        assert store.best(query) is None, query
+    # Word variants the BM25 index cannot match are still answered
+    assert store.best("sustainability")["heading"].endswith("> Mission")
+    assert "Co-Founder" in store.best("founders")["heading"]
+    assert store.best("load capacities")["heading"].endswith("> Load Capacity")
@@ -0,0 +1,60 @@
+import sys
+import types
+import pytest
+from audio import ShipraAudio
+from brain import ShipraBrain
+from config import Config
+from tts_cache import TTSCache
+from warmup import static_texts, warm_up
+
+
+@pytest.fixture
+def edge_tts(monkeypatch):
+    """Fake edge_tts recording what was synthesized"""
+    requests = []
+
+    class Communicate:
+        def __init__(self, text, voice, rate=None, volume=None, pitch=None, connector=None):
+            self.text = text
+
+        async def save(self, path):
+            requests.append(self.text)
+            with open(path, "wb") as f:
+                f.write(f"mp3:{self.text}".encode("utf-8"))
+
+        async def stream(self):
+            requests.append(self.text)
+            yield {"type": "audio", "data": f"mp3:{self.text}".encode("utf-8")}
+
+    monkeypatch.setitem(sys.modules, "edge_tts", types.SimpleNamespace(Communicate=Communicate))
+    return requests
+
+
+@pytest.fixture
+def audio(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, "TTS_CACHE_ENABLED", True)
+    monkeypatch.setattr(Config, "TTS_CACHE_DIRECTORY", str(tmp_path / "tts"))
+    audio = ShipraAudio(start=False)
+    yield audio
+    audio.loop.stop()
+
+
+def test_warmed_catalog_replies_are_served_from_the_cache(audio, edge_tts):
+    texts = static_texts()
+    summary = warm_up(audio.tts_cache, audio.voice_params(), workers=4, loop=audio.loop)
+    assert summary["synthesized"] == summary["total"] == len(texts) and summary["failed"] == 0
+    assert sorted(edge_tts) == sorted(texts)
+
+    # Canned replies the brain gives are cache hits: no edge-tts request at speak time
+    edge_tts.clear()
+    brain = ShipraBrain(watch=False)
+    for query in ["hello", "tell me about the company", "kaise ho", "who are you"]:
+        clean = audio.normalize_text(brain.chat(query))
+        assert audio._is_cached(clean), query
+        assert audio.loop.run(audio._synthesize_async(clean)) == f"mp3:{TTSCache.normalize(clean)}".encode("utf-8")
+    assert edge_tts == []
+
+    # A second warmup finds everything cached
+    again = warm_up(audio.tts_cache, audio.voice_params(), workers=4, loop=audio.loop)
+    assert again["cached"] == again["total"] and again["synthesized"] == 0
+    assert edge_tts == []
@@ -0,0 +1,96 @@
+import os
+import threading
+import pytest
+from brain import ShipraBrain
+from config import Config
+from watcher import DocumentWatcher
+
+
+@pytest.fixture
+def docs(tmp_path, monkeypatch):
+    directory = tmp_path / "docs"
+    directory.mkdir()
+    (directory / "cafeteria.md").write_text("# Cafeteria\n## Hours\n- The cafeteria opens at eight.\n",
+                                        encoding="utf-8")
+    # Enough unrelated sections for the BM25 scores of rare terms to clear KNOWLEDGE_MIN_SCORE
+    sections = "".join(f"## Bay {n}\n- Bay {n} holds tug number {n} and spare rotor set {n}.\n" for n in range(12))
+    (directory / "hangar.md").write_text(f"# Hangar\n{sections}", encoding="utf-8")
+    monkeypatch.setattr(Config, "DOCUMENTS_DIRECTORY", str(directory))
+    monkeypatch.setattr(Config, "KNOWLEDGE_INDEX_FILE", str(tmp_path / "knowledge_index.pkl"))
+    monkeypatch.setattr(Config, "VECTOR_ENABLED", False)
+    return directory
+
+
+def append_section(path, text):
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(f"\n## Update\n- {text}\n")
+
+
+def test_reload_swaps_in_new_state_and_keeps_catalog_decisions(docs):
+    brain = ShipraBrain(watch=False)
+    stale = []
+    brain.on_knowledge_change(stale.append)
+    company = brain.route("tell me about the company")
+    hours = brain.route("what are the cafeteria hours")
+    assert "opens at eight" in brain.answer(hours)
+    assert "zqwinglet" not in (brain.get_knowledge_answer("zqwinglet kit") or "")
+    old = brain.state
+
+    path = os.path.abspath(docs / "cafeteria.md")
+    append_section(path, "The zqwinglet kit ships in March.")
+    brain.reload_changed({path})
+
+    # One new state object replaces the old one, which is left untouched for turns in flight
+    assert brain.state is not old and brain.state.generation == old.generation + 1
+    assert "zqwinglet" not in (old.knowledge.best("zqwinglet kit") or "")
+    assert "zqwinglet" in brain.chat("zqwinglet kit")
+    # Catalog decisions survive; knowledge answers are decided again
+    assert brain.route("tell me about the company") is company
+    assert brain.route("what are the cafeteria hours") is not hours
+    assert len(stale) == 1
+
+
+def test_unchanged_files_keep_the_state_generation(docs):
+    brain = ShipraBrain(watch=False)
+    brain.route("what are the cafeteria hours")
+    generation = brain.state.generation
+    assert brain.reload_knowledge({os.path.abspath(docs / "hangar.md")}) == 0
+    assert brain.state.generation == generation
+    assert len(brain.route_cache) == 1
+
+
+def test_edits_are_picked_up_without_the_route_cache_or_a_watcher(docs, monkeypatch):
+    monkeypatch.setattr(Config, "ROUTE_CACHE_ENABLED", False)
+    monkeypatch.setattr(Config, "KNOWLEDGE_POLL_INTERVAL", 0)
+    brain = ShipraBrain(watch=False)
+    assert brain.route_cache is None and brain.watcher is None
+    assert "zqwinglet" not in brain.chat("zqwinglet kit")
+
+    append_section(os.path.abspath(docs / "cafeteria.md"), "The zqwinglet kit ships in March.")
+    assert "zqwinglet" in brain.chat("zqwinglet kit")
+
+
+@pytest.mark.parametrize("backend", ["inotify", "poll"])
+def test_watcher_reports_edited_files(docs, backend):
+    reported = []
+    changed = threading.Event()
+
+    def on_change(paths):
+        reported.append(paths)
+        changed.set()
+
+    watcher = DocumentWatcher(on_change, files=[], debounce_ms=20, poll_interval=0.05,
+                              use_inotify=backend == "inotify").start()
+    try:
+        if watcher.backend != backend:
+            pytest.skip(f"{backend} not available here")
+        path = os.path.abspath(docs / "hangar.md")
+        # The polling thread takes its baseline after start(): keep editing until an edit is seen
+        for attempt in range(50):
+            append_section(path, f"Hangar doors open at six ({attempt}).")
+            if changed.wait(0.1):
+                break
+        assert changed.is_set()
+    finally:
+        watcher.stop()
+    assert reported[0] is None or path in reported[0]
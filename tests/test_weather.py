@@ -0,0 +1,147 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from weather import WeatherService
+
+PAYLOAD = {
+    "current_condition": [{"temp_C": "31", "FeelsLikeC": "34", "humidity": "40",
+                           "weatherDesc": [{"value": "Sunny"}]}],
+    "weather": [
+        {"maxtempC": "33", "mintempC": "22", "hourly": [{"weatherDesc": [{"value": "Sunny"}]}]},
+        {"maxtempC": "32", "mintempC": "21", "hourly": [{"weatherDesc": [{"value": "Partly cloudy"}]}]},
+    ],
+}
+
+
+class StubWttr:
+    """Local wttr.in stand-in counting requests; can hold them open or fail them"""
+
+    def __init__(self):
+        self.requests = 0
+        self.status = 200
+        self.release = threading.Event()
+        self.release.set()
+        self.arrived = threading.Event()
+        stub = self
+        body = json.dumps(PAYLOAD).encode()
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                stub.requests += 1
+                stub.arrived.set()
+                stub.release.wait(5)
+                self.send_response(stub.status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, args=(0.05,), daemon=True).start()
+
+    def close(self):
+        self.release.set()
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def stub():
+    server = StubWttr()
+    yield server
+    server.close()
+
+
+@pytest.fixture
+def service(stub, tmp_path):
+    location_file = tmp_path / "location.json"
+    location_file.write_text(json.dumps({"city": "Bhopal", "country": "India", "resolved_at": time.time()}))
+    return WeatherService(base_url=stub.url, ttl=60, stale_ttl=600, location_file=str(location_file))
+
+
+def expire(service, city, age):
+    fetched_at, data = service._payloads[city]
+    service._payloads[city] = (fetched_at - age, data)
+
+
+def wait_until(condition, timeout=5):
+    deadline = time.time() + timeout
+    while not condition():
+        assert time.time() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def test_concurrent_callers_share_one_request(stub, service):
+    stub.release.clear()
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(service.get_weather_data("Bhopal")))
+               for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    assert stub.arrived.wait(5)
+    time.sleep(0.1)  # Let the other callers join the in-flight fetch
+    stub.release.set()
+    for thread in threads:
+        thread.join(5)
+    assert stub.requests == 1
+    assert results == [PAYLOAD] * 8
+
+
+def test_fresh_entry_is_served_without_http(stub, service):
+    assert service.get_weather_data("Bhopal") == PAYLOAD
+    for _ in range(3):
+        assert service.get_weather_data("Bhopal") == PAYLOAD
+    assert service.get_weather().startswith("In Bhopal, the temperature is 31 degrees")
+    assert service.get_forecast().startswith("Tomorrow's weather will be Partly cloudy")
+    assert stub.requests == 1
+    assert service.cache_hits == 5
+    assert service.geolocation_calls == 0
+
+
+def test_stale_entry_is_served_while_one_refresh_runs(stub, service):
+    service.get_weather_data("Bhopal")
+    expire(service, "Bhopal", 120)
+    stub.release.clear()
+    stub.arrived.clear()
+    start = time.perf_counter()
+    for _ in range(5):
+        assert service.get_weather_data("Bhopal") == PAYLOAD
+    assert time.perf_counter() - start < 1  # Answered without waiting for the held request
+    assert stub.arrived.wait(5)
+    assert service.stale_hits == 5
+    stub.release.set()
+    wait_until(lambda: not service._inflight)
+    assert stub.requests == 2
+    # The refresh replaced the entry: fresh again
+    service.get_weather_data("Bhopal")
+    assert stub.requests == 2 and service.cache_hits == 1
+
+
+def test_errors_fall_back_to_the_stale_value(stub, service):
+    service.get_weather_data("Bhopal")
+    stub.status = 500
+
+    # Stale window: the failed background refresh keeps the old payload
+    expire(service, "Bhopal", 120)
+    assert service.get_weather_data("Bhopal") == PAYLOAD
+    wait_until(lambda: stub.requests == 2 and not service._inflight)
+    assert service.get_weather_data("Bhopal") == PAYLOAD
+
+    # Past the stale window the fetch is synchronous; a failure still answers from the old copy
+    expire(service, "Bhopal", 10000)
+    assert service.get_weather_data("Bhopal") == PAYLOAD
+    assert stub.requests >= 3
+
+
+def test_failure_without_a_cached_value_returns_none(stub, service):
+    stub.status = 500
+    assert service.get_weather_data("Bhopal") is None
+    assert service.get_forecast() is None
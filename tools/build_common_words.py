@@ -0,0 +1,66 @@
+"""
+Rebuild data/common_words.txt: the ordinary English words that fuzzy
+correction would otherwise rewrite into an intent keyword.
+
+Source: the wordfreq package (https://github.com/rspeer/wordfreq), whose
+word frequency data is licensed CC BY-SA 4.0. The list is the subset of
+wordfreq's most frequent English words that lie within the corrector's edit
+budget of a catalog keyword, and is distributed under the same license.
+
+Run it from the repository root after editing the keywords in
+data/catalog.json or the FUZZY_* settings in config.py:
+    pip install wordfreq
+    python tools/build_common_words.py [--top N] [--output FILE]
+"""
+import argparse
+import importlib.metadata
+import os
+import re
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+os.chdir(ROOT)  # Config resolves data/ from the working directory
+sys.path.insert(0, ROOT)
+
+import intents
+from config import Config
+
+HEADER = """\
+# Ordinary English words that fuzzy correction never rewrites into a keyword.
+# Generated by tools/build_common_words.py from the {top} most frequent English
+# words in wordfreq {version} (https://github.com/rspeer/wordfreq).
+# wordfreq data is licensed CC BY-SA 4.0, and so is this list:
+# https://creativecommons.org/licenses/by-sa/4.0/
+"""
+
+
+def colliding_words(candidates):
+    """Candidates the corrector rewrites when no word list protects them"""
+    intents._common_words = frozenset()
+    corrector = intents.IntentMatcher(fuzzy=True).corrector
+    return sorted(word for word in set(candidates) if corrector.correct_word(word) != word)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Rebuild the fuzzy correction stop list from wordfreq")
+    parser.add_argument("--top", type=int, default=20000, help="Most frequent English words to check")
+    parser.add_argument("--output", default=Config.FUZZY_COMMON_WORDS_FILE)
+    args = parser.parse_args(argv)
+
+    try:
+        import wordfreq
+    except ImportError:
+        print("wordfreq is not installed (pip install wordfreq)")
+        return 1
+
+    candidates = [word for word in wordfreq.top_n_list("en", args.top) if re.fullmatch(r"[a-z]+", word)]
+    words = colliding_words(candidates)
+    with open(args.output, "w", encoding="utf-8", newline="\n") as f:
+        f.write(HEADER.format(top=args.top, version=importlib.metadata.version("wordfreq")))
+        f.write("\n".join(words) + "\n")
+    print(f"{len(words)} of {len(candidates)} words collide with a keyword -> {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,211 @@
+import hashlib
+import os
+import re
+import tempfile
+import threading
+import time
+
+class TTSCache:
+    """Content-addressed on-disk cache of synthesized speech.
+
+    Entries are keyed by (normalized text, voice, rate, volume, pitch), so any
+    change to the voice settings produces a new key. Files are written
+    atomically and evicted LRU once the cache exceeds max_bytes, or when they
+    are older than max_age seconds.
+    """
+
+    EXTENSION = ".mp3"
+
+    def __init__(self, directory, max_bytes=50 * 1024 * 1024, max_age=30 * 24 * 3600):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0  # LRU, over max_bytes
+        self.expired = 0  # Older than max_age
+        self.removed = 0  # Explicit remove()
+        self._lock = threading.Lock()
+        self._entries = {}  # key -> [size, created, last_used]
+        self._pinned = set()
+        self._total_bytes = 0
+        os.makedirs(self.directory, exist_ok=True)
+        self._load_index()
+
+    @staticmethod
+    def normalize(text):
+        """Strip markdown markers and collapse whitespace, as spoken"""
+        clean = text.replace("*", "").replace("#", "")
+        return re.sub(r"\s+", " ", clean).strip()
+
+    @classmethod
+    def make_key(cls, text, voice, rate, volume, pitch):
+        payload = "\x1f".join([cls.normalize(text), voice, rate, volume, pitch])
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def path_for(self, key):
+        return os.path.join(self.directory, key + self.EXTENSION)
+
+    def _load_index(self):
+        """Rebuild the in-memory index from the files already on disk"""
+        for name in os.listdir(self.directory):
+            if not name.endswith(self.EXTENSION):
+                # Leftover temp files from an interrupted write
+                if name.startswith(".tmp-"):
+                    try:
+                        os.remove(os.path.join(self.directory, name))
+                    except OSError:
+                        pass
+                continue
+            try:
+                st = os.stat(os.path.join(self.directory, name))
+            except OSError:
+                continue
+            key = name[:-len(self.EXTENSION)]
+            self._entries[key] = [st.st_size, st.st_mtime, st.st_atime]
+            self._total_bytes += st.st_size
+        with self._lock:
+            self._evict_locked(time.time())
+
+    def get(self, key):
+        """Return the cached file path for key, or None on a miss"""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if (entry is not None and self.max_age and now - entry[1] > self.max_age
+                    and key not in self._pinned):
+                self._remove_locked(key)
+                self.expired += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+        path = self.path_for(key)
+        try:
+            # Persist recency (atime only) so LRU order survives restarts
+            os.utime(path, (now, entry[1]))
+        except FileNotFoundError:
+            # Deleted behind the index (another process sharing the directory)
+            with self._lock:
+                if self._entries.get(key) is entry:
+                    self._drop_locked(key)
+                self.misses += 1
+            return None
+        except OSError:
+            pass
+        with self._lock:
+            entry[2] = now
+            self.hits += 1
+        return path
+
+    def contains(self, key):
+        """True if key is cached, without touching hit/miss counters or recency"""
+        with self._lock:
+            return key in self._entries
+
+    def pin(self, keys):
+        """Exempt keys (e.g. the warmed-up response catalog) from eviction"""
+        with self._lock:
+            self._pinned.update(keys)
+
+    def remove(self, keys):
+        """Drop entries (e.g. replies whose text is outdated), pinned or not; returns how many"""
+        removed = 0
+        with self._lock:
+            for key in keys:
+                if key in self._entries:
+                    self._remove_locked(key)
+                    self._pinned.discard(key)
+                    removed += 1
+            self.removed += removed
+        return removed
+
+    def new_temp_path(self):
+        """Path in the cache directory to synthesize into before commit()"""
+        fd, path = tempfile.mkstemp(prefix=".tmp-", suffix=self.EXTENSION, dir=self.directory)
+        os.close(fd)
+        return path
+
+    def commit(self, key, temp_path):
+        """Atomically move a finished temp file into the cache under key"""
+        try:
+            size = os.path.getsize(temp_path)
+            if size == 0:
+                os.remove(temp_path)
+                return None
+            path = self.path_for(key)
+            os.replace(temp_path, path)
+        except OSError as e:
+            print(f"[TTSCache] Write Error: {e}")
+            return None
+        now = time.time()
+        with self._lock:
+            old = self._entries.get(key)
+            if old is not None:
+                self._total_bytes -= old[0]
+            self._entries[key] = [size, now, now]
+            self._total_bytes += size
+            self.writes += 1
+            self._evict_locked(now, keep=key)
+        return path
+
+    def put(self, key, data):
+        """Atomically store raw audio bytes under key"""
+        temp_path = self.new_temp_path()
+        with open(temp_path, "wb") as f:
+            f.write(data)
+        return self.commit(key, temp_path)
+
+    def discard(self, temp_path):
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+
+    def _drop_locked(self, key):
+        """Forget key's entry; the caller deals with its file"""
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._total_bytes -= entry[0]
+        return entry
+
+    def _remove_locked(self, key):
+        if self._drop_locked(key) is None:
+            return
+        try:
+            os.remove(self.path_for(key))
+        except OSError:
+            pass
+
+    def _evict_locked(self, now, keep=None):
+        if self.max_age:
+            expired = [k for k, e in self._entries.items()
+                       if now - e[1] > self.max_age and k != keep and k not in self._pinned]
+            for key in expired:
+                self._remove_locked(key)
+            self.expired += len(expired)
+        if self.max_bytes and self._total_bytes > self.max_bytes:
+            by_recency = sorted(self._entries.items(), key=lambda item: item[1][2])
+            for key, _ in by_recency:
+                if self._total_bytes <= self.max_bytes:
+                    break
+                if key != keep and key not in self._pinned:
+                    self._remove_locked(key)
+                    self.evictions += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._total_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "writes": self.writes,
+                "evictions": self.evictions,
+                "expired": self.expired,
+                "removed": self.removed,
+                "pinned": len(self._pinned),
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
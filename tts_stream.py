@@ -0,0 +1,333 @@
+"""
+Streaming TTS playback: audio chunks are decoded into memory as they arrive
+and playback starts once a small jitter buffer is filled, while the next
+sentence is still being synthesized. The MP3 stream is decoded on frame
+boundaries, so each step decodes only the frames that are new.
+"""
+import asyncio
+import io
+import queue
+import re
+import threading
+import time
+
+# MPEG audio Layer III frame headers: bitrates (kbps) and sample rates by version bits
+MP3_BITRATES = {3: (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),  # MPEG-1
+                2: (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160)}  # MPEG-2 and 2.5
+MP3_SAMPLE_RATES = {3: (44100, 48000, 32000), 2: (22050, 24000, 16000), 0: (11025, 12000, 8000)}
+
+# Sentence boundaries, ignoring the honorifics used throughout the catalog
+SENTENCE_END = re.compile(r'(?<!\bMr\.)(?<!\bMrs\.)(?<!\bMs\.)(?<!\bDr\.)(?<=[.!?।])\s+')
+
+
+def split_sentences(text, min_chars=25):
+    """Split text into sentences, merging fragments shorter than min_chars"""
+    parts = [p.strip() for p in SENTENCE_END.split(text) if p.strip()]
+    sentences = []
+    for part in parts:
+        if sentences and len(sentences[-1]) < min_chars:
+            sentences[-1] = f"{sentences[-1]} {part}"
+        else:
+            sentences.append(part)
+    return sentences or [text]
+
+
+def mp3_frame(data, offset):
+    """(frame length, samples, sample rate) of the Layer III header at offset, or None"""
+    if offset + 4 > len(data) or data[offset] != 0xFF or data[offset + 1] & 0xE0 != 0xE0:
+        return None
+    version = (data[offset + 1] >> 3) & 3
+    layer = (data[offset + 1] >> 1) & 3
+    bitrate = data[offset + 2] >> 4
+    rate = (data[offset + 2] >> 2) & 3
+    if version == 1 or layer != 1 or bitrate in (0, 15) or rate == 3:
+        return None
+    bitrate = MP3_BITRATES[3 if version == 3 else 2][bitrate] * 1000
+    rate = MP3_SAMPLE_RATES[version][rate]
+    padding = (data[offset + 2] >> 1) & 1
+    if version == 3:
+        return 144 * bitrate // rate + padding, 1152, rate
+    return 72 * bitrate // rate + padding, 576, rate
+
+
+class FrameDecoder:
+    """Decodes a growing MP3 stream step by step, each step covering only new frames.
+
+    A step decodes the new complete frames plus warmup_frames before them
+    (their bit reservoir and overlap) and lookahead_frames after them (the
+    decoder holds back the end of its input), then keeps exactly the PCM of
+    the new frames. Bytes that do not parse as frames are decoded at finish(),
+    as is the whole stream when the decoder resamples it to a rate the frame
+    length does not divide evenly (Config.PLAYBACK_SAMPLE_RATE avoids that).
+    """
+
+    def __init__(self, decoder, step_bytes=4096, warmup_frames=3, lookahead_frames=1):
+        self.decoder = decoder
+        self.step_bytes = step_bytes
+        self.warmup_frames = warmup_frames
+        self.lookahead_frames = lookahead_frames
+        self.frame_bytes = getattr(decoder, "frame_bytes", 1)
+        self.buffer = bytearray()
+        self.frames = []  # Offsets of the complete frames
+        self.scan = None  # Offset of the next frame header (None until past any ID3 tag)
+        self.synced = True  # False once the stream stops parsing as frames
+        self.done = 0  # Frames whose PCM has been returned
+        self._pcm_per_frame = None  # PCM sample frames per MP3 frame, in the decoder's rate
+
+    def feed(self, chunk):
+        """Append compressed bytes; returns the PCM of newly completed frames (maybe empty)"""
+        self.buffer.extend(chunk)
+        self._parse()
+        ready = len(self.frames) - self.lookahead_frames
+        if ready > self.done and self._end(ready) - self.frames[self.done] >= self.step_bytes:
+            return self._decode(self.done, ready, final=False)
+        return b""
+
+    def finish(self):
+        """PCM of everything not returned yet"""
+        if self.done == 0 and not self.frames:
+            return self._trim(self.decoder.decode(bytes(self.buffer))) if self.buffer else b""
+        return self._decode(self.done, len(self.frames), final=True)
+
+    def _parse(self):
+        if self.scan is None:
+            if len(self.buffer) < 10:
+                return
+            self.scan = 0
+            if self.buffer[:3] == b"ID3":
+                size = self.buffer[6:10]
+                self.scan = 10 + (size[0] << 21 | size[1] << 14 | size[2] << 7 | size[3])
+        while self.synced:
+            header = mp3_frame(self.buffer, self.scan)
+            if header is None:
+                # Not a frame (yet): wait for its header bytes, else stop splitting the stream
+                self.synced = self.scan + 4 > len(self.buffer)
+                return
+            length, samples, rate = header
+            if self.scan + length > len(self.buffer):
+                return
+            if self._pcm_per_frame is None:
+                bytes_per_ms = getattr(self.decoder, "bytes_per_ms", None)
+                self._pcm_per_frame = samples * (bytes_per_ms * 1000 / self.frame_bytes if bytes_per_ms else rate) / rate
+                if self._pcm_per_frame != int(self._pcm_per_frame):
+                    # Resampled to a rate the frames do not divide evenly: separately decoded
+                    # steps would not line up, so decode everything once at finish()
+                    self.synced = False
+                    return
+            self.frames.append(self.scan)
+            self.scan += length
+
+    def _end(self, frame):
+        """Byte offset where frame starts (or the parsed end of the stream)"""
+        return self.frames[frame] if frame < len(self.frames) else self.scan
+
+    def _offset(self, frame):
+        """PCM bytes from the start of the stream to the start of frame"""
+        return round(frame * self._pcm_per_frame) * self.frame_bytes
+
+    def _decode(self, first, last, final):
+        start = max(0, first - self.warmup_frames)
+        begin = self.frames[start] if start else 0  # Leading tag bytes go with the first frame
+        end = len(self.buffer) if final else self._end(last + self.lookahead_frames)
+        pcm = self.decoder.decode(bytes(self.buffer[begin:end]))
+        skip = self._offset(first) - self._offset(start)
+        keep = None if final else self._offset(last) - self._offset(start)
+        self.done = last
+        return self._trim(pcm[skip:keep])
+
+    def _trim(self, pcm):
+        # Keep segments aligned to whole sample frames
+        return pcm[:len(pcm) - len(pcm) % self.frame_bytes]
+
+
+class PygameDecoder:
+    """Decodes compressed audio bytes to raw PCM in the mixer's format"""
+
+    def __init__(self):
+        import pygame
+        self.pygame = pygame
+        freq, fmt, channels = pygame.mixer.get_init()
+        self.bytes_per_ms = freq * (abs(fmt) // 8) * channels / 1000.0
+        self.frame_bytes = (abs(fmt) // 8) * channels
+
+    def decode(self, data):
+        return self.pygame.mixer.Sound(file=io.BytesIO(data)).get_raw()
+
+
+class ChannelSink:
+    """Plays PCM segments back to back on one pygame mixer channel"""
+
+    def __init__(self):
+        import pygame
+        self.pygame = pygame
+        self.channel = None
+        self.stopped = threading.Event()
+        self.ends_at = 0.0  # perf_counter time the last queued segment finishes
+        self.queued_starts = 0.0  # perf_counter time the queued segment takes over the channel
+        freq, fmt, channels = pygame.mixer.get_init()
+        self.bytes_per_sec = freq * (abs(fmt) // 8) * channels
+
+    def reset(self):
+        self.stopped.clear()
+        self.ends_at = 0.0
+        self.queued_starts = 0.0
+
+    def play(self, pcm):
+        """Start pcm now, or queue it behind the segment currently playing"""
+        if self.stopped.is_set():
+            return
+        sound = self.pygame.mixer.Sound(buffer=pcm)
+        duration = len(pcm) / self.bytes_per_sec
+        now = time.perf_counter()
+        if self.channel is not None and self.channel.get_busy() and self.channel.get_queue() is not None:
+            # A channel holds one queued sound: sleep until it starts playing (or stop()),
+            # then give the device a few ms more if it runs behind the clock
+            if self.stopped.wait(max(0.0, self.queued_starts - now)):
+                return
+            for _ in range(20):
+                if self.channel.get_queue() is None or self.stopped.wait(0.005):
+                    break
+            if self.stopped.is_set():
+                return
+            now = time.perf_counter()
+        if self.channel is not None and self.channel.get_busy():
+            self.channel.queue(sound)
+            self.queued_starts = max(self.ends_at, now)
+            self.ends_at = self.queued_starts + duration
+        else:
+            self.channel = sound.play()
+            self.ends_at = now + duration
+
+    def wait(self):
+        """Block until the queued audio has played out, or stop() is called"""
+        self.stopped.wait(max(0.0, self.ends_at - time.perf_counter()))
+
+    def stop(self):
+        self.stopped.set()
+        if self.channel is not None:
+            self.channel.stop()
+
+
+class StreamingSpeaker:
+    """Synthesizes sentence by sentence and plays while synthesis continues.
+
+    stream_factory(text) must return an async iterator of audio byte chunks;
+    the decoder turns a (possibly partial) compressed buffer into PCM and the
+    sink plays PCM segments in order. A local fake stream can be plugged in
+    to measure time-to-first-audio without the network.
+    """
+
+    def __init__(self, stream_factory, decoder, sink, jitter_ms=250, decode_step_bytes=4096,
+                 cache=None, cache_key=None, loop=None):
+        self.stream_factory = stream_factory
+        self.decoder = decoder
+        self.sink = sink
+        self.jitter_ms = jitter_ms
+        self.decode_step_bytes = decode_step_bytes
+        self.cache = cache
+        self.cache_key = cache_key
+        self.loop = loop  # AudioLoop; without one each reply gets a private loop
+        self.cancelled = threading.Event()
+
+    def cancel(self):
+        """Thread-safe: stop playback and abandon the rest of the synthesis"""
+        self.cancelled.set()
+        self.sink.stop()
+
+    def speak(self, text):
+        """Play text and return a timing report (milliseconds)"""
+        start = time.perf_counter()
+        self.cancelled.clear()
+        if hasattr(self.sink, "reset"):
+            self.sink.reset()
+        sentences = split_sentences(text)
+        segments = queue.Queue()
+        report = {"sentences": len(sentences), "segments": 0, "ttfa_ms": None,
+                  "synth_ms": None, "total_ms": None, "error": None}
+
+        if self.loop is not None:
+            producer = self.loop.submit(self._run_producer(text, sentences, segments, report, start))
+        else:
+            producer = threading.Thread(target=lambda: asyncio.run(self._run_producer(text, sentences, segments, report, start)),
+                                        name="tts-stream", daemon=True)
+            producer.start()
+
+        pending = []
+        pending_ms = 0.0
+        playing = False
+        while True:
+            pcm = segments.get()
+            done = pcm is None
+            if self.cancelled.is_set():
+                # Drain until the producer notices the cancel and finishes
+                if done:
+                    break
+                continue
+            if not done:
+                report["segments"] += 1
+                if playing:
+                    self.sink.play(pcm)
+                    continue
+                pending.append(pcm)
+                pending_ms += len(pcm) / self.decoder.bytes_per_ms
+            # Hold back until the jitter buffer is full (or synthesis is over)
+            if pending and (pending_ms >= self.jitter_ms or done):
+                report["ttfa_ms"] = (time.perf_counter() - start) * 1000
+                playing = True
+                for buffered in pending:
+                    self.sink.play(buffered)
+                pending = []
+            if done:
+                break
+
+        self.sink.wait()
+        if self.loop is not None:
+            producer.result()
+        else:
+            producer.join()
+        report["total_ms"] = (time.perf_counter() - start) * 1000
+        return report
+
+    async def _run_producer(self, text, sentences, segments, report, start):
+        try:
+            await self._produce(text, sentences, segments)
+        except Exception as e:
+            report["error"] = str(e)
+            print(f"[Audio] Streaming TTS Error: {e}")
+        finally:
+            report["synth_ms"] = (time.perf_counter() - start) * 1000
+            segments.put(None)
+
+    async def _produce(self, text, sentences, segments):
+        # Cached under the whole-text key, like the non-streaming path, so one
+        # lookup or removal covers a reply whichever way it was synthesized
+        key = self.cache_key(text) if self.cache is not None else None
+        cached = self.cache.get(key) if key else None
+        if cached:
+            with open(cached, "rb") as f:
+                segments.put(self._trim(self.decoder.decode(f.read())))
+            return
+
+        streams = []
+        for sentence in sentences:
+            if self.cancelled.is_set():
+                return
+            frames = FrameDecoder(self.decoder, step_bytes=self.decode_step_bytes)
+            async for chunk in self.stream_factory(sentence):
+                if self.cancelled.is_set():
+                    return
+                pcm = frames.feed(chunk)
+                if pcm:
+                    segments.put(pcm)
+            pcm = frames.finish()
+            if pcm:
+                segments.put(pcm)
+            streams.append(bytes(frames.buffer))
+        # Only a complete reply is cached (the sentence streams are bare MP3 frames)
+        if key and all(streams):
+            self.cache.put(key, b"".join(streams))
+
+    def _trim(self, pcm):
+        # Keep segments aligned to whole sample frames
+        frame = getattr(self.decoder, "frame_bytes", 1)
+        return pcm[:len(pcm) - len(pcm) % frame]
@@ -0,0 +1,316 @@
+"""
+Local semantic retrieval over the markdown knowledge base. Sections from
+data/*.md are chunked, embedded on the CPU with a hashed character n-gram
+embedder (no model download, no network) and stored as a float32 matrix in
+Config.CHROMA_PERSIST_DIRECTORY that is memory-mapped on load. Search is a
+batched inner product, through FAISS when it is installed.
+
+Every build writes a new generation of the matrix and its chunk metadata
+(vectors.<n>.npy, chunks.<n>.json) instead of replacing the files a live
+store has mapped or is about to read, which Windows refuses and which would
+pair one build's vectors with another's chunks. The manifest names the
+current generation; older generations are deleted once nothing maps them.
+"""
+import hashlib
+import json
+import os
+import re
+import weakref
+import zlib
+import numpy as np
+from config import Config
+from knowledge import parse_markdown, tokenize
+
+STORE_VERSION = 3
+# Generation n, or the unversioned files of versions 1 and 2 (generation 0)
+VECTORS_FILE = re.compile(r"vectors(?:\.(\d+))?\.npy")
+CHUNKS_FILE = re.compile(r"chunks(?:\.(\d+))?\.json")
+
+VARIANT_PREFIX = 5  # Letters a query term and a chunk word share to count as variants (founder, founders)
+
+_faiss = False  # Not imported yet
+
+
+def load_faiss():
+    """The faiss module, or None without faiss-cpu (imported on first use: it is slow to load)"""
+    global _faiss
+    if _faiss is False:
+        try:
+            import faiss
+            _faiss = faiss
+        except ImportError:
+            _faiss = None
+    return _faiss
+
+
+class HashingEmbedder:
+    """Signed feature hashing of words and character n-grams, L2-normalized"""
+
+    def __init__(self, dim=384, ngram_range=(3, 5), word_weight=2.0):
+        self.dim = dim
+        self.ngram_range = ngram_range
+        self.word_weight = word_weight
+        self._cache = {}
+
+    @property
+    def signature(self):
+        return f"hashing-{self.dim}-{self.ngram_range[0]}-{self.ngram_range[1]}-{self.word_weight}"
+
+    def _word_features(self, word):
+        """(column, signed weight) pairs for one word, memoized"""
+        features = self._cache.get(word)
+        if features is None:
+            low, high = self.ngram_range
+            padded = f"<{word}>"
+            grams = [(word, self.word_weight)] + [(padded[i:i + n], 1.0) for n in range(low, high + 1)
+                                                  for i in range(len(padded) - n + 1)]
+            features = []
+            for gram, weight in grams:
+                h = zlib.crc32(gram.encode("utf-8"))
+                features.append((h % self.dim, weight if h & 0x80000000 else -weight))
+            if len(self._cache) < 100000:
+                self._cache[word] = features
+        return features
+
+    def embed(self, texts):
+        """Embed a batch of texts into an (n, dim) float32 matrix"""
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            cols, weights = [], []
+            for word in tokenize(text):
+                for col, weight in self._word_features(word):
+                    cols.append(col)
+                    weights.append(weight)
+            if cols:
+                vectors[row] = np.bincount(cols, weights=weights, minlength=self.dim)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+
+
+def vector_generations(directory, pattern=VECTORS_FILE):
+    """generation -> file name for the matrices (or, with CHUNKS_FILE, the chunk lists) in directory"""
+    generations = {}
+    try:
+        names = os.listdir(directory)
+    except OSError:
+        return generations
+    for name in names:
+        match = pattern.fullmatch(name)
+        if match:
+            generations[int(match.group(1) or 0)] = name
+    return generations
+
+
+def remove_stale_generations(directory, manifest_name):
+    """Delete the matrices and chunk lists older than the generation the manifest
+    names. A file still mapped (Windows) is kept and retried when the next one
+    is released."""
+    try:
+        with open(os.path.join(directory, manifest_name), "r", encoding="utf-8") as f:
+            current = json.load(f).get("generation")
+    except (OSError, ValueError):
+        return
+    if not isinstance(current, int):
+        return
+    for pattern in (VECTORS_FILE, CHUNKS_FILE):
+        for generation, name in vector_generations(directory, pattern).items():
+            # Newer ones may be a build in progress in another process
+            if generation < current:
+                try:
+                    os.remove(os.path.join(directory, name))
+                except OSError:
+                    pass
+
+
+def is_variant(term, words):
+    """True if words hold term or a word sharing its first VARIANT_PREFIX letters"""
+    if term in words:
+        return True
+    if len(term) < VARIANT_PREFIX:
+        return False
+    stem = term[:VARIANT_PREFIX]
+    return any(word.startswith(stem) for word in words)
+
+
+def chunk_sections(sections, max_words=80, overlap=20):
+    """Split the spoken form of each section into overlapping chunks of max_words"""
+    chunks = []
+    for section in sections:
+        words = section.spoken().split()
+        step = max(1, max_words - overlap)
+        for start in range(0, max(1, len(words) - overlap), step):
+            chunks.append({"path": section.path, "heading": section.heading,
+                           "text": " ".join(words[start:start + max_words])})
+    return chunks
+
+
+class VectorStore:
+    """Memory-mapped embedding matrix plus chunk metadata"""
+
+    VECTORS = "vectors.{}.npy"  # Per generation
+    CHUNKS = "chunks.{}.json"  # Per generation
+    MANIFEST = "manifest.json"  # Names the current generation; written last
+
+    def __init__(self, directory=None, documents=None, embedder=None, use_faiss=None):
+        self.directory = directory or Config.CHROMA_PERSIST_DIRECTORY
+        self.documents = documents or Config.DOCUMENTS_DIRECTORY
+        self.embedder = embedder or HashingEmbedder(dim=Config.VECTOR_DIM)
+        self.use_faiss = Config.VECTOR_USE_FAISS if use_faiss is None else use_faiss
+        # Small stores are searched as fast with one matmul; an explicit use_faiss forces it
+        self.faiss_min_chunks = Config.VECTOR_FAISS_MIN_CHUNKS if use_faiss is None else 0
+        self.vectors = None
+        self.generation = None
+        self.chunks = []
+        self.sources = {}  # path -> sha256 of the documents the store was built from
+        self._faiss_index = None
+
+    def _sources(self):
+        sources = {}
+        for root, _, names in os.walk(self.documents):
+            for name in sorted(names):
+                if name.lower().endswith(".md"):
+                    path = os.path.join(root, name)
+                    with open(path, "rb") as f:
+                        sources[path] = hashlib.sha256(f.read()).hexdigest()
+        return sources
+
+    def _path(self, name):
+        return os.path.join(self.directory, name)
+
+    def load(self, previous=None):
+        """Open the persisted store, rebuilding it if the documents or embedder changed.
+
+        previous is an open store whose chunks and vectors are reused for the
+        documents that did not change (hot reload), so only edited files are
+        re-embedded.
+        """
+        sources = self._sources()
+        manifest = self._manifest()
+        current = (manifest.get("version") == STORE_VERSION
+                   and manifest.get("embedder") == self.embedder.signature
+                   and manifest.get("sources") == sources)
+        generation = manifest.get("generation") if current else self.build(sources, previous)
+        try:
+            self._open(generation)
+        except FileNotFoundError:
+            # Swept by a newer build in another process after the manifest was read (or deleted)
+            self._open(self.build(sources, previous))
+        self.sources = sources
+        remove_stale_generations(self.directory, self.MANIFEST)
+        return self
+
+    def _manifest(self):
+        try:
+            with open(self._path(self.MANIFEST), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except Exception:
+            return {}
+
+    def build(self, sources=None, previous=None):
+        """Chunk and embed every document (or only those changed since previous) and write the store
+        atomically as a new generation; returns the generation"""
+        sources = self._sources() if sources is None else sources
+        reusable = {}  # path -> rows of previous
+        if previous is not None and previous.vectors is not None \
+                and previous.embedder.signature == self.embedder.signature:
+            for row, chunk in enumerate(previous.chunks):
+                if previous.sources.get(chunk["path"]) == sources.get(chunk["path"]):
+                    reusable.setdefault(chunk["path"], []).append(row)
+        chunks, rows = [], []  # rows: row of previous, or -1 to embed
+        for path in sources:
+            if path in reusable:
+                chunks.extend(previous.chunks[row] for row in reusable[path])
+                rows.extend(reusable[path])
+                continue
+            with open(path, "r", encoding="utf-8", errors="replace") as f:
+                fresh = chunk_sections(parse_markdown(path, f.read()))
+            chunks.extend(fresh)
+            rows.extend([-1] * len(fresh))
+
+        rows = np.array(rows, dtype=np.int64)
+        vectors = np.zeros((len(chunks), self.embedder.dim), dtype=np.float32)
+        kept = rows >= 0
+        if kept.any():
+            vectors[kept] = previous.vectors[rows[kept]]
+        pending = np.flatnonzero(~kept)
+        batch = Config.VECTOR_BATCH_SIZE
+        for start in range(0, len(pending), batch):
+            ids = pending[start:start + batch]
+            vectors[ids] = self.embedder.embed([f"{chunks[i]['heading']}. {chunks[i]['text']}" for i in ids])
+
+        os.makedirs(self.directory, exist_ok=True)
+        # Never reuse a file name: a live store may still have the previous one mapped
+        generation = max([self._manifest().get("generation", 0), *vector_generations(self.directory),
+                          *vector_generations(self.directory, CHUNKS_FILE)]) + 1
+        manifest = {"version": STORE_VERSION, "embedder": self.embedder.signature, "generation": generation,
+                    "count": len(chunks), "sources": sources}
+        # The manifest goes last, so a half-written store is rebuilt next time
+        self._write(self.VECTORS.format(generation), lambda f: np.save(f, vectors), binary=True)
+        self._write(self.CHUNKS.format(generation), lambda f: json.dump(chunks, f))
+        self._write(self.MANIFEST, lambda f: json.dump(manifest, f))
+        print(f"[Vectors] Indexed {len(chunks)} chunks from {len(sources)} file(s) ({len(pending)} embedded)")
+        return generation
+
+    def _write(self, name, writer, binary=False):
+        tmp = f"{self._path(name)}.{os.getpid()}.tmp"  # Server workers may write at once
+        with open(tmp, "wb" if binary else "w", encoding=None if binary else "utf-8") as f:
+            writer(f)
+        os.replace(tmp, self._path(name))
+
+    def _open(self, generation):
+        self.vectors = np.load(self._path(self.VECTORS.format(generation)), mmap_mode="r")
+        self.generation = generation
+        mapping = getattr(self.vectors, "_mmap", None)
+        if mapping is not None:
+            # Runs after the map is closed, when the last reader of this generation lets go
+            weakref.finalize(mapping, remove_stale_generations, self.directory, self.MANIFEST)
+        with open(self._path(self.CHUNKS.format(generation)), "r", encoding="utf-8") as f:
+            self.chunks = json.load(f)
+        self._faiss_index = None
+        faiss = load_faiss() if self.use_faiss and len(self.chunks) >= max(1, self.faiss_min_chunks) else None
+        if faiss is not None:
+            self._faiss_index = faiss.IndexFlatIP(self.vectors.shape[1])
+            self._faiss_index.add(np.ascontiguousarray(self.vectors))
+
+    def search_batch(self, queries, k=3):
+        """Top-k (similarity, chunk) lists for each query in one batched pass"""
+        if self.vectors is None or not len(self.chunks):
+            return [[] for _ in queries]
+        q = self.embedder.embed(queries)
+        k = min(k, len(self.chunks))
+        if self._faiss_index is not None:
+            scores, ids = self._faiss_index.search(q, k)
+        else:
+            sims = q @ self.vectors.T
+            ids = np.argpartition(-sims, k - 1, axis=1)[:, :k]
+            scores = np.take_along_axis(sims, ids, axis=1)
+            order = np.argsort(-scores, axis=1)
+            ids = np.take_along_axis(ids, order, axis=1)
+            scores = np.take_along_axis(scores, order, axis=1)
+        return [[(float(s), self.chunks[i]) for s, i in zip(row_scores, row_ids) if i >= 0 and s > 0]
+                for row_scores, row_ids in zip(scores, ids)]
+
+    def search(self, query, k=3):
+        return self.search_batch([query], k)[0]
+
+    def best(self, query, min_similarity=None, k=3):
+        """Best of the top-k chunks above min_similarity that covers the query, or None.
+
+        N-gram similarity alone rewards shared fragments ("noise level" scores
+        0.26 against a feature list with neither word), so the chunk must also
+        contain every query term or a variant sharing its first VARIANT_PREFIX
+        letters. Hinglish words the documents never use fail that check too.
+        """
+        min_similarity = Config.VECTOR_MIN_SIMILARITY if min_similarity is None else min_similarity
+        terms = set(tokenize(query))
+        for similarity, chunk in self.search(query, k=k):
+            if similarity < min_similarity:
+                break
+            words = set(tokenize(f"{chunk['heading']} {chunk['text']}"))
+            if terms and all(is_variant(term, words) for term in terms):
+                return chunk
+        return None
+
+    def __len__(self):
+        return len(self.chunks)
@@ -0,0 +1,110 @@
+"""
+Pre-synthesizes every static reply in the response catalog into the TTS cache,
+so canned answers play without an edge-tts round-trip. Time and weather
+replies are dynamic and are still synthesized on demand.
+
+Build command:
+    python warmup.py [--workers N]
+"""
+import argparse
+import asyncio
+import threading
+import time
+from config import Config
+from responses import iter_static
+from tts_cache import TTSCache
+
+
+def static_texts():
+    """Unique spoken form of every static catalog variant"""
+    return list(dict.fromkeys(TTSCache.normalize(text) for _, _, text in iter_static()))
+
+
+async def _synthesize_all(cache, texts, voice_params, workers, loop=None):
+    voice, rate, volume, pitch = voice_params
+    semaphore = asyncio.Semaphore(workers)
+    summary = {"total": len(texts), "cached": 0, "synthesized": 0, "failed": 0}
+    keys = []
+
+    async def synthesize(text):
+        key = TTSCache.make_key(text, voice, rate, volume, pitch)
+        if cache.contains(key):
+            summary["cached"] += 1
+            keys.append(key)
+            return
+        async with semaphore:
+            temp_file = cache.new_temp_path()
+            try:
+                import edge_tts
+                connector = loop.connector() if loop is not None and Config.TTS_SHARED_CONNECTOR else None
+                communicate = edge_tts.Communicate(text, voice, rate=rate, volume=volume, pitch=pitch,
+                                                   connector=connector)
+                await communicate.save(temp_file)
+            except Exception as e:
+                cache.discard(temp_file)
+                summary["failed"] += 1
+                print(f"[Warmup] TTS Error for {text[:40]!r}: {e}")
+                return
+        if cache.commit(key, temp_file):
+            summary["synthesized"] += 1
+            keys.append(key)
+        else:
+            summary["failed"] += 1
+
+    await asyncio.gather(*(synthesize(text) for text in texts))
+    return summary, keys
+
+
+def warm_up(cache, voice_params, workers=4, loop=None):
+    """Synthesize the whole static catalog for voice_params into cache.
+
+    With an AudioLoop the jobs run on the audio subsystem's event loop;
+    otherwise (the build command) a private loop is used.
+    """
+    start = time.perf_counter()
+    job = _synthesize_all(cache, static_texts(), voice_params, workers, loop)
+    summary, keys = loop.run(job) if loop is not None else asyncio.run(job)
+    # The catalog is the bundle the audio layer relies on; keep it resident
+    cache.pin(keys)
+    summary["seconds"] = time.perf_counter() - start
+    print(f"[Warmup] {summary['total']} responses: {summary['cached']} cached, "
+          f"{summary['synthesized']} synthesized, {summary['failed']} failed "
+          f"in {summary['seconds']:.1f}s")
+    return summary
+
+
+def start_background_warmup(cache, voice_params, workers=4, loop=None, on_done=None):
+    """Run warm_up on a daemon thread so startup is not blocked.
+
+    on_done(summary) is called on that thread once the catalog is cached.
+    """
+    def run():
+        try:
+            summary = warm_up(cache, voice_params, workers=workers, loop=loop)
+            if on_done is not None:
+                on_done(summary)
+        except Exception as e:
+            print(f"[Warmup] Error: {e}")
+
+    thread = threading.Thread(target=run, name="tts-warmup", daemon=True)
+    thread.start()
+    return thread
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-synthesize Shipra's static responses")
+    parser.add_argument("--workers", type=int, default=Config.TTS_WARMUP_WORKERS)
+    args = parser.parse_args()
+
+    Config.ensure_directories()
+    cache = TTSCache(Config.TTS_CACHE_DIRECTORY,
+                     max_bytes=Config.TTS_CACHE_MAX_BYTES,
+                     max_age=Config.TTS_CACHE_MAX_AGE)
+    voice_params = (Config.TTS_VOICE, Config.TTS_RATE, Config.TTS_VOLUME, Config.TTS_PITCH)
+    summary = warm_up(cache, voice_params, workers=args.workers)
+    print(f"[Warmup] Cache: {cache.stats()}")
+    return 1 if summary["failed"] else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,206 @@
+"""
+Change notifications for the markdown files under Config.DOCUMENTS_DIRECTORY
+and for the response catalog (data/catalog.json). On Linux the watcher
+blocks on inotify (through libc with ctypes, no extra package) for
+close-after-write, rename, create and delete events in the directory tree;
+elsewhere, or when inotify is unavailable, it polls the files' (mtime,
+size) every KNOWLEDGE_POLL_INTERVAL seconds. Either way, events are
+debounced for KNOWLEDGE_WATCH_DEBOUNCE_MS (editors write a file in several
+steps) and on_change(paths) runs on the watcher thread with the set of
+changed paths, or None when the changes are unknown (inotify queue
+overflow) and everything must be rechecked.
+"""
+import ctypes
+import os
+import select
+import struct
+import sys
+import threading
+from config import Config
+from knowledge import fingerprint
+
+# inotify(7) event bits
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = getattr(os, "O_CLOEXEC", 0o2000000)
+WATCH_MASK = (IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+              | IN_DELETE_SELF | IN_MOVE_SELF)
+
+_EVENT = struct.Struct("iIII")  # wd, mask, cookie, len (then len bytes of name)
+
+
+def _load_inotify():
+    """libc with its inotify functions, or None"""
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        # ctypes.util.find_library would import subprocess (~5 ms of startup)
+        libc = ctypes.CDLL("libc.so.6", use_errno=True)
+        libc.inotify_init1.argtypes = [ctypes.c_int]
+        libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        return libc
+    except (OSError, AttributeError):
+        return None
+
+
+class DocumentWatcher:
+    """Background thread reporting changed knowledge and catalog files (inotify, else polling)"""
+
+    def __init__(self, on_change, directory=None, files=None, debounce_ms=None, poll_interval=None, use_inotify=True):
+        self.on_change = on_change
+        self.directory = os.path.abspath(directory or Config.DOCUMENTS_DIRECTORY)
+        # Other files reported besides *.md (only those inside directory are seen by inotify)
+        self.files = {os.path.abspath(path) for path in (files if files is not None else [Config.CATALOG_FILE])}
+        self.debounce = (Config.KNOWLEDGE_WATCH_DEBOUNCE_MS if debounce_ms is None else debounce_ms) / 1000
+        self.poll_interval = poll_interval or Config.KNOWLEDGE_POLL_INTERVAL
+        self.backend = None  # 'inotify' or 'poll' once started
+        self.notifications = 0
+        self._fd = None
+        self._watches = {}  # watch descriptor -> directory
+        self._libc = _load_inotify() if use_inotify else None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._libc is not None:
+            try:
+                self._open_inotify()
+                self.backend = "inotify"
+            except OSError as e:
+                print(f"[Watcher] inotify unavailable ({e}), polling every {self.poll_interval}s")
+                self._close_inotify()
+        if self.backend is None:
+            self.backend = "poll"
+        target = self._run_inotify if self.backend == "inotify" else self._run_poll
+        self._thread = threading.Thread(target=target, name="document-watcher", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+        self._close_inotify()
+
+    def wanted(self, path):
+        return path.lower().endswith(".md") or path in self.files
+
+    def _snapshot(self):
+        """path -> (mtime, size) of the watched files"""
+        found = {path: (mtime, size) for path, mtime, size in fingerprint(self.directory)}
+        for path in self.files:
+            try:
+                st = os.stat(path)
+                found[path] = (st.st_mtime_ns, st.st_size)
+            except OSError:
+                pass
+        return found
+
+    def _notify(self, paths):
+        self.notifications += 1
+        try:
+            self.on_change(paths)
+        except Exception as e:
+            print(f"[Watcher] Reload Error: {e}")
+
+    # --- inotify ---------------------------------------------------------
+
+    def _open_inotify(self):
+        fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if fd < 0:
+            raise OSError(ctypes.get_errno(), os.strerror(ctypes.get_errno()))
+        self._fd = fd
+        for root, _, _ in os.walk(self.directory):
+            self._add_watch(root)
+        if not self._watches:
+            raise OSError(f"cannot watch {self.directory}")
+
+    def _add_watch(self, directory):
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(directory), WATCH_MASK)
+        if wd < 0:
+            print(f"[Watcher] Cannot watch {directory}: {os.strerror(ctypes.get_errno())}")
+            return
+        self._watches[wd] = directory
+
+    def _close_inotify(self):
+        if self._fd is not None:
+            try:
+                os.close(self._fd)
+            except OSError:
+                pass
+            self._fd = None
+            self._watches = {}
+
+    def _read_events(self, paths):
+        """Drain pending events into paths; False on overflow (paths unknown)"""
+        complete = True
+        while True:
+            try:
+                data = os.read(self._fd, 65536)
+            except BlockingIOError:
+                return complete
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, length = _EVENT.unpack_from(data, offset)
+                name = data[offset + _EVENT.size:offset + _EVENT.size + length].rstrip(b"\0")
+                offset += _EVENT.size + length
+                if mask & IN_Q_OVERFLOW:
+                    complete = False
+                    continue
+                directory = self._watches.get(wd)
+                if directory is None:
+                    continue
+                if mask & IN_IGNORED:
+                    del self._watches[wd]
+                    continue
+                path = os.path.join(directory, os.fsdecode(name)) if name else directory
+                if mask & IN_ISDIR:
+                    if mask & (IN_CREATE | IN_MOVED_TO):
+                        # A new subdirectory: watch it and report the files it came with
+                        for root, _, names in os.walk(path):
+                            self._add_watch(root)
+                            paths.update(p for p in (os.path.join(root, n) for n in names) if self.wanted(p))
+                    elif mask & (IN_DELETE | IN_MOVED_FROM):
+                        complete = False  # Its files are gone; rescan
+                elif self.wanted(path):
+                    paths.add(path)
+
+    def _run_inotify(self):
+        while not self._stop.is_set():
+            ready, _, _ = select.select([self._fd], [], [], 0.5)
+            if not ready:
+                continue
+            paths = set()
+            complete = self._read_events(paths)
+            # Debounce: keep collecting until the directory has been quiet for a while
+            while select.select([self._fd], [], [], self.debounce)[0]:
+                complete = self._read_events(paths) and complete
+            if not complete:
+                self._notify(None)
+            elif paths:
+                self._notify(paths)
+
+    # --- Polling fallback ------------------------------------------------
+
+    def _run_poll(self):
+        known = self._snapshot()
+        while not self._stop.wait(self.poll_interval):
+            current = self._snapshot()
+            if current == known:
+                continue
+            # Wait for the writer to finish before reporting
+            self._stop.wait(self.debounce)
+            current = self._snapshot()
+            paths = {path for path in set(known) | set(current) if known.get(path) != current.get(path)}
+            known = current
+            if paths:
+                self._notify(paths)
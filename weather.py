@@ -1,33 +1,166 @@
-import requests
-import geocoder
+import json
+import os
+import threading
+import time
+from concurrent.futures import Future
+from config import Config
 
 class WeatherService:
-    def __init__(self):
-        self.base_url = "https://wttr.in"
-    
+    def __init__(self, base_url=None, ttl=None, stale_ttl=None, location_file=None):
+        self.base_url = base_url or Config.WEATHER_BASE_URL
+        self.ttl = Config.WEATHER_CACHE_TTL if ttl is None else ttl
+        self.stale_ttl = Config.WEATHER_STALE_TTL if stale_ttl is None else stale_ttl
+        self.location_file = location_file or Config.WEATHER_LOCATION_FILE
+
+        self._session = None  # Created on the first request (importing requests is slow)
+        self._lock = threading.Lock()
+        self._location = None  # (city, country, resolved_at)
+        self._payloads = {}  # query -> (fetched_at, j1 payload)
+        self._inflight = {}  # query -> Future shared by coalesced callers
+
+        # Counters
+        self.network_calls = 0
+        self.geolocation_calls = 0
+        self.cache_hits = 0
+        self.stale_hits = 0
+        self.cache_misses = 0
+
+    @property
+    def session(self):
+        """One pooled session for every wttr.in request (keep-alive, one TLS handshake)"""
+        if self._session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+            with self._lock:
+                if self._session is None:
+                    session = requests.Session()
+                    adapter = HTTPAdapter(pool_connections=2, pool_maxsize=4)
+                    session.mount("http://", adapter)
+                    session.mount("https://", adapter)
+                    self._session = session
+        return self._session
+
     def get_location(self):
-        """Get user's location based on IP"""
+        """Get user's location based on IP (cached in memory and on disk)"""
+        if self._location is not None:
+            return self._location[0], self._location[1]
+
+        location = self._load_location()
+        if location is None:
+            try:
+                self.geolocation_calls += 1
+                import geocoder
+                g = geocoder.ip('me')
+                if not g.ok:
+                    return None, None
+                location = (g.city, g.country, time.time())
+                self._save_location(location)
+            except:
+                return None, None
+        self._location = location
+        return location[0], location[1]
+
+    def _load_location(self):
         try:
-            g = geocoder.ip('me')
-            if g.ok:
-                return g.city, g.country
-            return None, None
+            with open(self.location_file, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if time.time() - data["resolved_at"] > Config.WEATHER_LOCATION_TTL:
+                return None
+            return data["city"], data["country"], data["resolved_at"]
         except:
-            return None, None
-    
-    def get_weather(self, lang='english'):
-        """Get current weather for user's location"""
+            return None
+
+    def _save_location(self, location):
+        try:
+            os.makedirs(os.path.dirname(self.location_file), exist_ok=True)
+            tmp = f"{self.location_file}.{os.getpid()}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"city": location[0], "country": location[1], "resolved_at": location[2]}, f)
+            os.replace(tmp, self.location_file)
+        except Exception as e:
+            print(f"[Weather] Could not persist location: {e}")
+
+    def get_weather_data(self, city):
+        """wttr.in j1 payload for city: fresh from cache, stale while revalidating, or fetched"""
+        now = time.time()
+        entry = self._payloads.get(city)
+        if entry is not None:
+            age = now - entry[0]
+            if age < self.ttl:
+                self.cache_hits += 1
+                return entry[1]
+            if age < self.ttl + self.stale_ttl:
+                # Answer from the stale copy now and refresh in the background
+                self.stale_hits += 1
+                self._fetch_coalesced(city, background=True)
+                return entry[1]
+        self.cache_misses += 1
+        data = self._fetch_coalesced(city).result()
+        if data is None and entry is not None:
+            # wttr.in is down: an expired answer beats none
+            self.stale_hits += 1
+            return entry[1]
+        return data
+
+    def _fetch_coalesced(self, city, background=False):
+        """Join the in-flight fetch for city, or start one"""
+        with self._lock:
+            future = self._inflight.get(city)
+            if future is not None:
+                return future
+            future = Future()
+            self._inflight[city] = future
+
+        if background:
+            threading.Thread(target=self._fetch, args=(city, future), name="weather-refresh", daemon=True).start()
+        else:
+            self._fetch(city, future)
+        return future
+
+    def _fetch(self, city, future):
+        data = None
+        try:
+            with self._lock:
+                self.network_calls += 1
+            response = self.session.get(f"{self.base_url}/{city}?format=j1", timeout=5)
+            if response.status_code == 200:
+                data = response.json()
+                self._payloads[city] = (time.time(), data)
+        except Exception as e:
+            print(f"[Weather] Fetch Error: {e}")
+        finally:
+            with self._lock:
+                self._inflight.pop(city, None)
+            future.set_result(data)
+
+    def stats(self):
+        return {
+            "network_calls": self.network_calls,
+            "geolocation_calls": self.geolocation_calls,
+            "cache_hits": self.cache_hits,
+            "stale_hits": self.stale_hits,
+            "cache_misses": self.cache_misses,
+        }
+
+    def resolve_place(self, place=None):
+        """(display name, wttr.in query) for a gazetteer Place, else the IP location"""
+        if place is not None:
+            return place.name, place.query
+        city, _ = self.get_location()
+        if not city:
+            city = "Bhopal"  # Default to Pushpak O2 location
+        return city, city
+
+    def get_weather(self, lang='english', place=None):
+        """Get current weather for the named place or the user's location"""
         try:
-            city, country = self.get_location()
-            if not city:
-                city = "Bhopal"  # Default to Pushpak O2 location
+            city, query = self.resolve_place(place)
             
-            # Get weather data in JSON format
-            response = requests.get(f"{self.base_url}/{city}?format=j1", timeout=5)
-            if response.status_code != 200:
+            # Get weather data in JSON format (shared with get_forecast)
+            data = self.get_weather_data(query)
+            if not data:
                 return None
             
-            data = response.json()
             current = data['current_condition'][0]
             
             temp_c = current['temp_C']
@@ -47,18 +180,15 @@ class WeatherService:
         except:
             return None
     
-    def get_forecast(self, lang='english'):
+    def get_forecast(self, lang='english', place=None):
         """Get weather forecast"""
         try:
-            city, _ = self.get_location()
-            if not city:
-                city = "Bhopal"
+            city, query = self.resolve_place(place)
             
-            response = requests.get(f"{self.base_url}/{city}?format=j1", timeout=5)
-            if response.status_code != 200:
+            data = self.get_weather_data(query)
+            if not data:
                 return None
             
-            data = response.json()
             tomorrow = data['weather'][1] if len(data['weather']) > 1 else data['weather'][0]
             
             max_temp = tomorrow['maxtempC']